@@ -13,6 +13,8 @@ try { print(1); } catch (e) { print(e); }`;
 
 export default function IDE() {
   const [code, setCode] = useState(SAMPLE);
+  // El backend guarda el documento y re-parsea solo las sentencias editadas
+  const [docId] = useState(() => Math.random().toString(36).slice(2));
   const [errors, setErrors] = useState<AnalyzeError[]>([]);
   const [globals, setGlobals] = useState<string[]>([]);
   const [loading, setLoading] = useState(false);
@@ -22,7 +24,7 @@ export default function IDE() {
   async function onAnalyze() {
     setLoading(true);
     try {
-      const res = await analyze(code);
+      const res = await analyze(code, docId);
       setErrors(res.errors || []);
       setGlobals(res.globals || []);
       setTac(res.tac || []);
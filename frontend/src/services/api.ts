@@ -1,15 +1,25 @@
-import type { AnalyzeResp } from "../types/analysis";
+import type { AnalyzeResp, RunResp } from "../types/analysis";
 
 const API =
   (import.meta as any).env?.VITE_API_URL ||
   (import.meta as any).env?.VITE_API ||
   "http://localhost:8000";
 
-export async function analyze(code: string): Promise<AnalyzeResp> {
+export async function analyze(code: string, docId?: string): Promise<AnalyzeResp> {
   const r = await fetch(`${API}/analyze`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ code }),
+    body: JSON.stringify(docId ? { code, docId } : { code }),
+  });
+  if (!r.ok) throw new Error(`HTTP ${r.status}`);
+  return r.json();
+}
+
+export async function run(code: string, optLevel = 0): Promise<RunResp> {
+  const r = await fetch(`${API}/run`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ code, optLevel }),
   });
   if (!r.ok) throw new Error(`HTTP ${r.status}`);
   return r.json();
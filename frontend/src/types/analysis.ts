@@ -15,11 +15,101 @@ export interface Quad {
   result: string | number | boolean | null;
 }
 
+export interface ParseInfo {
+  mode: "SLL" | "LL" | "INCR";
+  ms: number;
+  sllMs: number;
+  llMs: number;
+}
+
+export interface EditInfo {
+  mode: "incremental" | "full";
+  ms: number;
+  reparsed: number;
+  relexed: number;
+  reason: string | null;
+}
+
+export interface CfgBlock {
+  id: number;
+  first: number | null; // id del primer cuádruplo
+  last: number | null;
+  labels: string[];
+  succs: number[];
+  preds: number[];
+  idom: number | null;
+  loopDepth: number;
+}
+
+export interface ProcedureCfg {
+  name: string; // "<main>" o la etiqueta func_*
+  blocks: CfgBlock[];
+  loops: { header: number; blocks: number[]; latches: number[] }[];
+}
+
+export interface LayoutSlot {
+  name: string;
+  offset: number;
+  size: number;
+  type: string;
+}
+
+/** Registro de activación de un procedimiento (en "<main>", el área de globales) */
+export interface FrameLayout {
+  name: string;
+  size: number;
+  params: LayoutSlot[]; // desde $fp
+  locals: LayoutSlot[]; // desde la base del marco
+  temps: number;
+  tempBase: number;
+}
+
+export interface ObjectLayout {
+  name: string;
+  base: string | null;
+  size: number;
+  fields: LayoutSlot[]; // la palabra 0 es la cabecera
+}
+
+export interface PhaseTiming {
+  phase: "parse" | "symbols" | "types" | "codegen" | "optimize" | "cfg" | "run";
+  ms: number;
+  peakKb: number | null;
+  [counter: string]: string | number | null;
+}
+
+export interface Timings {
+  totalMs: number;
+  tokens: number;
+  nodes: number;
+  quads: number;
+  phases: PhaseTiming[];
+}
+
 export interface AnalyzeResp {
   errors: AnalyzeError[];
   globals: string[];
   symtab?: ScopeNode;
   tac?: Quad[];
+  cfg?: ProcedureCfg[];
+  /** temporales que usa cada procedimiento ("<main>", "func_f", ...) */
+  temps?: Record<string, number>;
+  layout?: { frames: FrameLayout[]; objects: ObjectLayout[] };
+  parse?: ParseInfo;
+  timings?: Timings;
+  edit?: EditInfo;
+}
+
+/** /run: el programa compilado y ejecutado en la VM del TAC */
+export interface RunResp {
+  errors: AnalyzeError[];
+  /** líneas impresas, también las de antes de un error */
+  output: string[];
+  /** error de ejecución que nadie atrapó (o el límite de pasos) */
+  error: string | null;
+  /** cuádruplos ejecutados */
+  steps: number;
+  timings: Timings;
 }
 
 export type SymEntry =
@@ -1,51 +1,137 @@
+import argparse
+import os
 import sys
-from antlr4 import * # type: ignore
-from CompiscriptLexer import CompiscriptLexer
-from CompiscriptParser import CompiscriptParser
 
-from CompiscriptListener import CompiscriptListener
-
-from src.utils.Errors import Error
-from src.utils.Temp import TempManager
-from src.symbolTable.SymbolTableBuilder import SymbolTableBuilder
-from src.typeChecker.TypeChecker import TypeChecker
-from src.codeGenerator.CodeGenerator import CodeGenerator
+from src.utils.Startup import ensure_bytecode_cache
+
+# Antes de importar ANTLR y el parser generado: asegura un cache de bytecode escribible
+ensure_bytecode_cache(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_arg_parser():
+    ap = argparse.ArgumentParser(prog="Driver.py", description="Compilador de Compiscript")
+    ap.add_argument("files", nargs="+", metavar="file",
+                    help="archivo .cps a compilar (con --batch: archivos y/o directorios)")
+    ap.add_argument("--stats", action="store_true",
+                    help="muestra tiempo, memoria pico y contadores de cada fase")
+    ap.add_argument("-O", dest="opt_level", type=int, default=0, choices=(0, 1, 2, 3), metavar="N",
+                    help="nivel de optimización del TAC (0 = ninguna, 1 = constantes y código muerto, 2 = además CSE y copias, 3 = además ciclos)")
+    ap.add_argument("--run", action="store_true",
+                    help="si compila sin errores, ejecuta el TAC en la máquina virtual en vez de listarlo")
+    ap.add_argument("--max-steps", type=int, metavar="N",
+                    help="con --run: corta la ejecución después de N pasos (cuádruplos, instrucciones de bytecode o MIPS o, con python, vueltas de ciclo y llamadas)")
+    ap.add_argument("--engine", default="tac", choices=("tac", "bytecode", "python", "mips"),
+                    help="con --run: interpretar el TAC (tac), bajarlo antes a bytecode (bytecode), traducirlo a funciones de Python (python) o a MIPS y simularlo (mips)")
+    ap.add_argument("--layout", action="store_true",
+                    help="muestra el registro de activación de cada procedimiento y la disposición de cada clase")
+    ap.add_argument("--mips", action="store_true",
+                    help="si compila sin errores, lista el ensamblador MIPS en vez del TAC")
+    ap.add_argument("--batch", action="store_true",
+                    help="compila muchos archivos en paralelo y escribe <archivo>.tac/.diag")
+    ap.add_argument("-o", "--out", metavar="DIR",
+                    help="con --batch: directorio de salida (por defecto, junto a cada fuente)")
+    ap.add_argument("-j", "--jobs", type=int, metavar="N",
+                    help="con --batch: procesos en paralelo (por defecto, uno por CPU)")
+    return ap
+
+
+def main_batch(args):
+    from src.batch.BatchCompiler import compile_batch
+
+    summary = compile_batch(args.files, out_dir=args.out, jobs=args.jobs, opt_level=args.opt_level)
+    print(summary.format())
+    return 1 if summary.failed else 0
 
 
 def main(argv):
-    input_stream = FileStream(argv[1], encoding="utf-8")
-    lexer = CompiscriptLexer(input_stream)
-    stream = CommonTokenStream(lexer)
-    parser = CompiscriptParser(stream)
-    tree = parser.program()  # We are using 'prog' since this is the starting rule based on our Compiscript grammar, yay!
-
-    errors = Error()
-
-    walker = ParseTreeWalker()
-    listener = SymbolTableBuilder(errors)
-    walker.walk(listener, tree)
-
-    checker = TypeChecker(listener.scopes, listener.globalScope, errors, parser)
-    checker.visit(tree)
-
-    temp_manager = TempManager()
-    generator = CodeGenerator(temp_manager)
-    generator.visit(tree)
-
+    ap = build_arg_parser()
+    args = ap.parse_args(argv[1:])
+    if args.batch:
+        return main_batch(args)
+    if len(args.files) != 1:
+        ap.error("sin --batch se compila un solo archivo")
+
+    # Import diferido: CompiscriptParser deserializa su ATN al importarse
+    from src.pipeline.CompilerSession import CompilerSession
+
+    session = CompilerSession.from_file(args.files[0], track_memory=args.stats, opt_level=args.opt_level).run()
+    if args.run:
+        return main_run(args, session)
+    if args.mips:
+        return main_mips(args, session)
+    parsed = session.parsed
+
+    print(f"Parse: {parsed.mode} ({parsed.elapsed * 1000:.2f} ms)")
     print("TAC generado:")
-    for quad in generator.quadruples:
+    for quad in session.quadruples:
         print(quad)
-
-    # print("GLOBAL:", list(listener.globalScope.symbols.keys()))
-    # for ctx, sc in listener.scopes.items():
+    temps = ", ".join(f"{name}: {n}" for name, n in session.frame_temps.items())
+    print(f"Temporales por procedimiento: {temps}")
+    if args.layout:
+        print("Memoria:")
+        for line in session.memory_layout().describe():
+            print(line)
+
+    if session.optimizer is not None:
+        passes = ", ".join(f"{r.name}: {r.removed}" for r in session.optimizer.reports)
+        print(f"Optimización -O{args.opt_level}: {session.optimizer.removed} cuádruplos eliminados ({passes})")
+
+    # print("GLOBAL:", list(session.symbols.globalScope.symbols.keys()))
+    # for ctx, sc in session.symbols.scopes.items():
     #     print(type(ctx).__name__, sc.name, list(sc.symbols.keys()))
 
-    for error in errors.errors:
+    for error in session.errors.errors:
         print(error)
 
+    if args.stats:
+        print()
+        print(session.format_stats())
+
+    return 0
 
 
+def main_run(args, session):
+    for error in session.errors.errors:
+        print(error)
+    if session.errors.errors:
+        return 1
+
+    from src.mips.MipsGenerator import MipsError
+
+    try:
+        vm = session.execute(max_steps=args.max_steps, stdout=print, engine=args.engine)
+    except MipsError as e:
+        print(f"Error MIPS: {e}")
+        return 1
+    status = 0
+    if vm.error is not None:
+        print(f"Error en ejecución: {vm.error}")
+        status = 1
+    if args.stats:
+        print()
+        print(session.format_stats())
+    return status
+
+
+def main_mips(args, session):
+    from src.mips.MipsGenerator import MipsError
+
+    for error in session.errors.errors:
+        print(error)
+    if session.errors.errors:
+        return 1
+    try:
+        program = session.mips()
+    except MipsError as e:
+        print(f"Error MIPS: {e}")
+        return 1
+    print(program.source, end="")
+    if args.stats:
+        print()
+        for label, a in program.allocations.items():
+            print(f"{label}: {len(a.registers)} en registros, {len(a.spilled)} en memoria, marco de {a.frame} bytes")
+    return 0
 
 
 if __name__ == '__main__':
-    main(sys.argv)
\ No newline at end of file
+    sys.exit(main(sys.argv))
@@ -0,0 +1,58 @@
+"""
+Benchmark de construcción del CFG (src/optimizer/ControlFlowGraph.py).
+
+    python bench/cfg.py [--sizes 250000,500000,1000000] [--file program.cps]
+
+Compila el archivo una vez y replica su TAC (renombrando etiquetas en cada copia)
+hasta llegar a cada tamaño; reporta el tiempo de build_cfgs (mejor de 3), bloques,
+ciclos y µs por cada 1000 cuádruplos. Si la construcción es lineal esa última
+columna se mantiene estable entre tamaños.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+LABEL_OPS = ("label", "goto", "ifFalse", "ifTrue", "trybegin")
+
+
+def replicate(unit, size):
+    from src.codeGenerator.QuadStore import QuadStore
+    out = QuadStore()
+    copy = 0
+    while len(out) < size:
+        out.extend(unit.shifted(len(out), lambda label: f"{label}_{copy}", LABEL_OPS))
+        copy += 1
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="250000,500000,1000000")
+    ap.add_argument("--file", default=os.path.join(ROOT, "program.cps"))
+    args = ap.parse_args()
+
+    from src.pipeline.CompilerSession import CompilerSession
+    from src.optimizer.ControlFlowGraph import build_cfgs
+
+    unit = CompilerSession.from_file(args.file, error_listeners=[]).run().quadruples
+    print(f"unidad: {len(unit)} quads ({os.path.basename(args.file)})")
+    print(f"{'quads':>10}{'procs':>8}{'blocks':>10}{'loops':>8}{'ms':>10}{'µs/1k':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        quads = replicate(unit, size)
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            cfgs = build_cfgs(quads)
+            times.append(time.perf_counter() - start)
+        t = min(times)
+        blocks = sum(len(c.blocks) for c in cfgs)
+        loops = sum(len(c.loops) for c in cfgs)
+        print(f"{len(quads):>10}{len(cfgs):>8}{blocks:>10}{loops:>8}{t * 1000:>10.1f}{t * 1e6 / (len(quads) / 1000):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
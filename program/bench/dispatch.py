@@ -0,0 +1,92 @@
+"""
+Llamadas a métodos por nombre (getprop + call) contra por vtable (callvirt).
+
+    python bench/dispatch.py [--depths 1,10,50] [--calls N] [--repeat R]
+
+Para cada profundidad D arma una cadena de D clases (cada una agrega un método
+y la última sobreescribe uno de la base) y llama N veces, sobre un objeto de la
+última, un método que solo declara la primera y el que se sobreescribe. El
+mismo programa se genera dos veces: sin los tipos del TypeChecker (getprop busca
+el método subiendo por la cadena de clases) y con ellos (callvirt indexa la
+vtable del receptor). Muestra el mejor tiempo de R corridas en la VM, el
+bytecode y el TAC traducido a Python, y cuántas veces más rápido es callvirt;
+verifica que las dos versiones impriman lo mismo.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+def source(depth, calls):
+    classes = ["class C0 { let v: integer = 1; function base(k: integer): integer { return this.v + k; }"
+               " function over(): integer { return 0; } }"]
+    for i in range(1, depth):
+        body = f"function m{i}(): integer {{ return {i}; }}"
+        if i == depth - 1:
+            body += " function over(): integer { return 2; }"
+        classes.append(f"class C{i} : C{i - 1} {{ {body} }}")
+    leaf = f"C{depth - 1}"
+    return "\n".join(classes) + f"""
+    let o: {leaf} = new {leaf}();
+    let acc: integer = 0;
+    for (let i: integer = 0; i < {calls}; i = i + 1) {{ acc = acc + o.base(i % 3); acc = acc - o.over(); }}
+    print(acc);
+    """
+
+
+def best(run, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        machine = run()
+        times.append(time.perf_counter() - start)
+    return min(times), machine
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--depths", default="1,10,50")
+    ap.add_argument("--calls", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    from src.pipeline.CompilerSession import CompilerSession
+    from src.codeGenerator.CodeGenerator import CodeGenerator
+    from src.utils.Temp import TempManager
+    from src.vm.Layout import local_names, local_types
+    from src.vm.VirtualMachine import VirtualMachine
+    from src.vm.Bytecode import lower
+    from src.vm.BytecodeMachine import BytecodeMachine
+    from src.vm.PythonBackend import compile_python
+    from src.vm.PythonMachine import PythonMachine
+
+    engines = {
+        "vm": lambda quads, names, types: (lambda: VirtualMachine(quads, names).run()),
+        "bc": lambda quads, names, types: (lambda p=lower(quads, names): BytecodeMachine(p).run()),
+        "py": lambda quads, names, types: (lambda p=compile_python(quads, names, types): PythonMachine(p).run()),
+    }
+    print(f"{'depth':>6}" + "".join(f"{e + ' name ms':>14}{e + ' vt ms':>12}{'x':>6}" for e in engines))
+    for depth in (int(d) for d in args.depths.split(",")):
+        session = CompilerSession(source(depth, args.calls), error_listeners=[]).run()
+        if session.errors.errors:
+            sys.exit("\n".join(session.errors.errors))
+        by_name = CodeGenerator(TempManager())
+        by_name.visit(session.tree)
+        names, types = local_names(session.symbols), local_types(session.symbols)
+        row = f"{depth:>6}"
+        for engine, make in engines.items():
+            name_time, a = best(make(by_name.quadruples, names, types), args.repeat)
+            vt_time, b = best(make(session.quadruples, names, types), args.repeat)
+            if (a.output, a.error) != (b.output, b.error):
+                sys.exit(f"{engine}, profundidad {depth}: por nombre y por vtable no coinciden "
+                         f"({a.output} {a.error} / {b.output} {b.error})")
+            row += f"{name_time * 1000:>14.1f}{vt_time * 1000:>12.1f}{name_time / vt_time:>5.1f}x"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
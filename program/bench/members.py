@@ -0,0 +1,90 @@
+"""
+Búsqueda de miembros de clase: subir por la cadena de superclases (como antes)
+contra la tabla aplanada de cada ClassSymbol.
+
+    python bench/members.py [--depths 10,50,200] [--lookups N] [--repeat R]
+
+Para cada profundidad D arma una cadena de D clases (cada una con un campo y un
+método propios), la compila y busca N veces, desde la última clase, miembros de
+toda la cadena: uno de la raíz, uno del medio, uno propio y uno que no existe.
+Compara el recorrido de antes (Scope.resolve en cada nivel, que también sube por
+los scopes que rodean a la clase) con resolve_member, verifica que encuentren
+lo mismo y muestra el mejor tiempo de R corridas. También muestra cuánto tardan
+la tabla de símbolos y el type check del programa (ya parseado), que hace una
+búsqueda por cada acceso a un miembro.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+def source(depth):
+    classes = ["class C0 { let f0: integer = 0; function m0(): integer { return this.f0; } }"]
+    for i in range(1, depth):
+        classes.append(f"class C{i} : C{i - 1} {{ let f{i}: integer = {i}; "
+                       f"function m{i}(): integer {{ return this.f{i} + this.f0 + this.m{i - 1}(); }} }}")
+    leaf = f"C{depth - 1}"
+    uses = " ".join(f"acc = acc + o.f{i} + o.m{i}();" for i in range(depth))
+    return "\n".join(classes) + f"""
+    let o: {leaf} = new {leaf}();
+    let acc: integer = 0;
+    {uses}
+    print(acc);
+    """
+
+
+def walk_member(cls, name):
+    """Lo que hacían resolve_member y TypeChecker._class_member."""
+    c = cls
+    while c:
+        sc = getattr(c, "scope", None)
+        if sc:
+            s = sc.resolve(name)
+            if s:
+                return s
+        c = getattr(c, "superclass", None)
+    return None
+
+
+def best(run, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--depths", default="10,50,200")
+    ap.add_argument("--lookups", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    from src.pipeline.CompilerSession import CompilerSession
+
+    print(f"{'depth':>6}{'walk ms':>10}{'table ms':>10}{'x':>7}{'check ms':>10}")
+    for depth in (int(d) for d in args.depths.split(",")):
+        src = source(depth)
+        session = CompilerSession(src, error_listeners=[]).run()
+        if session.errors.errors:
+            sys.exit("\n".join(session.errors.errors))
+        leaf = session.symbols.globalScope.symbols[f"C{depth - 1}"]
+        names = ["f0", f"m{depth // 2}", f"f{depth - 1}", "missing"] * (args.lookups // 4)
+        for name in set(names):
+            if walk_member(leaf, name) is not leaf.resolve_member(name):
+                sys.exit(f"profundidad {depth}: '{name}' no se resuelve igual")
+
+        walk = best(lambda: [walk_member(leaf, n) for n in names], args.repeat)
+        table = best(lambda: [leaf.resolve_member(n) for n in names], args.repeat)
+        check = best(lambda: (session.build_symbols(), session.type_check()), args.repeat)
+        print(f"{depth:>6}{walk * 1000:>10.1f}{table * 1000:>10.1f}{walk / table:>6.1f}x{check * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
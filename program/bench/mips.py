@@ -0,0 +1,116 @@
+"""
+Código MIPS que genera MipsGenerator, medido en el MipsSimulator.
+
+    python bench/mips.py [-O N] [--scale K]
+
+Para cada programa de la suite (fib recursivo, ciclos anidados, suma de un
+arreglo, strings y una función con más variables vivas que registros) muestra
+los cuádruplos que ejecuta la VM, las instrucciones MIPS ejecutadas y cuántas
+por cuádruplo, las lecturas y escrituras a memoria, cuántas variables quedaron
+en registros y cuántas en memoria, y las lecturas y escrituras que haría el
+mismo código sin asignación de registros (todo en memoria, "sin regs").
+Verifica que la salida coincida con la de la VM. --scale multiplica el tamaño
+de los ciclos.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+SUITE = {
+    "fib": """
+        function fib(n: integer): integer {
+            if (n < 2) { return n; }
+            return fib(n - 1) + fib(n - 2);
+        }
+        print(fib({fib}));
+    """,
+    "nested loops": """
+        let total: integer = 0;
+        for (let i: integer = 0; i < {n}; i = i + 1) {
+            for (let j: integer = 0; j < {n}; j = j + 1) {
+                if ((i + j) % 3 == 0) { total = total + i * j; } else { total = total - 1; }
+            }
+        }
+        print(total);
+    """,
+    "array sum": """
+        let xs: integer[] = [{items}];
+        let sum: integer = 0;
+        for (let r: integer = 0; r < 50; r = r + 1) {
+            foreach (x in xs) { sum = sum + x; }
+        }
+        print(sum);
+    """,
+    "strings": """
+        function line(k: integer): string {
+            let s: string = "";
+            for (let i: integer = 0; i < k; i = i + 1) { s = s + i % 10; }
+            return s;
+        }
+        let count: integer = 0;
+        for (let r: integer = 0; r < {n}; r = r + 1) {
+            if (line(r % 20) == "0123456789") { count = count + 1; }
+        }
+        print("coinciden: " + count);
+    """,
+    "pressure": """
+        function mix(k: integer): integer {
+            {decls}
+            for (let i: integer = 0; i < k; i = i + 1) { {updates} }
+            return {total};
+        }
+        print(mix({n}));
+    """,
+}
+
+
+def source(template, scale):
+    items = ", ".join(str(i * 7 % 13) for i in range(1000 * scale))
+    width = 24
+    sizes = {
+        "fib": 18 + (scale > 1) * 2, "n": 150 * scale, "items": items,
+        "decls": " ".join(f"let a{i}: integer = {i};" for i in range(width)),
+        "updates": " ".join(f"a{i} = a{i} + a{(i + 1) % width} % 7;" for i in range(width)),
+        "total": " + ".join(f"a{i}" for i in range(width)),
+    }
+    for key, value in sizes.items():
+        template = template.replace("{" + key + "}", str(value))
+    return template
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-O", dest="opt_level", type=int, default=0, choices=(0, 1, 2, 3))
+    ap.add_argument("--scale", type=int, default=1)
+    args = ap.parse_args()
+
+    from src.pipeline.CompilerSession import CompilerSession
+    from src.vm.Layout import local_names
+    from src.vm.VirtualMachine import VirtualMachine
+    from src.mips.MipsGenerator import compile_mips
+    from src.mips.MipsSimulator import assemble, MipsSimulator
+
+    print(f"{'program':<14}{'quads':>11}{'instr':>12}{'i/quad':>8}{'loads':>11}{'stores':>11}"
+          f"{'regs':>6}{'spill':>6}{'sin regs l+s':>14}{'ms':>9}")
+    for name, template in SUITE.items():
+        session = CompilerSession(source(template, args.scale), error_listeners=[], opt_level=args.opt_level).run()
+        vm = VirtualMachine(session.quadruples, local_names(session.symbols)).run()
+        runs = []
+        for allocate in (True, False):
+            program = compile_mips(session.quadruples, session.symbols, allocate=allocate)
+            sim = MipsSimulator(assemble(program.source)).run()
+            if (vm.output, vm.error) != (sim.output, sim.error):
+                sys.exit(f"{name}: la VM y MIPS no coinciden ({vm.output} {vm.error} / {sim.output} {sim.error})")
+            runs.append((program, sim))
+        (program, sim), (_, plain) = runs
+        regs = sum(len(a.registers) for a in program.allocations.values())
+        spilled = sum(len(a.spilled) for a in program.allocations.values())
+        print(f"{name:<14}{vm.steps:>11,}{sim.steps:>12,}{sim.steps / vm.steps:>8.2f}{sim.loads:>11,}{sim.stores:>11,}"
+              f"{regs:>6}{spilled:>6}{plain.loads + plain.stores:>14,}{sim.elapsed * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
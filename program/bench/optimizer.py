@@ -0,0 +1,65 @@
+"""
+Cuádruplos antes y después del optimizador sobre un corpus de programas.
+
+    python bench/optimizer.py [--levels 1,2,3] [paths...]
+
+Por defecto usa los .cps de test/files. Compila cada archivo sin errores con
+-O0 y con cada nivel pedido y muestra la cantidad de cuádruplos, más el total
+de lo que quitó cada pasada (cse puede sumar cuádruplos: agrega la copia del
+valor guardado, que después quitan copyprop y deadcode).
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+def sources(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, files in sorted(os.walk(path)):
+                for name in sorted(files):
+                    if name.endswith(".cps"):
+                        yield os.path.join(dirpath, name)
+        else:
+            yield path
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*", default=[os.path.join(ROOT, "test", "files")])
+    ap.add_argument("--levels", default="1,2,3")
+    args = ap.parse_args()
+    levels = [int(x) for x in args.levels.split(",")]
+
+    from src.pipeline.CompilerSession import CompilerSession
+
+    header = f"{'file':<36}{'-O0':>8}" + "".join(f"{'-O' + str(lv):>8}" for lv in levels)
+    print(header)
+    totals = [0] * (len(levels) + 1)
+    by_pass = {lv: {} for lv in levels}
+    for path in sources(args.paths):
+        base = CompilerSession.from_file(path, error_listeners=[]).run()
+        if base.errors.errors:
+            continue
+        counts = [len(base.quadruples)]
+        for lv in levels:
+            session = CompilerSession.from_file(path, error_listeners=[], opt_level=lv).run()
+            counts.append(len(session.quadruples))
+            for report in session.optimizer.reports:
+                by_pass[lv][report.name] = by_pass[lv].get(report.name, 0) + report.removed
+        totals = [t + c for t, c in zip(totals, counts)]
+        name = os.path.relpath(path, ROOT)
+        print(f"{name:<36}" + "".join(f"{c:>8}" for c in counts))
+
+    print(f"{'total':<36}" + "".join(f"{c:>8}" for c in totals))
+    for lv, t in zip(levels, totals[1:]):
+        passes = ", ".join(f"{name}: {n}" for name, n in by_pass[lv].items())
+        saved = 100 * (totals[0] - t) / totals[0] if totals[0] else 0
+        print(f"-O{lv}: {totals[0]} -> {t} ({saved:.1f}% menos; {passes})")
+
+
+if __name__ == "__main__":
+    main()
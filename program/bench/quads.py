@@ -0,0 +1,77 @@
+"""
+Benchmark de memoria del TAC: lista de dicts (lo que emitía CodeGenerator) contra QuadStore.
+
+    python bench/quads.py [--copies 50] [--file program.cps]
+
+Genera el TAC de `--copies` copias del archivo y reporta, para cada representación:
+
+- KB:       memoria que ocupa el contenedor (tracemalloc, sin contar el árbol ni el
+            generador; los strings de operandos se comparten en ambos casos).
+- B/quad:   lo mismo por cuádruplo.
+- build ms: armar la representación a partir de los cuádruplos.
+- json ms:  serializar el TAC de /analyze (mejor de 5): json.dumps de la lista de
+            dicts contra QuadStore.to_json_text().
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def best(fn, runs=5):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--copies", type=int, default=50)
+    ap.add_argument("--file", default=os.path.join(ROOT, "program.cps"))
+    args = ap.parse_args()
+
+    from src.pipeline.CompilerSession import CompilerSession
+    from src.codeGenerator.QuadStore import QuadStore
+
+    with open(args.file, encoding="utf-8") as fh:
+        source = fh.read() * args.copies
+    session = CompilerSession(source, error_listeners=[]).run()
+    rows = list(session.quadruples.rows())
+    n = len(rows)
+
+    keys = ("id", "op", "arg1", "arg2", "result")
+    dicts, dict_bytes, dict_build = measure(lambda: [dict(zip(keys, r)) for r in rows])
+    store, store_bytes, store_build = measure(lambda: QuadStore(dicts))
+
+    dict_json = best(lambda: json.dumps(dicts))
+    store_json = best(store.to_json_text)
+    assert json.loads(store.to_json_text()) == json.loads(json.dumps(dicts))
+
+    print(f"{n} quads ({args.copies} x {os.path.basename(args.file)})")
+    print(f"{'':<12}{'KB':>10}{'B/quad':>10}{'build ms':>10}{'json ms':>10}")
+    for name, size, build, js in (("dicts", dict_bytes, dict_build, dict_json),
+                                  ("QuadStore", store_bytes, store_build, store_json)):
+        print(f"{name:<12}{size / 1024:>10.1f}{size / n:>10.1f}{build * 1000:>10.1f}{js * 1000:>10.1f}")
+    print(f"ratio       {dict_bytes / store_bytes:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de arranque del CLI.
+
+    python bench/startup.py [--runs 20] [--file test/files/CodeGen/if.cps]
+
+Cada escenario lanza un proceso nuevo por corrida y reporta min/mediana en ms:
+
+- python-floor:      `python -c pass`, el piso del intérprete.
+- driver-no-pyc:     Driver.py sin cache de bytecode (lo que pasa cuando /program no
+                     es escribible): cada corrida recompila CompiscriptParser.py.
+- driver-pyc-prefix: Driver.py con el cache redirigido a un directorio temporal,
+                     que es lo que hace src/utils/Startup.ensure_bytecode_cache.
+- driver-usage:      Driver.py sin argumentos; con los imports diferidos no carga ANTLR.
+- server-import:     `import src.server.main`; tampoco carga el parser generado.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def run(cmd, env, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        # sin check: `Driver.py` sin argumentos termina con código 1 a propósito
+        subprocess.run(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples), statistics.median(samples)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--file", default=os.path.join("test", "files", "CodeGen", "if.cps"))
+    args = ap.parse_args(argv)
+
+    py = sys.executable
+    base = {k: v for k, v in os.environ.items() if k not in ("PYTHONDONTWRITEBYTECODE", "PYTHONPYCACHEPREFIX")}
+
+    with tempfile.TemporaryDirectory() as prefix, tempfile.TemporaryDirectory() as empty:
+        # prefijo vacío + sin escritura: ignora cualquier __pycache__ existente y recompila siempre
+        no_pyc = {**base, "PYTHONDONTWRITEBYTECODE": "1", "PYTHONPYCACHEPREFIX": empty}
+        with_pyc = {**base, "PYTHONPYCACHEPREFIX": prefix}
+        # una corrida previa para poblar el cache de bytecode
+        subprocess.run([py, "Driver.py", args.file], cwd=ROOT, env=with_pyc, stdout=subprocess.DEVNULL, check=True)
+        subprocess.run([py, "-c", "import src.server.main"], cwd=ROOT, env=with_pyc, check=True)
+
+        scenarios = [
+            ("python-floor", [py, "-c", "pass"], with_pyc),
+            ("driver-no-pyc", [py, "Driver.py", args.file], no_pyc),
+            ("driver-pyc-prefix", [py, "Driver.py", args.file], with_pyc),
+            ("driver-usage", [py, "Driver.py"], with_pyc),
+            ("server-import", [py, "-c", "import src.server.main"], with_pyc),
+        ]
+
+        print(f"{'scenario':<20}{'min ms':>10}{'median ms':>12}")
+        results = {}
+        for name, cmd, env in scenarios:
+            lo, med = run(cmd, env, args.runs)
+            results[name] = med
+            print(f"{name:<20}{lo:>10.1f}{med:>12.1f}")
+
+    saved = results["driver-no-pyc"] - results["driver-pyc-prefix"]
+    print(f"\nDriver.py con cache de bytecode: {saved:.1f} ms menos por ejecución "
+          f"({results['driver-no-pyc'] / results['driver-pyc-prefix']:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
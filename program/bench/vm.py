@@ -0,0 +1,118 @@
+"""
+Velocidad de la VirtualMachine (interpreta cuádruplos) contra el bytecode y
+contra el TAC traducido a Python.
+
+    python bench/vm.py [-O N] [--repeat R] [--scale K]
+
+Corre cada programa de la suite (fib recursivo, ciclos anidados, suma de un
+arreglo y llamadas a métodos) con los tres motores, verifica que impriman lo
+mismo y muestra el mejor tiempo de R corridas, los pasos por segundo de la VM
+y del bytecode (cuádruplos e instrucciones) y cuántas veces más rápido que la
+VM es cada uno de los otros dos. Los tiempos no incluyen bajar a bytecode ni
+traducir a Python (eso se hace una vez y se corre R veces; la traducción sale
+en "py compile"). --scale multiplica el tamaño de los ciclos.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+SUITE = {
+    "fib": """
+        function fib(n: integer): integer {
+            if (n < 2) { return n; }
+            return fib(n - 1) + fib(n - 2);
+        }
+        print(fib({fib}));
+    """,
+    "nested loops": """
+        let total: integer = 0;
+        for (let i: integer = 0; i < {n}; i = i + 1) {
+            for (let j: integer = 0; j < {n}; j = j + 1) {
+                if ((i + j) % 3 == 0) { total = total + i * j; } else { total = total - 1; }
+            }
+        }
+        print(total);
+    """,
+    "array sum": """
+        let xs: integer[] = [{items}];
+        let sum: integer = 0;
+        for (let r: integer = 0; r < 50; r = r + 1) {
+            foreach (x in xs) { sum = sum + x; }
+        }
+        print(sum);
+    """,
+    "method calls": """
+        class Counter {
+            let value: integer = 0;
+            function add(k: integer): integer { this.value = this.value + k; return this.value; }
+        }
+        class Stepper : Counter {
+            function step(): integer { return this.add(2) - 1; }
+        }
+        let c: Stepper = new Stepper();
+        let acc: integer = 0;
+        for (let i: integer = 0; i < {calls}; i = i + 1) { acc = acc + c.step() % 5; }
+        print(acc + c.value);
+    """,
+}
+
+
+def source(template, scale):
+    items = ", ".join(str(i * 7 % 13) for i in range(1000 * scale))
+    sizes = {"fib": 18 + (scale > 1) * 2, "n": 150 * scale, "items": items, "calls": 20000 * scale}
+    for key, value in sizes.items():
+        template = template.replace("{" + key + "}", str(value))
+    return template
+
+
+def best(run, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        machine = run()
+        times.append(time.perf_counter() - start)
+    return min(times), machine
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-O", dest="opt_level", type=int, default=0, choices=(0, 1, 2, 3))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--scale", type=int, default=1)
+    args = ap.parse_args()
+
+    from src.pipeline.CompilerSession import CompilerSession
+    from src.vm.Layout import local_names, local_types
+    from src.vm.VirtualMachine import VirtualMachine
+    from src.vm.Bytecode import lower
+    from src.vm.BytecodeMachine import BytecodeMachine
+    from src.vm.PythonBackend import compile_python
+    from src.vm.PythonMachine import PythonMachine
+
+    print(f"{'program':<16}{'vm ms':>10}{'quads/s':>12}{'bc ms':>10}{'instr/s':>12}{'bc x':>7}"
+          f"{'py ms':>10}{'py x':>7}{'py compile':>12}")
+    for name, template in SUITE.items():
+        session = CompilerSession(source(template, args.scale), error_listeners=[], opt_level=args.opt_level).run()
+        names = local_names(session.symbols)
+        vm_time, vm = best(lambda: VirtualMachine(session.quadruples, names).run(), args.repeat)
+        program = lower(session.quadruples, names)
+        bc_time, bc = best(lambda: BytecodeMachine(program).run(), args.repeat)
+        start = time.perf_counter()
+        translated = compile_python(session.quadruples, names, local_types(session.symbols))
+        compile_time = time.perf_counter() - start
+        py_time, py = best(lambda: PythonMachine(translated).run(), args.repeat)
+        for engine, machine in (("el bytecode", bc), ("Python", py)):
+            if (vm.output, vm.error) != (machine.output, machine.error):
+                sys.exit(f"{name}: la VM y {engine} no coinciden "
+                         f"({vm.output} {vm.error} / {machine.output} {machine.error})")
+        print(f"{name:<16}{vm_time * 1000:>10.1f}{vm.steps / vm_time:>12,.0f}"
+              f"{bc_time * 1000:>10.1f}{bc.steps / bc_time:>12,.0f}{vm_time / bc_time:>6.1f}x"
+              f"{py_time * 1000:>10.1f}{vm_time / py_time:>6.1f}x{compile_time * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import glob
+import multiprocessing
+import os
+import time
+
+from antlr4.error.ErrorListener import ErrorListener  # type: ignore
+
+from src.pipeline.CompilerSession import CompilerSession
+
+
+class SyntaxErrors(ErrorListener):
+    """Junta los errores de sintaxis del parser (en vez de imprimirlos) para el .diag."""
+    def __init__(self):
+        self.messages = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.messages.append(f"[line {line}:{column}] {msg}")
+
+
+class FileResult:
+    def __init__(self, path, lines=0, quads=0, errors=0, seconds=0.0, mode=None, failure=None):
+        self.path = path
+        self.lines = lines
+        self.quads = quads
+        self.errors = errors
+        self.seconds = seconds
+        self.mode = mode
+        self.failure = failure  # excepción inesperada del compilador (no errores de Compiscript)
+
+    @property
+    def ok(self):
+        return self.failure is None and self.errors == 0
+
+
+class BatchSummary:
+    def __init__(self, results, wall, jobs):
+        self.results = results
+        self.wall = wall
+        self.jobs = jobs
+
+    @property
+    def files(self):
+        return len(self.results)
+
+    @property
+    def lines(self):
+        return sum(r.lines for r in self.results)
+
+    @property
+    def quads(self):
+        return sum(r.quads for r in self.results)
+
+    @property
+    def with_errors(self):
+        return sum(1 for r in self.results if r.failure is None and r.errors)
+
+    @property
+    def failed(self):
+        return sum(1 for r in self.results if r.failure is not None)
+
+    def format(self):
+        wall = self.wall or 1e-9
+        lines = [
+            f"Archivos:      {self.files} ({self.files - self.with_errors - self.failed} ok, "
+            f"{self.with_errors} con errores, {self.failed} fallidos)",
+            f"Líneas:        {self.lines}",
+            f"Cuádruplos:    {self.quads}",
+            f"Procesos:      {self.jobs}",
+            f"Tiempo:        {self.wall:.3f} s",
+            f"Throughput:    {self.files / wall:.1f} archivos/s, {self.lines / wall:.1f} líneas/s",
+        ]
+        for r in self.results:
+            if r.failure is not None:
+                lines.append(f"  FALLÓ {r.path}: {r.failure}")
+        return "\n".join(lines)
+
+
+def collect_sources(paths):
+    """Expande directorios a sus .cps (recursivo) y conserva el orden de los archivos explícitos."""
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            out.extend(sorted(glob.glob(os.path.join(p, "**", "*.cps"), recursive=True)))
+        else:
+            out.append(p)
+    return out
+
+
+def output_paths(src, out_dir, base_dir):
+    """<out_dir>/<ruta relativa a base_dir>.tac y .diag; sin out_dir, junto al fuente."""
+    if out_dir is None:
+        stem = os.path.splitext(src)[0]
+    else:
+        rel = os.path.relpath(os.path.abspath(src), base_dir)
+        if rel.startswith(".."):
+            rel = os.path.basename(src)
+        stem = os.path.join(out_dir, os.path.splitext(rel)[0])
+    return stem + ".tac", stem + ".diag"
+
+
+def compile_file(task):
+    src, tac_path, diag_path, opt_level = task
+    start = time.perf_counter()
+    syntax = SyntaxErrors()
+    try:
+        session = CompilerSession.from_file(src, error_listeners=[syntax], opt_level=opt_level).run()
+    except Exception as e:
+        return FileResult(src, seconds=time.perf_counter() - start, failure=f"{type(e).__name__}: {e}")
+
+    # Los errores de sintaxis no pasan por Error(); van primero en el diagnóstico
+    syntax_errors = session.parser.getNumberOfSyntaxErrors()
+    os.makedirs(os.path.dirname(tac_path) or ".", exist_ok=True)
+    with open(tac_path, "w", encoding="utf-8") as fh:
+        for quad in session.quadruples:
+            fh.write(f"{quad}\n")
+    with open(diag_path, "w", encoding="utf-8") as fh:
+        fh.write(f"# parse: {session.parsed.mode}, syntax errors: {syntax_errors}\n")
+        for message in syntax.messages:
+            fh.write(f"{message}\n")
+        for error in session.errors.errors:
+            fh.write(f"{error}\n")
+
+    return FileResult(
+        src,
+        lines=len(session.source.splitlines()),
+        quads=session.quad_count,
+        errors=len(session.errors.errors) + syntax_errors,
+        seconds=time.perf_counter() - start,
+        mode=session.parsed.mode,
+    )
+
+
+def compile_batch(paths, out_dir=None, jobs=None, opt_level=0):
+    sources = collect_sources(paths)
+    base_dir = os.path.commonpath([os.path.abspath(os.path.dirname(s)) for s in sources]) if sources else os.getcwd()
+    tasks = [(src, *output_paths(src, out_dir, base_dir), opt_level) for src in sources]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks) or 1))
+
+    start = time.perf_counter()
+    if jobs == 1:
+        results = [compile_file(t) for t in tasks]
+    else:
+        # Los hijos heredan por fork los módulos ya importados (ANTLR, ATN, DFAs)
+        with multiprocessing.Pool(jobs) as pool:
+            chunk = max(1, len(tasks) // (jobs * 4))
+            results = list(pool.imap(compile_file, tasks, chunksize=chunk))
+    return BatchSummary(results, time.perf_counter() - start, jobs)
@@ -5,36 +5,60 @@ from src.utils.Types import Type, ArrayType
 from CompiscriptListener import CompiscriptListener
 from CompiscriptParser import CompiscriptParser
 from antlr4.tree.Tree import TerminalNode # type: ignore
+from src.codeGenerator.QuadStore import QuadStore
+from src.codeGenerator.TempAllocator import allocate_temps
 
 from CompiscriptVisitor import CompiscriptVisitor
 
+# Nodos que con un solo hijo solo pasan el valor de ese hijo
+_WRAPPERS = (
+    CompiscriptParser.ExpressionContext,
+    CompiscriptParser.ExprNoAssignContext,
+    CompiscriptParser.TernaryExprContext,
+    CompiscriptParser.LogicalOrExprContext,
+    CompiscriptParser.LogicalAndExprContext,
+    CompiscriptParser.EqualityExprContext,
+    CompiscriptParser.RelationalExprContext,
+    CompiscriptParser.AdditiveExprContext,
+    CompiscriptParser.MultiplicativeExprContext,
+    CompiscriptParser.UnaryExprContext,
+)
+
 class CodeGenerator(CompiscriptVisitor):
-    def __init__(self, temp_manager):
+    def __init__(self, temp_manager, method_receivers=None):
         self.temp_manager = temp_manager
-        self.quadruples = []
+        # TypeChecker.method_receivers: con él `obj.m(...)` es un callvirt por slot;
+        # sin él (o con super) queda getprop + call, que busca el método por nombre
+        self.method_receivers = method_receivers or {}
+        self.quadruples = QuadStore()
         self.counter = 0
 
         self.label_counter = 0
+        self.frame_temps = {}  # procedimiento -> temporales que usa (ver allocate_temps)
+        self.virtual_quadruples = self.quadruples
         self.loop_stack = []
         self.switch_stack = []
 
     def emit(self, op, arg1, arg2, result):
-        quad = {
-            "id": self.counter,
-            "op": op,
-            "arg1": arg1,
-            "arg2": arg2,
-            "result": result
-        }
-        self.quadruples.append(quad)
+        quad_id = self.quadruples.append(self.counter, op, arg1, arg2, result)
         self.counter += 1
-        return quad["id"]
+        return quad_id
     
     def new_label(self, hint="L"):
         self.label_counter += 1
         return f"{hint}{self.label_counter}"
 
-    
+    def visitProgram(self, ctx):
+        self.visitChildren(ctx)
+        self.allocate_temps()
+        return None
+
+    def allocate_temps(self):
+        # Los temporales virtuales pasan a los mínimos por procedimiento. El optimizador
+        # trabaja sobre la versión virtual (cada temporal con un solo valor) y asigna al final.
+        self.virtual_quadruples = self.quadruples
+        self.quadruples, self.frame_temps = allocate_temps(self.quadruples)
+
     # EXPR
     def visitAdditiveExpr(self, ctx):
         if ctx.getChildCount() == 1:
@@ -47,13 +71,6 @@ class CodeGenerator(CompiscriptVisitor):
             right = self.visit(ctx.getChild(i + 1))
             temp = self.temp_manager.new_temp()
             self.emit(op, result, right, temp)
-
-            # liberar temporales ya usados
-            if isinstance(result, str) and result.startswith("t"):
-                self.temp_manager.release_temp(result)
-            if isinstance(right, str) and right.startswith("t"):
-                self.temp_manager.release_temp(right)
-
             result = temp
             i += 2
 
@@ -70,59 +87,91 @@ class CodeGenerator(CompiscriptVisitor):
         temp = self.temp_manager.new_temp()
         self.emit(op, left, right, temp)
 
-        if isinstance(left, str) and left.startswith("t"):
-            self.temp_manager.release_temp(left)
-        if isinstance(right, str) and right.startswith("t"):
-            self.temp_manager.release_temp(right)
-
         return temp
 
     def visitLogicalAndExpr(self, ctx):
         if ctx.getChildCount() == 1:
             return self.visit(ctx.getChild(0))
-
-        left = self.visit(ctx.getChild(0))
-        right = self.visit(ctx.getChild(2))
-
-        result = self.temp_manager.new_temp()
-        Lfalse = f"L{len(self.quadruples)+1}_false"
-        Lend = f"L{len(self.quadruples)+3}_end"
-
-        self.emit("ifFalse", left, None, Lfalse)
-        self.emit("ifFalse", right, None, Lfalse)
-        self.emit("=", "1", None, result)
-        self.emit("goto", None, None, Lend)
-
-        self.emit("label", None, None, Lfalse)
-        self.emit("=", "0", None, result)
-
-        self.emit("label", None, None, Lend)
-
-        return result
+        return self.materialize(ctx)
 
     def visitLogicalOrExpr(self, ctx):
         if ctx.getChildCount() == 1:
             return self.visit(ctx.getChild(0))
+        return self.materialize(ctx)
 
-        left = self.visit(ctx.getChild(0))
-        right = self.visit(ctx.getChild(2))
-
+    # Código de saltos para condiciones (&&, ||, !)
+    def materialize(self, ctx):
+        # Una condición usada como valor: 1 si es verdadera, 0 si no
+        false_jumps = self.jump_if(ctx, False)
         result = self.temp_manager.new_temp()
-        Ltrue = f"L{len(self.quadruples)+1}_true"
-        Lend = f"L{len(self.quadruples)+3}_end"
+        Lend = self.new_label("Lbool_end_")
 
-        self.emit("ifTrue", left, None, Ltrue)
-        self.emit("ifTrue", right, None, Ltrue)
-        self.emit("=", "0", None, result)
+        self.emit("=", 1, None, result)
         self.emit("goto", None, None, Lend)
-
-        self.emit("label", None, None, Ltrue)
-        self.emit("=", "1", None, result)
-
+        self.place_label(false_jumps, "Lbool_false_")
+        self.emit("=", 0, None, result)
         self.emit("label", None, None, Lend)
 
         return result
 
+    def jump_if(self, ctx, sense):
+        """
+        Emite la condición `ctx` como código de saltos: salta si su valor es `sense`
+        y si no sigue de largo. Devuelve las posiciones de los saltos que quedan sin
+        destino, para completarlas con backpatch() cuando se conozca la etiqueta.
+        Los operandos de && y || se evalúan solo si hace falta.
+        """
+        node = self._condition(ctx)
+
+        if isinstance(node, CompiscriptParser.UnaryExprContext) and node.getChild(0).getText() == "!":
+            return self.jump_if(node.unaryExpr(), not sense)
+
+        if isinstance(node, (CompiscriptParser.LogicalAndExprContext, CompiscriptParser.LogicalOrExprContext)):
+            operands = node.getTypedRuleContexts(
+                CompiscriptParser.EqualityExprContext
+                if isinstance(node, CompiscriptParser.LogicalAndExprContext)
+                else CompiscriptParser.LogicalAndExprContext
+            )
+            # Con && un operando falso decide (con || uno verdadero)
+            decides = not isinstance(node, CompiscriptParser.LogicalAndExprContext)
+            if sense == decides:
+                jumps = []
+                for operand in operands:
+                    jumps += self.jump_if(operand, sense)
+                return jumps
+            skip = []
+            for operand in operands[:-1]:
+                skip += self.jump_if(operand, decides)
+            jumps = self.jump_if(operands[-1], sense)
+            self.place_label(skip, "Lbool_skip_")
+            return jumps
+
+        place = self.visit(node)
+        jump = len(self.quadruples)
+        self.emit("ifTrue" if sense else "ifFalse", place, None, None)
+        return [jump]
+
+    def _condition(self, ctx):
+        # Baja por los nodos de un solo hijo (y paréntesis) hasta el primero que importa
+        while True:
+            if isinstance(ctx, CompiscriptParser.PrimaryExprContext) and ctx.expression() is not None:
+                ctx = ctx.expression()
+            elif isinstance(ctx, _WRAPPERS) and ctx.getChildCount() == 1:
+                ctx = ctx.getChild(0)
+            else:
+                return ctx
+
+    def backpatch(self, jumps, label):
+        for i in jumps:
+            self.quadruples.patch(i, label)
+
+    def place_label(self, jumps, hint):
+        # Etiqueta nueva aquí para los saltos pendientes (si hay alguno)
+        if jumps:
+            label = self.new_label(hint)
+            self.backpatch(jumps, label)
+            self.emit("label", None, None, label)
+
     def visitUnaryExpr(self, ctx):
         if ctx.getChildCount() == 1:
             return self.visit(ctx.getChild(0))
@@ -138,35 +187,45 @@ class CodeGenerator(CompiscriptVisitor):
         elif op == "!":
             self.emit("not", expr_val, None, temp)
 
-        if isinstance(expr_val, str) and expr_val.startswith("t"):
-            self.temp_manager.release_temp(expr_val)
-
         return temp
 
     # IF
     def visitIfStatement(self, ctx):
-        cond_place = self.visit(ctx.expression())
-
-        else_label = f"L{len(self.quadruples)}_else"
-        end_label  = f"L{len(self.quadruples)}_end"
-
-        self.emit("ifFalse", cond_place, None, else_label)
+        false_jumps = self.jump_if(ctx.expression(), False)
 
         if ctx.block(0):
             self.visit(ctx.block(0))
 
+        end_label = None
         if ctx.block(1):
+            end_label = self.new_label("Lif_end_")
             self.emit("goto", None, None, end_label)
 
-        self.emit("label", None, None, else_label)
-        if ctx.block(1):   
-            self.visit(ctx.block(1))
-
+        self.place_label(false_jumps, "Lif_else_")
         if ctx.block(1):
+            self.visit(ctx.block(1))
             self.emit("label", None, None, end_label)
 
         return None
 
+    def visitTernaryExpr(self, ctx):
+        if ctx.getChildCount() == 1:
+            return self.visit(ctx.getChild(0))
+
+        false_jumps = self.jump_if(ctx.logicalOrExpr(), False)
+        result = self.temp_manager.new_temp()
+        Lend = self.new_label("Lternary_end_")
+
+        then_val = self.visit(ctx.expression(0))
+        self.emit("=", then_val, None, result)
+        self.emit("goto", None, None, Lend)
+
+        self.place_label(false_jumps, "Lternary_else_")
+        else_val = self.visit(ctx.expression(1))
+        self.emit("=", else_val, None, result)
+        self.emit("label", None, None, Lend)
+        return result
+
 
     # FUNCTION
     def visitFunctionDeclaration(self, ctx):
@@ -204,9 +263,6 @@ class CodeGenerator(CompiscriptVisitor):
         if expr:
             ret_val = self.visit(expr)
             self.emit("return", ret_val, None, None)
-
-            if isinstance(ret_val, str) and ret_val.startswith("t"):
-                self.temp_manager.release_temp(ret_val)
         else:
             self.emit("return", None, None, None)
 
@@ -214,8 +270,10 @@ class CodeGenerator(CompiscriptVisitor):
 
     def visitLeftHandSide(self, ctx):
         cur = self.visit(ctx.primaryAtom())
+        suffixes = list(ctx.suffixOp() or [])
+        slot = None  # de un `.m` que el '(' siguiente llama por la vtable
 
-        for suf in (ctx.suffixOp() or []):
+        for k, suf in enumerate(suffixes):
             kind = suf.getChild(0).getText()
 
             if kind == '(':
@@ -227,12 +285,11 @@ class CodeGenerator(CompiscriptVisitor):
                     self.emit("param", val, None, None)
 
                 temp = self.temp_manager.new_temp()
-                self.emit("call", cur, len(arg_vals), temp)
-
-                # si cur era un temporal, liberarlo
-                if isinstance(cur, str) and cur.startswith("t"):
-                    self.temp_manager.release_temp(cur)
-
+                if slot is not None:
+                    self.emit("callvirt", slot, len(arg_vals) + 1, temp)
+                    slot = None
+                else:
+                    self.emit("call", cur, len(arg_vals), temp)
                 cur = temp
                 continue
 
@@ -241,29 +298,32 @@ class CodeGenerator(CompiscriptVisitor):
                 idx_val = self.visit(suf.expression())
                 temp = self.temp_manager.new_temp()
                 self.emit("[]", cur, idx_val, temp)
-
-                if isinstance(cur, str) and cur.startswith("t"):
-                    self.temp_manager.release_temp(cur)
-                if isinstance(idx_val, str) and idx_val.startswith("t"):
-                    self.temp_manager.release_temp(idx_val)
-
                 cur = temp
                 continue
 
             # --- acceso a propiedad ---
             if kind == '.':
                 prop = suf.Identifier().getText()
+                slot = self._virtual_slot(suf, suffixes[k + 1] if k + 1 < len(suffixes) else None, cur)
+                if slot is not None:
+                    # el receptor es el primer argumento (el `this` del método); se apila
+                    # antes de evaluar los demás, donde antes se leía con getprop
+                    self.emit("param", cur, None, None)
+                    continue
                 temp = self.temp_manager.new_temp()
                 self.emit("getprop", cur, prop, temp)
-
-                if isinstance(cur, str) and cur.startswith("t"):
-                    self.temp_manager.release_temp(cur)
-
                 cur = temp
                 continue
 
         return cur
 
+    def _virtual_slot(self, suf, nxt, receiver):
+        # Slot de la vtable si el '.m' es un método que se llama enseguida (super.m no es virtual)
+        if nxt is None or nxt.getChild(0).getText() != '(' or receiver == "super":
+            return None
+        cls = self.method_receivers.get(suf)
+        return cls.slot(suf.Identifier().getText()) if cls is not None else None
+
 
     # CLASS
     def visitClassDeclaration(self, ctx):
@@ -325,9 +385,6 @@ class CodeGenerator(CompiscriptVisitor):
         temp = self.temp_manager.new_temp()
         self.emit("getprop", recv_place, prop, temp)
 
-        if recv_place and str(recv_place).startswith("t"):
-            self.temp_manager.release_temp(recv_place)
-
         return temp
 
     def visitMultiplicativeExpr(self, ctx):
@@ -341,12 +398,6 @@ class CodeGenerator(CompiscriptVisitor):
         temp = self.temp_manager.new_temp()
         self.emit(op, left, right, temp)
 
-        # Liberar temporales ya usados
-        if isinstance(left, str) and left.startswith("t"):
-            self.temp_manager.release_temp(left)
-        if isinstance(right, str) and right.startswith("t"):
-            self.temp_manager.release_temp(right)
-
         return temp
     
     def visitRelationalExpr(self, ctx):
@@ -362,12 +413,6 @@ class CodeGenerator(CompiscriptVisitor):
         temp = self.temp_manager.new_temp()
         self.emit(op, left, right, temp)
 
-        # Liberar temporales usados
-        if isinstance(left, str) and left.startswith("t"):
-            self.temp_manager.release_temp(left)
-        if isinstance(right, str) and right.startswith("t"):
-            self.temp_manager.release_temp(right)
-
         return temp
     
     # Herencia
@@ -385,8 +430,6 @@ class CodeGenerator(CompiscriptVisitor):
         Lincr = self.new_label("Lfor_incr_")
         Lend  = self.new_label("Lfor_end_")
 
-        self.loop_stack.append((Ltest, Lend))
-
         exprs = list(ctx.expression() or [])
 
         if hasattr(ctx, "variableDeclaration") and ctx.variableDeclaration():
@@ -400,13 +443,13 @@ class CodeGenerator(CompiscriptVisitor):
             if init_expr:
                 self.visit(init_expr)
 
+        # continue salta al incremento (si no hay, directo a la condición)
+        self.loop_stack.append((Lincr if incr_expr else Ltest, Lend))
+
         self.emit("label", None, None, Ltest)
 
         if cond_expr:
-            cond_place = self.visit(cond_expr)
-            self.emit("ifFalse", cond_place, None, Lend)
-            if isinstance(cond_place, str) and cond_place.startswith("t"):
-                self.temp_manager.release_temp(cond_place)
+            self.backpatch(self.jump_if(cond_expr, False), Lend)
 
         self.emit("label", None, None, Lbody)
 
@@ -427,9 +470,10 @@ class CodeGenerator(CompiscriptVisitor):
     def visitForeachStatement(self, ctx):
         Ltest = self.new_label("Lforeach_test_")
         Lbody = self.new_label("Lforeach_body_")
+        Lincr = self.new_label("Lforeach_incr_")
         Lend  = self.new_label("Lforeach_end_")
 
-        self.loop_stack.append((Ltest, Lend))
+        self.loop_stack.append((Lincr, Lend))
 
         iterator_temp = self.temp_manager.new_temp()  # i = 0
         self.emit("=", 0, None, iterator_temp)
@@ -454,13 +498,11 @@ class CodeGenerator(CompiscriptVisitor):
         self.emit("[]", coll_place, iterator_temp, elem_temp)
         self.emit("=", elem_temp, None, name)
 
-        if isinstance(elem_temp, str) and elem_temp.startswith("t"):
-            self.temp_manager.release_temp(elem_temp)
-
         body = getattr(ctx, "block", None) and ctx.block()
         if body:
             self.visit(body)
 
+        self.emit("label", None, None, Lincr)
         incr_temp = self.temp_manager.new_temp()
         self.emit("+", iterator_temp, 1, incr_temp)
         self.emit("=", incr_temp, None, iterator_temp)
@@ -479,8 +521,6 @@ class CodeGenerator(CompiscriptVisitor):
         if expr:
             val = self.visit(expr)
             self.emit("print", val, None, None)
-            if isinstance(val, str) and val.startswith("t"):
-                self.temp_manager.release_temp(val)
 
     # Variables
     def visitAssignment(self, ctx):
@@ -491,9 +531,6 @@ class CodeGenerator(CompiscriptVisitor):
             rhs_place = self.visit(exps[0])
             self.emit("=", rhs_place, None, left)
 
-            if rhs_place and str(rhs_place).startswith("t"):
-                self.temp_manager.release_temp(rhs_place)
-
             return left
 
         elif len(exps) == 2:
@@ -501,9 +538,6 @@ class CodeGenerator(CompiscriptVisitor):
             rhs_place  = self.visit(exps[1])
             self.emit("setprop", recv_place, rhs_place, left)
 
-            if rhs_place and str(rhs_place).startswith("t"):
-                self.temp_manager.release_temp(rhs_place)
-
             return left
 
         return self.visitChildren(ctx)
@@ -515,11 +549,8 @@ class CodeGenerator(CompiscriptVisitor):
         cur_place = self.visit(lhs.primaryAtom())   
         suffixes = list(lhs.suffixOp() or [])
 
-
         if not suffixes:
             self.emit("=", rhs_place, None, cur_place)
-            if isinstance(rhs_place, str) and rhs_place.startswith("t"):
-                self.temp_manager.release_temp(rhs_place)
             return cur_place
 
         for s in suffixes[:-1]:
@@ -529,12 +560,6 @@ class CodeGenerator(CompiscriptVisitor):
                 idx_val = self.visit(s.expression())
                 temp = self.temp_manager.new_temp()
                 self.emit("[]", cur_place, idx_val, temp)
-
-                if isinstance(cur_place, str) and cur_place.startswith("t"):
-                    self.temp_manager.release_temp(cur_place)
-                if isinstance(idx_val, str) and idx_val.startswith("t"):
-                    self.temp_manager.release_temp(idx_val)
-
                 cur_place = temp
                 continue
 
@@ -542,10 +567,6 @@ class CodeGenerator(CompiscriptVisitor):
                 prop = s.Identifier().getText()
                 temp = self.temp_manager.new_temp()
                 self.emit("getprop", cur_place, prop, temp)
-
-                if isinstance(cur_place, str) and cur_place.startswith("t"):
-                    self.temp_manager.release_temp(cur_place)
-
                 cur_place = temp
                 continue
 
@@ -555,25 +576,16 @@ class CodeGenerator(CompiscriptVisitor):
         last = suffixes[-1]
         last_kind = last.getChild(0).getText()
 
-
         if last_kind == '[':
             idx_val = self.visit(last.expression())
             self.emit("[]=", cur_place, idx_val, rhs_place)
 
-            # liberar temporales
-            if isinstance(rhs_place, str) and rhs_place.startswith("t"):
-                self.temp_manager.release_temp(rhs_place)
-            if isinstance(idx_val, str) and idx_val.startswith("t"):
-                self.temp_manager.release_temp(idx_val)
-
             return cur_place
 
         if last_kind == '.':
             prop = last.Identifier().getText()
             self.emit("setprop", cur_place, rhs_place, prop)
 
-            if isinstance(rhs_place, str) and rhs_place.startswith("t"):
-                self.temp_manager.release_temp(rhs_place)
             return cur_place
 
         if last_kind == '(':
@@ -589,11 +601,6 @@ class CodeGenerator(CompiscriptVisitor):
         temp = self.temp_manager.new_temp()
         self.emit("[]", arr_place, idx_place, temp)
 
-        if arr_place and str(arr_place).startswith("t"):
-            self.temp_manager.release_temp(arr_place)
-        if idx_place and str(idx_place).startswith("t"):
-            self.temp_manager.release_temp(idx_place)
-
         return temp
     
     def visitVariableDeclaration(self, ctx):
@@ -602,8 +609,6 @@ class CodeGenerator(CompiscriptVisitor):
         if init:
             val = self.visit(init.expression())
             self.emit("=", val, None, name)
-            if isinstance(val, str) and val.startswith("t"):
-                self.temp_manager.release_temp(val)
         return name
     
     def visitLiteralExpr(self, ctx):
@@ -637,9 +642,6 @@ class CodeGenerator(CompiscriptVisitor):
             val = self.visit(e)
             self.emit("[]=", arr_temp, i, val)
 
-            if isinstance(val, str) and val.startswith("t"):
-                self.temp_manager.release_temp(val)
-
         return arr_temp
 
     def visitArrayLiteral(self, ctx):
@@ -653,9 +655,6 @@ class CodeGenerator(CompiscriptVisitor):
             val = self.visit(e)
             self.emit("[]=", arr_temp, i, val)
 
-            if isinstance(val, str) and val.startswith("t"):
-                self.temp_manager.release_temp(val)
-
         return arr_temp
 
 
@@ -668,9 +667,6 @@ class CodeGenerator(CompiscriptVisitor):
             val = self.visit(init)   
             self.emit("=", val, None, name)
 
-            if isinstance(val, str) and val.startswith("t"):
-                self.temp_manager.release_temp(val)
-
         return name
 
     def visitPrimaryExpr(self, ctx):
@@ -716,9 +712,6 @@ class CodeGenerator(CompiscriptVisitor):
             val = self.visit(e)
             self.emit("[]=", arr_temp, i, val)
 
-            if isinstance(val, str) and val.startswith("t"):
-                self.temp_manager.release_temp(val)
-
         return arr_temp
 
     # While
@@ -730,11 +723,7 @@ class CodeGenerator(CompiscriptVisitor):
         self.loop_stack.append((Ltest, Lend))
 
         self.emit("label", None, None, Ltest)
-        cond = self.visit(ctx.expression())
-        self.emit("ifFalse", cond, None, Lend)
-
-        if isinstance(cond, str) and cond.startswith("t"):
-            self.temp_manager.release_temp(cond)
+        self.backpatch(self.jump_if(ctx.expression(), False), Lend)
 
         self.emit("label", None, None, Lbody)
         if getattr(ctx, "block", None) and ctx.block():
@@ -764,10 +753,7 @@ class CodeGenerator(CompiscriptVisitor):
 
         cond = ctx.expression()
         if cond:
-            cond_val = self.visit(cond)
-            self.emit("ifTrue", cond_val, None, Lbody)
-            if isinstance(cond_val, str) and cond_val.startswith("t"):
-                self.temp_manager.release_temp(cond_val)
+            self.backpatch(self.jump_if(cond, True), Lbody)
 
         self.emit("label", None, None, Lend)
 
@@ -853,11 +839,6 @@ class CodeGenerator(CompiscriptVisitor):
             self.emit("==", scrut, cv, t)
             self.emit("ifTrue", t, None, case_labels[i])
 
-            if isinstance(t, str) and t.startswith("t"):
-                self.temp_manager.release_temp(t)
-            if isinstance(cv, str) and isinstance(cv, str) and str(cv).startswith("t"):
-                self.temp_manager.release_temp(cv)
-
         # Si no coincidió ningún case, ve a default o fin
         self.emit("goto", None, None, Ldefault if Ldefault else Lend)
 
@@ -875,9 +856,6 @@ class CodeGenerator(CompiscriptVisitor):
         # End del switch
         self.emit("label", None, None, Lend)
 
-        if isinstance(scrut, str) and scrut.startswith("t"):
-            self.temp_manager.release_temp(scrut)
-
         self.switch_stack.pop()
         return None
 
@@ -0,0 +1,244 @@
+import json
+from array import array
+from bisect import bisect_left
+
+from src.utils.Temp import Temp
+
+
+class Quad:
+    """
+    Vista de un cuádruplo. Se comporta como el dict {id, op, arg1, arg2, result}
+    que emitía antes CodeGenerator: q["op"], dict(q), == contra un dict y el mismo repr.
+    """
+
+    __slots__ = ("id", "op", "arg1", "arg2", "result")
+    FIELDS = ("id", "op", "arg1", "arg2", "result")
+
+    def __init__(self, id, op, arg1, arg2, result):
+        self.id = id
+        self.op = op
+        self.arg1 = arg1
+        self.arg2 = arg2
+        self.result = result
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_json(self):
+        return {"id": self.id, "op": self.op, "arg1": self.arg1, "arg2": self.arg2, "result": self.result}
+
+    def __eq__(self, other):
+        if isinstance(other, Quad):
+            return self.to_tuple() == other.to_tuple()
+        if isinstance(other, dict):
+            return self.to_json() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def to_tuple(self):
+        return (self.id, self.op, self.arg1, self.arg2, self.result)
+
+    def __repr__(self):
+        return repr(self.to_json())
+
+
+class QuadStore:
+    """
+    Lista de cuádruplos en arreglos paralelos de enteros (id, op, arg1, arg2, result)
+    más una tabla de valores internados: cada operando distinto (temporal, etiqueta,
+    constante) se guarda una sola vez y cada cuádruplo ocupa 5 enteros de 4 bytes en
+    vez de un dict de cinco llaves.
+
+    Se usa como la lista de antes: len, índices, slices, iteración (devuelve Quad),
+    == contra otra QuadStore o una lista de dicts. to_json() arma la lista de dicts,
+    to_json_text() la escribe directo como JSON (lo que usa /analyze) y by_id()
+    busca un cuádruplo por su id.
+    """
+
+    def __init__(self, quads=()):
+        self._ids = array("i")
+        self._ops = array("i")
+        self._arg1 = array("i")
+        self._arg2 = array("i")
+        self._result = array("i")
+        self._values = [None]  # índice -> valor; el 0 es None
+        self._index = {}       # (tipo, valor) -> índice; el tipo separa 1, 1.0 y True
+        self.extend(quads)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """QuadStore a partir de filas (id, op, arg1, arg2, result); las filas en None se saltan."""
+        out = cls()
+        rows = [r for r in rows if r is not None]
+        intern = out._intern
+        out._ids = array("i", [r[0] for r in rows])
+        out._ops = array("i", [intern(r[1]) for r in rows])
+        out._arg1 = array("i", [intern(r[2]) for r in rows])
+        out._arg2 = array("i", [intern(r[3]) for r in rows])
+        out._result = array("i", [intern(r[4]) for r in rows])
+        return out
+
+    def _intern(self, value):
+        if value is None:
+            return 0
+        key = (value.__class__, value)
+        i = self._index.get(key)
+        if i is None:
+            i = len(self._values)
+            self._values.append(value)
+            self._index[key] = i
+        return i
+
+    def append(self, id, op, arg1, arg2, result):
+        intern = self._intern
+        self._ids.append(id)
+        self._ops.append(intern(op))
+        self._arg1.append(intern(arg1))
+        self._arg2.append(intern(arg2))
+        self._result.append(intern(result))
+        return id
+
+    def patch(self, index, result):
+        """Cambia el result del cuádruplo en la posición `index` (backpatching de saltos)."""
+        self._result[index] = self._intern(result)
+
+    def extend(self, quads):
+        if isinstance(quads, QuadStore):
+            # Se traduce la tabla de valores de la otra store una vez y se copian los índices
+            remap = [self._intern(v) for v in quads._values]
+            self._ids.extend(quads._ids)
+            for dst, src in ((self._ops, quads._ops), (self._arg1, quads._arg1),
+                             (self._arg2, quads._arg2), (self._result, quads._result)):
+                dst.extend(array("i", [remap[k] for k in src]))
+            return
+        for q in quads:
+            self.append(q["id"], q["op"], q["arg1"], q["arg2"], q["result"])
+
+    def rows(self, start=0, end=None):
+        """Tuplas (id, op, arg1, arg2, result) sin crear objetos Quad."""
+        get = self._values.__getitem__
+        cols = (self._ops, self._arg1, self._arg2, self._result)
+        if start or end is not None:
+            cols = tuple(c[start:end] for c in cols)
+        ids = self._ids[start:end] if start or end is not None else self._ids
+        return zip(ids, *(map(get, c) for c in cols))
+
+    def column(self, field):
+        """Lista con los valores de un campo ("op", "arg1", "arg2", "result" o "id") de todos los cuádruplos."""
+        if field == "id":
+            return self._ids.tolist()
+        column = {"op": self._ops, "arg1": self._arg1, "arg2": self._arg2, "result": self._result}[field]
+        v = self._values
+        return [v[k] for k in column]
+
+    def slice(self, start=0, end=None):
+        """Copia de un rango como QuadStore independiente."""
+        end = len(self._ids) if end is None else end
+        out = QuadStore()
+        remap = {}
+        def take(k):
+            i = remap.get(k)
+            if i is None:
+                i = remap[k] = out._intern(self._values[k])
+            return i
+        out._ids = self._ids[start:end]
+        out._ops = array("i", [take(k) for k in self._ops[start:end]])
+        out._arg1 = array("i", [take(k) for k in self._arg1[start:end]])
+        out._arg2 = array("i", [take(k) for k in self._arg2[start:end]])
+        out._result = array("i", [take(k) for k in self._result[start:end]])
+        return out
+
+    def shifted(self, id_delta, relabel=None, label_ops=(), temp_delta=0):
+        """
+        Copia con los ids desplazados en `id_delta`, los temporales renumerados en
+        `temp_delta` y, en los cuádruplos cuyo op está en `label_ops`, el result
+        pasado por relabel(result).
+        """
+        out = QuadStore()
+        if temp_delta:
+            out._values = [Temp(v.id + temp_delta) if isinstance(v, Temp) else v for v in self._values]
+            out._index = {(v.__class__, v): i for i, v in enumerate(out._values) if i}
+        else:
+            out._values = list(self._values)
+            out._index = dict(self._index)
+        out._ids = array("i", [i + id_delta for i in self._ids])
+        out._ops, out._arg1, out._arg2 = array("i", self._ops), array("i", self._arg1), array("i", self._arg2)
+        out._result = array("i", self._result)
+        if relabel is not None:
+            ops = {self._index[(op.__class__, op)] for op in label_ops if (op.__class__, op) in self._index}
+            renamed = {}
+            for i, op in enumerate(self._ops):
+                if op in ops:
+                    k = self._result[i]
+                    if k not in renamed:
+                        renamed[k] = out._intern(relabel(self._values[k]))
+                    out._result[i] = renamed[k]
+        return out
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self._ids)
+        if not 0 <= i < len(self._ids):
+            raise IndexError("quad index out of range")
+        v = self._values
+        return Quad(self._ids[i], v[self._ops[i]], v[self._arg1[i]], v[self._arg2[i]], v[self._result[i]])
+
+    def __iter__(self):
+        for row in self.rows():
+            yield Quad(*row)
+
+    def index_of(self, id):
+        """Posición del cuádruplo con ese id (los ids van en orden creciente)."""
+        i = bisect_left(self._ids, id)
+        if i < len(self._ids) and self._ids[i] == id:
+            return i
+        for j, qid in enumerate(self._ids):  # por si una pasada los desordenó
+            if qid == id:
+                return j
+        raise KeyError(id)
+
+    def by_id(self, id):
+        return self[self.index_of(id)]
+
+    def to_json(self):
+        v = self._values
+        return [{"id": i, "op": v[op], "arg1": v[a1], "arg2": v[a2], "result": v[r]}
+                for i, op, a1, a2, r in zip(self._ids, self._ops, self._arg1, self._arg2, self._result)]
+
+    def to_json_text(self):
+        """Lo mismo que json.dumps(self.to_json()) pero codificando cada valor internado una sola vez."""
+        enc = [json.dumps(v) for v in self._values]
+        return "[" + ", ".join(
+            f'{{"id": {i}, "op": {enc[op]}, "arg1": {enc[a1]}, "arg2": {enc[a2]}, "result": {enc[r]}}}'
+            for i, op, a1, a2, r in zip(self._ids, self._ops, self._arg1, self._arg2, self._result)
+        ) + "]"
+
+    def nbytes(self):
+        """Bytes de los arreglos (sin contar los valores internados)."""
+        return sum(a.itemsize * len(a) for a in (self._ids, self._ops, self._arg1, self._arg2, self._result))
+
+    def __eq__(self, other):
+        if isinstance(other, QuadStore):
+            return len(self) == len(other) and all(a == b for a, b in zip(self.rows(), other.rows()))
+        if isinstance(other, list):
+            return len(self) == len(other) and all(q == o for q, o in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"QuadStore({len(self)} quads)"
@@ -0,0 +1,92 @@
+import heapq
+
+from src.utils.Temp import Temp
+from src.optimizer.Tac import ARG1, ARG2, RESULT, is_temp, uses, defined, to_rows, from_rows
+from src.optimizer.ControlFlowGraph import build_cfgs
+from src.optimizer.Liveness import Liveness
+
+
+def allocate_temps(quads):
+    """
+    Renombra los temporales virtuales del CodeGenerator (uno nuevo por cada
+    new_temp) para usar la menor cantidad posible en cada procedimiento: dos
+    temporales comparten número si sus rangos de vida no se cruzan.
+
+    Devuelve (QuadStore, {procedimiento: temporales que usa}); lo segundo es el
+    máximo de temporales vivos a la vez, o sea cuántos necesita su registro de
+    activación. Cada procedimiento numera desde t1.
+    """
+    rows = to_rows(quads)
+    frames = {}
+    rename = {}
+    for cfg in build_cfgs(quads):
+        slots, count = _assign(_live_ranges(cfg, rows))
+        rename.update(slots)
+        frames[cfg.name] = count
+
+    physical = {}
+    for row in rows:
+        for f in (ARG1, ARG2, RESULT):
+            v = row[f]
+            if isinstance(v, Temp):
+                n = rename[v.id]
+                t = physical.get(n)
+                if t is None:
+                    t = physical[n] = Temp(n)
+                row[f] = t
+    return from_rows(rows), frames
+
+
+def _live_ranges(cfg, rows):
+    """
+    Rango [inicio, fin] de cada temporal sobre las posiciones del procedimiento.
+    El cuádruplo i lee en 2i y escribe en 2i + 1, así el temporal que muere en i
+    puede dejarle su número al que nace en i (`t1 = t1 * c`).
+    """
+    live = Liveness(cfg, rows)
+    ranges = {}
+
+    def touch(t, p):
+        r = ranges.get(t.id)
+        if r is None:
+            ranges[t.id] = [p, p]
+        elif p < r[0]:
+            r[0] = p
+        elif p > r[1]:
+            r[1] = p
+
+    for block in cfg.blocks:
+        for t in live.live_in[block.id]:
+            touch(t, 2 * block.start)
+        for i, after in live.backwards(block):
+            row = rows[i]
+            for t in after:
+                touch(t, 2 * i + 1)
+                touch(t, 2 * i + 2)
+            for u in uses(row):
+                if is_temp(u):
+                    touch(u, 2 * i)
+            d = defined(row)
+            if d is not None and is_temp(d):
+                touch(d, 2 * i + 1)
+    return ranges
+
+
+def _assign(ranges):
+    # Coloreo de intervalos: en orden de inicio, el número libre más bajo. Usa tantos
+    # números como intervalos se superponen a la vez, que es el mínimo.
+    active = []  # (fin, número) de los intervalos abiertos
+    free = []
+    slots = {}
+    count = 0
+    for temp_id, (start, end) in sorted(ranges.items(), key=lambda kv: (kv[1][0], kv[0])):
+        while active and active[0][0] < start:
+            heapq.heappush(free, heapq.heappop(active)[1])
+        if free:
+            n = heapq.heappop(free)
+        else:
+            count += 1
+            n = count
+        slots[temp_id] = n
+        heapq.heappush(active, (end, n))
+    return slots, count
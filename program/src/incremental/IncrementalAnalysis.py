@@ -0,0 +1,354 @@
+import re
+from antlr4 import ParseTreeWalker # type: ignore
+from antlr4.tree.Tree import TerminalNode # type: ignore
+from CompiscriptParser import CompiscriptParser
+from src.utils.Scope import Scope, ClassSymbol
+from src.utils.Temp import TempManager
+from src.symbolTable.SymbolTableBuilder import SymbolTableBuilder
+from src.typeChecker.TypeChecker import TypeChecker
+from src.codeGenerator.CodeGenerator import CodeGenerator
+
+_ERROR_LOC = re.compile(r"\[line (\d+):(.*)", re.S)
+
+# Etiquetas numeradas con el contador de CodeGenerator.new_label; al reutilizar
+# el TAC de una sentencia que se movió hay que desplazarlas.
+_SEQ_LABEL = re.compile(r"(L[a-z_]+_)(\d+)$")
+_LABEL_OPS = {"label", "goto", "ifFalse", "ifTrue", "trybegin"}
+
+_DECLARATIONS = (
+    CompiscriptParser.VariableDeclarationContext,
+    CompiscriptParser.ConstantDeclarationContext,
+    CompiscriptParser.FunctionDeclarationContext,
+    CompiscriptParser.ClassDeclarationContext,
+)
+
+
+class _TrackingScope(Scope):
+    # Scope global que anota qué nombres se resuelven y declaran mientras se analiza cada sentencia
+    def __init__(self, parent=None, name="<scope>", owner=None):
+        super().__init__(parent, name, owner)
+        self.reads = None
+        self.defines = None
+
+    def resolve(self, name):
+        if self.reads is not None:
+            self.reads.add(name)
+        return super().resolve(name)
+
+    def define(self, sym):
+        if self.defines is not None:
+            self.defines.add(sym.name)
+        return super().define(sym)
+
+
+class _Unit:
+    """Lo que se guarda de una sentencia top-level entre análisis."""
+
+    def __init__(self, node):
+        self.node = node
+        self.defines = declared_names(node)
+        self.reads = set()
+        self.scope_keys = []      # contextos que la sentencia agregó a builder.scopes
+        self.global_syms = []     # símbolos que definió en el scope global, en orden
+        self.owned_scopes = []
+        self.owned_syms = []
+        self.built = None         # estado de sus scopes/símbolos al terminar la tabla de símbolos
+        self.checked = None       # ... y al terminar el type check
+        self.foreign = []         # (símbolo ajeno, ty, address, superclass) que modificó su type check
+        self.builder_errors = []
+        self.checker_errors = []
+        self.code = None          # (pos, label_counter, temps, quads, label_counter_out, temps_out)
+        self.members = False      # su TAC usa miembros de objetos (getprop/callvirt): depende de las clases
+
+
+class IncrementalAnalyzer:
+    """
+    Tabla de símbolos, type check y TAC incrementales sobre las sentencias top-level.
+
+    Cada sentencia (identificada por su nodo, que IncrementalDocument conserva si no
+    la re-parseó) recuerda qué nombres globales declara y cuáles resuelve a través
+    del scope global. Tras una edición se vuelven a analizar las sentencias nuevas y,
+    transitivamente, las que leen o redeclaran algo que ellas declaran; las demás se
+    reproducen en orden desde lo guardado (símbolos, scopes, errores y TAC), de modo
+    que el resultado es el mismo que el de un análisis completo.
+    """
+
+    def __init__(self):
+        self._units = {}  # nodo -> _Unit
+        self.builder = None
+        self.global_scope = None
+        self.rebuilt = 0
+        self.reused = 0
+        self.code_reused = 0
+
+    # Fases (mismo orden que CompilerSession)
+    def build_symbols(self, tree, errors):
+        nodes = list(tree.children or [])
+        if self.builder is None:
+            self.builder = SymbolTableBuilder(errors)
+            self.global_scope = _TrackingScope(None, "global")
+            self.builder.globalScope = self.builder.current = self.global_scope
+        self.builder.errors = errors
+        self.builder.scopes[tree] = self.global_scope
+
+        dirty, names, readers = self._dirty_units(nodes)
+        err_start = len(errors.errors)
+        while True:
+            self._build_pass(nodes, dirty, errors)
+            # Una declaración anidada (p. ej. dentro de un switch) también cae en el
+            # scope global; si apareció un nombre nuevo, se extiende el cierre y se repite.
+            extra = set()
+            for node in dirty:
+                extra |= self._units[node].defines - names
+            if not extra:
+                break
+            before = len(dirty)
+            names |= extra
+            self._close(dirty, names, readers, list(extra))
+            if len(dirty) == before:
+                break
+            del errors.errors[err_start:]
+
+        self._order = nodes
+        self._dirty = dirty
+        self.rebuilt = len(dirty)
+        self.reused = len(nodes) - self.rebuilt
+        return self.builder
+
+    def _build_pass(self, nodes, dirty, errors):
+        builder = self.builder
+        gscope = self.global_scope
+        gscope.symbols = {}
+        gscope.offset = 0
+        walker = ParseTreeWalker()
+        for node in nodes:
+            unit = self._units[node]
+            if node not in dirty:
+                _restore(unit.built, gscope)
+                for sym in unit.global_syms:
+                    gscope.define(sym)
+                _extend_errors(errors, unit.builder_errors, node)
+                continue
+
+            for key in unit.scope_keys:
+                builder.scopes.pop(key, None)
+            keys_before = set(builder.scopes)
+            defined_before = set(gscope.symbols)
+            err_start = len(errors.errors)
+
+            unit.reads = set()
+            defines = set()
+            gscope.reads, gscope.defines = unit.reads, defines
+            builder.current = gscope
+            walker.walk(builder, node)
+            gscope.reads = gscope.defines = None
+            unit.defines = declared_names(node) | defines
+
+            unit.scope_keys = [k for k in builder.scopes if k not in keys_before]
+            unit.owned_scopes = [builder.scopes[k] for k in unit.scope_keys]
+            unit.global_syms = [s for n, s in gscope.symbols.items() if n not in defined_before]
+            unit.owned_syms = list(unit.global_syms)
+            seen = set(map(id, unit.owned_syms))
+            for sc in unit.owned_scopes:
+                for sym in sc.symbols.values():
+                    if id(sym) not in seen:
+                        seen.add(id(sym))
+                        unit.owned_syms.append(sym)
+            unit.built = _snapshot(unit)
+            unit.builder_errors = _relative_errors(errors.errors[err_start:], node)
+
+    def type_check(self, errors, parser):
+        checker = TypeChecker(self.builder.scopes, self.global_scope, errors, parser)
+        gscope = self.global_scope
+        for node in self._order:
+            unit = self._units[node]
+            if node not in self._dirty:
+                _restore(unit.checked, gscope)
+                for sym, ty, address, superclass in unit.foreign:
+                    sym.ty = ty
+                    if address is not None:
+                        sym.address = address
+                    if isinstance(sym, ClassSymbol):
+                        sym.superclass = superclass
+                _extend_errors(errors, unit.checker_errors, node)
+                continue
+
+            candidates = self._foreign_candidates(unit)
+            before = [(s, s.ty, s.address, getattr(s, "superclass", None)) for s in candidates]
+            err_start = len(errors.errors)
+
+            gscope.reads = unit.reads
+            checker.current = gscope
+            checker.visit(node)
+            gscope.reads = None
+
+            unit.checked = _snapshot(unit)
+            # La dirección solo se guarda si este type check la cambió: la de los
+            # globales la decide el orden de define() en la tabla de símbolos.
+            unit.foreign = [(s, s.ty, s.address if s.address != address else None,
+                             getattr(s, "superclass", None))
+                            for s, ty, address, superclass in before
+                            if s.ty is not ty or s.address != address
+                            or getattr(s, "superclass", None) is not superclass]
+            unit.checker_errors = _relative_errors(errors.errors[err_start:], node)
+        return checker
+
+    def generate(self, method_receivers=None):
+        # El TAC no depende de los símbolos: una sentencia se reutiliza si su nodo es
+        # el mismo; solo se desplazan ids, etiquetas y temporales (virtuales). Salvo
+        # las llamadas a métodos: si son callvirt (y con qué slot) o getprop + call
+        # depende de las clases, así que una sentencia que usa miembros de objetos y
+        # se volvió a chequear se genera de nuevo.
+        generator = CodeGenerator(TempManager(), method_receivers)
+        temps = generator.temp_manager
+        self.code_reused = 0
+        for node in self._order:
+            unit = self._units[node]
+            cached = unit.code
+            if cached is not None and not (unit.members and node in self._dirty):
+                pos, labels, first_temp, quads, labels_out, temps_out = cached
+                dpos = generator.counter - pos
+                dlabel = generator.label_counter - labels
+                dtemp = temps.counter - first_temp
+                if dpos or dlabel or dtemp:
+                    quads = quads.shifted(dpos, lambda label: _relabel(label, dlabel), _LABEL_OPS, dtemp)
+                    unit.code = (generator.counter, generator.label_counter, temps.counter, quads,
+                                 labels_out + dlabel, temps_out + dtemp)
+                generator.quadruples.extend(quads)
+                generator.counter += len(quads)
+                generator.label_counter = unit.code[4]
+                temps.counter = unit.code[5]
+                self.code_reused += 1
+                continue
+
+            start, labels, first_temp = generator.counter, generator.label_counter, temps.counter
+            generator.visit(node)
+            quads = generator.quadruples.slice(start)
+            unit.code = (start, labels, first_temp, quads, generator.label_counter, temps.counter)
+            unit.members = any(row[1] in ("getprop", "callvirt") for row in quads.rows())
+        generator.allocate_temps()
+        return generator
+
+    # Dependencias
+    def _dirty_units(self, nodes):
+        current = set(nodes)
+        removed = [u for n, u in self._units.items() if n not in current]
+        for unit in removed:
+            for key in unit.scope_keys:
+                self.builder.scopes.pop(key, None)
+            del self._units[unit.node]
+
+        dirty = set()
+        names = set()
+        for unit in removed:
+            names |= unit.defines
+        for node in nodes:
+            if node not in self._units:
+                unit = self._units[node] = _Unit(node)
+                dirty.add(node)
+                names |= unit.defines
+
+        # Quien lee o redeclara un nombre depende de todas las sentencias que lo declaran
+        readers = {}
+        for node in nodes:
+            unit = self._units[node]
+            for name in unit.reads | unit.defines:
+                readers.setdefault(name, []).append(node)
+
+        self._close(dirty, names, readers, list(names))
+        return dirty, names, readers
+
+    def _close(self, dirty, names, readers, pending):
+        while pending:
+            name = pending.pop()
+            for node in readers.get(name, ()):
+                if node in dirty:
+                    continue
+                dirty.add(node)
+                for n in self._units[node].defines - names:
+                    names.add(n)
+                    pending.append(n)
+
+    def _foreign_candidates(self, unit):
+        # Un type check toca símbolos de otra sentencia por dos caminos: copiar los
+        # miembros heredados (define les cambia address) y resolver por nombre una
+        # clase o global que ya existía (inferencia de tipo, superclass). Ambos pasan
+        # por nombres globales que la sentencia lee o declara.
+        owned = set(map(id, unit.owned_syms))
+        out = []
+        for name in unit.reads | unit.defines:
+            sym = self.global_scope.symbols.get(name)
+            if sym is None:
+                continue
+            if id(sym) not in owned:
+                out.append(sym)
+            if isinstance(sym, ClassSymbol) and sym.scope is not None:
+                out.extend(s for s in sym.scope.symbols.values() if id(s) not in owned)
+        return out
+
+
+def declared_names(node):
+    """Nombres que una sentencia top-level declara en el scope global."""
+    if isinstance(node, TerminalNode) or not node.getChildCount():
+        return set()
+    decl = node.getChild(0)
+    if isinstance(decl, _DECLARATIONS) and decl.Identifier():
+        ident = decl.Identifier()
+        ident = ident[0] if isinstance(ident, list) else ident
+        return {ident.getText()}
+    return set()
+
+
+def _snapshot(unit):
+    scopes = [(sc, dict(sc.symbols), sc.offset) for sc in unit.owned_scopes]
+    # La dirección de los globales la vuelve a asignar define() al reproducir el orden
+    globals_ = set(map(id, unit.global_syms))
+    syms = [(s, s.ty, None if id(s) in globals_ else s.address, getattr(s, "superclass", None))
+            for s in unit.owned_syms]
+    return scopes, syms
+
+
+def _restore(snapshot, gscope):
+    scopes, syms = snapshot
+    for sc, symbols, offset in scopes:
+        sc.symbols = dict(symbols)
+        sc.offset = offset
+        if isinstance(sc.owner, ClassSymbol):
+            sc.owner.invalidate_members()
+    for sym, ty, address, superclass in syms:
+        sym.ty = ty
+        if address is not None:
+            sym.address = address
+        if isinstance(sym, ClassSymbol):
+            sym.superclass = superclass
+
+
+def _start_line(node):
+    tok = node.symbol if isinstance(node, TerminalNode) else node.start
+    return tok.line if tok is not None else 0
+
+
+def _relative_errors(errors, node):
+    # Los errores guardan la línea relativa al inicio de la sentencia: si la
+    # sentencia se desplazó por una edición anterior se vuelven a numerar.
+    base = _start_line(node)
+    out = []
+    for e in errors:
+        m = _ERROR_LOC.match(e)
+        out.append((int(m.group(1)) - base, m.group(2)) if m else (None, e))
+    return out
+
+
+def _extend_errors(errors, saved, node):
+    base = _start_line(node)
+    for dline, rest in saved:
+        errors.errors.append(rest if dline is None else f"[line {base + dline}:{rest}")
+
+
+def _relabel(label, dlabel):
+    if not isinstance(label, str):
+        return label
+    m = _SEQ_LABEL.match(label)
+    if m:
+        return f"{m.group(1)}{int(m.group(2)) + dlabel}"
+    return label
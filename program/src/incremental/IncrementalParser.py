@@ -0,0 +1,335 @@
+import bisect
+import time
+from antlr4 import InputStream, CommonTokenStream, Token # type: ignore
+from antlr4.ListTokenSource import ListTokenSource # type: ignore
+from antlr4.tree.Tree import TerminalNode, ErrorNode # type: ignore
+from CompiscriptLexer import CompiscriptLexer
+from src.parser.TwoStageParser import ParseResult, parse_program, parse_tokens
+
+class _TokenList:
+    # Sustituto mínimo de CommonTokenStream para ParseResult: solo expone `tokens`
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+
+class EditStats:
+    def __init__(self, mode, seconds, reparsed=0, relexed=0, reason=None):
+        self.mode = mode            # "incremental" o "full"
+        self.seconds = seconds
+        self.reparsed = reparsed    # sentencias top-level re-parseadas
+        self.relexed = relexed      # tokens re-lexeados
+        self.reason = reason        # por qué no se pudo hacer incremental
+
+    def to_json(self):
+        return {
+            "mode": self.mode,
+            "ms": round(self.seconds * 1000, 3),
+            "reparsed": self.reparsed,
+            "relexed": self.relexed,
+            "reason": self.reason,
+        }
+
+
+class IncrementalDocument:
+    """
+    Documento con su token stream y su árbol `program` vivos entre ediciones.
+
+    `program: statement* EOF` hace que cada sentencia top-level sea una unidad
+    independiente: ante una edición se re-lexea y re-parsea solo la ventana de
+    sentencias que toca (más una vecina a cada lado, por si la edición une o
+    separa sentencias) y se empalma en el árbol existente. Los tokens que quedan
+    después del cambio solo se desplazan (offset/línea/columna).
+
+    Mientras la región tenga errores de sintaxis, la recuperación de errores
+    queda confinada a ella (las sentencias vecinas no se ven afectadas, como en
+    cualquier editor). Las sentencias con errores vecinas a la edición entran en
+    la región, así que una vez corregida el árbol coincide con el de un parse
+    completo. Un `/*` sin cerrar extiende la región hasta el final del documento.
+    """
+
+    def __init__(self, text="", error_listeners=None):
+        self.error_listeners = error_listeners
+        self.text = ""
+        self.tokens = []
+        self.tree = None
+        self.parser = None
+        self.mode = None
+        self.last_edit = None
+        self._open_comment = False
+        self._full_parse(text)
+
+    # API
+    def update(self, new_text):
+        """Recibe el buffer completo nuevo y lo traduce a una única edición (prefijo/sufijo común)."""
+        old = self.text
+        if new_text == old:
+            self.last_edit = EditStats("incremental", 0.0)
+            return self.last_edit
+        prefix = _common_prefix(old, new_text)
+        suffix = _common_suffix(old, new_text, prefix)
+        return self.apply_edit(prefix, len(old) - suffix, new_text[prefix:len(new_text) - suffix])
+
+    def apply_edit(self, start, end, replacement):
+        """Reemplaza text[start:end] por `replacement` y actualiza tokens/árbol."""
+        t0 = time.perf_counter()
+        new_text = self.text[:start] + replacement + self.text[end:]
+        reason = self._try_incremental(start, end, replacement, new_text)
+        if reason is None:
+            self.last_edit.seconds = time.perf_counter() - t0
+            return self.last_edit
+
+        self._full_parse(new_text)
+        self.last_edit = EditStats("full", time.perf_counter() - t0, reparsed=len(self.tree.children) - 1,
+                                   relexed=len(self.tokens), reason=reason)
+        return self.last_edit
+
+    def parse_result(self):
+        """ParseResult equivalente al de parse_program, para alimentar CompilerSession."""
+        seconds = self.last_edit.seconds if self.last_edit else 0.0
+        return ParseResult(None, _TokenList(self.tokens), self.parser, self.tree, self.mode, seconds, 0.0)
+
+    # Parse completo
+    def _full_parse(self, text):
+        t0 = time.perf_counter()
+        parsed = parse_program(InputStream(text), self.error_listeners)
+        parsed.tokens.fill()
+        self.text = text
+        self.tokens = list(parsed.tokens.tokens)
+        _materialize(self.tokens)
+        self.tree = parsed.tree
+        self.parser = parsed.parser
+        self.mode = parsed.mode
+        self._open_comment = _open_comment(self.tokens)
+        self.last_edit = EditStats("full", time.perf_counter() - t0, reparsed=len(self.tree.children) - 1,
+                                   relexed=len(self.tokens))
+
+    # Parse incremental
+    def _try_incremental(self, start, end, replacement, new_text):
+        if self._open_comment:
+            return "comentario /* sin cerrar"
+        # `/*` y `*/` cambian el lexeo a distancia (hacia adelante y hacia atrás)
+        if ("/*" in self.text[max(0, start - 1):end + 1] or "*/" in self.text[max(0, start - 1):end + 1]
+                or "/*" in new_text[max(0, start - 1):start + len(replacement) + 1]
+                or "*/" in new_text[max(0, start - 1):start + len(replacement) + 1]):
+            return "cambio en delimitadores de comentario"
+
+        children = self.tree.children or []
+        nodes = children[:-1]  # el último hijo es siempre EOF
+        if not nodes:
+            return "documento vacío"
+        spans = [_span(n) for n in nodes]
+        if any(s is None for s in spans):
+            return "árbol con nodos sin rango"
+        if any(spans[i][0] > spans[i + 1][0] for i in range(len(spans) - 1)):
+            return "árbol con nodos fuera de orden"
+
+        delta = len(replacement) - (end - start)
+
+        # Nodos que tocan la edición (contando los adyacentes) y uno más a cada lado
+        first = bisect.bisect_left(spans, start - 1, key=lambda s: s[1])
+        last = bisect.bisect_right(spans, end, key=lambda s: s[0]) - 1
+        lo = first - 1
+        hi = max(last, first - 1) + 1
+        n = len(nodes)
+
+        # Las sentencias vacías (de la recuperación de errores) apuntan al token de
+        # la sentencia siguiente: la región no puede empezar ni terminar en ellas.
+        # Tampoco en una con errores: la recuperación pudo partir una sentencia en
+        # varias, y una vez corregida hay que volver a parsear todos los pedazos.
+        def empty(i):
+            return spans[i][1] < spans[i][0]
+        broken = {}
+        def bad(i):
+            if i not in broken:
+                broken[i] = empty(i) or _has_errors(nodes[i])
+            return broken[i]
+        while lo >= 0 and (bad(lo) or (lo > 0 and bad(lo - 1))):
+            lo -= 1
+        while hi < n and bad(hi):
+            hi += 1
+
+        region_start = spans[lo][0] if lo >= 0 else 0
+        tok_lo = _first_token(nodes[lo]).tokenIndex if lo >= 0 else 0
+
+        # Posición (línea, columna) donde empieza la región: no cambia con la edición
+        if lo >= 0:
+            first_tok = _first_token(nodes[lo])
+            line, column = first_tok.line, first_tok.column
+        else:
+            line, column = 1, 0
+
+        # Un `//` o un string sin cerrar se extienden hasta el fin de línea: la región
+        # tiene que terminar justo antes de un salto de línea para poder lexearla aislada.
+        while hi < n and not _line_break_follows(self.text, spans[hi][1] + 1,
+                                                 spans[hi + 1][0] if hi + 1 < n else len(self.text)):
+            hi += 1
+        region_end_old = spans[hi][1] + 1 if hi < n else len(self.text)
+        region_end_new = region_end_old + delta
+        region_tokens = self._relex(new_text, region_start, region_end_new, line, column)
+        if _open_comment(region_tokens):
+            return "comentario /* sin cerrar"
+
+        lo_i = max(lo, 0)
+        hi_i = min(hi, n - 1)
+        tok_end = _last_token(nodes[hi]).tokenIndex + 1 if hi < n else len(self.tokens) - 1
+
+        region = parse_tokens(CommonTokenStream(ListTokenSource(region_tokens)), self.error_listeners)
+        new_nodes = (region.tree.children or [])[:-1]
+        # Una sentencia vacía al final de la región arranca en el EOF de la región,
+        # que no existe en el documento: en ese caso no se puede empalmar.
+        for node in new_nodes:
+            tok = _first_token(node)
+            if not (0 <= tok.tokenIndex < len(region_tokens) and region_tokens[tok.tokenIndex] is tok):
+                return "la región termina en una sentencia incompleta"
+
+        # Desplazar los tokens que siguen a la región (incluye EOF)
+        old_end_line, old_end_col = _advance(line, column, self.text, region_start, region_end_old)
+        new_end_line, new_end_col = _advance(line, column, new_text, region_start, region_end_new)
+        line_delta = new_end_line - old_end_line
+        col_delta = new_end_col - old_end_col
+        tail = self.tokens[tok_end:]
+        for tok in tail:
+            if tok.line == old_end_line:
+                tok.column += col_delta
+            tok.line += line_delta
+            tok.start += delta
+            tok.stop += delta
+
+        # Empalmar tokens y renumerar desde la región
+        self.tokens = self.tokens[:tok_lo] + region_tokens + tail
+        for i in range(tok_lo, len(self.tokens)):
+            self.tokens[i].tokenIndex = i
+
+        # Las sentencias vacías que siguen a la región apuntaban (stop) a un token reemplazado
+        k = hi + 1
+        while k < n and empty(k):
+            before = nodes[k].start.tokenIndex - 1
+            nodes[k].stop = self.tokens[before] if before >= 0 else None
+            k += 1
+
+        # Empalmar sentencias en el árbol existente
+        for node in new_nodes:
+            node.parentCtx = self.tree
+        self.tree.children[lo_i:hi_i + 1] = new_nodes
+        if self.tree.children:
+            self.tree.start = _first_token(self.tree.children[0])
+        # Como en ANTLR, stop es el último token consumido antes de EOF
+        self.tree.stop = self.tokens[-2] if len(self.tokens) > 1 else None
+
+        self.text = new_text
+        self.mode = "INCR"
+        self.last_edit = EditStats("incremental", 0.0, reparsed=len(new_nodes), relexed=len(region_tokens))
+        return None
+
+    def _relex(self, new_text, region_start, region_end, line, column):
+        chunk = new_text[region_start:region_end]
+        lexer = CompiscriptLexer(InputStream(chunk))
+        lexer.line, lexer.column = line, column
+
+        out = []
+        while True:
+            tok = lexer.nextToken()
+            if tok.type == Token.EOF:
+                break
+            _materialize((tok,))
+            tok.start += region_start
+            tok.stop += region_start
+            tok.source = (None, None)  # el texto ya quedó fijado; no retener el chunk
+            out.append(tok)
+        return out
+
+
+def _materialize(tokens):
+    # Fija el texto de cada token: después sus offsets se desplazan y ya no
+    # apuntarían al texto correcto del InputStream original.
+    for tok in tokens:
+        tok._text = tok.text
+
+
+def _span(node):
+    if isinstance(node, TerminalNode):
+        tok = node.symbol
+        return (tok.start, tok.stop)
+    start, stop = node.start, node.stop
+    if start is None:
+        return None
+    if stop is None or stop.tokenIndex < start.tokenIndex:
+        # Sentencia vacía que dejó la recuperación de errores: rango de ancho cero
+        return (start.start, start.start - 1)
+    return (start.start, stop.stop)
+
+
+def _has_errors(node):
+    """¿Quedó algo de la recuperación de errores (nodos de error, tokens faltantes)?"""
+    if isinstance(node, ErrorNode):
+        return True
+    if isinstance(node, TerminalNode):
+        return node.symbol.tokenIndex < 0  # token que el parser inventó (<missing ...>)
+    if node.exception is not None:
+        return True
+    return any(_has_errors(c) for c in node.children or ())
+
+
+def _first_token(node):
+    return node.symbol if isinstance(node, TerminalNode) else node.start
+
+
+def _last_token(node):
+    if isinstance(node, TerminalNode):
+        return node.symbol
+    if node.stop is None or node.stop.tokenIndex < node.start.tokenIndex:
+        return _TokenBefore(node.start)
+    return node.stop
+
+
+class _TokenBefore:
+    # "Token anterior" de una sentencia vacía, solo para calcular índices
+    def __init__(self, tok):
+        self.tokenIndex = tok.tokenIndex - 1
+
+
+def _open_comment(tokens):
+    # Un `/*` sin `*/` no es error léxico: se lexea como `/` seguido de `*`
+    prev = None
+    for tok in tokens:
+        if prev is not None and prev.text == "/" and tok.text == "*" and tok.start == prev.stop + 1:
+            return True
+        prev = tok
+    return False
+
+
+def _line_break_follows(text, pos, limit):
+    """True si entre pos y limit hay un salto de línea precedido solo por espacios."""
+    nl = text.find("\n", pos, limit)
+    return nl != -1 and not text[pos:nl].strip()
+
+
+def _advance(line, column, text, start, end):
+    """(línea, columna) de text[end] sabiendo que text[start] está en (line, column)."""
+    nl = text.count("\n", start, end)
+    if nl == 0:
+        return line, column + (end - start)
+    return line + nl, end - text.rfind("\n", start, end) - 1
+
+
+def _common_prefix(a, b):
+    # Búsqueda binaria comparando slices: las comparaciones corren en C
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a, b, prefix):
+    lo, hi = 0, min(len(a), len(b)) - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
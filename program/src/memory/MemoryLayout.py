@@ -0,0 +1,262 @@
+from src.utils.Scope import ClassSymbol
+from src.utils.Types import WORD, Type, ArrayType, size_of, align_of, align_up
+from src.vm.Layout import MAIN, procedure_of
+
+# Alineación de los registros de activación (como la pila de MIPS)
+FRAME_ALIGN = 8
+# Palabras de enlace arriba de cada marco: dirección de retorno y $fp anterior
+LINK_WORDS = 2
+
+
+class Slot:
+    """Lugar de una variable, parámetro o campo: desplazamiento y bytes que ocupa."""
+
+    __slots__ = ("name", "offset", "size", "align", "ty")
+
+    def __init__(self, name, offset, size, align, ty):
+        self.name = name
+        self.offset = offset
+        self.size = size
+        self.align = align
+        self.ty = ty
+
+    def __repr__(self):
+        return f"{self.name}@{self.offset}:{self.size}"
+
+
+class FrameLayout:
+    """
+    Registro de activación de un procedimiento, de abajo hacia arriba a partir de
+    la base del marco ($sp después del prólogo):
+
+        locales | temporales en memoria | enlaces (retorno y $fp anterior)
+
+    `locals` tiene los desplazamientos desde la base. Los parámetros los apila
+    quien llama justo arriba del marco, así que `params` tiene desplazamientos
+    desde el tope ($fp, >= 0); cada uno ocupa al menos una palabra (se promueven,
+    como en la convención de MIPS) y el primero queda más arriba. Un método
+    recibe `this` como primer parámetro.
+
+    El de MAIN describe el área de datos de las globales (`locals`); sus
+    temporales sí van en la pila.
+    """
+
+    def __init__(self, label, func, params, locals_, locals_size, temps=0, links=LINK_WORDS):
+        self.label = label
+        self.func = func                # FuncSymbol (None para MAIN)
+        self.params = params            # nombre -> Slot, desde $fp
+        self.locals = locals_           # nombre -> Slot, desde la base del marco
+        self.locals_size = locals_size
+        self.temps = temps              # temporales que pueden quedar en memoria
+        self.links = links
+
+    @property
+    def temp_base(self):
+        return align_up(self.locals_size, WORD)
+
+    def temp_offset(self, k):
+        """Desplazamiento (desde la base) del k-ésimo temporal guardado en memoria."""
+        return self.temp_base + WORD * k
+
+    @property
+    def size(self):
+        return align_up(self.temp_base + WORD * (self.temps + self.links), FRAME_ALIGN)
+
+    @property
+    def params_size(self):
+        return sum(align_up(s.size, WORD) for s in self.params.values())
+
+    def with_temps(self, temps, links=LINK_WORDS):
+        """El mismo marco con otra cantidad de temporales y palabras de enlace."""
+        return FrameLayout(self.label, self.func, self.params, self.locals, self.locals_size, temps, links)
+
+    def describe(self):
+        head = "datos globales" if self.label == MAIN else "marco"
+        lines = [f"{self.label}: {head} de {self.locals_size if self.label == MAIN else self.size} bytes"]
+        for s in sorted(self.params.values(), key=lambda s: -s.offset):
+            lines.append(f"  param {s.name}: $fp+{s.offset} ({s.size} bytes, {type_name(s.ty)})")
+        for s in sorted(self.locals.values(), key=lambda s: s.offset):
+            kind = "global" if self.label == MAIN else "local"
+            lines.append(f"  {kind} {s.name}: +{s.offset} ({s.size} bytes, {type_name(s.ty)})")
+        if self.temps and self.label == MAIN:
+            lines.append(f"  temporales: {self.temps} x {WORD} bytes en la pila")
+        elif self.temps:
+            lines.append(f"  temporales: +{self.temp_base} ({self.temps} x {WORD} bytes)")
+        return lines
+
+
+class ObjectLayout:
+    """
+    Campos de una instancia en desplazamientos fijos. La palabra 0 es la cabecera
+    (la clase del objeto, o su vtable); después van los campos heredados, en los
+    mismos lugares que en la clase base, y al final los propios ordenados por
+    alineación para que no quede relleno entre ellos. Un campo propio que se
+    llama como uno heredado reusa su lugar si cabe.
+    """
+
+    def __init__(self, name, base, fields, size):
+        self.name = name
+        self.base = base        # ObjectLayout de la superclase o None
+        self.fields = fields    # nombre -> Slot, en orden de desplazamiento
+        self.size = size
+
+    def field(self, name):
+        return self.fields.get(name)
+
+    def describe(self):
+        base = f" : {self.base.name}" if self.base else ""
+        lines = [f"class {self.name}{base}: {self.size} bytes", f"  +0 cabecera ({WORD} bytes)"]
+        for s in self.fields.values():
+            lines.append(f"  +{s.offset} {s.name} ({s.size} bytes, {type_name(s.ty)})")
+        return lines
+
+
+def _slot_json(s):
+    return {"name": s.name, "offset": s.offset, "size": s.size, "type": type_name(s.ty)}
+
+
+class MemoryLayout:
+    def __init__(self, frames, objects):
+        self.frames = frames    # etiqueta del procedimiento -> FrameLayout
+        self.objects = objects  # nombre de la clase -> ObjectLayout
+
+    def frame(self, label):
+        return self.frames.get(label)
+
+    def object(self, name):
+        return self.objects.get(name)
+
+    def to_json(self):
+        return {
+            "frames": [{"name": f.label, "size": f.locals_size if f.label == MAIN else f.size,
+                        "params": [_slot_json(s) for s in f.params.values()],
+                        "locals": [_slot_json(s) for s in f.locals.values()],
+                        "temps": f.temps, "tempBase": f.temp_base} for f in self.frames.values()],
+            "objects": [{"name": o.name, "base": o.base.name if o.base else None, "size": o.size,
+                         "fields": [_slot_json(s) for s in o.fields.values()]} for o in self.objects.values()],
+        }
+
+    def describe(self):
+        lines = []
+        for frame in self.frames.values():
+            lines += frame.describe()
+        for obj in self.objects.values():
+            lines += obj.describe()
+        return lines
+
+
+def plan_memory(symbols, temps=None):
+    """
+    Tamaños reales y lugares fijos de todo lo que declara el programa, con los
+    tipos ya inferidos por el TypeChecker (los de Symbol.size/address son los
+    declarados). `temps` es {procedimiento: temporales} (p. ej. frame_temps):
+    cuántos reservar en cada marco por si ninguno queda en un registro.
+
+    Las locales de todos los bloques de un procedimiento van en un solo marco:
+    el TAC no distingue dos `x` de bloques distintos, así que comparten lugar
+    (con el tamaño del más grande).
+    """
+    temps = temps or {}
+    scopes = []
+    seen = set()
+    for scope in (symbols.globalScope, *symbols.scopes.values()):
+        if id(scope) not in seen:
+            seen.add(id(scope))
+            scopes.append(scope)
+
+    declared = {MAIN: {}}   # procedimiento -> nombre -> [tamaño, alineación, tipo, orden]
+    funcs = {MAIN: None}
+    methods = {}    # procedimiento -> ClassSymbol del método
+    classes = []
+    for scope in scopes:
+        proc = procedure_of(scope)
+        if scope.name.startswith("func ") and scope.parent is not None:
+            func = scope.parent.symbols.get(scope.name[len("func "):])
+            if getattr(func, "kind", None) == "func":
+                funcs[proc] = func
+                declared.setdefault(proc, {})
+                if isinstance(scope.parent.owner, ClassSymbol):
+                    methods[proc] = scope.parent.owner
+        for sym in scope.symbols.values():
+            if isinstance(sym, ClassSymbol) and id(sym) not in seen:
+                seen.add(id(sym))
+                classes.append(sym)
+            if getattr(sym, "kind", None) not in ("var", "const") or proc.startswith("class ") or sym.name == "this":
+                continue
+            names = declared.setdefault(proc, {})
+            size, align = size_of(sym.ty), align_of(sym.ty)
+            entry = names.get(sym.name)
+            if entry is None:
+                names[sym.name] = [size, align, sym.ty, len(names)]
+            else:
+                entry[0], entry[1] = max(entry[0], size), max(entry[1], align)
+                if entry[2] != sym.ty:
+                    entry[2] = None
+
+    frames = {}
+    for proc, names in declared.items():
+        func = funcs.get(proc)
+        params = _params(func, methods.get(proc))
+        locals_, size = _pack({n: e for n, e in names.items() if n not in params}, 0)
+        frames[proc] = FrameLayout(proc, func, params, locals_, size, temps.get(proc, 0))
+
+    objects = {}
+    for cls in classes:
+        _object(cls, objects)
+    return MemoryLayout(frames, objects)
+
+
+def type_name(ty):
+    if isinstance(ty, Type):
+        return ty.value
+    if isinstance(ty, ArrayType):
+        return type_name(ty.base) + "[]" * ty.dimensions
+    return getattr(ty, "name", "?")
+
+
+def _params(func, cls):
+    if func is None:
+        return {}
+    params = [(p.name, p.ty) for p in func.params]
+    if cls is not None:
+        params.insert(0, ("this", cls))
+    slots = {}
+    offset = 0
+    for name, ty in reversed(params):  # el último queda en $fp+0
+        size = align_up(size_of(ty), WORD)
+        offset = align_up(offset, align_of(ty))
+        slots[name] = Slot(name, offset, size, max(align_of(ty), WORD), ty)
+        offset += size
+    return dict(reversed(list(slots.items())))
+
+
+def _pack(entries, start):
+    """Acomoda {nombre: [tamaño, alineación, tipo, orden]} desde `start`; más alineados primero."""
+    slots = {}
+    offset = start
+    for name, (size, align, ty, _) in sorted(entries.items(), key=lambda kv: (-kv[1][1], kv[1][3])):
+        offset = align_up(offset, align)
+        slots[name] = Slot(name, offset, size, align, ty)
+        offset += size
+    return slots, offset
+
+
+def _object(cls, objects):
+    layout = objects.get(cls.name)
+    if layout is not None:
+        return layout
+    base = _object(cls.superclass, objects) if isinstance(cls.superclass, ClassSymbol) else None
+    fields = dict(base.fields) if base else {}
+    end = base.size if base else WORD
+    own = {}
+    for k, (name, sym) in enumerate(cls.fields.items()):
+        size = size_of(sym.ty)
+        inherited = fields.get(name)
+        if inherited is not None and size <= inherited.size:
+            continue
+        own[name] = [size, align_of(sym.ty), sym.ty, k]
+    packed, end = _pack(own, end)
+    fields.update(packed)
+    align = max([WORD] + [s.align for s in fields.values()])
+    layout = objects[cls.name] = ObjectLayout(cls.name, base, fields, align_up(end, align))
+    return layout
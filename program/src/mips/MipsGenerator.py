@@ -0,0 +1,860 @@
+from src.optimizer.Tac import literal, uses, defined
+from src.optimizer.ControlFlowGraph import build_procedure_cfg
+from src.optimizer.Liveness import Liveness
+from src.utils.Temp import Temp
+from src.utils.Types import Type, ArrayType
+from src.vm.Layout import MAIN, ProgramLayout, local_names, local_types, return_types
+from src.memory.MemoryLayout import FrameLayout, LINK_WORDS, plan_memory
+from src.mips.RegisterAllocator import CALLEE_SAVED, live_intervals, linear_scan
+
+# Registros que no reparte el allocator: operandos que están en memoria ($t8, $t9,
+# $a2), cuentas internas ($v1, $a3) y los de llamadas y syscalls ($v0, $a0, $a1)
+_INT, _STR, _NULL = Type.INT, Type.STRING, Type.NULL
+_COMPARE = {"<", "<=", ">", ">=", "==", "!="}
+_UNSUPPORTED = {
+    "class": "las clases no están soportadas", "endclass": "las clases no están soportadas",
+    "inherit": "la herencia no está soportada", "new": "los objetos no están soportados",
+    "getprop": "los objetos no están soportados", "setprop": "los objetos no están soportados",
+    "callvirt": "los objetos no están soportados",
+    "trybegin": "try/catch no está soportado", "tryend": "try/catch no está soportado",
+    "/": "la división no está soportada (siempre da float)",
+}
+
+# Rutinas del runtime: solo tocan $v0, $v1, $a0-$a3, $t8 y $t9, así lo que el
+# allocator dejó en $t0-$t7 y $s0-$s7 sobrevive a un jal a ellas
+RUNTIME = {
+    "_print_str": """
+_print_str:                 # imprime el string $a0 (null si es 0) y un fin de línea
+    bne $a0, $zero, _print_str_go
+    la $a0, _null
+_print_str_go:
+    li $v0, 4
+    syscall
+    li $a0, 10
+    li $v0, 11
+    syscall
+    jr $ra""",
+    "_itoa": """
+_itoa:                      # $v0 = string nuevo con el entero $a0
+    move $t8, $a0
+    li $a0, 12
+    li $v0, 9
+    syscall
+    addiu $t9, $v0, 11
+    sb $zero, 0($t9)
+    move $a1, $t8
+    bltz $a1, _itoa_loop0
+    subu $a1, $zero, $a1    # se trabaja en negativo: así cabe -2147483648
+_itoa_loop0:
+    li $a2, 10
+_itoa_loop:
+    div $a1, $a2
+    mfhi $a3
+    mflo $a1
+    subu $a3, $zero, $a3
+    addiu $a3, $a3, 48
+    addiu $t9, $t9, -1
+    sb $a3, 0($t9)
+    bne $a1, $zero, _itoa_loop
+    bgez $t8, _itoa_done
+    li $a3, 45
+    addiu $t9, $t9, -1
+    sb $a3, 0($t9)
+_itoa_done:
+    move $v0, $t9
+    jr $ra""",
+    "_concat": """
+_concat:                    # $v0 = string nuevo con $a0 seguido de $a1 (null se escribe "null")
+    bne $a0, $zero, _concat_a
+    la $a0, _null
+_concat_a:
+    bne $a1, $zero, _concat_b
+    la $a1, _null
+_concat_b:
+    move $t8, $a0
+_concat_len_a:
+    lbu $v1, 0($t8)
+    addiu $t8, $t8, 1
+    bne $v1, $zero, _concat_len_a
+    subu $a2, $t8, $a0
+    move $t8, $a1
+_concat_len_b:
+    lbu $v1, 0($t8)
+    addiu $t8, $t8, 1
+    bne $v1, $zero, _concat_len_b
+    subu $t8, $t8, $a1
+    addu $a2, $a2, $t8
+    move $a3, $a0
+    move $a0, $a2
+    li $v0, 9
+    syscall
+    move $t9, $v0
+_concat_copy_a:
+    lbu $v1, 0($a3)
+    beq $v1, $zero, _concat_copy_b
+    sb $v1, 0($t9)
+    addiu $a3, $a3, 1
+    addiu $t9, $t9, 1
+    j _concat_copy_a
+_concat_copy_b:
+    lbu $v1, 0($a1)
+    sb $v1, 0($t9)
+    addiu $a1, $a1, 1
+    addiu $t9, $t9, 1
+    bne $v1, $zero, _concat_copy_b
+    jr $ra""",
+    "_streq": """
+_streq:                     # $v0 = 1 si los strings $a0 y $a1 son iguales
+    beq $a0, $a1, _streq_yes
+    beq $a0, $zero, _streq_no
+    beq $a1, $zero, _streq_no
+_streq_loop:
+    lbu $v1, 0($a0)
+    lbu $t8, 0($a1)
+    bne $v1, $t8, _streq_no
+    addiu $a0, $a0, 1
+    addiu $a1, $a1, 1
+    bne $v1, $zero, _streq_loop
+_streq_yes:
+    li $v0, 1
+    jr $ra
+_streq_no:
+    move $v0, $zero
+    jr $ra""",
+    "_newarr": """
+_newarr:                    # $v0 = arreglo de $a0 elementos en null; la palabra 0 es el largo
+    bltz $a0, _err_size
+    move $t8, $a0
+    sll $a0, $a0, 2
+    addiu $a0, $a0, 4
+    li $v0, 9
+    syscall
+    sw $t8, 0($v0)
+    jr $ra""",
+}
+
+# Errores en ejecución: el mensaje (el mismo de la VirtualMachine) sin fin de línea y exit2(1)
+ERRORS = {
+    "_err_index": ("índice fuera de rango: ", True),
+    "_err_size": ("tamaño de arreglo inválido: ", True),
+    "_err_mod": ("módulo entre cero", False),
+    "_err_not_array": ("null no es un arreglo", False),
+    "_err_no_length": ("null no tiene longitud", False),
+}
+
+
+class MipsError(Exception):
+    """El programa usa algo que el backend MIPS no traduce (clases, try/catch, float...)."""
+
+
+class ProcAllocation:
+    """Resultado de la asignación de registros de un procedimiento."""
+
+    def __init__(self, label, intervals, frame, saved):
+        self.label = label
+        self.registers = {iv.name: iv.register for iv in intervals if iv.register is not None}
+        self.spilled = [iv.name for iv in intervals if iv.register is None]
+        self.frame = frame      # bytes del registro de activación
+        self.saved = saved      # registros $s que guarda el prólogo
+
+
+class MipsProgram:
+    def __init__(self, source, allocations):
+        self.source = source
+        self.allocations = allocations  # procedimiento -> ProcAllocation
+
+    def listing(self):
+        return self.source.splitlines()
+
+
+def compile_mips(quads, symbols, allocate=True):
+    """
+    Traduce el TAC a ensamblador MIPS32 (el de MARS/SPIM; lo corre MipsSimulator).
+    Cada procedimiento pasa por su CFG y su análisis de vida: temporales y locales
+    van a registros por barrido lineal (RegisterAllocator), y lo que no cabe vive
+    en su lugar del registro de activación, el que calcula SymbolTableBuilder
+    (MemoryLayout.plan_memory: un bool ocupa un byte). Las variables del
+    top-level que usa alguna función están en el segmento de datos ($gp + address).
+
+    Convención de llamada: los argumentos se apilan en orden (el primero queda más
+    arriba), el resultado vuelve en $v0 y el llamado guarda $ra, $fp y los $s que
+    usa. Los valores son palabras: enteros y booleanos, y punteros para strings
+    (terminados en 0) y arreglos (el largo en la primera palabra); null es 0.
+
+    Soporta funciones (anidadas si no usan locales de la función que las encierra),
+    enteros, booleanos, strings, arreglos y print. Clases, try/catch, floats y
+    clausuras levantan MipsError. Con allocate=False todo vive en memoria (sirve
+    para medir cuánto ahorra la asignación de registros).
+    """
+    return _Generator(quads, symbols, allocate).program
+
+
+class _Generator:
+    def __init__(self, quads, symbols, allocate):
+        self.allocate = allocate
+        layout = self.layout = ProgramLayout(quads)
+        self.quads = quads
+        self.rows = layout.rows
+        self.locals = local_names(symbols)
+        self.types = local_types(symbols)
+        self.memory = plan_memory(symbols)
+        self.returns = return_types(symbols)
+        self.strings = {}       # contenido -> etiqueta en .data
+        self.runtime = set()    # rutinas y errores que se usan
+        self.labels = 0
+
+        for label, proc in layout.procs.items():
+            if proc.cls is not None:
+                raise MipsError(f"{label}: las clases no están soportadas en MIPS")
+            for i in proc.indices:
+                op = self.rows[i][1]
+                if op in _UNSUPPORTED:
+                    raise MipsError(f"{label}: {_UNSUPPORTED[op]} en MIPS (cuádruplo {i}: {op})")
+
+        self.globals = self._globals()
+        text, allocations = [], {}
+        for label in [MAIN] + [l for l in layout.procs if l != MAIN]:
+            proc = _Procedure(self, label)
+            text += proc.emit()
+            allocations[label] = proc.allocation
+        self.program = MipsProgram(self._source(text), allocations)
+
+    def own_locals(self, label):
+        proc = self.layout.procs[label]
+        return set(self.locals.get(label, ())) | set(proc.params)
+
+    def _globals(self):
+        # Variables del top-level que lee o escribe otro procedimiento: viven en memoria
+        shared = set()
+        main = self.own_locals(MAIN) | self.layout.procs[MAIN].written
+        for label, proc in self.layout.procs.items():
+            if label == MAIN:
+                continue
+            mine = self.own_locals(label)
+            for i in proc.indices:
+                row = self.rows[i]
+                names = [x for x in uses(row) + [defined(row)] if _is_name(x)]
+                if row[1] == "call" and row[2] in names:
+                    names.remove(row[2])
+                for x in names:
+                    if x in mine:
+                        continue
+                    if x not in main:
+                        raise MipsError(f"{label}: usa '{x}' de la función que la encierra "
+                                        f"(las clausuras no están soportadas en MIPS)")
+                    shared.add(x)
+        return shared
+
+    def string(self, value):
+        label = self.strings.get(value)
+        if label is None:
+            label = self.strings[value] = f"_str{len(self.strings) + 1}"
+        return label
+
+    def new_label(self, hint):
+        self.labels += 1
+        return f"_{hint}{self.labels}"
+
+    def _source(self, text):
+        size = self.memory.frame(MAIN).locals_size
+        data = ["    .data", f"_globals: .space {max(4, _align(size))}", '_null: .asciiz "null"']
+        for value, label in self.strings.items():
+            data.append(f'{label}: .asciiz "{_escape(value)}"')
+        for name, (message, _) in ERRORS.items():
+            if name in self.runtime:
+                data.append(f'{name}_msg: .asciiz "{_escape(message)}"')
+        code = ["", "    .text", "    .globl main"] + text
+        for name in RUNTIME:
+            if name in self.runtime:
+                code += RUNTIME[name].splitlines()
+        for name, (message, with_value) in ERRORS.items():
+            if name not in self.runtime:
+                continue
+            code += ["", f"{name}:"]
+            if with_value:
+                code.append("    move $t8, $a0")
+            code += [f"    la $a0, {name}_msg", "    li $v0, 4", "    syscall"]
+            if with_value:
+                code += ["    move $a0, $t8", "    li $v0, 1", "    syscall"]
+            code += ["    li $a0, 1", "    li $v0, 17", "    syscall"]
+        return "\n".join(data + code) + "\n"
+
+
+class _Procedure:
+    def __init__(self, gen, label):
+        self.gen = gen
+        self.label = label
+        self.info = gen.layout.procs[label]
+        self.rows = gen.rows
+        self.indices = self.info.indices
+        self.is_main = label == MAIN
+        self.out = []
+
+        self.mine = gen.own_locals(label)
+        if self.is_main:
+            # Las del top-level que no toca nadie más van a registros; su lugar en memoria es el de $gp
+            self.candidate = lambda x: isinstance(x, Temp) or (_is_name(x) and x not in gen.globals
+                                                                and (x in self.mine or x in self.info.written))
+        else:
+            self.candidate = lambda x: isinstance(x, Temp) or (_is_name(x) and x in self.mine)
+        self._kinds()
+        self._allocate(gen.memory.frame(label) or FrameLayout(label, None, {}, {}, 0))
+
+    # Tipos (lo que hace falta para print, + y ==)
+    def _declared(self, name):
+        table = self.gen.types.get(self.label if name in self.mine else MAIN, {})
+        return _kind(table.get(name))
+
+    def _kinds(self):
+        names = {}
+        temps = {}
+        self.operands = {}  # índice -> tipo de los temporales que lee
+
+        def of(x):
+            if x is None:
+                return None
+            if x == "null":
+                return _NULL
+            v = literal(x)
+            if isinstance(v, str):
+                return _STR
+            if isinstance(v, float):
+                raise MipsError(f"{self.label}: los float no están soportados en MIPS ({x})")
+            if v is not None:
+                return _INT
+            if isinstance(x, Temp):
+                return temps.get(x)
+            return names.get(x) or self._declared(x)
+
+        for _ in range(2):  # la segunda vuelta ve lo que se infirió de los nombres sin tipo (foreach)
+            for i in self.indices:
+                _, op, a1, a2, r = self.rows[i]
+                self.operands[i] = {x: temps.get(x) for x in (a1, a2, r) if isinstance(x, Temp)}
+                k = None
+                if op == "=":
+                    k = of(a1)
+                elif op == "+":
+                    x, y = of(a1), of(a2)
+                    k = _STR if _STR in (x, y) else _INT if x == y == _INT else None
+                elif op in ("-", "*", "%", "not", "len") or op in _COMPARE:
+                    of(a1), of(a2)
+                    k = _INT
+                elif op == "[]":
+                    arr = of(a1)
+                    k = _kind(arr.element()) if isinstance(arr, ArrayType) else None
+                elif op == "newarr":
+                    k = temps.get(r) if isinstance(temps.get(r), ArrayType) else None
+                elif op == "[]=":
+                    arr, value = of(a1), of(r)
+                    if arr is None and isinstance(a1, Temp) and value is not None:
+                        # arreglo literal: el tipo sale de lo que se guarda en él
+                        temps[a1] = ArrayType(value.base, value.dimensions + 1) if isinstance(value, ArrayType) \
+                            else ArrayType(value, 1)
+                elif op == "call":
+                    target = self.gen.layout.function(a1, self.label)
+                    k = _kind(self.gen.returns.get(target))
+                elif op == "param" and a1 is None:
+                    k = self._declared(r)
+                else:
+                    of(a1)
+                d = defined(self.rows[i])
+                if d is None:
+                    continue
+                if isinstance(d, Temp):
+                    temps[d] = k
+                elif k is not None and not self._declared(d):
+                    names[d] = names.get(d) or k
+        self.names = names
+
+    def kind(self, x, at):
+        """Tipo del operando x en el cuádruplo `at`."""
+        if x == "null":
+            return _NULL
+        v = literal(x)
+        if isinstance(v, str):
+            return _STR
+        if v is not None:
+            return _INT
+        if isinstance(x, Temp):
+            return self.operands[at].get(x)
+        return self.names.get(x) or self._declared(x)
+
+    # Registros y registro de activación
+    def _allocate(self, frame):
+        gen = self.gen
+        self.position = {i: k for k, i in enumerate(self.indices)}
+        cfg = self.cfg = build_procedure_cfg(gen.quads, self.label, self.indices)
+        live = self.live = Liveness(cfg, self.rows, track=self.candidate)
+        intervals = live_intervals(cfg, self.rows, self.indices, live)
+        ordered = linear_scan(intervals) if gen.allocate else linear_scan(intervals, (), ())
+        self.reg = {iv.name: iv.register for iv in ordered if iv.register is not None}
+        self.live_after = {}
+        for block in cfg.blocks:
+            for i, after in live.backwards(block):
+                self.live_after[i] = set(after)
+        self.entry_live = live.live_in[cfg.entry] if cfg.blocks else set()
+
+        # Lo que no quedó en un registro vive en su lugar del plan de memoria: las
+        # locales donde las puso plan_memory, los parámetros donde los dejó quien
+        # llama y los temporales (y algún nombre sin declarar) después de las locales
+        saved = sorted({r for r in self.reg.values() if r in CALLEE_SAVED}) if not self.is_main else []
+        globals_ = gen.memory.frame(MAIN).locals
+        self.home = {}   # nombre o temporal en memoria -> "off($fp)" / "off($gp)"
+        self.width = {}  # los que ocupan un byte (bool) se leen con lbu y se guardan con sb
+        extra = []
+        for iv in ordered:
+            x = iv.name
+            if iv.register is not None:
+                continue
+            if isinstance(x, Temp) or (x not in frame.params and x not in frame.locals
+                                       and not (self.is_main and x in globals_)):
+                extra.append(x)
+        if self.is_main:
+            # las globales están en $gp: en la pila de main solo van temporales
+            frame = FrameLayout(MAIN, None, {}, {}, 0, len(extra), links=0)
+        else:
+            frame = frame.with_temps(len(extra), LINK_WORDS + len(saved))
+        self.frame = frame.size
+        for x, slot in frame.locals.items():
+            self._place(x, f"{slot.offset - self.frame}($fp)", slot.size)
+        for k, x in enumerate(extra):
+            self._place(x, f"{frame.temp_offset(k) - self.frame}($fp)", 4)
+        for x, slot in frame.params.items():
+            self._place(x, f"{slot.offset}($fp)", slot.size)
+        if self.is_main:
+            for x, slot in globals_.items():
+                self._place(x, f"{slot.offset}($gp)", slot.size)
+        self.saved = saved
+        self.layout = frame
+        self.allocation = ProcAllocation(self.label, ordered, self.frame, saved)
+
+    def _place(self, x, where, size):
+        if x not in self.reg and x not in self.home:
+            self.home[x] = where
+            if size == 1:
+                self.width[x] = 1
+
+    def location(self, x):
+        """Registro o dirección de una variable (no literal)."""
+        if x in self.reg:
+            return self.reg[x]
+        if x in self.home:
+            return self.home[x]
+        if not isinstance(x, Temp) and x in self.gen.globals:
+            slot = self.gen.memory.frame(MAIN).locals.get(x)
+            if slot is not None:
+                if slot.size == 1:
+                    self.width[x] = 1
+                return f"{slot.offset}($gp)"
+        raise MipsError(f"{self.label}: '{x}' no está definida")
+
+    # Emisión
+    def ins(self, text):
+        self.out.append(f"    {text}")
+
+    def read(self, x, scratch):
+        """Registro con el valor de x; si hay que cargarlo, lo deja en `scratch`."""
+        if x is None or x == "null":
+            return "$zero"
+        v = literal(x)
+        if isinstance(v, str):
+            self.ins(f"la {scratch}, {self.gen.string(v[1:-1])}")
+            return scratch
+        if v is not None:
+            if v == 0:
+                return "$zero"
+            self.ins(f"li {scratch}, {v}")
+            return scratch
+        where = self.location(x)
+        if where.startswith("$"):
+            return where
+        self.ins(f"{'lbu' if self.width.get(x) == 1 else 'lw'} {scratch}, {where}")
+        return scratch
+
+    def read_into(self, x, register):
+        r = self.read(x, register)
+        if r != register:
+            self.ins(f"move {register}, {r}")
+
+    def target(self, x):
+        """Registro donde calcular el valor de x; store() lo guarda si x vive en memoria."""
+        where = self.location(x)
+        return where if where.startswith("$") else "$t8"
+
+    def store(self, x, register):
+        where = self.location(x)
+        if where.startswith("$"):
+            if where != register:
+                self.ins(f"move {where}, {register}")
+        else:
+            self.ins(f"{'sb' if self.width.get(x) == 1 else 'sw'} {register}, {where}")
+
+    def call(self, routine):
+        self.gen.runtime.add(routine)
+        if routine == "_newarr":
+            self.gen.runtime.add("_err_size")
+        self.ins(f"jal {routine}")
+
+    def emit(self):
+        label = self.label
+        if self.is_main:
+            self.out.append("main:")
+            self.ins("la $gp, _globals")
+            self.ins("move $fp, $sp")
+            if self.frame:
+                self.ins(f"addiu $sp, $sp, -{self.frame}")
+            self._zero_uninitialized()
+        self._comment()
+        self.returned = False
+        k = 0
+        indices = self.indices
+        while k < len(indices):
+            i = indices[k]
+            _, op, a1, a2, r = self.rows[i]
+            if op == "param" and a1 is not None:
+                run = 1
+                while k + run < len(indices) and self.rows[indices[k + run]][1] == "param":
+                    run += 1
+                self.ins(f"addiu $sp, $sp, -{4 * run}")
+                for j in range(run):
+                    value = self.read(self.rows[indices[k + j]][2], "$t8")
+                    self.ins(f"sw {value}, {4 * (run - 1 - j)}($sp)")
+                k += run
+                continue
+            fused = self._fused(k)
+            if fused:
+                k += 2
+                continue
+            self._quad(i, op, a1, a2, r)
+            k += 1
+        if self.is_main:
+            self.ins("li $v0, 10")
+            self.ins("syscall")
+        return self.out
+
+    def _comment(self):
+        regs = ", ".join(f"{x} {r}" for x, r in sorted(self.reg.items(), key=lambda kv: str(kv[0])))
+        mem = ", ".join(f"{x} {w}" for x, w in sorted(self.home.items(), key=lambda kv: str(kv[0])))
+        self.out.append(f"    # {self.label}: registros: {regs or '-'}; memoria: {mem or '-'}")
+
+    def _prologue(self):
+        f = self.frame
+        self.ins(f"addiu $sp, $sp, -{f}")
+        self.ins(f"sw $ra, {f - 4}($sp)")
+        self.ins(f"sw $fp, {f - 8}($sp)")
+        for k, s in enumerate(self.saved):
+            self.ins(f"sw {s}, {f - 12 - 4 * k}($sp)")
+        self.ins(f"addiu $fp, $sp, {f}")
+
+    def _epilogue(self):
+        f = self.frame
+        for k, s in enumerate(self.saved):
+            self.ins(f"lw {s}, {-12 - 4 * k}($fp)")
+        self.ins("lw $ra, -4($fp)")
+        self.ins("move $sp, $fp")
+        self.ins("lw $fp, -8($sp)")
+        self.ins("jr $ra")
+
+    def _exit_label(self):
+        return f"{self.label}_exit"
+
+    def _quad(self, i, op, a1, a2, r):
+        if op == "label":
+            if r == self.label:
+                self.out.append(f"\n{r}:")
+                self._prologue()
+                if not self.info.params:
+                    self._zero_uninitialized()
+                return
+            self.out.append(f"{r}:")
+        elif op == "param":  # cabecera: el argumento llega en la pila del que llama
+            if r in self.reg:
+                slot = self.layout.params.get(r)
+                k = self.info.params.index(r)
+                offset = slot.offset if slot is not None else 4 * (len(self.info.params) - 1 - k)
+                self.ins(f"lw {self.reg[r]}, {offset}($fp)")
+            if self.info.params and r == self.info.params[-1]:
+                self._zero_uninitialized()
+        elif op == "endfunc":
+            if not self.returned:
+                self.ins("move $v0, $zero")
+            self.out.append(f"{self._exit_label()}:")
+            self._epilogue()
+        elif op == "return":
+            if a1 is not None:
+                self.read_into(a1, "$v0")
+            else:
+                self.ins("move $v0, $zero")
+            nxt = self._next(i)
+            self.returned = nxt is not None and self.rows[nxt][1] == "endfunc"
+            if not self.returned:
+                self.ins(f"j {self._exit_label()}")
+        elif op == "goto":
+            self.ins(f"j {r}")
+        elif op in ("ifFalse", "ifTrue"):
+            v = literal(a1)
+            if v is not None and not isinstance(v, str):
+                if (v == 0) == (op == "ifFalse"):
+                    self.ins(f"j {r}")
+                return
+            x = self.read(a1, "$t8")
+            self.ins(f"{'beq' if op == 'ifFalse' else 'bne'} {x}, $zero, {r}")
+        elif op == "=":
+            d = self.target(r)
+            v = literal(a1)
+            if isinstance(v, str):
+                self.ins(f"la {d}, {self.gen.string(v[1:-1])}")
+            elif v is not None:
+                self.ins(f"li {d}, {v}")
+            else:
+                x = self.read(a1, d)
+                if x != d:
+                    self.ins(f"move {d}, {x}")
+            self.store(r, d)
+        elif op == "+" and _STR in (self.kind(a1, i), self.kind(a2, i)):
+            self._concat(i, a1, a2, r)
+        elif op in ("+", "-", "*", "%"):
+            self._arithmetic(i, op, a1, a2, r)
+        elif op in _COMPARE:
+            d = self.target(r)
+            reg, inverted = self._compare(i, op, a1, a2, d)
+            if inverted:
+                self.ins(f"xori {d}, {reg}, 1")
+            elif reg != d:
+                self.ins(f"move {d}, {reg}")
+            self.store(r, d)
+        elif op == "not":
+            d = self.target(r)
+            self.ins(f"sltiu {d}, {self.read(a1, '$t8')}, 1")
+            self.store(r, d)
+        elif op == "print":
+            self._print(i, a1)
+        elif op == "call":
+            self._call(i, a1, a2, r)
+        elif op == "newarr":
+            self.read_into(a2, "$a0")
+            self.call("_newarr")
+            self.store(r, "$v0")
+        elif op == "len":
+            if self.kind(a1, i) == _STR:
+                raise MipsError(f"{self.label}: el largo de un string no está soportado en MIPS")
+            a = self.read(a1, "$t8")
+            self.gen.runtime.add("_err_no_length")
+            self.ins(f"beq {a}, $zero, _err_no_length")
+            d = self.target(r)
+            self.ins(f"lw {d}, 0({a})")
+            self.store(r, d)
+        elif op in ("[]", "[]="):
+            self._index(op, a1, a2, r)
+        else:
+            raise MipsError(f"{self.label}: {op} no está soportado en MIPS")
+
+    def _next(self, i):
+        k = self.position[i] + 1
+        return self.indices[k] if k < len(self.indices) else None
+
+    def _zero_uninitialized(self):
+        # Una local que se lee antes de asignarla vale null, como en la VirtualMachine
+        for x in sorted(self.entry_live, key=str):
+            if x in self.info.params:
+                continue
+            where = self.location(x)
+            if where.startswith("$"):
+                self.ins(f"move {where}, $zero")
+            elif where.endswith("($fp)"):
+                self.ins(f"{'sb' if self.width.get(x) == 1 else 'sw'} $zero, {where}")
+
+    def _fused(self, k):
+        # `t = a op b` + `ifFalse t L` con t muerto después: una comparación y un salto
+        indices = self.indices
+        if k + 1 >= len(indices):
+            return False
+        i, j = indices[k], indices[k + 1]
+        _, op, a1, a2, t = self.rows[i]
+        _, branch, c, _, target = self.rows[j]
+        if op not in _COMPARE or branch not in ("ifFalse", "ifTrue") or c != t or not isinstance(t, Temp):
+            return False
+        if t in self.live_after.get(j, ()) or self._string_compare(i, op, a1, a2):
+            return False
+        jump_if_true = branch == "ifTrue"
+        if op in ("==", "!="):
+            x = self.read(a1, "$t8")
+            y = self.read(a2, "$t9")
+            same = (op == "==") == jump_if_true
+            self.ins(f"{'beq' if same else 'bne'} {x}, {y}, {target}")
+            return True
+        reg, inverted = self._compare(i, op, a1, a2, "$t8")
+        if inverted:
+            jump_if_true = not jump_if_true
+        self.ins(f"{'bne' if jump_if_true else 'beq'} {reg}, $zero, {target}")
+        return True
+
+    def _string_compare(self, i, op, a1, a2):
+        kinds = (self.kind(a1, i), self.kind(a2, i))
+        return op in ("==", "!=") and _STR in kinds and _NULL not in kinds
+
+    def _compare(self, i, op, a1, a2, d):
+        """Deja la comparación en un registro; devuelve (registro, invertido)."""
+        if self._string_compare(i, op, a1, a2):
+            self.read_into(a1, "$a0")
+            self.read_into(a2, "$a1")
+            self.call("_streq")
+            return "$v0", op == "!="
+        kinds = (self.kind(a1, i), self.kind(a2, i))
+        if op not in ("==", "!=") and any(k not in (_INT, None) for k in kinds):
+            raise MipsError(f"{self.label}: solo se comparan enteros con {op} en MIPS")
+        b = literal(a2)
+        if op in ("==", "!="):
+            x = self.read(a1, "$t8")
+            if b == 0 and not isinstance(b, str) or a2 == "null":
+                diff = x
+            elif isinstance(b, int) and 0 <= b <= 0xFFFF:
+                self.ins(f"xori {d}, {x}, {b}")
+                diff = d
+            else:
+                self.ins(f"xor {d}, {x}, {self.read(a2, '$t9')}")
+                diff = d
+            if op == "==":
+                self.ins(f"sltiu {d}, {diff}, 1")
+            else:
+                self.ins(f"sltu {d}, $zero, {diff}")
+            return d, False
+        x = self.read(a1, "$t8")
+        if op in ("<", ">=") and isinstance(b, int) and -0x8000 <= b <= 0x7FFF:
+            self.ins(f"slti {d}, {x}, {b}")
+            return d, op == ">="
+        y = self.read(a2, "$t9")
+        if op in ("<", ">="):
+            self.ins(f"slt {d}, {x}, {y}")
+            return d, op == ">="
+        self.ins(f"slt {d}, {y}, {x}")
+        return d, op == "<="
+
+    def _arithmetic(self, i, op, a1, a2, r):
+        kinds = (self.kind(a1, i), self.kind(a2, i))
+        if any(k not in (_INT, None) for k in kinds):
+            raise MipsError(f"{self.label}: {op} entre {kinds[0]} y {kinds[1]} no está soportado en MIPS")
+        d = self.target(r)
+        x = self.read(a1, "$t8")
+        b = literal(a2)
+        if op in ("+", "-") and isinstance(b, int) and -0x7FFF <= b <= 0x7FFF:
+            self.ins(f"addiu {d}, {x}, {b if op == '+' else -b}")
+        elif op == "*" and isinstance(b, int) and b > 0 and b & (b - 1) == 0:
+            self.ins(f"sll {d}, {x}, {b.bit_length() - 1}")
+        elif op == "%":
+            y = self.read(a2, "$t9")
+            if not (isinstance(b, int) and b != 0):
+                self.gen.runtime.add("_err_mod")
+                self.ins(f"beq {y}, $zero, _err_mod")
+            self.ins(f"div {x}, {y}")
+            self.ins(f"mfhi {d}")
+        else:
+            y = self.read(a2, "$t9")
+            self.ins(f"{ {'+': 'addu', '-': 'subu', '*': 'mul'}[op]} {d}, {x}, {y}")
+        self.store(r, d)
+
+    def _as_string(self, i, x, register):
+        kind = self.kind(x, i)
+        if kind == _STR or kind == _NULL:
+            self.read_into(x, register)
+        elif kind == _INT:
+            self.read_into(x, "$a0")
+            self.call("_itoa")
+            if register != "$v0":
+                self.ins(f"move {register}, $v0")
+        else:
+            raise MipsError(f"{self.label}: no se sabe convertir '{x}' a string en MIPS")
+
+    def _concat(self, i, a1, a2, r):
+        # Primero el lado que hay que convertir (_itoa usa los registros de los argumentos)
+        first, second = ((a2, "$a1"), (a1, "$a0")) if self.kind(a2, i) == _INT else ((a1, "$a0"), (a2, "$a1"))
+        self._as_string(i, *first)
+        self._as_string(i, *second)
+        self.call("_concat")
+        self.store(r, "$v0")
+
+    def _print(self, i, x):
+        kind = self.kind(x, i)
+        if kind == _INT:
+            self.read_into(x, "$a0")
+            self.ins("li $v0, 1")
+            self.ins("syscall")
+            self.ins("li $a0, 10")
+            self.ins("li $v0, 11")
+            self.ins("syscall")
+        elif kind in (_STR, _NULL):
+            self.read_into(x, "$a0")
+            self.call("_print_str")
+        else:
+            raise MipsError(f"{self.label}: no se sabe imprimir '{x}' ({kind}) en MIPS")
+
+    def _call(self, i, a1, a2, r):
+        target = self.gen.layout.function(a1, self.label) if isinstance(a1, str) and not isinstance(a1, Temp) else None
+        if target is None:
+            raise MipsError(f"{self.label}: no se puede llamar a '{a1}' en MIPS")
+        n = literal(a2) or 0
+        self.ins(f"jal {target}")
+        if n:
+            self.ins(f"addiu $sp, $sp, {4 * n}")
+        if r is not None:
+            self.store(r, "$v0")
+
+    def _index(self, op, a1, a2, r):
+        gen = self.gen
+        gen.runtime.update(("_err_not_array", "_err_index"))
+        a = self.read(a1, "$t8")
+        self.ins(f"beq {a}, $zero, _err_not_array")
+        self.ins(f"lw $v1, 0({a})")
+        ok = gen.new_label("ok")
+        k = literal(a2)
+        if isinstance(k, int):
+            if k < 0:
+                self.ins(f"li $a0, {k}")
+                self.ins("j _err_index")
+                return
+            self.ins(f"slti $a3, $v1, {k + 1}")
+            self.ins(f"beq $a3, $zero, {ok}")
+            self.ins(f"li $a0, {k}")
+            self.ins("j _err_index")
+            self.out.append(f"{ok}:")
+            address = f"{4 + 4 * k}({a})"
+        else:
+            x = self.read(a2, "$t9")
+            self.ins(f"sltu $a3, {x}, $v1")
+            self.ins(f"bne $a3, $zero, {ok}")
+            self.ins(f"move $a0, {x}")
+            self.ins("j _err_index")
+            self.out.append(f"{ok}:")
+            self.ins(f"sll $a3, {x}, 2")
+            self.ins(f"addu $a3, $a3, {a}")
+            address = "4($a3)"
+        if op == "[]":
+            d = self.target(r)
+            self.ins(f"lw {d}, {address}")
+            self.store(r, d)
+        else:
+            self.ins(f"sw {self.read(r, '$a2')}, {address}")
+
+
+def _is_name(x):
+    return isinstance(x, str) and not isinstance(x, Temp) and x != "null" and literal(x) is None
+
+
+def _kind(ty):
+    if ty in (Type.INT, Type.BOOL):
+        return _INT
+    if ty == Type.STRING:
+        return _STR
+    if isinstance(ty, ArrayType):
+        return ty
+    if ty == Type.FLOAT:
+        raise MipsError("los float no están soportados en MIPS")
+    return None
+
+
+def _align(n, size=4):
+    return (n + size - 1) // size * size
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,610 @@
+import re
+import sys
+import time
+
+# Registros por nombre; también se aceptan $0..$31
+REGISTERS = {
+    "$zero": 0, "$at": 1, "$v0": 2, "$v1": 3, "$a0": 4, "$a1": 5, "$a2": 6, "$a3": 7,
+    **{f"$t{i}": 8 + i for i in range(8)}, **{f"$s{i}": 16 + i for i in range(8)},
+    "$t8": 24, "$t9": 25, "$k0": 26, "$k1": 27, "$gp": 28, "$sp": 29, "$fp": 30, "$ra": 31,
+    **{f"${i}": i for i in range(32)},
+}
+NAMES = {n: name for name, n in REGISTERS.items() if not name[1:].isdigit()}
+NAMES[0] = "$zero"
+
+# Mapa de memoria como el de MARS/SPIM
+TEXT_BASE = 0x00400000
+DATA_BASE = 0x10010000
+STACK_END = 0x80000000   # la pila crece hacia abajo desde aquí
+
+# Instrucciones reales (las pseudo se expanden al ensamblar)
+(ADDU, ADDIU, SUBU, MUL, MULT, DIV, MFHI, MFLO, AND, ANDI, OR, ORI, XOR, XORI, NOR,
+ SLT, SLTI, SLTU, SLTIU, SLL, SRL, SRA, SLLV, SRLV, SRAV, LUI, LW, SW, LB, LBU, SB,
+ BEQ, BNE, BLEZ, BGTZ, BLTZ, BGEZ, J, JAL, JR, JALR, SYSCALL) = range(42)
+
+_R3 = {"addu": ADDU, "add": ADDU, "subu": SUBU, "sub": SUBU, "mul": MUL, "and": AND, "or": OR,
+       "xor": XOR, "nor": NOR, "slt": SLT, "sltu": SLTU, "sllv": SLLV, "srlv": SRLV, "srav": SRAV}
+_IMM = {"addiu": (ADDIU, True), "addi": (ADDIU, True), "slti": (SLTI, True), "sltiu": (SLTIU, True),
+        "andi": (ANDI, False), "ori": (ORI, False), "xori": (XORI, False)}
+_IMM_AS_R = {ADDIU: ADDU, SLTI: SLT, SLTIU: SLTU, ANDI: AND, ORI: OR, XORI: XOR}
+_SHIFT = {"sll": SLL, "srl": SRL, "sra": SRA}
+_MEMORY = {"lw": LW, "sw": SW, "lb": LB, "lbu": LBU, "sb": SB}
+_BRANCH2 = {"beq": BEQ, "bne": BNE}
+_BRANCH1 = {"blez": BLEZ, "bgtz": BGTZ, "bltz": BLTZ, "bgez": BGEZ}
+# blt a, b, L -> slt $at, x, y + beq/bne $at, $zero, L
+_COMPARE_BRANCH = {"blt": (False, BNE), "bgt": (True, BNE), "ble": (True, BEQ), "bge": (False, BEQ)}
+
+_MEM_OPERAND = re.compile(r"^(-?\w*)\((\$\w+)\)$")
+
+
+class AssemblyError(Exception):
+    """El texto no es ensamblador MIPS que entienda el simulador."""
+
+
+class MipsImage:
+    """Programa ensamblado: instrucciones decodificadas, segmento de datos y etiquetas."""
+
+    def __init__(self, code, data, labels, entry, origin):
+        self.code = code        # [(op, a, b, c)]
+        self.data = data        # bytes del segmento .data
+        self.labels = labels    # etiqueta -> dirección
+        self.entry = entry      # índice de la primera instrucción (main)
+        self.origin = origin    # por instrucción: línea del fuente de la que salió
+
+
+def assemble(source):
+    """
+    Ensambla un programa MIPS32 (subconjunto de MARS): directivas .data, .text,
+    .globl, .word, .space, .asciiz y .align; instrucciones enteras, loads y stores
+    de palabra y byte, saltos y syscall. Las pseudo (li, la, move, b, beqz, blt...)
+    se expanden en las instrucciones reales que las implementan, así los pasos
+    que cuenta el simulador son instrucciones de verdad.
+    """
+    return _Assembler(source).image()
+
+
+class _Assembler:
+    def __init__(self, source):
+        self.code = []          # [op, a, b, c] con etiquetas sin resolver
+        self.origin = []
+        self.data = bytearray()
+        self.labels = {}
+        self.fixups = []        # (offset en data, etiqueta) de .word etiqueta
+        segment = "text"
+        for number, raw in enumerate(source.splitlines(), 1):
+            line = _strip_comment(raw).strip()
+            while line:
+                m = re.match(r"^([A-Za-z_.$][\w.$]*):", line)
+                if not m:
+                    break
+                self._label(m.group(1), segment, number)
+                line = line[m.end():].strip()
+            if not line:
+                continue
+            try:
+                if line.startswith("."):
+                    segment = self._directive(line, segment)
+                elif segment != "text":
+                    raise AssemblyError("instrucción fuera de .text")
+                else:
+                    self._instruction(line, number)
+            except AssemblyError as e:
+                raise AssemblyError(f"línea {number}: {e} ({raw.strip()})") from None
+
+    def image(self):
+        code = []
+        for (op, a, b, c), number in zip(self.code, self.origin):
+            if op in (BEQ, BNE, BLEZ, BGTZ, BLTZ, BGEZ):
+                c = self._text_target(c, number)
+            elif op in (J, JAL):
+                a = self._text_target(a, number)
+            elif op in (LUI, ORI) and isinstance(c, tuple):
+                half, label = c
+                address = self._address(label, number)
+                c = address >> 16 if half == "hi" else address & 0xFFFF
+            code.append((op, a, b, c))
+        for offset, label in self.fixups:
+            self.data[offset:offset + 4] = self._address(label, 0).to_bytes(4, "little")
+        if "main" not in self.labels:
+            raise AssemblyError("falta la etiqueta main")
+        entry = (self.labels["main"] - TEXT_BASE) // 4
+        return MipsImage(code, bytes(self.data), dict(self.labels), entry, self.origin)
+
+    def _label(self, name, segment, number):
+        if name in self.labels:
+            raise AssemblyError(f"línea {number}: etiqueta repetida {name}")
+        if segment == "text":
+            self.labels[name] = TEXT_BASE + 4 * len(self.code)
+        else:
+            self.labels[name] = DATA_BASE + len(self.data)
+
+    def _address(self, label, number):
+        if label not in self.labels:
+            raise AssemblyError(f"línea {number}: etiqueta desconocida {label}")
+        return self.labels[label]
+
+    def _text_target(self, label, number):
+        return (self._address(label, number) - TEXT_BASE) // 4
+
+    def _directive(self, line, segment):
+        name, _, rest = line.partition(" ")
+        rest = rest.strip()
+        if name in (".text", ".data"):
+            return name[1:]
+        if name == ".globl":
+            return segment
+        if segment != "data":
+            raise AssemblyError(f"{name} fuera de .data")
+        if name == ".word":
+            for item in _split(rest):
+                value = _int(item)
+                if value is None:
+                    self.fixups.append((len(self.data), item))
+                    value = 0
+                self.data += (value & 0xFFFFFFFF).to_bytes(4, "little")
+        elif name == ".space":
+            self.data += bytes(_int(rest) or 0)
+        elif name == ".asciiz":
+            self.data += _string(rest) + b"\0"
+        elif name == ".align":
+            size = 1 << (_int(rest) or 0)
+            self.data += bytes(-len(self.data) % size)
+        else:
+            raise AssemblyError(f"directiva desconocida {name}")
+        return segment
+
+    def _emit(self, op, a=0, b=0, c=0):
+        self.code.append([op, a, b, c])
+        self.origin.append(self._line)
+
+    def _instruction(self, line, number):
+        self._line = number
+        name, _, rest = line.partition(" ")
+        args = _split(rest)
+        reg = _register
+
+        if name in _R3:
+            self._expect(args, 3)
+            self._emit(_R3[name], reg(args[0]), reg(args[1]), reg(args[2]))
+        elif name in _IMM:
+            self._expect(args, 3)
+            op, signed = _IMM[name]
+            self._immediate(op, reg(args[0]), reg(args[1]), self._value(args[2]), signed)
+        elif name in _SHIFT:
+            self._expect(args, 3)
+            self._emit(_SHIFT[name], reg(args[0]), reg(args[1]), self._value(args[2]) & 31)
+        elif name in _MEMORY:
+            self._expect(args, 2)
+            m = _MEM_OPERAND.match(args[1])
+            if m:
+                offset = _int(m.group(1)) if m.group(1) else 0
+                if offset is None or not -0x8000 <= offset <= 0x7FFF:
+                    raise AssemblyError(f"desplazamiento inválido {m.group(1)}")
+                self._emit(_MEMORY[name], reg(args[0]), reg(m.group(2)), offset)
+            else:  # lw $t0, etiqueta
+                self._emit(LUI, 1, 0, ("hi", args[1]))
+                self._emit(ORI, 1, 1, ("lo", args[1]))
+                self._emit(_MEMORY[name], reg(args[0]), 1, 0)
+        elif name in _BRANCH2:
+            self._expect(args, 3)
+            self._emit(_BRANCH2[name], reg(args[0]), reg(args[1]), args[2])
+        elif name in _BRANCH1:
+            self._expect(args, 2)
+            self._emit(_BRANCH1[name], reg(args[0]), 0, args[1])
+        elif name in ("beqz", "bnez"):
+            self._expect(args, 2)
+            self._emit(BEQ if name == "beqz" else BNE, reg(args[0]), 0, args[1])
+        elif name == "b":
+            self._expect(args, 1)
+            self._emit(BEQ, 0, 0, args[0])
+        elif name in _COMPARE_BRANCH:
+            self._expect(args, 3)
+            swap, op = _COMPARE_BRANCH[name]
+            x, y = reg(args[0]), reg(args[1])
+            self._emit(SLT, 1, *((y, x) if swap else (x, y)))
+            self._emit(op, 1, 0, args[2])
+        elif name in ("j", "jal"):
+            self._expect(args, 1)
+            self._emit(J if name == "j" else JAL, args[0])
+        elif name == "jr":
+            self._expect(args, 1)
+            self._emit(JR, reg(args[0]))
+        elif name == "jalr":
+            self._emit(JALR, 31 if len(args) == 1 else reg(args[0]), reg(args[-1]))
+        elif name in ("mult", "div") and len(args) == 2:
+            self._emit(MULT if name == "mult" else DIV, 0, reg(args[0]), reg(args[1]))
+        elif name in ("div", "rem"):
+            self._expect(args, 3)
+            self._emit(DIV, 0, reg(args[1]), reg(args[2]))
+            self._emit(MFLO if name == "div" else MFHI, reg(args[0]))
+        elif name in ("mfhi", "mflo"):
+            self._expect(args, 1)
+            self._emit(MFHI if name == "mfhi" else MFLO, reg(args[0]))
+        elif name == "lui":
+            self._expect(args, 2)
+            self._emit(LUI, reg(args[0]), 0, self._value(args[1]) & 0xFFFF)
+        elif name == "li":
+            self._expect(args, 2)
+            self._load_immediate(reg(args[0]), self._value(args[1]))
+        elif name == "la":
+            self._expect(args, 2)
+            rd = reg(args[0])
+            self._emit(LUI, rd, 0, ("hi", args[1]))
+            self._emit(ORI, rd, rd, ("lo", args[1]))
+        elif name == "move":
+            self._expect(args, 2)
+            self._emit(ADDU, reg(args[0]), reg(args[1]), 0)
+        elif name == "neg":
+            self._expect(args, 2)
+            self._emit(SUBU, reg(args[0]), 0, reg(args[1]))
+        elif name == "not":
+            self._expect(args, 2)
+            self._emit(NOR, reg(args[0]), reg(args[1]), 0)
+        elif name == "nop":
+            self._emit(SLL, 0, 0, 0)
+        elif name == "syscall":
+            self._emit(SYSCALL)
+        else:
+            raise AssemblyError(f"instrucción desconocida {name}")
+
+    def _immediate(self, op, rt, rs, value, signed):
+        if (-0x8000 <= value <= 0x7FFF) if signed else (0 <= value <= 0xFFFF):
+            self._emit(op, rt, rs, value)
+        else:  # no cabe en 16 bits: se arma en $at
+            self._load_immediate(1, value)
+            self._emit(_IMM_AS_R[op], rt, rs, 1)
+
+    def _load_immediate(self, rd, value):
+        value = _signed(value)
+        if -0x8000 <= value <= 0x7FFF:
+            self._emit(ADDIU, rd, 0, value)
+        elif 0 <= value <= 0xFFFF:
+            self._emit(ORI, rd, 0, value)
+        else:
+            self._emit(LUI, rd, 0, (value >> 16) & 0xFFFF)
+            if value & 0xFFFF:
+                self._emit(ORI, rd, rd, value & 0xFFFF)
+
+    def _value(self, text):
+        value = _int(text)
+        if value is None:
+            raise AssemblyError(f"se esperaba un número: {text}")
+        return value
+
+    @staticmethod
+    def _expect(args, n):
+        if len(args) != n:
+            raise AssemblyError(f"se esperaban {n} operandos")
+
+
+def _strip_comment(line):
+    quoted = False
+    for i, ch in enumerate(line):
+        if ch == '"' and (i == 0 or line[i - 1] != "\\"):
+            quoted = not quoted
+        elif ch == "#" and not quoted:
+            return line[:i]
+    return line
+
+
+def _split(text):
+    return [part.strip() for part in text.split(",")] if text.strip() else []
+
+
+def _register(text):
+    if text not in REGISTERS:
+        raise AssemblyError(f"registro desconocido {text}")
+    return REGISTERS[text]
+
+
+def _int(text):
+    try:
+        return int(text, 0)
+    except ValueError:
+        if len(text) == 3 and text[0] == text[2] == "'":
+            return ord(text[1])
+        return None
+
+
+def _string(text):
+    if len(text) < 2 or text[0] != '"' or text[-1] != '"':
+        raise AssemblyError(f"string inválido {text}")
+    body = text[1:-1]
+    out = bytearray()
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if ch == "\\" and i + 1 < len(body):
+            i += 1
+            ch = {"n": "\n", "t": "\t", "0": "\0", "\\": "\\", '"': '"'}.get(body[i], body[i])
+        out += ch.encode("utf-8")
+        i += 1
+    return bytes(out)
+
+
+def _signed(v):
+    return ((v + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+class MipsSimulator:
+    """
+    Ejecuta un MipsImage instrucción por instrucción, sin delay slots (como MARS
+    por defecto). Cuenta las instrucciones ejecutadas (`steps`) y los accesos a
+    memoria (`loads`, `stores`). Syscalls: 1 print_int, 4 print_string, 9 sbrk,
+    10 exit, 11 print_char y 17 exit2.
+
+    Cada línea que el programa termina con '\\n' va a `output`. Si sale con exit2 y
+    un código distinto de 0, lo que quedó sin terminar de imprimir es el mensaje de
+    `error` (así reporta sus errores el código que genera MipsGenerator); también
+    son errores pasarse de `max_steps`, salirse de la pila y las direcciones inválidas.
+    """
+
+    def __init__(self, image, max_steps=None, stack_size=1 << 20, heap_size=1 << 22, stdout=None):
+        self.image = image
+        self.max_steps = max_steps
+        self.stack_size = stack_size
+        self.heap_size = heap_size
+        self.stdout = stdout
+
+        self.output = []
+        self.error = None
+        self.exit_code = 0
+        self.steps = 0
+        self.loads = 0
+        self.stores = 0
+        self.elapsed = 0.0
+        self.regs = [0] * 32
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self._run()
+        except _Fault as e:
+            self.error = str(e)
+        self.elapsed = time.perf_counter() - start
+        return self
+
+    def _run(self):
+        image = self.image
+        code = image.code
+        regs = self.regs
+        data = bytearray(max(self.heap_size, len(image.data) + 8))
+        data[:len(image.data)] = image.data
+        data_words = memoryview(data).cast("i")
+        stack = bytearray(self.stack_size)
+        stack_words = memoryview(stack).cast("i")
+        stack_base = STACK_END - self.stack_size
+        brk = DATA_BASE + ((len(image.data) + 7) & ~7)
+        data_end = DATA_BASE + len(data)
+        pending = bytearray()   # lo impreso desde el último '\n'
+
+        regs[28] = DATA_BASE                 # $gp
+        regs[29] = STACK_END - 4             # $sp
+        regs[30] = STACK_END - 4             # $fp
+        regs[31] = TEXT_BASE + 4 * len(code)  # volver de main termina el programa
+        hi = lo = 0
+        pc = image.entry
+        n = len(code)
+        limit = self.max_steps if self.max_steps is not None else sys.maxsize
+        steps = loads = stores = 0
+
+        def fault(addr):
+            if stack_base - self.stack_size <= addr < stack_base:
+                return _Fault("desbordamiento de pila")
+            return _Fault(f"dirección inválida: 0x{addr & 0xFFFFFFFF:08x}")
+
+        def read_string(addr):
+            if not DATA_BASE <= addr < data_end:
+                raise fault(addr)
+            end = data.index(0, addr - DATA_BASE)
+            return data[addr - DATA_BASE:end]
+
+        def emit(chunk):
+            pending.extend(chunk)
+            while True:
+                k = pending.find(b"\n")
+                if k < 0:
+                    return
+                line = pending[:k].decode("utf-8", "replace")
+                del pending[:k + 1]
+                self.output.append(line)
+                if self.stdout is not None:
+                    self.stdout(line)
+
+        try:
+            while 0 <= pc < n:
+                steps += 1
+                if steps > limit:
+                    raise _Fault(f"se superó el límite de {limit} pasos")
+                op, a, b, c = code[pc]
+                pc += 1
+                if op == ADDU:
+                    v = regs[b] + regs[c]
+                    if not -0x80000000 <= v <= 0x7FFFFFFF:
+                        v = ((v + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+                    if a:
+                        regs[a] = v
+                elif op == ADDIU:
+                    v = regs[b] + c
+                    if not -0x80000000 <= v <= 0x7FFFFFFF:
+                        v = ((v + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+                    if a:
+                        regs[a] = v
+                elif op == LW or op == SW:
+                    addr = regs[b] + c
+                    if addr & 3:
+                        raise _Fault(f"dirección desalineada: 0x{addr & 0xFFFFFFFF:08x}")
+                    if stack_base <= addr < STACK_END:
+                        words, k = stack_words, (addr - stack_base) >> 2
+                    elif DATA_BASE <= addr < brk:
+                        words, k = data_words, (addr - DATA_BASE) >> 2
+                    else:
+                        raise fault(addr)
+                    if op == LW:
+                        loads += 1
+                        if a:
+                            regs[a] = words[k]
+                    else:
+                        stores += 1
+                        words[k] = regs[a]
+                elif op == BEQ:
+                    if regs[a] == regs[b]:
+                        pc = c
+                elif op == BNE:
+                    if regs[a] != regs[b]:
+                        pc = c
+                elif op == SLT:
+                    if a:
+                        regs[a] = 1 if regs[b] < regs[c] else 0
+                elif op == SLTI:
+                    if a:
+                        regs[a] = 1 if regs[b] < c else 0
+                elif op == J:
+                    pc = a
+                elif op == SUBU:
+                    v = regs[b] - regs[c]
+                    if not -0x80000000 <= v <= 0x7FFFFFFF:
+                        v = ((v + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+                    if a:
+                        regs[a] = v
+                elif op == MUL:
+                    v = regs[b] * regs[c]
+                    if not -0x80000000 <= v <= 0x7FFFFFFF:
+                        v = ((v + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+                    if a:
+                        regs[a] = v
+                elif op == JAL:
+                    regs[31] = TEXT_BASE + 4 * pc
+                    pc = a
+                elif op == JR:
+                    pc = (regs[a] - TEXT_BASE) >> 2
+                elif op == SLTU:
+                    if a:
+                        regs[a] = 1 if regs[b] & 0xFFFFFFFF < regs[c] & 0xFFFFFFFF else 0
+                elif op == SLTIU:
+                    if a:
+                        regs[a] = 1 if regs[b] & 0xFFFFFFFF < c & 0xFFFFFFFF else 0
+                elif op == XOR:
+                    if a:
+                        regs[a] = regs[b] ^ regs[c]
+                elif op == XORI:
+                    if a:
+                        regs[a] = regs[b] ^ c
+                elif op == SLL:
+                    if a:
+                        regs[a] = _signed(regs[b] << c)
+                elif op == LUI:
+                    if a:
+                        regs[a] = _signed(c << 16)
+                elif op == ORI:
+                    if a:
+                        regs[a] = _signed((regs[b] & 0xFFFFFFFF) | c)
+                elif op == ANDI:
+                    if a:
+                        regs[a] = regs[b] & c
+                elif op == AND:
+                    if a:
+                        regs[a] = regs[b] & regs[c]
+                elif op == OR:
+                    if a:
+                        regs[a] = regs[b] | regs[c]
+                elif op == NOR:
+                    if a:
+                        regs[a] = ~(regs[b] | regs[c])
+                elif op == SRL:
+                    if a:
+                        regs[a] = _signed((regs[b] & 0xFFFFFFFF) >> c)
+                elif op == SRA:
+                    if a:
+                        regs[a] = regs[b] >> c
+                elif op == SLLV:
+                    if a:
+                        regs[a] = _signed(regs[b] << (regs[c] & 31))
+                elif op == SRLV:
+                    if a:
+                        regs[a] = _signed((regs[b] & 0xFFFFFFFF) >> (regs[c] & 31))
+                elif op == SRAV:
+                    if a:
+                        regs[a] = regs[b] >> (regs[c] & 31)
+                elif op == DIV:
+                    x, y = regs[b], regs[c]
+                    if y == 0:  # en MIPS no es un error: hi y lo quedan indefinidos
+                        hi = lo = 0
+                    else:
+                        q = abs(x) // abs(y)
+                        lo = _signed(q if (x < 0) == (y < 0) else -q)
+                        hi = _signed(x - q * y if (x < 0) == (y < 0) else x + q * y)
+                elif op == MULT:
+                    v = regs[b] * regs[c]
+                    lo, hi = _signed(v), _signed(v >> 32)
+                elif op == MFHI:
+                    if a:
+                        regs[a] = hi
+                elif op == MFLO:
+                    if a:
+                        regs[a] = lo
+                elif op in (LB, LBU, SB):
+                    addr = regs[b] + c
+                    if stack_base <= addr < STACK_END:
+                        mem, k = stack, addr - stack_base
+                    elif DATA_BASE <= addr < brk:
+                        mem, k = data, addr - DATA_BASE
+                    else:
+                        raise fault(addr)
+                    if op == SB:
+                        stores += 1
+                        mem[k] = regs[a] & 0xFF
+                    else:
+                        loads += 1
+                        v = mem[k]
+                        if a:
+                            regs[a] = v - 256 if op == LB and v > 127 else v
+                elif op == BLEZ:
+                    if regs[a] <= 0:
+                        pc = c
+                elif op == BGTZ:
+                    if regs[a] > 0:
+                        pc = c
+                elif op == BLTZ:
+                    if regs[a] < 0:
+                        pc = c
+                elif op == BGEZ:
+                    if regs[a] >= 0:
+                        pc = c
+                elif op == JALR:
+                    target = regs[b]
+                    if a:
+                        regs[a] = TEXT_BASE + 4 * pc
+                    pc = (target - TEXT_BASE) >> 2
+                elif op == SYSCALL:
+                    service = regs[2]
+                    if service == 1:
+                        emit(str(regs[4]).encode())
+                    elif service == 4:
+                        emit(read_string(regs[4]))
+                    elif service == 11:
+                        emit(bytes((regs[4] & 0xFF,)))
+                    elif service == 9:
+                        size = (regs[4] + 3) & ~3
+                        if size < 0 or brk + size > data_end:
+                            raise _Fault("memoria agotada")
+                        regs[2] = brk
+                        brk += size
+                    elif service == 10:
+                        break
+                    elif service == 17:
+                        self.exit_code = regs[4]
+                        if self.exit_code:
+                            self.error = pending.decode("utf-8", "replace") or f"terminó con código {self.exit_code}"
+                            pending.clear()
+                        break
+                    else:
+                        raise _Fault(f"syscall desconocida: {service}")
+        finally:
+            self.steps, self.loads, self.stores = steps, loads, stores
+            if pending and self.error is None:
+                self.output.append(pending.decode("utf-8", "replace"))
+
+
+class _Fault(Exception):
+    pass
@@ -0,0 +1,106 @@
+from src.optimizer.Tac import uses, defined
+
+# Los que guarda quien llama (no sobreviven a un jal) y los que guarda el llamado
+CALLER_SAVED = tuple(f"$t{i}" for i in range(8))
+CALLEE_SAVED = tuple(f"$s{i}" for i in range(8))
+
+
+class Interval:
+    """Rango de vida de una variable sobre las posiciones del procedimiento."""
+
+    __slots__ = ("name", "start", "end", "weight", "crosses_call", "register")
+
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start
+        self.end = start
+        self.weight = 0              # usos y definiciones, pesados por la profundidad de ciclo
+        self.crosses_call = False    # sigue viva después de un call que no la define
+        self.register = None         # None: vive en memoria (spill)
+
+    def __repr__(self):
+        return f"{self.name}[{self.start}, {self.end}] -> {self.register}"
+
+
+def live_intervals(cfg, rows, order, live, calls=("call",)):
+    """
+    Un intervalo por cada variable que sigue `live` (un Liveness del CFG). Las
+    posiciones son las del procedimiento en `order` (sus índices de cuádruplo):
+    el k-ésimo lee en 2k y escribe en 2k + 1, como en TempAllocator, así la
+    variable que muere en un cuádruplo puede dejarle el registro a la que nace ahí.
+    """
+    position = {i: k for k, i in enumerate(order)}
+    track = live.track
+    intervals = {}
+
+    def touch(x, p, weight=0):
+        iv = intervals.get(x)
+        if iv is None:
+            iv = intervals[x] = Interval(x, p)
+        elif p < iv.start:
+            iv.start = p
+        elif p > iv.end:
+            iv.end = p
+        iv.weight += weight
+
+    for block in cfg.blocks:
+        if block.start == block.end:
+            continue
+        weight = 10 ** min(block.loop_depth, 6)
+        for x in live.live_in[block.id]:
+            touch(x, 2 * position[block.start])
+        for i, after in live.backwards(block):
+            k = position[i]
+            row = rows[i]
+            d = defined(row)
+            for x in after:
+                touch(x, 2 * k + 1)
+                touch(x, 2 * k + 2)
+                if row[1] in calls and x != d:
+                    intervals[x].crosses_call = True
+            for u in uses(row):
+                if track(u):
+                    touch(u, 2 * k, weight)
+            if d is not None and track(d):
+                touch(d, 2 * k + 1, weight)
+    return intervals
+
+
+def linear_scan(intervals, caller_saved=CALLER_SAVED, callee_saved=CALLEE_SAVED):
+    """
+    Asignación de registros por barrido lineal (Poletto y Sarkar) con dos clases:
+    lo que sigue vivo después de una llamada solo puede ir en un registro que
+    guarda el llamado; lo demás prefiere uno que guarda quien llama. Si no queda
+    ninguno libre se manda a memoria el intervalo (el nuevo o uno activo que
+    podría ceder su registro) con menos usos pesados; a igualdad, el que termina
+    más lejos. Devuelve los intervalos con `register` puesto, en orden de inicio.
+    """
+    ordered = sorted(intervals.values(), key=lambda iv: (iv.start, iv.end, str(iv.name)))
+    free_caller = list(caller_saved)
+    free_callee = list(callee_saved)
+    active = []
+
+    def release(iv):
+        (free_callee if iv.register in callee_saved else free_caller).append(iv.register)
+
+    for current in ordered:
+        for iv in [iv for iv in active if iv.end < current.start]:
+            active.remove(iv)
+            release(iv)
+
+        if not current.crosses_call and free_caller:
+            current.register = free_caller.pop(0)
+        elif free_callee:
+            current.register = free_callee.pop(0)
+        else:
+            usable = [iv for iv in active
+                      if not current.crosses_call or iv.register in callee_saved]
+            if not usable:
+                continue
+            victim = min(usable, key=lambda iv: (iv.weight, -iv.end))
+            if (victim.weight, -victim.end) >= (current.weight, -current.end):
+                continue  # el nuevo es el más barato: se queda en memoria
+            current.register, victim.register = victim.register, None
+            active.remove(victim)
+        active.append(current)
+    return ordered
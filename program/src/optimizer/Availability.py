@@ -0,0 +1,53 @@
+class Availability:
+    """
+    Análisis hacia adelante de "disponible en todos los caminos" sobre un
+    ControlFlowGraph (expresiones disponibles, copias disponibles). Los hechos son
+    bits de un entero: `gen[b]` los que el bloque deja disponibles al salir y
+    `kill[b]` los que invalida en algún punto.
+
+    `avail_in[b]` es la intersección de lo que llega por cada predecesor. Por la
+    arista al catch solo llega lo que estaba disponible al entrar al bloque del try
+    y el bloque no invalida, porque el salto puede ocurrir en cualquier cuádruplo.
+    Los bloques que no se alcanzan quedan en 0.
+    """
+
+    def __init__(self, cfg, gen, kill, universe):
+        self.cfg = cfg
+        self.gen = gen
+        self.kill = kill
+        self.universe = universe
+        n = len(cfg.blocks)
+        self.avail_in = [0] * n
+        self.avail_out = [0] * n
+        self._solve()
+
+    def _solve(self):
+        cfg = self.cfg
+        blocks = cfg.blocks
+        if not blocks:
+            return
+        order = list(cfg.rpo)
+        live = set(order)
+        for b in order:
+            if b != cfg.entry:
+                self.avail_in[b] = self.universe
+            self.avail_out[b] = self.gen[b] | (self.avail_in[b] & ~self.kill[b])
+
+        changed = True
+        while changed:  # en RPO converge en pocas vueltas
+            changed = False
+            for b in order:
+                if b == cfg.entry:
+                    continue
+                new_in = self.universe
+                for p in blocks[b].preds:
+                    if p not in live:
+                        continue
+                    if blocks[p].handler == b:
+                        new_in &= self.avail_in[p] & ~self.kill[p]
+                    else:
+                        new_in &= self.avail_out[p]
+                if new_in != self.avail_in[b]:
+                    self.avail_in[b] = new_in
+                    self.avail_out[b] = self.gen[b] | (new_in & ~self.kill[b])
+                    changed = True
@@ -0,0 +1,249 @@
+import itertools
+
+from src.utils.Temp import Temp
+from src.optimizer.Tac import (
+    ID, OP, ARG1, ARG2, RESULT, BINARY, UNARY, CALLS,
+    is_temp, is_variable, defined, to_rows, from_rows,
+)
+from src.optimizer.ControlFlowGraph import build_cfgs
+from src.optimizer.Availability import Availability
+
+# Ops cuyo valor depende solo de sus operandos; `[]` y `getprop` además de la memoria
+EXPRESSIONS = BINARY | UNARY | {"[]", "getprop", "len"}
+_MEMORY = {"[]", "getprop"}
+# `+` no entra: también concatena strings
+_COMMUTATIVE = {"*", "==", "!="}
+
+
+def eliminate_common_subexpressions(quads):
+    """
+    Elimina los cálculos repetidos (aritmética, `not`, `len`, `[]` y `getprop`):
+
+    - dentro de cada bloque básico con numeración de valores local, que también
+      reconoce la expresión a través de copias (`t2 = a; a[i]` y `t2[i]`): el
+      cálculo repetido se vuelve una copia del nombre que ya tiene el valor;
+    - entre bloques con expresiones disponibles sobre el CFG: si `a op b` ya se
+      calculó en todos los caminos que llegan y nada cambió sus operandos, cada
+      cálculo de esa expresión guarda además el resultado en un temporal nuevo y la
+      repetición se vuelve una copia de él.
+
+    `[]=` invalida las lecturas de arreglos, `setprop` las de esa propiedad y una
+    llamada o `new` todas, además de las expresiones sobre nombres no temporales
+    (la función llamada puede cambiarlos). Las copias que quedan las limpian
+    copyprop y deadcode.
+    """
+    rows = to_rows(quads)
+    next_id = max((r[ID] for r in rows), default=-1) + 1
+    next_temp = max((v.id for r in rows for v in r[ARG1:] if isinstance(v, Temp)), default=0) + 1
+    new_ids = itertools.count(next_id)
+    new_temps = (Temp(n) for n in itertools.count(next_temp))
+
+    extra = {}  # índice -> copias que van justo después
+    for cfg in build_cfgs(quads):
+        for block in cfg.blocks:
+            _number_values(rows, block)
+        _GlobalCSE(cfg, rows).rewrite(new_temps, new_ids, extra)
+
+    if extra:
+        out = []
+        for i, row in enumerate(rows):
+            out.append(row)
+            out.extend(extra.get(i, ()))
+        rows = out
+    return from_rows(rows)
+
+
+def expression_key(row):
+    """(op, operando, operando) de lo que calcula el cuádruplo, o None si no es una expresión."""
+    op = row[OP]
+    if op not in EXPRESSIONS:
+        return None
+    a, b = (row[ARG1].__class__, row[ARG1]), (row[ARG2].__class__, row[ARG2])
+    if op in _COMMUTATIVE and repr(b) < repr(a):
+        a, b = b, a
+    return (op, a, b)
+
+
+def _operands(row):
+    # Nombres que lee la expresión (en getprop el arg2 es la propiedad)
+    if row[OP] == "getprop":
+        return [row[ARG1]] if is_variable(row[ARG1]) else []
+    return [x for x in (row[ARG1], row[ARG2]) if is_variable(x)]
+
+
+# Numeración de valores local
+def _number_values(rows, block):
+    numbers = {}    # nombre -> número de valor
+    holders = {}    # número -> nombres que hoy lo tienen
+    table = {}      # (op, número, número) -> número
+    constants = {}  # (tipo, literal) -> número
+    fresh = itertools.count()
+
+    def number(x):
+        if not is_variable(x):
+            key = (x.__class__, x)
+            n = constants.get(key)
+            if n is None:
+                n = constants[key] = next(fresh)
+            return n
+        n = numbers.get(x)
+        if n is None:
+            n = numbers[x] = next(fresh)
+            holders[n] = [x]
+        return n
+
+    def forget(name):
+        old = numbers.pop(name, None)
+        if old is not None:
+            holders[old].remove(name)
+
+    def assign(name, n):
+        forget(name)
+        numbers[name] = n
+        holders.setdefault(n, []).append(name)
+
+    def invalidate(test):
+        for key in [k for k in table if test(k)]:
+            del table[key]
+
+    for i in range(block.start, block.end):
+        row = rows[i]
+        if row is None:
+            continue
+        op = row[OP]
+
+        if op in EXPRESSIONS:
+            a = number(row[ARG1])
+            b = row[ARG2] if op == "getprop" else number(row[ARG2])
+            if op in _COMMUTATIVE and b < a:
+                a, b = b, a
+            d = row[RESULT]
+            n = table.get((op, a, b))
+            if n is not None and holders.get(n):
+                h = holders[n][0]
+                if h == d:  # ya tiene ese valor
+                    rows[i] = None
+                    continue
+                row[OP], row[ARG1], row[ARG2] = "=", h, None
+            else:
+                n = next(fresh)
+                table[(op, a, b)] = n
+            assign(d, n)
+            continue
+
+        if op == "[]=":
+            invalidate(lambda k: k[0] == "[]")
+        elif op == "setprop":
+            prop = row[RESULT]
+            invalidate(lambda k: k[0] == "getprop" and k[2] == prop)
+        elif op in CALLS:
+            invalidate(lambda k: k[0] in _MEMORY)
+            for name in [x for x in numbers if not is_temp(x)]:
+                forget(name)
+
+        d = defined(row)
+        if d is not None:
+            assign(d, number(row[ARG1]) if op == "=" else next(fresh))
+
+
+# Expresiones disponibles entre bloques
+class _GlobalCSE:
+    def __init__(self, cfg, rows):
+        self.cfg = cfg
+        self.rows = rows
+        self.keys = {}     # índice -> llave de la expresión que calcula
+        self.bits = {}     # llave -> bit
+        self.by_name = {}  # nombre -> bits de las expresiones que lo leen
+        self.arrays = 0    # bits de los `[]`
+        self.props = {}    # propiedad -> bits de sus `getprop`
+        self.outer = 0     # bits de las expresiones que leen un nombre no temporal
+
+        for block in cfg.blocks:
+            for i in range(block.start, block.end):
+                row = rows[i]
+                key = expression_key(row) if row is not None else None
+                if key is None:
+                    continue
+                self.keys[i] = key
+                if key in self.bits:
+                    continue
+                bit = self.bits[key] = 1 << len(self.bits)
+                for name in _operands(row):
+                    self.by_name[name] = self.by_name.get(name, 0) | bit
+                    if not is_temp(name):
+                        self.outer |= bit
+                if row[OP] == "[]":
+                    self.arrays |= bit
+                elif row[OP] == "getprop":
+                    self.props[row[ARG2]] = self.props.get(row[ARG2], 0) | bit
+
+        self.memory = self.arrays
+        for bits in self.props.values():
+            self.memory |= bits
+
+        gen, kill = [], []
+        for block in cfg.blocks:
+            g = k = 0
+            for i in range(block.start, block.end):
+                if rows[i] is None:
+                    continue
+                killed = self._kills(rows[i])
+                g = (g & ~killed) | self._gen(i)
+                k |= killed
+            gen.append(g)
+            kill.append(k)
+        self.avail = Availability(cfg, gen, kill, (1 << len(self.bits)) - 1)
+
+    def _kills(self, row):
+        op = row[OP]
+        k = 0
+        d = defined(row)
+        if d is not None:
+            k |= self.by_name.get(d, 0)
+        if op == "[]=":
+            k |= self.arrays
+        elif op == "setprop":
+            k |= self.props.get(row[RESULT], 0)
+        elif op in CALLS:
+            k |= self.memory | self.outer
+        return k
+
+    def _gen(self, i):
+        key = self.keys.get(i)
+        if key is None or self.rows[i][RESULT] in _operands(self.rows[i]):
+            return 0
+        return self.bits[key]
+
+    def rewrite(self, new_temps, new_ids, extra):
+        if not self.bits:
+            return
+        rows = self.rows
+        redundant = []
+        for b in self.cfg.rpo:
+            block = self.cfg.blocks[b]
+            avail = self.avail.avail_in[b]
+            for i in range(block.start, block.end):
+                if rows[i] is None:
+                    continue
+                key = self.keys.get(i)
+                if key is not None and avail & self.bits[key]:
+                    redundant.append(i)
+                avail = (avail & ~self._kills(rows[i])) | self._gen(i)
+        if not redundant:
+            return
+
+        # Cada cálculo de una expresión repetida deja su valor también en un temporal nuevo
+        holder = {}
+        for i in redundant:
+            key = self.keys[i]
+            if key not in holder:
+                holder[key] = next(new_temps)
+        skip = set(redundant)
+        for i, key in self.keys.items():
+            if i in skip or key not in holder or rows[i] is None:
+                continue
+            row = rows[i]
+            extra[i] = [[next(new_ids), "=", holder[key], None, row[RESULT]]]
+            row[RESULT] = holder[key]
+        for i in redundant:
+            rows[i][OP], rows[i][ARG1], rows[i][ARG2] = "=", holder[self.keys[i]], None
@@ -0,0 +1,238 @@
+import heapq
+
+from src.optimizer.Tac import (
+    OP, ARG1, ARG2, RESULT, BINARY, UNARY, BRANCHES, CALLS,
+    literal, is_temp, is_variable, same_value, defined, evaluate, truthy, to_rows, from_rows,
+)
+from src.optimizer.ControlFlowGraph import build_cfgs
+from src.optimizer.Liveness import Liveness
+
+# Campos en los que se puede poner una constante en lugar de un nombre
+_SUBSTITUTE = {
+    "=": (ARG1,),
+    "not": (ARG1,),
+    "ifFalse": (ARG1,),
+    "ifTrue": (ARG1,),
+    "print": (ARG1,),
+    "return": (ARG1,),
+    "param": (ARG1,),
+    "[]": (ARG2,),
+    "[]=": (ARG2, RESULT),
+    "setprop": (ARG2,),
+}
+_BINARY_FIELDS = (ARG1, ARG2)
+
+
+def fold_constants(quads, const_names=()):
+    """
+    Plegado y propagación de constantes sobre una QuadStore, procedimiento por
+    procedimiento; devuelve la QuadStore optimizada.
+
+    Es una propagación condicional: solo se siguen las aristas que pueden
+    ejecutarse, así que un `ifFalse` sobre una constante se vuelve `goto` (o
+    desaparece) y lo que llega por la rama muerta no arruina el valor de la otra.
+    Los operadores aritméticos, relacionales, de igualdad y `not` con operandos
+    conocidos se reemplazan por una asignación del resultado, y los temporales
+    constantes que ya nadie lee se borran (un `&&`/`||` con operandos
+    conocidos se reduce a la asignación de 1 o 0).
+
+    `const_names` son los nombres declarados con `const`: si su valor queda
+    constante se propaga a todos los procedimientos y sobrevive a las llamadas.
+    """
+    consts = {}
+    while True:
+        rows = to_rows(quads)
+        for cfg in build_cfgs(quads):
+            _Propagation(cfg, rows, consts).rewrite()
+        quads = from_rows(rows)
+        found = _const_values(rows, const_names)
+        if found.keys() <= consts.keys():
+            break
+        consts = found  # una const puede depender de otra: se vuelve a propagar
+
+    rows = to_rows(quads)
+    for cfg in build_cfgs(quads):
+        _remove_dead_temps(cfg, rows)
+    return from_rows(rows)
+
+
+def _const_values(rows, const_names):
+    """Constantes declaradas con `const` que se asignan una sola vez y con un literal."""
+    const_names = set(const_names)
+    if not const_names:
+        return {}
+    values, seen = {}, set()
+    for row in rows:
+        if row is None:
+            continue
+        d = defined(row)
+        if d not in const_names:
+            continue
+        if d in seen:
+            values.pop(d, None)
+            continue
+        seen.add(d)
+        v = literal(row[ARG1]) if row[OP] == "=" else None
+        if v is not None:
+            values[d] = v
+    return values
+
+
+class _Propagation:
+    def __init__(self, cfg, rows, consts):
+        self.cfg = cfg
+        self.rows = rows
+        self.consts = consts
+        self.in_state = [None] * len(cfg.blocks)  # None: bloque que no se alcanzó
+        self._solve()
+
+    # Análisis
+    def _solve(self):
+        blocks = self.cfg.blocks
+        if not blocks:
+            return
+        edges = {}     # (origen, destino) -> estado que llega por esa arista
+        # Se procesa en orden RPO (los predecesores antes, salvo aristas de retorno)
+        order = [len(blocks)] * len(blocks)
+        for i, b in enumerate(self.cfg.rpo):
+            order[b] = i
+        work = [(order[self.cfg.entry], self.cfg.entry)]
+        queued = {self.cfg.entry}
+        while work:
+            b = heapq.heappop(work)[1]
+            queued.discard(b)
+            block = blocks[b]
+            incoming = [edges[(p, b)] for p in block.preds if (p, b) in edges]
+            if b == self.cfg.entry:
+                incoming.append(dict(self.consts))
+            new_in = _meet(incoming)
+            if self.in_state[b] is not None and _same_state(new_in, self.in_state[b]):
+                continue
+            self.in_state[b] = new_in
+
+            env = dict(new_in)
+            written = set()
+            taken = self._run(block, env, written)
+            if taken is None:
+                normal = [s for s in block.succs if s != block.handler]
+            else:
+                normal = [s for s in block.succs if s in taken]
+            merged = {s: env for s in normal}
+            if block.handler is not None:
+                # el catch puede empezar desde cualquier punto del try
+                st = {k: v for k, v in new_in.items() if k not in written}
+                h = block.handler
+                merged[h] = _meet([merged[h], st]) if h in merged else st
+            for s, st in merged.items():
+                old = edges.get((b, s))
+                if old is None or not _same_state(old, st):
+                    edges[(b, s)] = st
+                    if s not in queued:
+                        queued.add(s)
+                        heapq.heappush(work, (order[s], s))
+
+    def _run(self, block, env, written, rewrite=False):
+        """
+        Aplica los cuádruplos del bloque a `env` (nombre -> literal). Devuelve los
+        sucesores que pueden ejecutarse si el salto final se decide en compilación,
+        o None si pueden ejecutarse todos.
+        """
+        rows, consts = self.rows, self.consts
+        taken = None
+
+        def value(x):
+            v = literal(x)
+            if v is None and isinstance(x, str):
+                v = env.get(x)
+            return v
+
+        for i in range(block.start, block.end):
+            row = rows[i]
+            if row is None:
+                continue
+            op = row[OP]
+
+            if rewrite:
+                for f in _BINARY_FIELDS if op in BINARY else _SUBSTITUTE.get(op, ()):
+                    if op == "param" and row[ARG1] is None:
+                        break
+                    v = env.get(row[f]) if is_variable(row[f]) else None
+                    if v is not None:
+                        row[f] = v
+
+            if op in BRANCHES:
+                t = truthy(value(row[ARG1]))
+                if t is not None:
+                    jumps = t == (op == "ifTrue")
+                    target = self.cfg.label_index.get(row[RESULT])
+                    nxt = block.id + 1
+                    taken = {target} if jumps else {nxt}
+                    if rewrite:
+                        if jumps:
+                            row[OP], row[ARG1] = "goto", None
+                        else:
+                            rows[i] = None
+                continue
+
+            d = defined(row)
+            if d is None:
+                continue
+            written.add(d)
+            v = None
+            if op == "=":
+                v = value(row[ARG1])
+            elif op in BINARY:
+                a, b = value(row[ARG1]), value(row[ARG2])
+                if a is not None and b is not None:
+                    v = evaluate(op, a, b)
+            elif op in UNARY:
+                a = value(row[ARG1])
+                if a is not None:
+                    v = evaluate(op, a)
+
+            if rewrite and v is not None and op != "=":
+                row[OP], row[ARG1], row[ARG2] = "=", v, None
+
+            if v is None:
+                env.pop(d, None)
+            else:
+                env[d] = v
+
+            if op in CALLS:
+                # La llamada puede cambiar globales y variables de funciones que la encierran
+                for k in [k for k in env if not is_temp(k) and k not in consts]:
+                    del env[k]
+        return taken
+
+    # Reescritura
+    def rewrite(self):
+        for block in self.cfg.blocks:
+            st = self.in_state[block.id]
+            if st is not None:
+                self._run(block, dict(st), set(), rewrite=True)
+
+
+def _remove_dead_temps(cfg, rows):
+    """Borra `= literal tN` cuando tN ya no se lee después (su valor se propagó)."""
+    live = Liveness(cfg, rows)
+    for block in cfg.blocks:
+        for i, after in live.backwards(block):
+            row = rows[i]
+            if row[OP] == "=" and is_temp(row[RESULT]) and literal(row[ARG1]) is not None \
+                    and row[RESULT] not in after:
+                rows[i] = None
+
+
+def _meet(states):
+    if not states:
+        return {}
+    out = dict(states[0])
+    for st in states[1:]:
+        for k in list(out):
+            if k not in st or not same_value(st[k], out[k]):
+                del out[k]
+    return out
+
+
+def _same_state(a, b):
+    return a.keys() == b.keys() and all(same_value(a[k], b[k]) for k in a)
@@ -0,0 +1,415 @@
+from collections import defaultdict
+
+# Ops que terminan un bloque básico
+JUMPS = {"goto", "ifFalse", "ifTrue"}
+CONDITIONAL = {"ifFalse", "ifTrue"}
+EXITS = {"return", "endfunc"}
+TERMINATORS = JUMPS | EXITS | {"trybegin", "tryend"}
+
+MAIN = "<main>"
+
+
+def is_function_label(op, result):
+    return op == "label" and isinstance(result, str) and result.startswith("func_")
+
+
+class BasicBlock:
+    """Rango [start, end) de índices de cuádruplos que se ejecuta de corrido."""
+
+    __slots__ = ("id", "start", "end", "labels", "succs", "preds", "handler", "idom", "loop_depth")
+
+    def __init__(self, id, start, end):
+        self.id = id
+        self.start = start
+        self.end = end
+        self.labels = []     # etiquetas al inicio del bloque
+        self.succs = []      # ids de bloques sucesores
+        self.preds = []
+        self.handler = None  # bloque del catch si el bloque está dentro de un try
+        self.idom = None     # dominador inmediato (None en la entrada y en bloques inalcanzables)
+        self.loop_depth = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"B{self.id}[{self.start}:{self.end}]"
+
+
+class Loop:
+    """Ciclo natural: la cabecera domina a todos sus bloques; los latches saltan de vuelta a ella."""
+
+    __slots__ = ("header", "blocks", "latches", "parent")
+
+    def __init__(self, header, blocks, latches):
+        self.header = header
+        self.blocks = blocks    # set de ids, incluye la cabecera
+        self.latches = latches  # ids de los bloques con la arista de retorno
+        self.parent = None      # ciclo que lo contiene, si hay
+
+    def __contains__(self, block_id):
+        return block_id in self.blocks
+
+    def __repr__(self):
+        return f"Loop(B{self.header}, {len(self.blocks)} blocks)"
+
+
+class ControlFlowGraph:
+    """
+    CFG de un procedimiento (el código top-level o una función/método).
+
+    Los bloques guardan rangos de índices sobre la QuadStore del programa; los del
+    código top-level saltan por encima de los cuerpos de función que CodeGenerator
+    emite en línea. Las etiquetas se resuelven con `label_index` (nombre -> bloque).
+    Al construirlo se calculan predecesores, sucesores, dominadores (Cooper, Harvey y
+    Kennedy sobre el orden postorden inverso) y ciclos naturales.
+    """
+
+    def __init__(self, name, quads, blocks, label_index, duplicate_labels=(), unresolved=()):
+        self.name = name
+        self.quads = quads
+        self.blocks = blocks
+        self.entry = 0
+        self.label_index = label_index
+        self.duplicate_labels = list(duplicate_labels)  # etiquetas definidas más de una vez
+        self.unresolved = list(unresolved)              # (bloque, etiqueta) de saltos sin destino
+        self.rpo = []
+        self.loops = []
+        self._pre = self._post = None
+        self._innermost = None
+        if blocks:
+            self._compute_rpo()
+            self._compute_dominators()
+            self._compute_loops()
+
+    # Consultas
+    def block_of(self, index):
+        """Bloque que contiene el cuádruplo en la posición `index` (o None si es de otro procedimiento)."""
+        lo, hi = 0, len(self.blocks)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            b = self.blocks[mid]
+            if index < b.start:
+                hi = mid
+            elif index >= b.end:
+                lo = mid + 1
+            else:
+                return b
+        return None
+
+    def target(self, label):
+        bid = self.label_index.get(label)
+        return None if bid is None else self.blocks[bid]
+
+    def block_quads(self, block):
+        return self.quads[block.start:block.end]
+
+    def reachable(self, block_id):
+        return block_id == self.entry or self.blocks[block_id].idom is not None
+
+    def dominates(self, a, b):
+        """¿Todo camino desde la entrada hasta `b` pasa por `a`? O(1) con la numeración del árbol de dominadores."""
+        if not self.reachable(a) or not self.reachable(b):
+            return False
+        return self._pre[a] <= self._pre[b] and self._post[b] <= self._post[a]
+
+    def dominators(self, block_id):
+        out = []
+        b = block_id
+        while b is not None:
+            out.append(b)
+            b = self.blocks[b].idom
+        return out if self.reachable(block_id) else []
+
+    def exits(self):
+        return [b for b in self.blocks if not b.succs]
+
+    def preheader(self, loop):
+        """
+        Índice donde insertar código que corra una vez antes de entrar al ciclo: justo
+        antes de la primera etiqueta de la cabecera a la que se salta desde dentro.
+        Sirve si desde fuera solo se entra cayendo del bloque anterior o saltando a
+        etiquetas previas a esa, y desde dentro solo saltando a ella o a las
+        siguientes. None si no hay tal posición (p. ej. se entra por un catch).
+        """
+        header = self.blocks[loop.header]
+        labels = header.labels
+        outside, inside = -1, len(labels)  # -1: se llega cayendo, antes de todas las etiquetas
+        entered = False
+        for p in header.preds:
+            block = self.blocks[p]
+            last = self.quads[block.end - 1]
+            edges = []
+            if (last.op in JUMPS or last.op == "trybegin") and last.result in labels:
+                edges.append(labels.index(last.result))
+            if p == header.id - 1 and last.op != "goto" and last.op not in EXITS:
+                edges.append(-1)
+            if not edges:
+                return None
+            if p in loop:
+                if -1 in edges:
+                    return None
+                inside = min(inside, *edges)
+            else:
+                entered = True
+                outside = max(outside, *edges)
+        if not entered or outside >= inside:
+            return None
+        return header.start + inside
+
+    def loop_of(self, block_id):
+        """Ciclo más interno que contiene al bloque."""
+        return self._innermost[block_id] if self.loops else None
+
+    def to_json(self):
+        ids = self.quads.column("id") if len(self.quads) else []
+        def qid(i):
+            return ids[i] if i < len(ids) else None
+        return {
+            "name": self.name,
+            "blocks": [{
+                "id": b.id,
+                "first": qid(b.start),
+                "last": qid(b.end - 1),
+                "labels": b.labels,
+                "succs": b.succs,
+                "preds": b.preds,
+                "idom": b.idom,
+                "loopDepth": b.loop_depth,
+            } for b in self.blocks],
+            "loops": [{"header": l.header, "blocks": sorted(l.blocks), "latches": l.latches} for l in self.loops],
+        }
+
+    # Análisis
+    def _compute_rpo(self):
+        blocks = self.blocks
+        seen = [False] * len(blocks)
+        order = []
+        stack = [(self.entry, iter(blocks[self.entry].succs))]
+        seen[self.entry] = True
+        while stack:
+            b, it = stack[-1]
+            for s in it:
+                if not seen[s]:
+                    seen[s] = True
+                    stack.append((s, iter(blocks[s].succs)))
+                    break
+            else:
+                stack.pop()
+                order.append(b)
+        order.reverse()
+        self.rpo = order
+
+    def _compute_dominators(self):
+        blocks = self.blocks
+        rpo_num = [-1] * len(blocks)
+        for i, b in enumerate(self.rpo):
+            rpo_num[b] = i
+        idom = [None] * len(blocks)
+        entry = self.entry
+        idom[entry] = entry
+
+        def intersect(a, b):
+            while a != b:
+                while rpo_num[a] > rpo_num[b]:
+                    a = idom[a]
+                while rpo_num[b] > rpo_num[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for b in self.rpo[1:]:
+                new = None
+                for p in blocks[b].preds:
+                    if idom[p] is None:
+                        continue
+                    new = p if new is None else intersect(p, new)
+                if new is not None and idom[b] != new:
+                    idom[b] = new
+                    changed = True
+
+        for b in blocks:
+            b.idom = idom[b.id] if b.id != entry else None
+
+        # Numeración pre/post del árbol de dominadores para dominates() en O(1)
+        children = defaultdict(list)
+        for b in self.rpo[1:]:
+            if idom[b] is not None:
+                children[idom[b]].append(b)
+        pre = [0] * len(blocks)
+        post = [0] * len(blocks)
+        clock = 0
+        stack = [(entry, False)]
+        while stack:
+            b, done = stack.pop()
+            if done:
+                post[b] = clock
+                clock += 1
+                continue
+            pre[b] = clock
+            clock += 1
+            stack.append((b, True))
+            for c in children[b]:
+                stack.append((c, False))
+        self._pre, self._post = pre, post
+
+    def _compute_loops(self):
+        blocks = self.blocks
+        latches = defaultdict(list)
+        for b in self.rpo:
+            for s in blocks[b].succs:
+                if self.dominates(s, b):
+                    latches[s].append(b)
+
+        loops = []
+        for header in self.rpo:  # en RPO: los ciclos externos antes que los internos
+            if header not in latches:
+                continue
+            body = {header}
+            stack = [l for l in latches[header] if l != header]
+            body.update(stack)
+            while stack:
+                b = stack.pop()
+                for p in blocks[b].preds:
+                    if p not in body and self.reachable(p):
+                        body.add(p)
+                        stack.append(p)
+            loops.append(Loop(header, body, latches[header]))
+
+        # Anidamiento: de mayor a menor cada ciclo pisa el "más interno" de sus bloques;
+        # como dos ciclos naturales son disjuntos o anidados, el padre es el que
+        # tenía la cabecera justo antes.
+        innermost = [None] * len(blocks)
+        for loop in sorted(loops, key=lambda l: -len(l.blocks)):
+            loop.parent = innermost[loop.header]
+            for b in loop.blocks:
+                innermost[b] = loop
+                blocks[b].loop_depth += 1
+        self._innermost = innermost
+        self.loops = loops
+
+
+def build_cfgs(quads):
+    """
+    Parte el TAC en procedimientos (top-level + una entrada por cada `label func_*`
+    ... `endfunc`, anidados incluidos) y devuelve un ControlFlowGraph por cada uno,
+    el top-level primero. Lineal en la cantidad de cuádruplos.
+    """
+    ops = quads.column("op")
+    results = quads.column("result")
+    n = len(ops)
+
+    # 1. Segmentos contiguos de cada procedimiento
+    procs = [[MAIN, []]]
+    stack = [0]
+    seg_start = 0
+    for i in range(n):
+        op = ops[i]
+        if is_function_label(op, results[i]):
+            if seg_start < i:
+                procs[stack[-1]][1].append((seg_start, i))
+            procs.append([results[i], []])
+            stack.append(len(procs) - 1)
+            seg_start = i
+        elif op == "endfunc" and len(stack) > 1:
+            procs[stack[-1]][1].append((seg_start, i + 1))
+            stack.pop()
+            seg_start = i + 1
+    while stack:
+        if seg_start < n:
+            procs[stack[-1]][1].append((seg_start, n))
+        seg_start = n
+        stack.pop()
+
+    return [_build_procedure(name, segments, quads, ops, results) for name, segments in procs]
+
+
+def build_procedure_cfg(quads, name, indices):
+    """
+    CFG de un solo procedimiento dado por sus índices en orden (los de
+    Layout.ProgramLayout, que además separa los inicializadores de campos que
+    build_cfgs deja en el top-level). Los tramos no contiguos se encadenan.
+    """
+    segments = []
+    for i in indices:
+        if segments and segments[-1][1] == i:
+            segments[-1][1] = i + 1
+        else:
+            segments.append([i, i + 1])
+    ops = quads.column("op")
+    results = quads.column("result")
+    return _build_procedure(name, [tuple(s) for s in segments], quads, ops, results)
+
+
+def _build_procedure(name, segments, quads, ops, results):
+    blocks = []
+    label_index = {}
+    duplicates = []
+    handler_of = []   # por bloque: etiqueta del catch activo
+    handlers = []     # pila de etiquetas de trybegin abiertas
+
+    # 2. Bloques: empiezan en el inicio de un segmento, en una etiqueta (salvo que
+    #    la anterior también lo sea) y después de cada terminador.
+    for seg_start, seg_end in segments:
+        start = seg_start
+        for i in range(seg_start, seg_end):
+            op = ops[i]
+            if op == "label" and i > start and ops[i - 1] != "label":
+                blocks.append(BasicBlock(len(blocks), start, i))
+                handler_of.append(handlers[-1] if handlers else None)
+                start = i
+            if op == "label":
+                label = results[i]
+                if label in label_index:
+                    duplicates.append(label)
+                else:
+                    label_index[label] = len(blocks)
+            elif op in TERMINATORS:
+                blocks.append(BasicBlock(len(blocks), start, i + 1))
+                handler_of.append(handlers[-1] if handlers else None)
+                if op == "trybegin":
+                    handlers.append(results[i])
+                elif op == "tryend" and handlers:
+                    handlers.pop()
+                start = i + 1
+        if start < seg_end:
+            blocks.append(BasicBlock(len(blocks), start, seg_end))
+            handler_of.append(handlers[-1] if handlers else None)
+
+    for b in blocks:
+        last = b.start
+        while last < b.end and ops[last] == "label":
+            b.labels.append(results[last])
+            last += 1
+
+    # 3. Aristas
+    unresolved = []
+    last_id = len(blocks) - 1
+    for b in blocks:
+        op = ops[b.end - 1]
+        succs = []
+        if op in JUMPS or op == "trybegin":
+            if op != "goto" and b.id < last_id:
+                succs.append(b.id + 1)
+            target = label_index.get(results[b.end - 1])
+            if target is None:
+                unresolved.append((b.id, results[b.end - 1]))
+            elif target not in succs:
+                succs.append(target)
+        elif op not in EXITS and b.id < last_id:
+            succs.append(b.id + 1)
+
+        h = handler_of[b.id]
+        if h is not None and op != "trybegin":
+            target = label_index.get(h)
+            if target is not None:
+                b.handler = target
+                if target not in succs:
+                    succs.append(target)
+        b.succs = succs
+        for s in succs:
+            blocks[s].preds.append(b.id)
+
+    return ControlFlowGraph(name, quads, blocks, label_index, duplicates, unresolved)
@@ -0,0 +1,104 @@
+from src.optimizer.Tac import (
+    OP, ARG1, RESULT, CALLS,
+    is_temp, is_variable, defined, use_fields, to_rows, from_rows,
+)
+from src.optimizer.ControlFlowGraph import build_cfgs
+from src.optimizer.Availability import Availability
+
+
+def propagate_copies(quads):
+    """
+    Propagación de copias sobre el CFG de cada procedimiento: después de `x = y`,
+    las lecturas de x se reemplazan por y mientras la copia esté disponible en todos
+    los caminos (ni x ni y se volvieron a asignar, y si alguno no es temporal, no
+    hubo una llamada en medio). La copia queda sin lectores y la borra deadcode.
+    Las copias de literales ya las propaga constfold.
+    """
+    rows = to_rows(quads)
+    for cfg in build_cfgs(quads):
+        _Copies(cfg, rows).rewrite()
+    return from_rows(rows)
+
+
+def _copy(row):
+    if row[OP] == "=" and is_variable(row[ARG1]) and row[ARG1] != row[RESULT]:
+        return row[RESULT], row[ARG1]
+    return None
+
+
+class _Copies:
+    def __init__(self, cfg, rows):
+        self.cfg = cfg
+        self.rows = rows
+        self.bits = {}       # (x, y) -> bit
+        self.by_name = {}    # nombre -> bits de las copias que lo mencionan
+        self.sources = {}    # x -> [(bit, y)]
+        self.outer = 0       # bits de copias con algún nombre no temporal
+
+        for block in cfg.blocks:
+            for i in range(block.start, block.end):
+                c = _copy(rows[i]) if rows[i] is not None else None
+                if c is None or c in self.bits:
+                    continue
+                bit = self.bits[c] = 1 << len(self.bits)
+                x, y = c
+                self.sources.setdefault(x, []).append((bit, y))
+                for name in c:
+                    self.by_name[name] = self.by_name.get(name, 0) | bit
+                    if not is_temp(name):
+                        self.outer |= bit
+
+        gen, kill = [], []
+        for block in cfg.blocks:
+            g = k = 0
+            for i in range(block.start, block.end):
+                if rows[i] is None:
+                    continue
+                killed = self._kills(rows[i])
+                g = (g & ~killed) | self._gen(rows[i])
+                k |= killed
+            gen.append(g)
+            kill.append(k)
+        self.avail = Availability(cfg, gen, kill, (1 << len(self.bits)) - 1)
+
+    def _kills(self, row):
+        k = 0
+        d = defined(row)
+        if d is not None:
+            k |= self.by_name.get(d, 0)
+        if row[OP] in CALLS:
+            k |= self.outer
+        return k
+
+    def _gen(self, row):
+        c = _copy(row)
+        return self.bits[c] if c is not None else 0
+
+    def _source(self, x, avail):
+        # Sigue la cadena de copias disponibles (x = y, y = z: x se lee como z)
+        seen = set()
+        while is_variable(x) and x not in seen:
+            seen.add(x)
+            for bit, y in self.sources.get(x, ()):
+                if avail & bit:
+                    x = y
+                    break
+            else:
+                break
+        return x
+
+    def rewrite(self):
+        if not self.bits:
+            return
+        rows = self.rows
+        for b in self.cfg.rpo:
+            block = self.cfg.blocks[b]
+            avail = self.avail.avail_in[b]
+            for i in range(block.start, block.end):
+                row = rows[i]
+                if row is None:
+                    continue
+                gen = self._gen(row)  # la copia original, antes de reescribir su fuente
+                for f in use_fields(row[OP]):
+                    row[f] = self._source(row[f], avail)
+                avail = (avail & ~self._kills(row)) | gen
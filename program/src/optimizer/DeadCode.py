@@ -0,0 +1,167 @@
+from src.optimizer.Tac import (
+    OP, ARG2, RESULT, BINARY, BRANCHES,
+    literal, is_temp, uses, defined, to_rows, from_rows,
+)
+from src.optimizer.ControlFlowGraph import build_cfgs, is_function_label
+from src.optimizer.Liveness import Liveness
+
+# Estructura del programa: se conservan aunque su bloque no se alcance
+_STRUCTURAL = {"endfunc", "class", "endclass", "inherit"}
+
+# Ops sin efectos: si nadie lee lo que definen se pueden borrar.
+# `/` y `%` solo si el divisor es un literal distinto de cero (si no, pueden fallar).
+_PURE = (BINARY - {"/", "%"}) | {"=", "not", "newarr"}
+
+_JUMPS = BRANCHES | {"goto"}
+
+
+def eliminate_dead_code(quads, global_names=()):
+    """
+    Borra del TAC, procedimiento por procedimiento:
+
+    - los bloques que no se alcanzan desde la entrada (p. ej. lo que sigue a un
+      `return`, o la rama que la propagación de constantes dejó sin usar);
+    - los saltos a la instrucción siguiente;
+    - las asignaciones sin efectos a temporales o a variables locales de una función
+      que nadie lee después (liveness); se repite hasta que no queda ninguna;
+    - las etiquetas a las que ya no salta nadie.
+
+    `global_names` son los nombres del scope global: una asignación a ellos nunca se
+    borra, porque otra función puede leerlos. Las etiquetas `func_*`, `endfunc`,
+    `class`/`endclass` y los pares `trybegin`/`tryend` alcanzables se conservan.
+    """
+    rows = to_rows(quads)
+    _remove_unreachable(rows, build_cfgs(quads))
+    _remove_jumps_to_next(rows)
+
+    quads = from_rows(rows)
+    global_names = set(global_names)
+    while True:
+        rows = to_rows(quads)
+        cfgs = build_cfgs(quads)
+        removed = 0
+        for cfg, track in zip(cfgs, _tracked(cfgs, rows, global_names)):
+            removed += _remove_dead_assignments(cfg, rows, track)
+        if not removed:
+            break
+        quads = from_rows(rows)
+
+    _remove_unused_labels(rows)
+    return from_rows(rows)
+
+
+def _remove_unreachable(rows, cfgs):
+    # trybegin -> tryend que lo cierra: el par se queda o se va junto
+    closing, stack = {}, []
+    for i, row in enumerate(rows):
+        if row[OP] == "trybegin":
+            stack.append(i)
+        elif row[OP] == "tryend" and stack:
+            closing[stack.pop()] = i
+
+    keep_tryend = set()
+    for cfg in cfgs:
+        for block in cfg.blocks:
+            if not cfg.reachable(block.id):
+                continue
+            for i in range(block.start, block.end):
+                if rows[i][OP] == "trybegin" and i in closing:
+                    keep_tryend.add(closing[i])
+
+    for cfg in cfgs:
+        for block in cfg.blocks:
+            if cfg.reachable(block.id):
+                continue
+            for i in range(block.start, block.end):
+                op = rows[i][OP]
+                if op in _STRUCTURAL or is_function_label(op, rows[i][RESULT]) or i in keep_tryend:
+                    continue
+                rows[i] = None
+
+
+def _remove_jumps_to_next(rows):
+    n = len(rows)
+    for i, row in enumerate(rows):
+        if row is None or row[OP] not in _JUMPS:
+            continue
+        j = i + 1
+        while j < n and (rows[j] is None or rows[j][OP] == "label"):
+            if rows[j] is not None and rows[j][RESULT] == row[RESULT]:
+                rows[i] = None  # la condición es un nombre o literal: evaluarla no tiene efectos
+                break
+            j += 1
+
+
+def _tracked(cfgs, rows, global_names):
+    """
+    Por procedimiento, qué nombres se pueden dar por muertos al salir: los temporales
+    y, en las funciones, las variables que define y que no son globales ni las lee
+    otro procedimiento ni las asigna una función que la encierra o que está dentro
+    de ella (cierran sobre la misma variable).
+    """
+    used_by = {}
+    defined_by = []
+    for k, cfg in enumerate(cfgs):
+        defs = set()
+        for block in cfg.blocks:
+            for i in range(block.start, block.end):
+                row = rows[i]
+                if row is None:
+                    continue
+                for u in uses(row):
+                    used_by.setdefault(u, set()).add(k)
+                d = defined(row)
+                if d is not None:
+                    defs.add(d)
+        defined_by.append(defs)
+
+    # Lo que asignan las funciones que encierran a cada una o que están dentro de ella:
+    # `acc = acc + k` en una anidada escribe la `acc` de afuera aunque solo ella la lea
+    spans = [(min(b.start for b in cfg.blocks), max(b.end for b in cfg.blocks)) if cfg.blocks else (0, 0)
+             for cfg in cfgs]
+    out = []
+    for k, cfg in enumerate(cfgs):
+        if k == 0:  # top-level: todo lo que no es temporal es global
+            out.append(is_temp)
+            continue
+        start, end = spans[k]
+        shared = set()
+        for j in range(1, len(cfgs)):
+            s, e = spans[j]
+            if j != k and (s <= start < e or start <= s < end):
+                shared |= defined_by[j]
+        local = {d for d in defined_by[k]
+                 if d not in global_names and d not in shared and used_by.get(d, {k}) <= {k}}
+        out.append(lambda name, local=local: is_temp(name) or name in local)
+    return out
+
+
+def _removable(row):
+    op = row[OP]
+    if op in _PURE:
+        return True
+    if op in ("/", "%"):
+        d = literal(row[ARG2])
+        return isinstance(d, (int, float)) and d != 0
+    return False
+
+
+def _remove_dead_assignments(cfg, rows, track):
+    live = Liveness(cfg, rows, track)
+    removed = 0
+    for block in cfg.blocks:
+        for i, after in live.backwards(block):
+            row = rows[i]
+            d = defined(row)
+            if d is not None and track(d) and d not in after and _removable(row):
+                rows[i] = None
+                removed += 1
+    return removed
+
+
+def _remove_unused_labels(rows):
+    targets = {row[RESULT] for row in rows if row is not None and (row[OP] in _JUMPS or row[OP] == "trybegin")}
+    for i, row in enumerate(rows):
+        if row is not None and row[OP] == "label" and row[RESULT] not in targets \
+                and not is_function_label(row[OP], row[RESULT]):
+            rows[i] = None
@@ -0,0 +1,86 @@
+from src.optimizer.Tac import uses, defined, is_temp
+
+
+class Liveness:
+    """
+    Variables vivas a la entrada y salida de cada bloque de un ControlFlowGraph
+    (análisis hacia atrás clásico). Solo se siguen los nombres para los que
+    `track(nombre)` es verdadero; por defecto los temporales, que son locales a
+    cada procedimiento. Las filas en None (cuádruplos ya borrados) se ignoran.
+    """
+
+    def __init__(self, cfg, rows, track=is_temp, exit_live=()):
+        self.cfg = cfg
+        self.rows = rows
+        self.track = track
+        self.exit_live = set(exit_live)  # vivas al salir del procedimiento (p. ej. globales)
+        n = len(cfg.blocks)
+        self.gen = [None] * n
+        self.kill = [None] * n
+        self.live_in = [set() for _ in range(n)]
+        self.live_out = [set() for _ in range(n)]
+        for b in cfg.blocks:
+            self._local(b)
+        self._solve()
+
+    def _local(self, block):
+        gen, kill = set(), set()
+        track = self.track
+        for i in range(block.start, block.end):
+            row = self.rows[i]
+            if row is None:
+                continue
+            for u in uses(row):
+                if u not in kill and track(u):
+                    gen.add(u)
+            d = defined(row)
+            if d is not None and track(d):
+                kill.add(d)
+        self.gen[block.id] = gen
+        self.kill[block.id] = kill
+
+    def _solve(self):
+        blocks = self.cfg.blocks
+        # En postorden converge en pocas vueltas
+        work = list(self.cfg.rpo) + [b.id for b in blocks if not self.cfg.reachable(b.id)]
+        pending = set(work)
+        while work:
+            b = work.pop()
+            pending.discard(b)
+            block = blocks[b]
+            out = set(self.exit_live) if not block.succs else set()
+            for s in block.succs:
+                out |= self.live_in[s]
+            self.live_out[b] = out
+            new_in = self.gen[b] | (out - self.kill[b])
+            if new_in != self.live_in[b]:
+                self.live_in[b] = new_in
+                for p in block.preds:
+                    if p not in pending:
+                        pending.add(p)
+                        work.append(p)
+
+    def backwards(self, block):
+        """
+        Recorre el bloque de abajo hacia arriba dando (índice, vivas_después) para
+        cada fila. Dentro de un try también está vivo lo que usa el catch, porque
+        cualquier cuádruplo puede saltar ahí. Si quien recorre borra la fila
+        (rows[i] = None), lo que leía deja de estar vivo más arriba.
+        """
+        live = set(self.live_out[block.id])
+        handler = self.live_in[block.handler] if block.handler is not None else set()
+        track = self.track
+        for i in range(block.end - 1, block.start - 1, -1):
+            row = self.rows[i]
+            if row is None:
+                continue
+            live |= handler
+            yield i, live
+            if self.rows[i] is None:  # quien recorre lo borró: sus operandos no cuentan
+                continue
+            d = defined(row)
+            if d is not None:
+                live.discard(d)
+            for u in uses(row):
+                if track(u):
+                    live.add(u)
@@ -0,0 +1,189 @@
+from src.optimizer.Tac import (
+    OP, ARG1, ARG2, RESULT, BINARY, UNARY, BRANCHES, CALLS,
+    literal, is_temp, is_variable, defined, to_rows, from_rows,
+)
+from src.optimizer.ControlFlowGraph import build_cfgs
+from src.optimizer.Liveness import Liveness
+
+# Ops que se pueden sacar del ciclo si sus operandos no cambian adentro
+_HOISTABLE = BINARY | UNARY | {"=", "[]", "getprop", "len"}
+# De esas, las que pueden fallar en ejecución (división entre cero, índice fuera de
+# rango, null): solo salen si el ciclo las iba a correr antes de cualquier otro efecto
+_FAILING = {"/", "%", "[]", "getprop", "len"}
+# Lo que no se nota si corre o no: etiquetas, saltos y cálculos que no fallan
+_QUIET = BRANCHES | {"label", "goto"}
+
+
+def hoist_loop_invariants(quads):
+    """
+    Saca de cada ciclo natural los cálculos invariantes (sus operandos son literales,
+    nombres que el ciclo no asigna o temporales de otro cálculo invariante) y los pone
+    en el preheader, justo antes de la cabecera. Así el `len` del foreach o un
+    `this.x` que el cuerpo lee en cada vuelta se calculan una sola vez.
+
+    Solo salen cálculos cuyo destino es un temporal que el ciclo asigna una sola vez y
+    que no está vivo al entrar a la cabecera; si sigue vivo después del ciclo, su
+    bloque tiene que dominar esa salida. Los que pueden fallar (`/`, `%`, `[]`, `len`,
+    `getprop` fuera de `this`) además tienen que correr en todas las vueltas antes de
+    cualquier otro efecto, y no dentro de un try. `[]` no sale si el ciclo escribe un
+    arreglo, `getprop p` si asigna la propiedad p, y ninguno de los dos (ni nada que
+    lea un nombre no temporal) si hay llamadas.
+
+    Los ciclos se procesan de adentro hacia afuera: lo que sale de un ciclo interno
+    puede volver a salir del externo en la vuelta siguiente.
+    """
+    done = set()  # etiquetas de las cabeceras ya procesadas
+    while True:
+        rows = to_rows(quads)
+        moved = {}  # índice -> filas que van justo antes
+        pending = False
+        for cfg in build_cfgs(quads):
+            live = None
+            busy = set()  # bloques de los ciclos procesados en esta vuelta
+            for loop in sorted(cfg.loops, key=lambda l: len(l.blocks)):
+                labels = cfg.blocks[loop.header].labels
+                if not labels or labels[0] in done:
+                    continue
+                if loop.blocks & busy:
+                    pending = True  # contiene un ciclo que se acaba de mover: en la otra vuelta
+                    continue
+                done.add(labels[0])
+                busy |= loop.blocks
+                pos = cfg.preheader(loop)
+                if pos is None:
+                    continue
+                if live is None:
+                    live = Liveness(cfg, rows)
+                hoisted = _Hoister(cfg, rows, live, loop).run()
+                if hoisted:
+                    moved.setdefault(pos, []).extend(hoisted)
+        if moved:
+            out = []
+            for i, row in enumerate(rows):
+                out.extend(moved.get(i, ()))
+                out.append(row)
+            quads = from_rows(out)
+        if not pending:
+            return quads
+
+
+def can_fail(row):
+    op = row[OP]
+    if op in ("/", "%"):
+        d = literal(row[ARG2])
+        return not isinstance(d, (int, float)) or isinstance(d, bool) or d == 0
+    if op == "getprop":
+        return row[ARG1] != "this"
+    return op in _FAILING
+
+
+def _quiet(row):
+    return row[OP] in _QUIET or (row[OP] in _HOISTABLE and not can_fail(row))
+
+
+class _Hoister:
+    def __init__(self, cfg, rows, live, loop):
+        self.cfg = cfg
+        self.rows = rows
+        self.live = live
+        self.loop = loop
+        blocks = sorted(loop.blocks, key=lambda b: cfg.blocks[b].start)
+        self.indices = [i for b in blocks for i in range(cfg.blocks[b].start, cfg.blocks[b].end)
+                        if rows[i] is not None]
+
+        self.defs = {}        # nombre -> veces que el ciclo lo asigna
+        self.calls = False
+        self.stores = False   # hay `[]=`
+        self.props = set()    # propiedades asignadas con setprop
+        for i in self.indices:
+            row = rows[i]
+            d = defined(row)
+            if d is not None:
+                self.defs[d] = self.defs.get(d, 0) + 1
+            op = row[OP]
+            if op in CALLS:
+                self.calls = True
+            elif op == "[]=":
+                self.stores = True
+            elif op == "setprop":
+                self.props.add(row[RESULT])
+
+        # Salidas: (bloque del ciclo, bloque de afuera)
+        self.exits = [(b, s) for b in loop.blocks for s in cfg.blocks[b].succs if s not in loop]
+        self.exiting = {b for b in loop.blocks if not cfg.blocks[b].succs} | {b for b, _ in self.exits}
+        self.hoisted = set()  # índices
+        self.invariant = set()  # temporales definidos por cálculos que salen
+
+    def run(self):
+        out = []
+        changed = True
+        while changed:
+            changed = False
+            for i in self.indices:
+                if i not in self.hoisted and self._can_hoist(i):
+                    self.hoisted.add(i)
+                    self.invariant.add(self.rows[i][RESULT])
+                    out.append(self.rows[i])
+                    changed = True
+        for i in self.hoisted:
+            self.rows[i] = None
+        return out
+
+    def _operand(self, x):
+        if not is_variable(x):
+            return True
+        n = self.defs.get(x, 0)
+        if n == 0:
+            return is_temp(x) or not self.calls
+        return n == 1 and x in self.invariant
+
+    def _can_hoist(self, i):
+        row = self.rows[i]
+        op = row[OP]
+        d = row[RESULT]
+        if op not in _HOISTABLE or not is_temp(d) or self.defs.get(d) != 1:
+            return False
+        if d in self.live.live_in[self.loop.header]:
+            return False
+        operands = [row[ARG1]] if op in ("getprop", "=", "len") or op in UNARY else [row[ARG1], row[ARG2]]
+        if not all(self._operand(x) for x in operands):
+            return False
+        if op == "[]" and (self.stores or self.calls):
+            return False
+        if op == "getprop" and (row[ARG2] in self.props or self.calls):
+            return False
+
+        cfg = self.cfg
+        block = cfg.block_of(i)
+        for b, s in self.exits:
+            if d in self.live.live_in[s]:
+                if cfg.blocks[b].handler == s or not cfg.dominates(block.id, b):
+                    return False
+        if can_fail(row):
+            return self._runs_first(i, block)
+        return True
+
+    def _runs_first(self, i, block):
+        # Entrando al ciclo, ¿se llega siempre a la fila i antes de cualquier otro efecto?
+        cfg, rows = self.cfg, self.rows
+        header = self.loop.header
+        if block.handler is not None or cfg.blocks[header].handler is not None:
+            return False
+        if any(not cfg.dominates(block.id, b) for b in self.exiting | set(self.loop.latches)):
+            return False
+        before = {header} if block.id != header else set()
+        stack = [p for p in block.preds if p in self.loop and block.id != header]
+        while stack:
+            b = stack.pop()
+            if b in before:
+                continue
+            before.add(b)
+            if b != header:
+                stack.extend(p for p in cfg.blocks[b].preds if p in self.loop)
+        ranges = [range(cfg.blocks[b].start, cfg.blocks[b].end) for b in before - {block.id}]
+        ranges.append(range(block.start, i))
+        for r in ranges:
+            for j in r:
+                if rows[j] is not None and j not in self.hoisted and not _quiet(rows[j]):
+                    return False
+        return True
@@ -0,0 +1,85 @@
+import time
+
+from src.codeGenerator.TempAllocator import allocate_temps
+from src.optimizer.ConstantFolding import fold_constants
+from src.optimizer.CommonSubexpressions import eliminate_common_subexpressions
+from src.optimizer.CopyPropagation import propagate_copies
+from src.optimizer.LoopInvariants import hoist_loop_invariants
+from src.optimizer.StrengthReduction import reduce_strength
+from src.optimizer.DeadCode import eliminate_dead_code
+
+
+class PassReport:
+    def __init__(self, name, before, after, wall):
+        self.name = name
+        self.before = before  # cuádruplos antes de la pasada
+        self.after = after
+        self.wall = wall      # segundos
+
+    @property
+    def removed(self):
+        return self.before - self.after
+
+    def to_json(self):
+        return {"pass": self.name, "before": self.before, "after": self.after,
+                "removed": self.removed, "ms": round(self.wall * 1000, 3)}
+
+
+class Optimizer:
+    """
+    Corre sobre una QuadStore las pasadas habilitadas para el nivel `-O` pedido, en
+    el orden de PASSES. Cada pasada recibe la QuadStore y el optimizador (para
+    leer `const_names`, `global_names` y demás información del programa) y devuelve
+    una nueva.
+
+    Conviene darle el TAC con temporales virtuales (CodeGenerator.virtual_quadruples):
+    al terminar vuelve a asignar los temporales y deja en `frame_temps` cuántos usa
+    cada procedimiento.
+    """
+
+    # (nivel mínimo, nombre, pasada)
+    PASSES = (
+        (1, "constfold", lambda quads, opt: fold_constants(quads, opt.const_names)),
+        (3, "licm", lambda quads, opt: hoist_loop_invariants(quads)),
+        (2, "cse", lambda quads, opt: eliminate_common_subexpressions(quads)),
+        (3, "strength", lambda quads, opt: reduce_strength(quads)),
+        (2, "copyprop", lambda quads, opt: propagate_copies(quads)),
+        (1, "deadcode", lambda quads, opt: eliminate_dead_code(quads, opt.global_names)),
+    )
+
+    def __init__(self, level=1, const_names=(), global_names=()):
+        self.level = level
+        self.const_names = set(const_names)
+        self.global_names = set(global_names)
+        self.reports = []
+        self.frame_temps = {}
+
+    def run(self, quads):
+        for min_level, name, run_pass in self.PASSES:
+            if self.level < min_level:
+                continue
+            start = time.perf_counter()
+            before = len(quads)
+            quads = run_pass(quads, self)
+            self.reports.append(PassReport(name, before, len(quads), time.perf_counter() - start))
+        quads, self.frame_temps = allocate_temps(quads)
+        return quads
+
+    @property
+    def removed(self):
+        return sum(r.removed for r in self.reports)
+
+
+def global_names(symbols):
+    return set(symbols.globalScope.symbols)
+
+
+def const_names(symbols):
+    """Nombres declarados con `const` en cualquier scope de la tabla de símbolos."""
+    names = set()
+    scopes = {symbols.globalScope, *symbols.scopes.values()}
+    for scope in scopes:
+        for name, sym in scope.symbols.items():
+            if getattr(sym, "kind", None) == "const":
+                names.add(name)
+    return names
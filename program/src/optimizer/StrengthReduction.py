@@ -0,0 +1,148 @@
+import itertools
+
+from src.utils.Temp import Temp
+from src.optimizer.Tac import (
+    ID, OP, ARG1, ARG2, RESULT, CALLS,
+    evaluate, is_temp, is_variable, defined, uses, to_rows, from_rows,
+)
+from src.optimizer.ControlFlowGraph import build_cfgs, TERMINATORS
+
+
+def reduce_strength(quads):
+    """
+    Variables de inducción de cada ciclo natural:
+
+    - simplificación: el incremento `t = i + 1; i = t` (el del foreach y el de
+      `i = i + 1`) queda como `i = i + 1` cuando nadie más lee t;
+    - reducción de fuerza: si i solo cambia en el ciclo con `i = i ± k` y entra al
+      ciclo con un entero, `i * c` (k y c literales enteros) se vuelve una copia de un
+      temporal s que se calcula una vez en el preheader (`s = i * c`) y se actualiza
+      con `s = s + c*k` después de cada incremento de i.
+
+    Las copias que quedan las limpian copyprop y deadcode.
+    """
+    rows = to_rows(quads)
+    next_id = max((r[ID] for r in rows), default=-1) + 1
+    next_temp = max((v.id for r in rows for v in r[ARG1:] if isinstance(v, Temp)), default=0) + 1
+    new_ids = itertools.count(next_id)
+    new_temps = (Temp(n) for n in itertools.count(next_temp))
+
+    reads = {}
+    for row in rows:
+        for u in uses(row):
+            reads[u] = reads.get(u, 0) + 1
+
+    before, after = {}, {}  # índice -> filas que van antes / después
+    for cfg in build_cfgs(quads):
+        simplified = set()
+        for loop in cfg.loops:
+            for b in loop.blocks:
+                block = cfg.blocks[b]
+                for i in range(block.start, block.end - 1):
+                    if i not in simplified and _simplify_increment(rows, i, reads):
+                        simplified.add(i)
+
+        reduced = set()
+        for loop in sorted(cfg.loops, key=lambda l: len(l.blocks)):
+            pos = cfg.preheader(loop)
+            if pos is not None:
+                _reduce(cfg, rows, loop, pos, reduced, new_temps, new_ids, before, after)
+
+    if before or after:
+        out = []
+        for i, row in enumerate(rows):
+            out.extend(before.get(i, ()))
+            out.append(row)
+            out.extend(after.get(i, ()))
+        rows = out
+    return from_rows(rows)
+
+
+def _int(x):
+    return isinstance(x, int) and not isinstance(x, bool)
+
+
+def _simplify_increment(rows, i, reads):
+    # `+ i k t` seguido de `= t _ i`, con t leído solo por esa copia -> `+ i k i`
+    row, copy = rows[i], rows[i + 1]
+    if row is None or copy is None or row[OP] not in ("+", "-"):
+        return False
+    t = row[RESULT]
+    if not is_temp(t) or reads.get(t) != 1 or copy[OP] != "=" or copy[ARG1] != t:
+        return False
+    x = copy[RESULT]
+    if not (row[ARG1] == x and _int(row[ARG2]) or row[OP] == "+" and row[ARG2] == x and _int(row[ARG1])):
+        return False
+    row[RESULT] = x
+    rows[i + 1] = None
+    return True
+
+
+def _step(row, x):
+    """k si la fila es `x = x + k` (o -k si es `x = x - k`), con k literal entero; si no, None."""
+    if row[RESULT] != x:
+        return None
+    if row[OP] == "+":
+        if row[ARG1] == x and _int(row[ARG2]):
+            return row[ARG2]
+        if row[ARG2] == x and _int(row[ARG1]):
+            return row[ARG1]
+    if row[OP] == "-" and row[ARG1] == x and _int(row[ARG2]):
+        return evaluate("-", 0, row[ARG2])
+    return None
+
+
+def _enters_as_int(rows, pos, x):
+    # Lo último que asigna x en el bloque del preheader tiene que ser un literal entero
+    for j in range(pos - 1, -1, -1):
+        row = rows[j]
+        if row is None:
+            continue
+        op = row[OP]
+        if op == "label" or op in TERMINATORS or (op in CALLS and not is_temp(x)):
+            return False
+        if defined(row) == x:
+            return op == "=" and _int(row[ARG1])
+    return False
+
+
+def _reduce(cfg, rows, loop, pos, reduced, new_temps, new_ids, before, after):
+    indices = [i for b in loop.blocks for i in range(cfg.blocks[b].start, cfg.blocks[b].end)
+               if rows[i] is not None]
+    calls = any(rows[i][OP] in CALLS for i in indices)
+
+    # Variables de inducción básicas: nombre -> [(índice, paso)]
+    defs = {}
+    for i in indices:
+        d = defined(rows[i])
+        if d is not None:
+            defs.setdefault(d, []).append(i)
+    steps = {}
+    for x, where in defs.items():
+        if not is_variable(x) or (calls and not is_temp(x)):
+            continue
+        found = [(i, _step(rows[i], x)) for i in where]
+        if all(k is not None for _, k in found):
+            steps[x] = found
+
+    reduced_by = {}  # (i, c) -> s
+    for i in sorted(indices):
+        row = rows[i]
+        if i in reduced or row[OP] != "*":
+            continue
+        for x, c in ((row[ARG1], row[ARG2]), (row[ARG2], row[ARG1])):
+            if x in steps and _int(c):
+                break
+        else:
+            continue
+        updates = [evaluate("*", c, k) for _, k in steps[x]]
+        if any(u is None for u in updates) or not _enters_as_int(rows, pos, x):
+            continue
+        s = reduced_by.get((x, c))
+        if s is None:
+            s = reduced_by[(x, c)] = next(new_temps)
+            before.setdefault(pos, []).append([next(new_ids), "*", x, c, s])
+            for (j, _), u in zip(steps[x], updates):
+                after.setdefault(j, []).append([next(new_ids), "+", s, u, s])
+        row[OP], row[ARG1], row[ARG2] = "=", s, None
+        reduced.add(i)
@@ -0,0 +1,178 @@
+import math
+
+from src.codeGenerator.QuadStore import QuadStore
+from src.utils.Temp import Temp
+
+# Lo que necesitan todas las pasadas para leer un cuádruplo del CodeGenerator:
+# qué operandos son literales, qué campos se leen como valores y qué nombre
+# define. Los cuádruplos se manejan como filas [id, op, arg1, arg2, result].
+ID, OP, ARG1, ARG2, RESULT = range(5)
+
+BINARY = {"+", "-", "*", "/", "%", "<", "<=", ">", ">=", "==", "!="}
+UNARY = {"not"}
+BRANCHES = {"ifFalse", "ifTrue"}
+
+# Ops cuyo result es el nombre que definen (además de BINARY y UNARY)
+_DEFINES = {"=", "[]", "getprop", "call", "callvirt", "new", "newarr", "len"}
+
+# Campos que se leen como valores; el resto son etiquetas, funciones, clases o propiedades
+_USES = {
+    "=": (ARG1,),
+    "not": (ARG1,),
+    "len": (ARG1,),
+    "ifFalse": (ARG1,),
+    "ifTrue": (ARG1,),
+    "print": (ARG1,),
+    "return": (ARG1,),
+    "param": (ARG1,),
+    "[]": (ARG1, ARG2),
+    "[]=": (ARG1, ARG2, RESULT),
+    "getprop": (ARG1,),
+    "setprop": (ARG1, ARG2),
+    "call": (ARG1,),     # un método se llama a través del temporal de su getprop
+    # callvirt no lee nada: el receptor es el primer `param` y arg1 es el slot de la vtable
+    "newarr": (ARG2,),
+}
+_BINARY_USES = (ARG1, ARG2)
+
+# Ops que pueden correr código del usuario (y por lo tanto cambiar cualquier variable no temporal)
+CALLS = {"call", "callvirt", "new"}
+
+# Fuera de rango de un entero de 32 bits no se pliega: lo decide el backend
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+def to_rows(quads):
+    return [list(row) for row in quads.rows()]
+
+
+def from_rows(rows):
+    """QuadStore con las filas que no se borraron (las borradas quedan en None)."""
+    return QuadStore.from_rows(rows)
+
+
+def is_temp(x):
+    return isinstance(x, Temp)
+
+
+def literal(x):
+    """
+    Valor constante de un operando o None si es un nombre. Los literales del
+    CodeGenerator son int/float y strings con sus comillas ('"hola"'); un string
+    de dígitos también se lee como entero.
+    """
+    if isinstance(x, bool):
+        return int(x)
+    if isinstance(x, (int, float)):
+        return x
+    if isinstance(x, str) and x:
+        if len(x) >= 2 and x[0] == x[-1] and x[0] in "\"'":
+            return x
+        if x.isascii() and x.isdigit():
+            return int(x)
+    return None
+
+
+def is_variable(x):
+    return isinstance(x, str) and literal(x) is None
+
+
+def same_value(a, b):
+    # 1, 1.0 y True son iguales para Python pero no para el TAC
+    return type(a) is type(b) and a == b
+
+
+def uses(row):
+    """Nombres (no literales) que lee el cuádruplo."""
+    op = row[OP]
+    fields = _BINARY_USES if op in BINARY else _USES.get(op, ())
+    return [row[f] for f in fields if is_variable(row[f])]
+
+
+def use_fields(op):
+    return _BINARY_USES if op in BINARY else _USES.get(op, ())
+
+
+def defined(row):
+    """Nombre que define el cuádruplo, o None."""
+    op = row[OP]
+    if op in BINARY or op in UNARY or op in _DEFINES:
+        return row[RESULT]
+    if op == "param" and row[ARG1] is None:  # parámetro en la cabecera de una función
+        return row[RESULT]
+    return None
+
+
+def truthy(v):
+    """Valor de verdad de una constante para ifFalse/ifTrue; None si no es numérica."""
+    if isinstance(v, (int, float)):
+        return v != 0
+    return None
+
+
+def evaluate(op, a, b=None):
+    """
+    Resultado de `op` sobre literales con la semántica del type checker (`/` siempre
+    da float, `%` solo entre enteros, + concatena strings), o None si no se puede
+    saber en compilación: tipos mezclados, división entre cero o desborde de 32 bits.
+    """
+    if op == "not":
+        t = truthy(a)
+        return None if t is None else int(not t)
+
+    if isinstance(a, str) or isinstance(b, str):
+        return _evaluate_string(op, a, b)
+    if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+        return None
+
+    if op == "+":
+        r = a + b
+    elif op == "-":
+        r = a - b
+    elif op == "*":
+        r = a * b
+    elif op == "/":
+        if b == 0:
+            return None
+        r = a / b
+    elif op == "%":
+        if not (isinstance(a, int) and isinstance(b, int)) or b == 0:
+            return None
+        r = int(math.fmod(a, b))
+    elif op == "<":
+        return int(a < b)
+    elif op == "<=":
+        return int(a <= b)
+    elif op == ">":
+        return int(a > b)
+    elif op == ">=":
+        return int(a >= b)
+    elif op == "==":
+        return int(a == b)
+    elif op == "!=":
+        return int(a != b)
+    else:
+        return None
+
+    if isinstance(r, int):
+        return r if INT_MIN <= r <= INT_MAX else None
+    return r if math.isfinite(r) else None
+
+
+def _evaluate_string(op, a, b):
+    def text(v):
+        # solo strings con comillas dobles (las mismas que se usan al concatenar) y enteros
+        if isinstance(v, str):
+            return v[1:-1] if v[0] == '"' else None
+        if isinstance(v, int):
+            return str(v)
+        return None
+
+    if op == "+":
+        ta, tb = text(a), text(b)
+        if ta is None or tb is None:
+            return None
+        return '"' + ta + tb + '"'
+    if op in ("==", "!=") and isinstance(a, str) and isinstance(b, str) and a == b:
+        # con escapes dos textos distintos pueden ser el mismo string: solo se pliega si son idénticos
+        return int(op == "==")
+    return None
@@ -0,0 +1,68 @@
+import pickle
+import sys
+from antlr4.PredictionContext import PredictionContext # type: ignore
+from antlr4.ParserRuleContext import RuleContext # type: ignore
+from antlr4.atn.ATNSimulator import ATNSimulator # type: ignore
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator # type: ignore
+from antlr4.atn.SemanticContext import SemanticContext # type: ignore
+from antlr4.atn.LexerAction import LexerSkipAction, LexerPopModeAction, LexerMoreAction # type: ignore
+
+# El runtime de ANTLR compara varios singletons por identidad (`is SemanticContext.NONE`,
+# `is self.ERROR`, ...). Un pickle normal los duplicaría y el simulador dejaría de
+# reconocerlos, así que se guardan por nombre y se resuelven al cargar.
+_SINGLETONS = {
+    "PredictionContext.EMPTY": PredictionContext.EMPTY,
+    "RuleContext.EMPTY": RuleContext.EMPTY,
+    "SemanticContext.NONE": SemanticContext.NONE,
+    "ATNSimulator.ERROR": ATNSimulator.ERROR,
+    "LexerATNSimulator.ERROR": LexerATNSimulator.ERROR,
+    "LexerSkipAction.INSTANCE": LexerSkipAction.INSTANCE,
+    "LexerPopModeAction.INSTANCE": LexerPopModeAction.INSTANCE,
+    "LexerMoreAction.INSTANCE": LexerMoreAction.INSTANCE,
+}
+_NAMES = {id(obj): name for name, obj in _SINGLETONS.items()}
+
+# El grafo del ATN es profundo y pickle lo recorre recursivamente
+_RECURSION_LIMIT = 20000
+
+
+class _Pickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        return _NAMES.get(id(obj))
+
+
+class _Unpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return _SINGLETONS[pid]
+
+
+def dump(obj, fh):
+    prev = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(prev, _RECURSION_LIMIT))
+    try:
+        _Pickler(fh, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+    finally:
+        sys.setrecursionlimit(prev)
+
+
+def load(fh):
+    prev = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(prev, _RECURSION_LIMIT))
+    try:
+        return _Unpickler(fh).load()
+    finally:
+        sys.setrecursionlimit(prev)
+
+
+def rehash_dfas(dfas):
+    """
+    Los dicts cuyas claves son DFAState se reconstruyen durante el unpickle, a veces
+    antes de que el estado interno de la clave exista, con lo que quedan con hashes
+    viejos. Se reindexan una vez después de cargar.
+    """
+    for dfa in dfas:
+        dfa._states = {s: s for s in dfa._states.values()}
+
+
+def rehash_context_cache(cache):
+    cache.cache = {ctx: ctx for ctx in cache.cache.values()}
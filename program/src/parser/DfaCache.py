@@ -0,0 +1,100 @@
+import glob
+import hashlib
+import os
+import pickle
+from antlr4 import FileStream # type: ignore
+from CompiscriptLexer import CompiscriptLexer, serializedATN as lexerATN
+from CompiscriptParser import CompiscriptParser, serializedATN as parserATN
+from src.parser.TwoStageParser import parse_program
+from src.parser import AtnPickle
+
+# Los DFAs de predicción de ANTLR viven como atributos de clase (decisionsToDFA),
+# así que ya son compartidos por todos los lexers/parsers del proceso. Este
+# módulo se encarga de calentarlos con un corpus y de guardarlos/cargarlos de disco.
+
+CACHE_VERSION = 1
+DEFAULT_CORPUS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "test", "files"))
+
+
+def grammar_fingerprint():
+    """Hash de ambos ATN serializados: si se regenera la gramática, el cache en disco deja de valer."""
+    h = hashlib.sha256()
+    h.update(repr(lexerATN()).encode())
+    h.update(repr(parserATN()).encode())
+    return h.hexdigest()
+
+
+def dfa_state_counts():
+    return {
+        "lexer": sum(len(d._states) for d in CompiscriptLexer.decisionsToDFA),
+        "parser": sum(len(d._states) for d in CompiscriptParser.decisionsToDFA),
+    }
+
+
+def corpus_files(paths):
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            out.extend(sorted(glob.glob(os.path.join(p, "**", "*.cps"), recursive=True)))
+        elif os.path.isfile(p):
+            out.append(p)
+    return out
+
+
+def warm(paths=None):
+    """Parsea cada .cps del corpus para poblar los DFAs compartidos. Devuelve cuántos archivos usó."""
+    files = corpus_files(paths or [DEFAULT_CORPUS])
+    for f in files:
+        # sin listeners: los archivos de error del corpus no deben ensuciar la consola
+        parse_program(FileStream(f, encoding="utf-8"), [])
+    return len(files)
+
+
+def save(path):
+    payload = {
+        "version": CACHE_VERSION,
+        "fingerprint": grammar_fingerprint(),
+        "lexer": (CompiscriptLexer.atn, CompiscriptLexer.decisionsToDFA),
+        "parser": (CompiscriptParser.atn, CompiscriptParser.decisionsToDFA, CompiscriptParser.sharedContextCache),
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        AtnPickle.dump(payload, fh)
+    os.replace(tmp, path)  # escritura atómica: varios workers pueden compartir el archivo
+
+
+def load(path):
+    """Instala los DFAs guardados en `path`. Devuelve False si no existe o no corresponde a esta gramática."""
+    if not os.path.isfile(path):
+        return False
+    try:
+        with open(path, "rb") as fh:
+            payload = AtnPickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+        return False
+
+    if payload.get("version") != CACHE_VERSION or payload.get("fingerprint") != grammar_fingerprint():
+        return False
+
+    # El ATN se reemplaza junto con los DFAs porque sus estados están referenciados desde ellos
+    lexer_atn, lexer_dfas = payload["lexer"]
+    parser_atn, parser_dfas, context_cache = payload["parser"]
+    AtnPickle.rehash_dfas(lexer_dfas)
+    AtnPickle.rehash_dfas(parser_dfas)
+    AtnPickle.rehash_context_cache(context_cache)
+
+    CompiscriptLexer.atn, CompiscriptLexer.decisionsToDFA = lexer_atn, lexer_dfas
+    CompiscriptParser.atn, CompiscriptParser.decisionsToDFA = parser_atn, parser_dfas
+    CompiscriptParser.sharedContextCache = context_cache
+    return True
+
+
+def warm_or_load(cache_path=None, corpus=None):
+    """Arranque típico de un worker: usa el cache en disco si sirve; si no, calienta y (opcional) lo guarda."""
+    if cache_path and load(cache_path):
+        return {"source": "disk", "files": 0, **dfa_state_counts()}
+    n = warm(corpus)
+    if cache_path:
+        save(cache_path)
+    return {"source": "corpus", "files": n, **dfa_state_counts()}
+
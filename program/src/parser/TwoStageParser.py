@@ -0,0 +1,80 @@
+import time
+from antlr4 import CommonTokenStream # type: ignore
+from antlr4.atn.PredictionMode import PredictionMode # type: ignore
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy # type: ignore
+from antlr4.error.ErrorListener import ConsoleErrorListener # type: ignore
+from antlr4.error.Errors import ParseCancellationException # type: ignore
+from CompiscriptLexer import CompiscriptLexer
+from CompiscriptParser import CompiscriptParser
+
+
+class ParseResult:
+    def __init__(self, lexer, tokens, parser, tree, mode, sll_time, ll_time):
+        self.lexer = lexer
+        self.tokens = tokens
+        self.parser = parser
+        self.tree = tree
+        self.mode = mode          # "SLL" si bastó la primera etapa, "LL" si hubo fallback
+        self.sll_time = sll_time  # segundos gastados en la etapa SLL
+        self.ll_time = ll_time    # segundos gastados en la etapa LL (0 si no hizo falta)
+
+    @property
+    def elapsed(self):
+        return self.sll_time + self.ll_time
+
+    def to_json(self):
+        return {
+            "mode": self.mode,
+            "ms": round(self.elapsed * 1000, 3),
+            "sllMs": round(self.sll_time * 1000, 3),
+            "llMs": round(self.ll_time * 1000, 3),
+        }
+
+
+def parse_program(input_stream, error_listeners=None):
+    """
+    Parsea `program` en dos etapas: primero SLL con BailErrorStrategy (rápido,
+    sin reportar nada) y, solo si falla, vuelve a parsear con LL completo y la
+    estrategia por defecto para que los diagnósticos sean los de siempre.
+    """
+    lexer = CompiscriptLexer(input_stream)
+    tokens = CommonTokenStream(lexer)
+    return parse_tokens(tokens, error_listeners, lexer)
+
+
+def parse_tokens(tokens, error_listeners=None, lexer=None):
+    """Igual que parse_program pero sobre un token stream ya armado (p. ej. un ListTokenSource)."""
+    parser = CompiscriptParser(tokens)
+    listeners = list(error_listeners) if error_listeners is not None else [ConsoleErrorListener.INSTANCE]
+
+    # Etapa 1: SLL, sin listeners y abortando al primer error
+    parser.removeErrorListeners()
+    parser._errHandler = BailErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.SLL
+
+    start = time.perf_counter()
+    try:
+        tree = parser.program()
+        sll_time = time.perf_counter() - start
+        _restore_defaults(parser, listeners)
+        return ParseResult(lexer, tokens, parser, tree, "SLL", sll_time, 0.0)
+    except ParseCancellationException:
+        sll_time = time.perf_counter() - start
+
+    # Etapa 2: LL completo sobre los mismos tokens (el lexer no vuelve a correr)
+    tokens.seek(0)
+    parser.reset()
+    _restore_defaults(parser, listeners)
+
+    start = time.perf_counter()
+    tree = parser.program()
+    ll_time = time.perf_counter() - start
+    return ParseResult(lexer, tokens, parser, tree, "LL", sll_time, ll_time)
+
+
+def _restore_defaults(parser, listeners):
+    parser._errHandler = DefaultErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.LL
+    parser.removeErrorListeners()
+    for listener in listeners:
+        parser.addErrorListener(listener)
@@ -0,0 +1,301 @@
+import time
+import tracemalloc
+from antlr4 import InputStream, ParseTreeWalker # type: ignore
+from antlr4.tree.Tree import TerminalNode # type: ignore
+from src.parser.TwoStageParser import parse_program
+from src.utils.Errors import Error
+from src.utils.Temp import TempManager
+from src.symbolTable.SymbolTableBuilder import SymbolTableBuilder
+from src.typeChecker.TypeChecker import TypeChecker
+from src.codeGenerator.CodeGenerator import CodeGenerator
+from src.codeGenerator.QuadStore import QuadStore
+from src.optimizer.ControlFlowGraph import build_cfgs
+from src.optimizer.Optimizer import Optimizer, const_names, global_names
+
+ENGINES = ("tac", "bytecode", "python", "mips")  # cómo execute() corre el programa
+
+
+class PhaseStats:
+    def __init__(self, name):
+        self.name = name
+        self.wall = 0.0          # segundos
+        self.peak_memory = None  # bytes asignados en el pico de la fase (solo con track_memory)
+        self.counters = {}       # tokens, nodos, quads... según la fase
+
+    def to_json(self):
+        return {
+            "phase": self.name,
+            "ms": round(self.wall * 1000, 3),
+            "peakKb": None if self.peak_memory is None else round(self.peak_memory / 1024, 1),
+            **self.counters,
+        }
+
+
+class CompilerSession:
+    """
+    Pipeline completo de Compiscript: parse -> tabla de símbolos -> type check -> TAC
+    -> optimización (según `opt_level`, 0 = ninguna) -> CFG.
+    Cada fase se puede correr por separado (en orden) o todas con run(); cada una
+    deja sus resultados como atributos y sus métricas en `self.stats`. execute()
+    corre después el TAC en la VirtualMachine, ya bajado a bytecode o traducido a
+    Python (fase "run", fuera de run()).
+    """
+
+    PHASES = ("parse", "symbols", "types", "codegen", "optimize", "cfg")
+
+    def __init__(self, source, name="<input>", track_memory=False, error_listeners=None, parsed=None, analyzer=None,
+                 opt_level=0):
+        self.source = source
+        self.name = name
+        self.track_memory = track_memory
+        self.error_listeners = error_listeners
+
+        self.errors = Error()
+        self.parsed = parsed  # ParseResult ya hecho (p. ej. por IncrementalDocument): parse() lo reutiliza
+        self.analyzer = analyzer  # IncrementalAnalyzer del documento: reanaliza solo lo que cambió
+        self.opt_level = opt_level
+        self.parser = None
+        self.tree = None
+        self.symbols = None
+        self.checker = None
+        self.generator = None
+        self.optimizer = None
+        self.optimized = None  # QuadStore optimizada (None con opt_level=0)
+        self.cfgs = None  # un ControlFlowGraph por procedimiento, el top-level primero
+        self.vm = None  # VirtualMachine ya corrida por execute()
+        self.stats = []
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, encoding="utf-8") as fh:
+            return cls(fh.read(), name=path, **kwargs)
+
+    # Fases
+    def parse(self):
+        with self._phase("parse") as st:
+            if self.parsed is None:
+                self.parsed = parse_program(InputStream(self.source), self.error_listeners)
+            self.parser, self.tree = self.parsed.parser, self.parsed.tree
+        st.counters["mode"] = self.parsed.mode
+        st.counters["tokens"] = len(self.parsed.tokens.tokens)
+        st.counters["nodes"] = count_nodes(self.tree)
+        return self.tree
+
+    def build_symbols(self):
+        with self._phase("symbols") as st:
+            if self.analyzer is not None:
+                self.symbols = self.analyzer.build_symbols(self.tree, self.errors)
+            else:
+                self.symbols = SymbolTableBuilder(self.errors)
+                ParseTreeWalker().walk(self.symbols, self.tree)
+        st.counters["scopes"] = len(set(self.symbols.scopes.values()))
+        if self.analyzer is not None:
+            st.counters["rechecked"] = self.analyzer.rebuilt
+            st.counters["reused"] = self.analyzer.reused
+        return self.symbols
+
+    def type_check(self):
+        with self._phase("types") as st:
+            if self.analyzer is not None:
+                self.checker = self.analyzer.type_check(self.errors, self.parser)
+            else:
+                self.checker = TypeChecker(self.symbols.scopes, self.symbols.globalScope, self.errors, self.parser)
+                self.checker.visit(self.tree)
+        st.counters["errors"] = len(self.errors.errors)
+        return self.checker
+
+    def generate(self):
+        with self._phase("codegen") as st:
+            if self.analyzer is not None:
+                self.generator = self.analyzer.generate(self.checker.method_receivers)
+            else:
+                self.generator = CodeGenerator(TempManager(), self.checker.method_receivers)
+                self.generator.visit(self.tree)
+        st.counters["quads"] = len(self.generator.quadruples)
+        st.counters["temps"] = max(self.generator.frame_temps.values(), default=0)
+        if self.analyzer is not None:
+            st.counters["reused"] = self.analyzer.code_reused
+        return self.generator
+
+    def optimize(self):
+        with self._phase("optimize") as st:
+            if self.opt_level > 0:
+                self.optimizer = Optimizer(self.opt_level, const_names(self.symbols), global_names(self.symbols))
+                self.optimized = self.optimizer.run(self.generator.virtual_quadruples)
+        st.counters["level"] = self.opt_level
+        if self.optimizer is not None:
+            st.counters["removed"] = self.optimizer.removed
+            for report in self.optimizer.reports:
+                st.counters[report.name] = report.removed
+        return self.optimized
+
+    def build_cfg(self):
+        with self._phase("cfg") as st:
+            self.cfgs = build_cfgs(self.quadruples)
+        st.counters["procedures"] = len(self.cfgs)
+        st.counters["blocks"] = sum(len(c.blocks) for c in self.cfgs)
+        st.counters["loops"] = sum(len(c.loops) for c in self.cfgs)
+        return self.cfgs
+
+    def execute(self, max_steps=None, stdout=None, engine="tac"):
+        """
+        Corre el TAC final (el optimizado si hubo -O); solo tiene sentido si no hubo errores.
+        Con engine="tac" lo interpreta la VirtualMachine cuádruplo por cuádruplo; con
+        "bytecode" primero lo baja a bytecode y lo corre la BytecodeMachine (ahí los
+        pasos son instrucciones); con "python" lo traduce a funciones de Python y las
+        corre la PythonMachine (ahí los pasos son vueltas de ciclo y llamadas); con
+        "mips" lo traduce a ensamblador MIPS y lo corre el MipsSimulator (los pasos son
+        instrucciones; levanta MipsError si el programa usa algo que ese backend no soporta).
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"motor desconocido: {engine}")
+        # Los motores se importan al usarlos: compilar sin correr (el CLI, /analyze)
+        # no tiene por qué pagar su carga
+        from src.vm.Layout import local_names, local_types
+        with self._phase("run") as st:
+            names = local_names(self.symbols)
+            if engine == "bytecode":
+                from src.vm.Bytecode import lower
+                from src.vm.BytecodeMachine import BytecodeMachine
+                program = lower(self.quadruples, names)
+                st.counters["instructions"] = len(program.code)
+                self.vm = BytecodeMachine(program, max_steps=max_steps, stdout=stdout).run()
+            elif engine == "python":
+                from src.vm.PythonBackend import compile_python
+                from src.vm.PythonMachine import PythonMachine
+                program = compile_python(self.quadruples, names, local_types(self.symbols))
+                st.counters["pythonLines"] = len(program.listing())
+                self.vm = PythonMachine(program, max_steps=max_steps, stdout=stdout).run()
+            elif engine == "mips":
+                from src.mips.MipsSimulator import assemble, MipsSimulator
+                program = self.mips()
+                image = assemble(program.source)
+                st.counters["instructions"] = len(image.code)
+                st.counters["registers"] = sum(len(a.registers) for a in program.allocations.values())
+                st.counters["spilled"] = sum(len(a.spilled) for a in program.allocations.values())
+                self.vm = MipsSimulator(image, max_steps=max_steps, stdout=stdout).run()
+                st.counters["loads"] = self.vm.loads
+                st.counters["stores"] = self.vm.stores
+            else:
+                from src.vm.VirtualMachine import VirtualMachine
+                self.vm = VirtualMachine(self.quadruples, names, max_steps=max_steps, stdout=stdout).run()
+        st.counters["engine"] = engine
+        st.counters["steps"] = self.vm.steps
+        st.counters["lines"] = len(self.vm.output)
+        if self.vm.error is not None:
+            st.counters["error"] = self.vm.error
+        return self.vm
+
+    def memory_layout(self):
+        """Marcos de cada procedimiento y objetos de cada clase con tamaños reales (MemoryLayout)."""
+        from src.memory.MemoryLayout import plan_memory
+        return plan_memory(self.symbols, self.frame_temps)
+
+    def mips(self):
+        """El programa traducido a ensamblador MIPS (MipsProgram); levanta MipsError si no se puede."""
+        from src.mips.MipsGenerator import compile_mips
+        return compile_mips(self.quadruples, self.symbols)
+
+    def run(self):
+        self.parse()
+        self.build_symbols()
+        self.type_check()
+        self.generate()
+        self.optimize()
+        self.build_cfg()
+        return self
+
+    # Resultados
+    @property
+    def quadruples(self):
+        if self.optimized is not None:
+            return self.optimized
+        return self.generator.quadruples if self.generator else QuadStore()
+
+    @property
+    def frame_temps(self):
+        """Temporales que usa cada procedimiento (lo que ocupa en su registro de activación)."""
+        if self.optimizer is not None:
+            return self.optimizer.frame_temps
+        return self.generator.frame_temps if self.generator else {}
+
+    @property
+    def token_count(self):
+        return len(self.parsed.tokens.tokens) if self.parsed else 0
+
+    @property
+    def node_count(self):
+        return self._counter("parse", "nodes")
+
+    @property
+    def quad_count(self):
+        return len(self.quadruples)
+
+    @property
+    def total_time(self):
+        return sum(st.wall for st in self.stats)
+
+    def timings_json(self):
+        return {
+            "totalMs": round(self.total_time * 1000, 3),
+            "tokens": self.token_count,
+            "nodes": self.node_count,
+            "quads": self.quad_count,
+            "phases": [st.to_json() for st in self.stats],
+        }
+
+    def format_stats(self):
+        lines = [f"{'phase':<10}{'ms':>10}{'peak KB':>10}  counters"]
+        for st in self.stats:
+            peak = "-" if st.peak_memory is None else f"{st.peak_memory / 1024:.1f}"
+            counters = ", ".join(f"{k}={v}" for k, v in st.counters.items())
+            lines.append(f"{st.name:<10}{st.wall * 1000:>10.2f}{peak:>10}  {counters}")
+        lines.append(f"{'total':<10}{self.total_time * 1000:>10.2f}")
+        return "\n".join(lines)
+
+    def _counter(self, phase, key):
+        for st in self.stats:
+            if st.name == phase:
+                return st.counters.get(key, 0)
+        return 0
+
+    def _phase(self, name):
+        return _PhaseTimer(self, name)
+
+
+class _PhaseTimer:
+    def __init__(self, session, name):
+        self.session = session
+        self.stats = PhaseStats(name)
+        self.started_tracing = False
+
+    def __enter__(self):
+        if self.session.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+            self.base = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.wall = time.perf_counter() - self.start
+        if self.session.track_memory:
+            self.stats.peak_memory = max(0, tracemalloc.get_traced_memory()[1] - self.base)
+            if self.started_tracing:
+                tracemalloc.stop()
+        self.session.stats.append(self.stats)
+        return False
+
+
+def count_nodes(tree):
+    # Iterativo: los árboles de expresiones son profundos y la recursión se quedaría corta
+    n = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        n += 1
+        if not isinstance(node, TerminalNode) and node.children:
+            stack.extend(node.children)
+    return n
@@ -0,0 +1,221 @@
+from src.utils.Types import Type, ArrayType
+
+import json
+import os
+import re
+
+# Todo lo que necesita /analyze sin depender de FastAPI: lo usan tanto el proceso
+# del servidor como los workers de WorkerPool. ANTLR y CompilerSession se importan
+# de forma diferida para que importar este módulo siga siendo barato.
+
+_TYPE_NAMES = {
+    Type.INT: "int",
+    Type.FLOAT: "float",
+    Type.BOOL: "bool",
+    Type.STRING: "string",
+    Type.VOID: "void",
+    Type.NULL: "null",
+}
+
+def _ty_to_str(t):
+    if isinstance(t, ArrayType):
+        base = _ty_to_str(t.base)
+        return base + "[]" * t.dimensions
+    
+    if hasattr(t, "kind") and getattr(t, "kind") == "class":
+        return getattr(t, "name", "class")
+
+    if t in _TYPE_NAMES:
+        return _TYPE_NAMES[t]
+    return str(t)
+
+def _param_to_json(p):
+    return {
+        "name": getattr(p, "name", "?"),
+        "type": _ty_to_str(getattr(p, "ty", Type.NULL)),
+    }
+
+def _sym_to_json(sym):
+    kind = getattr(sym, "kind", None)
+    name = getattr(sym, "name", "?")
+
+    def mem_meta(s):
+        return {
+            "size": getattr(s, "size", None),
+            "address": getattr(s, "address", None),
+        }
+
+    if kind in ("var", "const") or hasattr(sym, "is_const"):
+        is_const = getattr(sym, "is_const", False)
+        base = {
+            "kind": "const" if is_const else "var",
+            "name": name,
+            "type": _ty_to_str(getattr(sym, "ty", Type.NULL)),
+        }
+
+        return {**base, **mem_meta(sym)}
+    
+    if kind == "func":
+        ret = _ty_to_str(getattr(sym, "ty", Type.VOID))
+        params = [ _param_to_json(p) for p in getattr(sym, "params", []) ]
+        base = {
+            "kind": "func",
+            "name": name,
+            "returnType": ret,
+            "params": params,
+        }
+        return {**base, **mem_meta(sym)}
+    
+    if kind == "class":
+        sup = getattr(sym, "superclass", None)
+        super_name = getattr(sup, "name", None) if sup else None
+        base = {
+            "kind": "class",
+            "name": name,
+            "super": super_name,
+        }
+        return {**base, **mem_meta(sym)}
+    
+    return {"kind": kind or "symbol", "name": name, **mem_meta(sym)}
+
+def _build_symtab_json(global_scope, scopes_dict_values):
+    all_scopes = set([global_scope])
+    for sc in list(scopes_dict_values):
+        all_scopes.add(sc)
+
+    id_by_scope = {}
+    ordered = list(all_scopes)
+    for i, sc in enumerate(ordered):
+        id_by_scope[sc] = f"sc_{i}"
+
+    children = { id_by_scope[sc]: [] for sc in all_scopes }
+    for sc in all_scopes:
+        parent = getattr(sc, "parent", None)
+        if parent and parent in id_by_scope:
+            children[id_by_scope[parent]].append(id_by_scope[sc])
+
+    node_data = {}
+    for sc in all_scopes:
+        sid = id_by_scope[sc]
+        syms = getattr(sc, "symbols", {}) or {}
+        sym_list = []
+        for _name, _sym in syms.items():
+            sym_list.append(_sym_to_json(_sym))
+        sym_list.sort(key=lambda x: (x.get("kind",""), x.get("name","")))
+        node_data[sid] = {
+            "id": sid,
+            "name": getattr(sc, "name", "scope"),
+            "symbols": sym_list,
+            "children": [],
+        }
+
+    for parent_id, childs in children.items():
+        for cid in childs:
+            node_data[parent_id]["children"].append(node_data[cid])
+
+    return node_data[id_by_scope[global_scope]]
+
+def _errors_to_json(errors_list):
+    out = []
+    rx = re.compile(r"\[line (\d+):(\d+)\]\s*(.*)")
+    for e in errors_list:
+        m = rx.match(e)
+        if m:
+            out.append({"line": int(m.group(1)), "col": int(m.group(2)), "msg": m.group(3), "severity": "error"})
+        else:
+            out.append({"line": None, "col": None, "msg": e, "severity": "error"})
+    return out
+
+def run_analysis(code, parsed=None, analyzer=None):
+    from src.pipeline.CompilerSession import CompilerSession
+
+    # CPS_TRACK_MEMORY=1 agrega la memoria pico por fase (tracemalloc cuesta ~2x)
+    session = CompilerSession(code, track_memory=os.environ.get("CPS_TRACK_MEMORY") == "1",
+                              parsed=parsed, analyzer=analyzer).run()
+    st = session.symbols
+    tac = session.quadruples  # QuadStore; se serializa como lista de {id, op, arg1, arg2, result}
+
+    # símbolos globales rápidos para la vista
+    globalsyms = sorted(list(st.globalScope.symbols.keys()))
+    symtab_root = _build_symtab_json(st.globalScope, list(st.scopes.values()))
+
+    return {
+        "errors": _errors_to_json(session.errors.errors), 
+        "globals": globalsyms, 
+        "symtab": symtab_root,
+        "tac": tac,
+        "cfg": [cfg.to_json() for cfg in session.cfgs],
+        "temps": session.frame_temps,
+        "layout": session.memory_layout().to_json(),
+        "parse": session.parsed.to_json(),
+        "timings": session.timings_json()
+    }
+
+def encode_result(result):
+    # El TAC se escribe directo desde la QuadStore, sin armar un dict por cuádruplo
+    result = dict(result)
+    tac = result.pop("tac")
+    head = json.dumps(result)
+    return (head[:-1] + ', "tac": ' + tac.to_json_text() + "}").encode("utf-8")
+
+def analysis_payload(code):
+    """Respuesta de /analyze ya serializada: es lo que se guarda en el cache y lo que devuelven los workers."""
+    return encode_result(run_analysis(code))
+
+def run_payload(code, opt_level=0, max_steps=None):
+    """Respuesta de /run: compila y, si no hubo errores, corre el TAC en la VirtualMachine."""
+    from src.pipeline.CompilerSession import CompilerSession
+
+    session = CompilerSession(code, opt_level=opt_level).run()
+    result = {"errors": _errors_to_json(session.errors.errors), "output": [], "error": None, "steps": 0}
+    if not session.errors.errors:
+        vm = session.execute(max_steps=max_steps)
+        result.update(output=vm.output, error=vm.error, steps=vm.steps)
+    result["timings"] = session.timings_json()
+    return json.dumps(result).encode("utf-8")
+
+# Documentos abiertos del worker (cada proceso del pool tiene los suyos; el pool
+# manda siempre el mismo docId al mismo worker)
+_documents = None
+
+def worker_documents():
+    global _documents
+    if _documents is None:
+        from src.server.DocumentStore import DocumentStore
+        _documents = DocumentStore(max_docs=int(os.environ.get("CPS_DOCUMENTS", "64")))
+    return _documents
+
+def handle_job(job):
+    """Lo que corre un worker del pool: el código solo es un /analyze; ("run", code, nivel, pasos) un /run;
+    ("document", docId, code), ("close", docId) y ("documents",) trabajan con sus documentos abiertos."""
+    if isinstance(job, tuple):
+        kind = job[0]
+        if kind == "run":
+            return run_payload(*job[1:])
+        if kind == "document":
+            return document_payload(worker_documents(), *job[1:])
+        if kind == "close":
+            return worker_documents().close(job[1])
+        if kind == "documents":
+            return worker_documents().stats()
+    return analysis_payload(job)
+
+def document_payload(documents, doc_id, code):
+    """Como analysis_payload pero re-parseando y re-analizando de forma incremental el documento `doc_id`."""
+    def handler(parsed, edit, analyzer):
+        result = run_analysis(code, parsed, analyzer)
+        result["edit"] = edit.to_json()
+        return encode_result(result)
+    return documents.run(doc_id, code, handler)
+
+def warm_from_env():
+    # CPS_DFA_WARM=0 lo desactiva; CPS_DFA_CACHE guarda/carga los DFAs en disco
+    # para que un worker nuevo arranque ya caliente; CPS_DFA_CORPUS cambia el corpus.
+    if os.environ.get("CPS_DFA_WARM", "1") == "0":
+        return None
+    from src.parser import DfaCache
+    corpus = os.environ.get("CPS_DFA_CORPUS")
+    return DfaCache.warm_or_load(
+        os.environ.get("CPS_DFA_CACHE"),
+        corpus.split(os.pathsep) if corpus else None,
+    )
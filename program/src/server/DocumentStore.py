@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+
+class DocumentStore:
+    """
+    Documentos abiertos en el IDE (docId -> IncrementalDocument + IncrementalAnalyzer),
+    para que cada /analyze con docId re-parsee y re-analice solo lo que cambió.
+
+    LRU acotado a `max_docs`; cada documento tiene su propio lock porque el árbol
+    se modifica en sitio y dos peticiones del mismo docId no pueden pisarse.
+    """
+
+    def __init__(self, max_docs=64):
+        self.max_docs = max_docs
+        self._docs = OrderedDict()  # doc_id -> (IncrementalDocument, IncrementalAnalyzer, Lock)
+        self._lock = threading.Lock()
+
+        self.opened = 0
+        self.evictions = 0
+        self.incremental = 0
+        self.full = 0
+        self.failures = 0
+
+    def run(self, doc_id, code, handler, error_listeners=None):
+        """
+        Aplica `code` al documento y corre handler(parse_result, edit_stats, analyzer)
+        con el documento bloqueado (el análisis recorre el árbol que la próxima edición modifica).
+        Si algo falla a mitad de camino el documento y su analizador pueden quedar a
+        medio actualizar: se descartan y la próxima petición vuelve a analizar todo.
+        """
+        from src.incremental.IncrementalParser import IncrementalDocument
+        from src.incremental.IncrementalAnalysis import IncrementalAnalyzer
+
+        with self._lock:
+            entry = self._docs.get(doc_id)
+            if entry is None:
+                entry = (None, IncrementalAnalyzer(), threading.Lock())
+                self._docs[doc_id] = entry
+                self.opened += 1
+                while len(self._docs) > self.max_docs:
+                    self._docs.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._docs.move_to_end(doc_id)
+
+        doc, analyzer, lock = entry
+        with lock:
+            try:
+                if doc is None:
+                    doc = IncrementalDocument(code, error_listeners)
+                    with self._lock:
+                        if doc_id in self._docs:
+                            self._docs[doc_id] = (doc, analyzer, lock)
+                    edit = doc.last_edit
+                else:
+                    edit = doc.update(code)
+                    with self._lock:
+                        if edit.mode == "incremental":
+                            self.incremental += 1
+                        else:
+                            self.full += 1
+                return handler(doc.parse_result(), edit, analyzer)
+            except Exception:
+                with self._lock:
+                    current = self._docs.get(doc_id)
+                    if current is not None and current[2] is lock:
+                        del self._docs[doc_id]
+                    self.failures += 1
+                raise
+
+    def close(self, doc_id):
+        with self._lock:
+            return self._docs.pop(doc_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "maxDocuments": self.max_docs,
+                "opened": self.opened,
+                "evictions": self.evictions,
+                "incremental": self.incremental,
+                "full": self.full,
+                "failures": self.failures,
+            }
+
+    def __len__(self):
+        return len(self._docs)
@@ -0,0 +1,280 @@
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+
+
+class PoolSaturated(Exception):
+    """Todos los workers ocupados y la cola de espera llena: el servidor responde 503."""
+
+
+class AnalysisTimeout(Exception):
+    """La petición superó su tiempo; el worker que la corría fue terminado y reemplazado."""
+
+
+class WorkerCrashed(Exception):
+    """El worker murió mientras procesaba la petición (y ya fue reemplazado)."""
+
+
+class WorkerError(Exception):
+    """El handler levantó una excepción en el worker (que sigue vivo); el mensaje es el suyo."""
+
+
+def _worker_main(conn, handler, warm):
+    # Corre en el proceso hijo: importa y calienta el pipeline una sola vez,
+    # avisa que está listo y después atiende peticiones hasta recibir None.
+    if warm is not None:
+        warm()
+    conn.send(("ready", None))
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if job is None:
+            break
+        try:
+            conn.send(("ok", handler(job)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, ctx, handler, warm):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, handler, warm), daemon=True)
+        self.process.start()
+        child.close()
+
+    def wait_ready(self, timeout):
+        if not self.conn.poll(timeout):
+            raise TimeoutError("el worker no terminó de arrancar")
+        status, _ = self.conn.recv()
+        if status != "ready":
+            raise RuntimeError(f"el worker respondió {status!r} al arrancar")
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+
+
+class WorkerPool:
+    """
+    Pool de procesos pre-calentados para correr el pipeline fuera del GIL del servidor.
+
+    - workers:      cantidad de procesos hijos.
+    - timeout:      segundos máximos por petición (incluye la espera por un worker libre).
+                    Si se vence con el trabajo en curso, ese worker se termina y se reemplaza.
+    - max_queue:    peticiones que pueden esperar un worker libre; por encima de
+                    workers + max_queue en vuelo, submit() lanza PoolSaturated.
+    - handler:      función (picklable) que corre en el hijo con el trabajo recibido.
+    - warm:         función opcional que el hijo corre una vez al arrancar.
+
+    A diferencia de ProcessPoolExecutor, cada worker tiene su propio Pipe, así un
+    timeout puede cancelar justo el proceso que se colgó sin tumbar a los demás.
+
+    submit(job, affinity=k) manda todos los trabajos con la misma clave al mismo
+    worker mientras siga vivo (espera a que se libere aunque haya otros libres):
+    así un worker puede guardar estado entre peticiones, como los documentos
+    abiertos del IDE. Si ese worker se reemplaza, la clave pasa a otro, que
+    arranca sin ese estado.
+    """
+
+    # Claves de afinidad recordadas (las más viejas se olvidan)
+    MAX_AFFINITY = 4096
+
+    def __init__(self, workers, handler, timeout=10.0, max_queue=8, warm=None,
+                 start_method="spawn", ready_timeout=60.0):
+        self.workers = workers
+        self.handler = handler
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.warm = warm
+        self.ready_timeout = ready_timeout
+        self._ctx = multiprocessing.get_context(start_method)
+
+        self._idle = []     # workers libres, el que más espera primero
+        self._all = set()
+        self._affinity = OrderedDict()  # clave -> worker que la atiende
+        self._lock = threading.Lock()
+        self._freed = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._closed = False
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def start(self):
+        # Arranca todos los procesos a la vez y después espera que cada uno quede listo
+        pending = [self._new_worker() for _ in range(self.workers)]
+        for w in pending:
+            w.wait_ready(self.ready_timeout)
+            self._release(w)
+        return self
+
+    def submit(self, job, affinity=None):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("pool cerrado")
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated()
+            self._in_flight += 1
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            with self._lock:
+                preferred = self._affinity.get(affinity) if affinity is not None else None
+            worker = self._acquire(preferred, deadline)
+            if worker is None:
+                self._count("timeouts")
+                raise AnalysisTimeout()
+            if affinity is not None:
+                with self._lock:
+                    self._affinity[affinity] = worker
+                    self._affinity.move_to_end(affinity)
+                    while len(self._affinity) > self.MAX_AFFINITY:
+                        self._affinity.popitem(last=False)
+            return self._run_on(worker, job, deadline)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def each(self, job):
+        """Corre `job` una vez en cada worker vivo (p. ej. para juntar su estado); devuelve los resultados."""
+        with self._lock:
+            workers = list(self._all)
+        results = []
+        for w in workers:
+            worker = self._acquire(w, time.monotonic() + self.timeout, strict=True)
+            if worker is not None:
+                results.append(self._run_on(worker, job, time.monotonic() + self.timeout))
+        return results
+
+    def forget(self, affinity):
+        with self._lock:
+            self._affinity.pop(affinity, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "idle": len(self._idle),
+                "sticky": len(self._affinity),
+                "inFlight": self._in_flight,
+                "maxQueue": self.max_queue,
+                "timeout": self.timeout,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "restarts": self.restarts,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._all)
+            self._all.clear()
+        for w in workers:
+            w.stop()
+
+    def _run_on(self, worker, job, deadline):
+        try:
+            worker.conn.send(job)
+            if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                self._count("timeouts")
+                self._replace(worker)
+                raise AnalysisTimeout()
+            status, value = worker.conn.recv()
+        except (EOFError, OSError, BrokenPipeError):
+            self._count("failed")
+            self._replace(worker)
+            raise WorkerCrashed()
+
+        self._release(worker)
+        if status == "error":
+            self._count("failed")
+            raise WorkerError(value)
+        self._count("completed")
+        return value
+
+    def _acquire(self, preferred, deadline, strict=False):
+        # El worker preferido si sigue vivo (esperándolo); si no, cualquiera libre.
+        # Con strict solo sirve el preferido. None si se vence el plazo.
+        with self._freed:
+            while True:
+                if preferred is not None and preferred in self._all:
+                    if preferred in self._idle:
+                        self._idle.remove(preferred)
+                        return preferred
+                elif strict:
+                    return None
+                elif self._idle:
+                    return self._idle.pop(0)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._freed.wait(remaining)
+
+    def _release(self, worker):
+        with self._freed:
+            self._idle.append(worker)
+            self._freed.notify_all()
+
+    def _new_worker(self):
+        w = _Worker(self._ctx, self.handler, self.warm)
+        with self._lock:
+            self._all.add(w)
+        return w
+
+    def _replace(self, worker):
+        worker.kill()
+        with self._freed:
+            self._all.discard(worker)
+            for key in [k for k, w in self._affinity.items() if w is worker]:
+                del self._affinity[key]
+            self.restarts += 1
+            # Quien esperaba a este worker tiene que ir a otro
+            self._freed.notify_all()
+            if self._closed:
+                return
+        # El reemplazo arranca en segundo plano para no demorar la respuesta de error
+        threading.Thread(target=self._spawn_into_idle, daemon=True).start()
+
+    def _spawn_into_idle(self):
+        w = self._new_worker()
+        try:
+            w.wait_ready(self.ready_timeout)
+        except (TimeoutError, RuntimeError, EOFError):
+            w.kill()
+            with self._lock:
+                self._all.discard(w)
+            return
+        with self._lock:
+            closed = self._closed
+        if closed:
+            w.stop()
+            return
+        self._release(w)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
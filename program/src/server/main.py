@@ -1,176 +1,156 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-from antlr4 import InputStream, CommonTokenStream # type: ignore
-from CompiscriptLexer import CompiscriptLexer
-from CompiscriptParser import CompiscriptParser
-from antlr4 import ParseTreeWalker # type: ignore
-from src.utils.Temp import TempManager
-from src.codeGenerator.CodeGenerator import CodeGenerator
-
-from src.utils.Errors import Error
-from src.symbolTable.SymbolTableBuilder import SymbolTableBuilder
-from src.typeChecker.TypeChecker import TypeChecker
 from fastapi.staticfiles import StaticFiles
-from src.utils.Types import Type, ArrayType
+from src.server.ResultCache import ResultCache
+from src.server.DocumentStore import DocumentStore
+from src.server.Analysis import analysis_payload, document_payload, run_payload, handle_job, warm_from_env
+from src.server.WorkerPool import WorkerPool, PoolSaturated, AnalysisTimeout, WorkerCrashed, WorkerError
 
-import re
-
-_TYPE_NAMES = {
-    Type.INT: "int",
-    Type.FLOAT: "float",
-    Type.BOOL: "bool",
-    Type.STRING: "string",
-    Type.VOID: "void",
-    Type.NULL: "null",
-}
+import os
 
 app = FastAPI()
 app.add_middleware(
     CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]
 )
 
+# Pool de procesos para el pipeline: CPS_WORKERS=0 corre todo en el hilo de la
+# petición (como antes); CPS_TIMEOUT son los segundos máximos por petición y
+# CPS_MAX_QUEUE cuántas pueden esperar un worker antes de responder 503.
+pool = None
+
+@app.on_event("startup")
+def start_workers():
+    global pool
+    workers = int(os.environ.get("CPS_WORKERS", str(min(4, os.cpu_count() or 1))))
+    if workers <= 0:
+        app.state.dfa = warm_from_env()
+        return
+    pool = WorkerPool(
+        workers,
+        handle_job,
+        timeout=float(os.environ.get("CPS_TIMEOUT", "10")),
+        max_queue=int(os.environ.get("CPS_MAX_QUEUE", "8")),
+        warm=warm_from_env,
+    ).start()
+
+@app.on_event("shutdown")
+def stop_workers():
+    global pool
+    if pool is not None:
+        pool.shutdown()
+        pool = None
+
+# Cache de respuestas por hash del código: CPS_CACHE_ENTRIES=0 lo desactiva,
+# CPS_CACHE_BYTES pone un tope de memoria y CPS_CACHE_TTL una expiración en segundos.
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("CPS_CACHE_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("CPS_CACHE_BYTES", "0")),
+    ttl=float(os.environ.get("CPS_CACHE_TTL", "0")),
+)
+
+# Documentos abiertos para el re-parse incremental (/analyze con docId). Con pool
+# viven en los workers (el pool manda cada docId siempre al mismo, así que tienen
+# el mismo timeout y el mismo 503 que el resto); sin pool, en este proceso.
+# CPS_DOCUMENTS los acota (por proceso).
+documents = DocumentStore(max_docs=int(os.environ.get("CPS_DOCUMENTS", "64")))
+
 class AnalyzeReq(BaseModel):
     code: str
-
-def _ty_to_str(t):
-    if isinstance(t, ArrayType):
-        base = _ty_to_str(t.base)
-        return base + "[]" * t.dimensions
-    
-    if hasattr(t, "kind") and getattr(t, "kind") == "class":
-        return getattr(t, "name", "class")
-
-    if t in _TYPE_NAMES:
-        return _TYPE_NAMES[t]
-    return str(t)
-
-def _param_to_json(p):
-    return {
-        "name": getattr(p, "name", "?"),
-        "type": _ty_to_str(getattr(p, "ty", Type.NULL)),
-    }
-
-def _sym_to_json(sym):
-    kind = getattr(sym, "kind", None)
-    name = getattr(sym, "name", "?")
-
-    def mem_meta(s):
-        return {
-            "size": getattr(s, "size", None),
-            "address": getattr(s, "address", None),
-        }
-
-    if kind in ("var", "const") or hasattr(sym, "is_const"):
-        is_const = getattr(sym, "is_const", False)
-        base = {
-            "kind": "const" if is_const else "var",
-            "name": name,
-            "type": _ty_to_str(getattr(sym, "ty", Type.NULL)),
-        }
-
-        return {**base, **mem_meta(sym)}
-    
-    if kind == "func":
-        ret = _ty_to_str(getattr(sym, "ty", Type.VOID))
-        params = [ _param_to_json(p) for p in getattr(sym, "params", []) ]
-        base = {
-            "kind": "func",
-            "name": name,
-            "returnType": ret,
-            "params": params,
-        }
-        return {**base, **mem_meta(sym)}
-    
-    if kind == "class":
-        sup = getattr(sym, "superclass", None)
-        super_name = getattr(sup, "name", None) if sup else None
-        base = {
-            "kind": "class",
-            "name": name,
-            "super": super_name,
-        }
-        return {**base, **mem_meta(sym)}
-    
-    return {"kind": kind or "symbol", "name": name, **mem_meta(sym)}
-
-def _build_symtab_json(global_scope, scopes_dict_values):
-    all_scopes = set([global_scope])
-    for sc in list(scopes_dict_values):
-        all_scopes.add(sc)
-
-    id_by_scope = {}
-    ordered = list(all_scopes)
-    for i, sc in enumerate(ordered):
-        id_by_scope[sc] = f"sc_{i}"
-
-    children = { id_by_scope[sc]: [] for sc in all_scopes }
-    for sc in all_scopes:
-        parent = getattr(sc, "parent", None)
-        if parent and parent in id_by_scope:
-            children[id_by_scope[parent]].append(id_by_scope[sc])
-
-    node_data = {}
-    for sc in all_scopes:
-        sid = id_by_scope[sc]
-        syms = getattr(sc, "symbols", {}) or {}
-        sym_list = []
-        for _name, _sym in syms.items():
-            sym_list.append(_sym_to_json(_sym))
-        sym_list.sort(key=lambda x: (x.get("kind",""), x.get("name","")))
-        node_data[sid] = {
-            "id": sid,
-            "name": getattr(sc, "name", "scope"),
-            "symbols": sym_list,
-            "children": [],
-        }
-
-    for parent_id, childs in children.items():
-        for cid in childs:
-            node_data[parent_id]["children"].append(node_data[cid])
-
-    return node_data[id_by_scope[global_scope]]
-
-def _errors_to_json(errors_list):
-    out = []
-    rx = re.compile(r"\[line (\d+):(\d+)\]\s*(.*)")
-    for e in errors_list:
-        m = rx.match(e)
-        if m:
-            out.append({"line": int(m.group(1)), "col": int(m.group(2)), "msg": m.group(3), "severity": "error"})
-        else:
-            out.append({"line": None, "col": None, "msg": e, "severity": "error"})
-    return out
+    docId: Optional[str] = None
 
 @app.post("/analyze")
 def analyze(req: AnalyzeReq):
-    input_stream = InputStream(req.code)
-    lexer = CompiscriptLexer(input_stream)
-    tokens = CommonTokenStream(lexer)
-    parser = CompiscriptParser(tokens)
-    tree = parser.program()
-
-    errors = Error()
-    walker = ParseTreeWalker()
-    st = SymbolTableBuilder(errors)
-    walker.walk(st, tree)
-
-    tc = TypeChecker(st.scopes, st.globalScope, errors, parser)
-    tc.visit(tree)
-
-    temp_manager = TempManager()
-    generator = CodeGenerator(temp_manager)
-    generator.visit(tree)
-
-    tac = generator.quadruples  # lista de {id, op, arg1, arg2, result}
-
-    # símbolos globales rápidos para la vista
-    globalsyms = sorted(list(st.globalScope.symbols.keys()))
-    symtab_root = _build_symtab_json(st.globalScope, list(st.scopes.values()))
-
-    return {
-        "errors": _errors_to_json(errors.errors), 
-        "globals": globalsyms, 
-        "symtab": symtab_root,
-        "tac": tac
-    }
+    # Con docId la respuesta depende del estado del documento (y trae `edit`), y
+    # la petición tiene que actualizarlo aunque el código ya se haya visto: no
+    # pasa por el cache.
+    key = ResultCache.key_for(req.code) if req.docId is None else None
+    payload = result_cache.get(key) if key is not None else None
+    if payload is None:
+        try:
+            if req.docId is not None and pool is not None:
+                payload = pool.submit(("document", req.docId, req.code), affinity=req.docId)
+            elif req.docId is not None:
+                payload = document_payload(documents, req.docId, req.code)
+            elif pool is not None:
+                payload = pool.submit(req.code)
+            else:
+                payload = analysis_payload(req.code)
+        except PoolSaturated:
+            return JSONResponse({"detail": "server busy"}, status_code=503, headers={"Retry-After": "1"})
+        except AnalysisTimeout:
+            return JSONResponse({"detail": "analysis timed out"}, status_code=504)
+        except WorkerCrashed:
+            return JSONResponse({"detail": "analysis worker crashed"}, status_code=500)
+        except WorkerError as e:
+            return JSONResponse({"detail": f"analysis failed: {e}"}, status_code=500)
+        if key is not None:
+            result_cache.put(key, payload)
+            status = "miss"
+        else:
+            status = "bypass"
+    else:
+        status = "hit"
+    return Response(content=payload, media_type="application/json", headers={"X-Cache": status})
+
+# /run compila y ejecuta el programa en la VM; CPS_RUN_STEPS acota los cuádruplos
+# ejecutados (sin pool, un ciclo infinito dejaría el hilo ocupado para siempre).
+run_steps = int(os.environ.get("CPS_RUN_STEPS", "5000000"))
+
+class RunReq(BaseModel):
+    code: str
+    optLevel: int = 0
+
+@app.post("/run")
+def run(req: RunReq):
+    if req.optLevel not in (0, 1, 2, 3):
+        return JSONResponse({"detail": "optLevel must be 0-3"}, status_code=422)
+    try:
+        if pool is not None:
+            payload = pool.submit(("run", req.code, req.optLevel, run_steps))
+        else:
+            payload = run_payload(req.code, req.optLevel, run_steps)
+    except PoolSaturated:
+        return JSONResponse({"detail": "server busy"}, status_code=503, headers={"Retry-After": "1"})
+    except AnalysisTimeout:
+        return JSONResponse({"detail": "run timed out"}, status_code=504)
+    except WorkerCrashed:
+        return JSONResponse({"detail": "run worker crashed"}, status_code=500)
+    except WorkerError as e:
+        return JSONResponse({"detail": f"run failed: {e}"}, status_code=500)
+    return Response(content=payload, media_type="application/json")
+
+@app.get("/cache/stats")
+def cache_stats():
+    return result_cache.stats()
+
+@app.get("/documents/stats")
+def document_stats():
+    if pool is None:
+        return documents.stats()
+    # Suma lo de cada worker
+    totals = {}
+    for stats in pool.each(("documents",)):
+        for name, value in stats.items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+@app.delete("/documents/{doc_id}")
+def close_document(doc_id: str):
+    if pool is None:
+        return {"closed": documents.close(doc_id)}
+    try:
+        closed = pool.submit(("close", doc_id), affinity=doc_id)
+    except PoolSaturated:
+        return JSONResponse({"detail": "server busy"}, status_code=503, headers={"Retry-After": "1"})
+    except (AnalysisTimeout, WorkerCrashed):
+        # El worker se reemplazó, y con él se fue el documento
+        closed = False
+    pool.forget(doc_id)
+    return {"closed": closed}
+
+@app.get("/pool/stats")
+def pool_stats():
+    return pool.stats() if pool is not None else {"workers": 0}
@@ -37,6 +37,8 @@ class SymbolTableBuilder(CompiscriptListener):
         sym = VarSymbol(name, ty_decl, is_const=True)
         if not self.current.define(sym):
             self.errors.err_ctx(ctx, f"Constant '{name}' redeclared in this scope")
+        else:
+            self._add_member("fields", sym)
 
     def enterVariableDeclaration(self, ctx):
         name = ctx.Identifier().getText()
@@ -50,6 +52,8 @@ class SymbolTableBuilder(CompiscriptListener):
         sym = VarSymbol(name, ty_decl, is_const=False)
         if not self.current.define(sym):
             self.errors.err_ctx(ctx, f"Variable '{name}' redeclared in this scope")
+        else:
+            self._add_member("fields", sym)
 
     def enterTryCatchStatement(self, ctx):
         blocks = ctx.block() or []
@@ -69,6 +73,8 @@ class SymbolTableBuilder(CompiscriptListener):
         func = FuncSymbol(name, ret, [])
         if not self.current.define(func):
             self.errors.err_ctx(ctx, f"Function '{name}' redeclared")
+        else:
+            self._add_member("methods", func)
 
         if isinstance(self.current.owner, ClassSymbol):
             owner = self.current.owner
@@ -154,6 +160,12 @@ class SymbolTableBuilder(CompiscriptListener):
     def exitDoWhileStatement(self, ctx):
         self.loop_depth -= 1
 
+    def _add_member(self, kind, sym):
+        # Lo que se declara directo en el cuerpo de una clase (no en sus métodos) es suyo
+        if self.current.name.startswith("class ") and isinstance(self.current.owner, ClassSymbol):
+            getattr(self.current.owner, kind)[sym.name] = sym
+            self.current.owner.invalidate_members()
+
     def _find_function_scope(self):
         scope = self.current
         while scope:
@@ -1,7 +1,7 @@
 from CompiscriptVisitor import CompiscriptVisitor
 from src.utils.Errors import Error
 from src.utils.Scope import VarSymbol, Type, ClassSymbol, FuncSymbol, Scope
-from src.utils.Types import Type, ArrayType
+from src.utils.Types import Type, ArrayType, can_assign, is_subclass, unify_base
 from CompiscriptListener import CompiscriptListener
 from CompiscriptParser import CompiscriptParser
 from antlr4.tree.Tree import TerminalNode # type: ignore
@@ -14,6 +14,7 @@ class TypeChecker(CompiscriptVisitor):
         self.errors = errors
         self.parser = parser
         self.types = {}
+        self.method_receivers = {}  # sufijo '.m' que nombra un método -> ClassSymbol estática del receptor
         self.fn_ret_stack = []
         self.loop_depth = 0
         self.switch_depth = 0
@@ -27,30 +28,11 @@ class TypeChecker(CompiscriptVisitor):
         return a == b
 
     def _is_subclass(self, sub, sup):
-        c = sub
-        while c and getattr(c, "superclass", None):
-            if c.superclass == sup:
-                return True
-            c = c.superclass
-        return False
+        return is_subclass(sub, sup)
 
     def _can_assign(self, dst, src):
-        if dst == src: return True
-        if dst == Type.FLOAT and src == Type.INT: return True
-        if dst == Type.NULL: return True
-        if isinstance(dst, ArrayType) and isinstance(src, ArrayType):
-            if dst.dimensions != src.dimensions:
-                return False
-            if src.base == Type.NULL:  # arreglo vacío puede asignarse a cualquier tipo de arreglo
-                return True
-            if dst.base == src.base:
-                return True
-            if dst.base == Type.FLOAT and src.base == Type.INT:
-                return True
-            return False
-        if getattr(dst, "kind", "") == "class" and getattr(src, "kind", "") == "class":
-            return src == dst or self._is_subclass(src, dst)
-        return False
+        # Los tipos están internados: la compatibilidad es por identidad y se memoiza
+        return can_assign(dst, src)
 
     def _expect_bool(self, ctx, ty):
         if ty != Type.BOOL:
@@ -61,21 +43,10 @@ class TypeChecker(CompiscriptVisitor):
         return isinstance(t, ArrayType)
 
     def _unify_base(self, a, b):
-        if a == b:
-            return a
-        if {a, b} <= {Type.INT, Type.FLOAT}:
-            return Type.FLOAT
-        return None
+        return unify_base(a, b)
 
     def _class_member(self, cls, name):
-        c = cls
-        while c:
-            sc = getattr(c, "scope", None)
-            if sc:
-                sym = sc.resolve(name)
-                if sym: return sym
-            c = getattr(c, "superclass", None)
-        return None
+        return cls.resolve_member(name) if isinstance(cls, ClassSymbol) else None
 
     
     def _apply_assignment(self, name, rhs_ty, ctx):
@@ -107,15 +78,13 @@ class TypeChecker(CompiscriptVisitor):
 
 
     def _apply_index_assignment(self, arr_ty, idx_ty, rhs_ty, ctx):
-        from src.utils.Types import ArrayType, Type
         if not isinstance(arr_ty, ArrayType):
             self.errors.err_ctx(ctx, "Indexación sobre no-arreglo")
             return self._set(ctx, rhs_ty)
         if idx_ty != Type.INT:
             self.errors.err_ctx(ctx, "Índice de arreglo debe ser integer")
         # tipo del elemento
-        elem_ty = (ArrayType(arr_ty.base, arr_ty.dimensions-1)
-                if arr_ty.dimensions > 1 else arr_ty.base)
+        elem_ty = arr_ty.element()
         if not self._can_assign(elem_ty, rhs_ty):
             self.errors.err_ctx(ctx, f"Asignación incompatible en arreglo: {elem_ty} = {rhs_ty}")
 
@@ -333,8 +302,7 @@ class TypeChecker(CompiscriptVisitor):
                     self.errors.err_ctx(s, "Indexación sobre no-arreglo")
                     recv_ty = Type.NULL
                 else:
-                    recv_ty = (ArrayType(recv_ty.base, recv_ty.dimensions - 1)
-                            if recv_ty.dimensions > 1 else recv_ty.base)
+                    recv_ty = recv_ty.element()
 
             elif kind == '.':
                 prop = s.Identifier().getText()
@@ -459,7 +427,7 @@ class TypeChecker(CompiscriptVisitor):
                     self.errors.err_ctx(suf, "Indexación sobre no-arreglo")
                     cur = Type.NULL
                 else:
-                    cur = (ArrayType(cur.base, cur.dimensions - 1) if cur.dimensions > 1 else cur.base)
+                    cur = cur.element()
                 continue
 
             # Acceso a propiedad: '.' Identifier
@@ -476,7 +444,11 @@ class TypeChecker(CompiscriptVisitor):
                     else:
                         # si es método, dejamos el FuncSymbol para que la siguiente llamada lo use;
                         # si es campo, tomamos su tipo
-                        cur = psym if getattr(psym, "kind", "") == "func" else psym.ty
+                        if getattr(psym, "kind", "") == "func":
+                            self.method_receivers[suf] = cur
+                            cur = psym
+                        else:
+                            cur = psym.ty
                 continue
 
             # Fallback (no debería ocurrir)
@@ -498,8 +470,7 @@ class TypeChecker(CompiscriptVisitor):
         if idx_ty != Type.INT:
             self.errors.err_ctx(ctx, "Índice de arreglo debe ser integer")
 
-        elem_ty = (ArrayType(recv_ty.base, recv_ty.dimensions - 1)
-               if recv_ty.dimensions > 1 else recv_ty.base)
+        elem_ty = recv_ty.element()
 
         return self._set(ctx, elem_ty)
 
@@ -651,11 +622,7 @@ class TypeChecker(CompiscriptVisitor):
             self.errors.err_ctx(ctx, f"No se puede acceder propiedad '{prop}' sobre tipo {recv_ty}")
             return self._set(ctx, Type.NULL)
 
-        psym = recv_ty.resolve_member(prop) if hasattr(recv_ty, "resolve_member") \
-           else (recv_ty.scope.resolve(prop) if getattr(recv_ty, "scope", None) else None)
-
-
-        psym = recv_ty.resolve_member(prop)
+        psym = self._class_member(recv_ty, prop)
         if not psym:
             self.errors.err_ctx(ctx, f"Propiedad '{prop}' no existe")
             return self._set(ctx, Type.NULL)
@@ -743,8 +710,7 @@ class TypeChecker(CompiscriptVisitor):
             coll_ty = self.visit(coll_expr) if coll_expr else Type.NULL
 
             if isinstance(coll_ty, ArrayType):
-                elem_ty = (ArrayType(coll_ty.base, coll_ty.dimensions - 1)
-                        if coll_ty.dimensions > 1 else coll_ty.base)
+                elem_ty = coll_ty.element()
             else:
                 self.errors.err_ctx(ctx, f"foreach espera un arreglo; recibió {coll_ty}")
                 elem_ty = Type.NULL
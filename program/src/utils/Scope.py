@@ -1,11 +1,12 @@
+import weakref
 from typing import List, Optional
-from src.utils.Types import Type
+from src.utils.Types import Type, size_of, align_of, align_up
 
 class Symbol:
-    def __init__(self, name: str, ty: Type, size: int = 4): 
+    def __init__(self, name: str, ty: Type, size: int | None = None):
         self.name, self.ty = name, ty
         self.kind = None
-        self.size = size
+        self.size = size_of(ty) if size is None else size  # con el tipo declarado (ver MemoryLayout)
         self.address = None
 
 class VarSymbol(Symbol): 
@@ -17,30 +18,119 @@ class VarSymbol(Symbol):
 
 class FuncSymbol(Symbol):
     def __init__(self, name: str, ret: Type, params: list[Symbol]):
-        super().__init__(name, ret)
+        super().__init__(name, ret, size=0)  # es código: no ocupa lugar en el scope
         self.kind = 'func'
         self.params = params
 
 class ClassSymbol(Symbol):
     def __init__(self, name: str, superclass: Optional["ClassSymbol"] = None):
-        super().__init__(name, None)
+        super().__init__(name, None, size=0)
         self.kind = 'class'
+        # Tablas aplanadas, cada una armada sobre la de la superclase la primera vez
+        # que se pide y descartada (con las de las subclases) cuando la clase cambia
+        self._members = None    # ({nombre: símbolo}, scopes que rodean a la cadena)
+        self._vtable = None     # ([(nombre, FuncSymbol)], {nombre: slot})
+        self._subclasses = weakref.WeakSet()
+        self._superclass = None
         self.superclass = superclass
         self.fields: dict[str, Symbol] = {}
         self.methods: dict[str, FuncSymbol] = {}
         self.scope: Scope|None = None
 
+    @property
+    def superclass(self):
+        return self._superclass
+
+    @superclass.setter
+    def superclass(self, sup):
+        old = self._superclass
+        if isinstance(old, ClassSymbol):
+            old._subclasses.discard(self)
+        if isinstance(sup, ClassSymbol):
+            sup._subclasses.add(self)
+        self._superclass = sup
+        self.invalidate_members()
+
+    def invalidate_members(self):
+        """La clase cambió (un miembro, la superclase o su scope): se descartan sus tablas y las de sus subclases."""
+        if self._members is None and self._vtable is None:
+            return  # una subclase con tabla implica que esta también la tiene
+        self._members = self._vtable = None
+        for sub in list(self._subclasses):
+            sub.invalidate_members()
+
+    def _member_table(self):
+        table = self._members
+        if table is None:
+            self._members = _NO_MEMBERS  # por si la cadena de superclases tiene un ciclo
+            sup = self._superclass
+            members, outer = sup._member_table() if isinstance(sup, ClassSymbol) else _NO_MEMBERS
+            members = dict(members)
+            if self.scope is not None:
+                members.update(self.scope.symbols)
+                if self.scope.parent is not None and all(sc is not self.scope.parent for sc in outer):
+                    outer = (self.scope.parent,) + outer
+            self._members = table = (members, outer)
+        return table
+
+    def _vtable_table(self):
+        table = self._vtable
+        if table is None:
+            self._vtable = _NO_METHODS
+            sup = self._superclass
+            inherited = sup._vtable_table()[0] if isinstance(sup, ClassSymbol) else []
+            slots = extend_vtable(inherited, self.methods)
+            self._vtable = table = (slots, {name: k for k, (name, _) in enumerate(slots)})
+        return table
+
+    def members(self) -> dict[str, Symbol]:
+        """Todo lo que se ve como miembro de la clase: lo propio tapa lo heredado."""
+        return self._member_table()[0]
+
     def resolve_member(self, member: str):
-        c: ClassSymbol | None = self
-        while c:
-            sc = getattr(c, "scope", None)
-            if sc:
-                s = sc.resolve(member)
-                if s:
-                    return s
-            c = getattr(c, "superclass", None)
+        members, outer = self._members or self._member_table()
+        s = members.get(member)
+        if s:
+            return s
+        # Como Scope.resolve en cada nivel: lo que no es miembro se busca en los
+        # scopes que rodean a las clases de la cadena
+        for sc in outer:
+            s = sc.resolve(member)
+            if s:
+                return s
         return None
 
+    def vtable(self) -> list[tuple[str, FuncSymbol]]:
+        """(nombre, FuncSymbol) de cada slot, con los de las bases primero (ver extend_vtable)."""
+        return list(self._vtable_table()[0])
+
+    def slot(self, method: str) -> int | None:
+        """Slot del método en la vtable de la clase, o None si no es un método suyo ni heredado."""
+        return self._vtable_table()[1].get(method)
+
+
+_NO_MEMBERS = ({}, ())
+_NO_METHODS = ([], {})
+
+
+def extend_vtable(inherited, methods):
+    """
+    Vtable de una clase a partir de la de su base: `inherited` es [(nombre, x)] por
+    slot y `methods` {nombre: x} los métodos propios en orden de declaración. Un
+    override reemplaza el slot heredado y lo nuevo va al final, así que un método
+    tiene el mismo slot en toda la jerarquía que sigue a la clase que lo declaró.
+    """
+    table = list(inherited)
+    index = {name: k for k, (name, _) in enumerate(table)}
+    for name, x in methods.items():
+        k = index.get(name)
+        if k is None:
+            index[name] = len(table)
+            table.append((name, x))
+        else:
+            table[k] = (name, x)
+    return table
+
 class Scope:
     def __init__(self, parent=None, name="<scope>", owner=None):
         self.parent = parent
@@ -51,9 +141,12 @@ class Scope:
 
     def define(self, sym: Symbol):
         if sym.name in self.symbols: return False
-        sym.address = self.offset
-        self.offset += sym.size
-        self.symbols[sym.name] = sym; return True
+        sym.address = align_up(self.offset, align_of(sym.ty)) if sym.size else self.offset
+        self.offset = sym.address + sym.size
+        self.symbols[sym.name] = sym
+        if isinstance(self.owner, ClassSymbol):
+            self.owner.invalidate_members()
+        return True
     def resolve(self, name: str):
         s = self.symbols.get(name)
         return s if s else (self.parent.resolve(name) if self.parent else None)
\ No newline at end of file
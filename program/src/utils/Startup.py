@@ -0,0 +1,64 @@
+import os
+import sys
+
+# Este módulo solo puede importar stdlib liviana: se usa antes de cargar ANTLR.
+
+PYCACHE_DIRNAME = "compiscript-pycache"
+
+
+def ensure_bytecode_cache(root):
+    """
+    CompiscriptParser.py/CompiscriptLexer.py pesan ~150 KB; si Python no puede escribir
+    su __pycache__ (p. ej. /program montado en docker y el contenedor corre como appuser)
+    los recompila en cada ejecución, y eso domina el arranque del CLI. En ese caso se
+    redirige el cache de bytecode a un directorio propio del usuario:
+    $XDG_CACHE_HOME/compiscript-pycache o, si no está, <tmp>/compiscript-pycache-<uid>.
+    Se crea con permisos 0700 y solo se usa si es del usuario y nadie más puede
+    escribir en él (otro usuario podría dejar ahí .pyc que después importamos).
+
+    Respeta PYTHONDONTWRITEBYTECODE y un PYTHONPYCACHEPREFIX ya configurado.
+    Devuelve el prefijo usado, o None si no hizo falta cambiar nada.
+    """
+    if sys.dont_write_bytecode or sys.pycache_prefix:
+        return None
+
+    pycache = os.path.join(root, "__pycache__")
+    target = pycache if os.path.isdir(pycache) else root
+    if os.access(target, os.W_OK):
+        return None
+
+    prefix = _private_cache_dir()
+    if prefix is None:
+        return None
+    sys.pycache_prefix = prefix
+    return prefix
+
+
+def _private_cache_dir():
+    if not hasattr(os, "getuid"):
+        return None
+    uid = os.getuid()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    if xdg:
+        prefix = os.path.join(xdg, PYCACHE_DIRNAME)
+    else:
+        import tempfile
+        prefix = os.path.join(tempfile.gettempdir(), f"{PYCACHE_DIRNAME}-{uid}")
+    try:
+        if xdg:
+            os.makedirs(xdg, mode=0o700, exist_ok=True)
+        os.mkdir(prefix, 0o700)
+    except FileExistsError:
+        pass
+    except OSError:
+        return None
+
+    # lstat: un symlink puesto por otro usuario tampoco sirve
+    try:
+        st = os.lstat(prefix)
+    except OSError:
+        return None
+    import stat
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != uid or st.st_mode & 0o022:
+        return None
+    return prefix
@@ -1,16 +1,32 @@
-import re
+class Temp(str):
+    """
+    Temporal del TAC. Se escribe como "t3" (es un str, así sale igual en el JSON y
+    se compara con "t3"), pero es de otra clase que los nombres del programa: una
+    variable que se llame `total` o `t3` nunca se confunde con un temporal.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, id):
+        return super().__new__(cls, f"t{id}")
+
+    @property
+    def id(self):
+        return int(self[1:])
+
+    def __getnewargs__(self):  # pickle/copy lo reconstruyen con el número
+        return (self.id,)
+
 
 class TempManager:
+    """
+    Entrega temporales nuevos (virtuales): cada new_temp() da uno distinto. Cuántos
+    hacen falta de verdad lo decide después TempAllocator con el análisis de vida.
+    """
+
     def __init__(self):
-        self.available = []  # temporales libres
-        self.counter = 0     # cuántos he creado
+        self.counter = 0  # cuántos he creado
 
     def new_temp(self):
-        if self.available:  # si hay alguno libre, reutilízalo
-            return self.available.pop()
         self.counter += 1
-        return f"t{self.counter}"
-
-    def release_temp(self, name):
-        if isinstance(name, str) and re.fullmatch(r"t\d+", name) and name not in self.available:
-            self.available.append(name)
+        return Temp(self.counter)
@@ -1,3 +1,5 @@
+import threading
+import weakref
 from enum import Enum
 
 class Type(Enum):
@@ -9,10 +11,126 @@ class Type(Enum):
     NULL = "null"
 
 class ArrayType:
-    def __init__(self, base, dimensions=1, empty=False):
-        self.base = base
-        self.dimensions = dimensions
-        self.empty = empty
-    
+    """
+    Tipo arreglo internado: ArrayType(base, dims) devuelve siempre el mismo objeto
+    para los mismos argumentos, así que dos tipos son iguales si y solo si son el
+    mismo objeto (== e `is` coinciden y sirven como llave de diccionario).
+
+    La tabla guarda referencias débiles: un arreglo de una clase que ya nadie usa
+    (p. ej. de un análisis anterior) se libera junto con su ClassSymbol.
+    """
+
+    __slots__ = ("base", "dimensions", "empty", "__weakref__")
+
+    _interned = weakref.WeakValueDictionary()  # (base, dims, empty) -> ArrayType
+    _lock = threading.Lock()
+
+    def __new__(cls, base, dimensions=1, empty=False):
+        # `empty` marca el tipo del literal [] (sin elementos de los que inferir la base)
+        key = (base, dimensions, empty)
+        t = cls._interned.get(key)
+        if t is None:
+            with cls._lock:
+                t = cls._interned.get(key)
+                if t is None:
+                    t = object.__new__(cls)
+                    object.__setattr__(t, "base", base)
+                    object.__setattr__(t, "dimensions", dimensions)
+                    object.__setattr__(t, "empty", empty)
+                    cls._interned[key] = t
+        return t
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ArrayType es inmutable")
+
+    def __reduce__(self):
+        # Al deserializar (p. ej. en otro proceso) se vuelve a internar
+        return (ArrayType, (self.base, self.dimensions, self.empty))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def element(self):
+        """Tipo de a[i]: un arreglo con una dimensión menos, o la base."""
+        return ArrayType(self.base, self.dimensions - 1) if self.dimensions > 1 else self.base
+
     def __repr__(self):
-        return f"{self.base}{'[]' * self.dimensions}"
\ No newline at end of file
+        return f"{self.base}{'[]' * self.dimensions}"
+
+
+# Tamaño en bytes de un valor de cada tipo primitivo; strings, arreglos, objetos
+# y null son referencias de una palabra
+WORD = 4
+_SIZES = {Type.INT: 4, Type.FLOAT: 8, Type.BOOL: 1, Type.STRING: WORD, Type.NULL: WORD, Type.VOID: 0}
+
+def size_of(t):
+    """Bytes que ocupa un valor de tipo `t` en un registro de activación o un objeto."""
+    return _SIZES.get(t, WORD) if isinstance(t, Type) else WORD
+
+def align_of(t):
+    """Alineación de un valor de tipo `t` (la de su tamaño; VOID alinea a 1)."""
+    return max(size_of(t), 1)
+
+def align_up(n, alignment):
+    return (n + alignment - 1) // alignment * alignment
+
+
+def _is_class(t):
+    return getattr(t, "kind", "") == "class"
+
+def is_subclass(sub, sup):
+    c = sub
+    while c and getattr(c, "superclass", None):
+        if c.superclass is sup:
+            return True
+        c = c.superclass
+    return False
+
+# (dst, src) -> bool para los pares que no dependen de la jerarquía de clases
+_ASSIGNABLE = {}
+
+def can_assign(dst, src):
+    """¿Se puede asignar un valor de tipo `src` a algo de tipo `dst`?"""
+    if dst is src:
+        return True
+    if _is_class(dst) and _is_class(src):
+        # La jerarquía cambia mientras se chequea (superclass se resuelve tarde): no se memoiza
+        return is_subclass(src, dst)
+    key = (dst, src)
+    ok = _ASSIGNABLE.get(key)
+    if ok is None:
+        ok = _can_assign(dst, src)
+        # Solo se guardan tipos primitivos o arreglos de primitivos, para no
+        # retener ClassSymbols de análisis anteriores
+        if _is_builtin(dst) and _is_builtin(src):
+            _ASSIGNABLE[key] = ok
+    return ok
+
+def _is_builtin(t):
+    return isinstance(t, Type) or (isinstance(t, ArrayType) and isinstance(t.base, Type))
+
+def _can_assign(dst, src):
+    if dst is Type.FLOAT and src is Type.INT: return True
+    if dst is Type.NULL: return True
+    if isinstance(dst, ArrayType) and isinstance(src, ArrayType):
+        if dst.dimensions != src.dimensions:
+            return False
+        if src.base is Type.NULL:  # arreglo vacío puede asignarse a cualquier tipo de arreglo
+            return True
+        if dst.base is src.base:
+            return True
+        if dst.base is Type.FLOAT and src.base is Type.INT:
+            return True
+        return False
+    return False
+
+def unify_base(a, b):
+    """Tipo común de dos bases (promoción int -> float), o None."""
+    if a is b:
+        return a
+    if (a is Type.INT and b is Type.FLOAT) or (a is Type.FLOAT and b is Type.INT):
+        return Type.FLOAT
+    return None
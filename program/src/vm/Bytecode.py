@@ -0,0 +1,449 @@
+from src.optimizer.Tac import OP, ARG1, BRANCHES, literal, is_temp, to_rows
+from src.optimizer.ControlFlowGraph import build_cfgs
+from src.optimizer.Liveness import Liveness
+from src.utils.Temp import Temp
+from src.vm.Layout import MAIN, ProgramLayout, class_proc
+
+# Cada instrucción es una tupla (opcode, a, b, c) de enteros: registros del frame,
+# índices de función, de nombre o de instrucción según el opcode. Están en el orden
+# en que BytecodeMachine las pregunta (las más frecuentes primero).
+OPCODES = (
+    "MOVE",      # r[c] = r[a]
+    "ADD", "SUB", "MUL",
+    "JMP",       # pc = c
+    "JFLT", "JFLE", "JFGT", "JFGE", "JFEQ", "JFNE",  # comparación + ifFalse: pc = c si no (r[a] op r[b])
+    "JF", "JT",  # pc = c si r[a] es falso / verdadero
+    "INDEX",     # r[c] = r[a][r[b]]
+    "STORE",     # r[a][r[b]] = r[c]
+    "LT", "LE", "GT", "GE", "EQ", "NE",
+    "GETG",      # r[c] = global a
+    "SETG",      # global c = r[a]
+    "PARAM",     # apila r[a] como argumento
+    "CALL",      # función a con b argumentos, el resultado en r[c]
+    "RET",       # devuelve r[a]
+    "GETPROP",   # r[c] = r[a].names[b] (campo o método ligado)
+    "SETPROP",   # r[a].names[c] = r[b]
+    "CALLV",     # llama el método ligado que está en r[a]
+    "CALLM",     # función a con b argumentos y this = r[c]; devuelve this en r[c]
+    "CALLVT",    # método del slot a de la vtable del primero de los b argumentos (el receptor)
+    "LEN", "DIV", "MOD", "NOT",
+    "RETN",      # devuelve null
+    "PRINT",
+    "NEWARR",    # r[c] = arreglo de r[a] nulls
+    "NEWOBJ",    # r[c] = objeto vacío de la clase names[a]
+    "CALLTHIS",  # llamada por nombre dentro de un método: método de this o función (callsites[a])
+    "GETO",      # r[c] = registro b de la llamada activa de la función a (la que encierra a esta)
+    "SETO",      # registro c de la llamada activa de la función b = r[a]
+    "MKMETHOD",  # r[c] = función b ligada a r[a] (super.m)
+    "POPARGS",   # descarta a argumentos (new sin constructor)
+    "ENDINIT",   # fin de un inicializador de campos: los copia a this y lo devuelve
+    "HALT",
+)
+(MOVE, ADD, SUB, MUL, JMP, JFLT, JFLE, JFGT, JFGE, JFEQ, JFNE, JF, JT, INDEX, STORE,
+ LT, LE, GT, GE, EQ, NE, GETG, SETG, PARAM, CALL, RET, GETPROP, SETPROP, CALLV, CALLM,
+ CALLVT, LEN, DIV, MOD, NOT, RETN, PRINT, NEWARR, NEWOBJ, CALLTHIS, GETO, SETO, MKMETHOD,
+ POPARGS, ENDINIT, HALT) = range(len(OPCODES))
+
+_ARITH = {"+": ADD, "-": SUB, "*": MUL, "/": DIV, "%": MOD,
+          "<": LT, "<=": LE, ">": GT, ">=": GE, "==": EQ, "!=": NE}
+_JUMP_IF_NOT = {LT: JFLT, LE: JFLE, GT: JFGT, GE: JFGE, EQ: JFEQ, NE: JFNE}
+# ifTrue sobre == / != es el ifFalse de la otra (con <, <= ... no: NaN no cumple ninguna)
+_NEGATED = {EQ: NE, NE: EQ}
+
+
+class Function:
+    """Un procedimiento ya bajado: dónde empieza y el prototipo de su arreglo de registros."""
+
+    __slots__ = ("index", "label", "name", "entry", "size", "proto", "params", "this_slot",
+                 "fields", "slots", "consts", "scratch")
+
+    def __init__(self, index, label, name, temps):
+        self.index = index
+        self.label = label
+        self.name = name
+        self.entry = 0
+        self.size = temps        # registros: temporales, nombres, constantes y auxiliares
+        self.proto = None        # registros recién creados: None salvo las constantes
+        self.params = []         # registros de los parámetros, en orden
+        self.this_slot = None
+        self.fields = []         # (nombre, registro) que un inicializador de clase copia al objeto
+        self.slots = {}          # nombre -> registro
+        self.consts = {}         # (tipo, valor) -> registro
+        self.scratch = []        # registros auxiliares para leer globales y de afuera
+
+    def __str__(self):
+        return self.label
+
+
+class ClassEntry:
+    __slots__ = ("name", "methods", "vtable")
+
+    def __init__(self, name):
+        self.name = name
+        self.methods = {}  # nombre -> Function, con los heredados ya resueltos
+        self.vtable = []   # Function de cada slot (ver ProgramLayout.vtable)
+
+
+class Program:
+    """
+    El bytecode de todo el programa: las instrucciones de todos los procedimientos una
+    detrás de otra (el top-level primero, termina en HALT), las funciones, las clases
+    con sus métodos aplanados, el pool de nombres (propiedades y clases) y qué catch
+    atiende cada instrucción: {pc: (pc del catch, registro de la variable `exception`)}.
+    """
+
+    def __init__(self):
+        self.code = []
+        self.functions = []
+        self.classes = {}
+        self.names = []
+        self.callsites = []  # (nombre, Function o None) de cada CALLTHIS
+        self.handlers = {}
+
+    @property
+    def main(self):
+        return self.functions[0]
+
+    def listing(self):
+        """Desensamblado, una instrucción por línea; cada función empieza con su etiqueta."""
+        entries = {f.entry: f for f in self.functions}
+        lines = []
+        for pc, (op, a, b, c) in enumerate(self.code):
+            if pc in entries:
+                f = entries[pc]
+                lines.append(f"{f.label}:  ; {f.size} registros, constantes {_consts(f)}")
+            lines.append(f"{pc:>5}  {OPCODES[op]:<9}{a:>5}{b:>5}{c:>5}")
+        return lines
+
+
+def _consts(f):
+    return "{" + ", ".join(f"r{slot}={value!r}" for (_, value), slot in f.consts.items()) + "}"
+
+
+def lower(quads, local_names=None):
+    """
+    Baja el TAC a bytecode. Cada procedimiento tiene un arreglo de registros: sus
+    temporales (t3 -> registro 3), después sus nombres locales, su pool de constantes
+    (que el prototipo ya trae cargadas) y unos auxiliares; los operandos son índices
+    en ese arreglo. Las globales se leen y escriben con GETG/SETG y las locales de una
+    función que encierra a esta con GETO/SETO. Los parámetros se copian a sus
+    registros al llamar, `new C` se vuelve NEWOBJ más una CALLM por inicializador y
+    otra al constructor, un `callvirt` toma el método de la vtable del receptor, y una comparación seguida del ifFalse que la consume (si el
+    temporal no se vuelve a leer) es una sola instrucción.
+
+    `local_names` es lo mismo que recibe la VirtualMachine (ver Layout.local_names).
+    """
+    return _Lowering(quads, local_names).program
+
+
+def _dead_conditions(quads):
+    # Índices de los ifFalse/ifTrue cuyo temporal de condición ya no se lee después del salto
+    rows = to_rows(quads)
+    dead = set()
+    for cfg in build_cfgs(quads):
+        live = None
+        for block in cfg.blocks:
+            row = rows[block.end - 1]
+            if row[OP] in BRANCHES and is_temp(row[ARG1]):
+                if live is None:
+                    live = Liveness(cfg, rows)
+                if row[ARG1] not in live.live_out[block.id]:
+                    dead.add(block.end - 1)
+    return dead
+
+
+class _Lowering:
+    def __init__(self, quads, local_names):
+        layout = self.layout = ProgramLayout(quads)
+        self.locals = local_names if local_names is not None else layout.guess_locals()
+        self.dead = _dead_conditions(quads)
+        self.program = program = Program()
+        self.name_index = {}
+        self.pc_of = {}       # índice de cuádruplo -> primera instrucción que le corresponde
+        self.jumps = []       # (pc, etiqueta) a resolver al final
+        self.catches = []     # (pc, etiqueta del catch, Function)
+
+        self.fn = {}
+        for label, proc in layout.procs.items():  # el top-level primero, después en orden de aparición
+            f = self.fn[label] = Function(len(program.functions), label, proc.name, proc.temps)
+            program.functions.append(f)
+        for name in layout.classes:
+            program.classes[name] = ClassEntry(name)
+        for name, entry in program.classes.items():
+            for method in self._method_names(name):
+                entry.methods[method] = self.fn[layout.method(name, method)]
+            entry.vtable = [self.fn[label] for label in layout.vtable(name)]
+        self.method_names = {m for entry in program.classes.values() for m in entry.methods}
+
+        for label in layout.procs:
+            self._lower(label)
+
+        code = program.code
+        for pc, label in self.jumps:
+            code[pc][3] = self.pc_of[layout.labels[label]]
+        for pc, label, f in self.catches:
+            program.handlers[pc] = (self.pc_of[layout.labels[label]], self._slot(f, "exception"))
+        program.code = [tuple(ins) for ins in code]
+        for f in program.functions:
+            f.proto = [None] * f.size
+            for (_, value), slot in f.consts.items():
+                f.proto[slot] = value
+
+    def _method_names(self, cls):
+        names = set()
+        while cls is not None and cls in self.layout.classes:
+            names |= set(self.layout.classes[cls].methods)
+            cls = self.layout.classes[cls].base
+        return names
+
+    # Registros
+    def _slot(self, f, name):
+        slot = f.slots.get(name)
+        if slot is None:
+            slot = f.slots[name] = f.size
+            f.size += 1
+        return slot
+
+    def _const(self, f, value):
+        key = (type(value), value)
+        slot = f.consts.get(key)
+        if slot is None:
+            slot = f.consts[key] = f.size
+            f.size += 1
+        return slot
+
+    def _scratch(self, f):
+        if self.used == len(f.scratch):
+            f.scratch.append(f.size)
+            f.size += 1
+        self.used += 1
+        return f.scratch[self.used - 1]
+
+    def _name_index(self, name):
+        i = self.name_index.get(name)
+        if i is None:
+            i = self.name_index[name] = len(self.program.names)
+            self.program.names.append(name)
+        return i
+
+    def _where(self, label, name):
+        # ("local", registro), ("outer", función, registro) o ("global", registro del top-level)
+        f = self.fn[label]
+        if (label == MAIN or name == "exception" or name in self.locals.get(label, ())
+                or name in self.layout.procs[label].params):
+            return ("local", self._slot(f, name))
+        parent = self.layout.procs[label].parent
+        while parent is not None and parent != MAIN:
+            if name in self.locals.get(parent, ()):
+                outer = self.fn[parent]
+                return ("outer", outer.index, self._slot(outer, name))
+            parent = self.layout.procs[parent].parent
+        return ("global", self._slot(self.fn[MAIN], name))
+
+    def _read(self, label, x):
+        f = self.fn[label]
+        if x is None:
+            return 0
+        if isinstance(x, Temp):
+            return x.id
+        if x == "null":
+            return self._const(f, None)
+        v = literal(x)
+        if v is not None:
+            return self._const(f, v[1:-1] if isinstance(v, str) else v)
+        if x == "this":
+            return f.this_slot if f.this_slot is not None else self._const(f, None)
+        where = self._where(label, x)
+        if where[0] == "local":
+            return where[1]
+        s = self._scratch(f)
+        if where[0] == "global":
+            self._emit(GETG, where[1], 0, s)
+        else:
+            self._emit(GETO, where[1], where[2], s)
+        return s
+
+    def _dest(self, label, x):
+        # Registro donde deja su resultado la instrucción y lo que hay que emitir después (o None)
+        if isinstance(x, Temp):
+            return x.id, None
+        where = self._where(label, x)
+        if where[0] == "local":
+            return where[1], None
+        s = self._scratch(self.fn[label])
+        if where[0] == "global":
+            return s, (SETG, s, 0, where[1])
+        return s, (SETO, s, where[1], where[2])
+
+    # Emisión
+    def _emit(self, op, a=0, b=0, c=0):
+        pc = len(self.program.code)
+        self.program.code.append([op, a, b, c])
+        if self.handler is not None:
+            self.catches.append((pc, self.handler, self.current))
+        self.last_compare = None
+        return pc
+
+    def _emit_to(self, label, op, a, b, x):
+        c, after = self._dest(label, x)
+        pc = self._emit(op, a, b, c)
+        if after is not None:
+            self._emit(*after)
+        return pc
+
+    def _lower(self, label):
+        layout = self.layout
+        proc = layout.procs[label]
+        f = self.current = self.fn[label]
+        if proc.cls is not None or label.startswith("class "):
+            f.this_slot = self._slot(f, "this")
+        returns_this = proc.cls is not None and proc.name == "constructor"
+        f.entry = len(self.program.code)
+        self.last_compare = None
+        self.handler = None
+
+        for i in proc.indices:
+            _, op, a1, a2, r = layout.rows[i]
+            self.pc_of[i] = len(self.program.code)
+            self.handler = layout.handlers[i]
+            self.used = 0
+
+            if op == "label":
+                self.last_compare = None
+            elif op == "=":
+                self._copy(label, a1, r)
+            elif op in _ARITH:
+                a, b = self._read(label, a1), self._read(label, a2)
+                code = _ARITH[op]
+                pc = self._emit_to(label, code, a, b, r)
+                if code in _JUMP_IF_NOT and isinstance(r, Temp):
+                    self.last_compare = (pc, code, r)
+            elif op == "not":
+                self._emit_to(label, NOT, self._read(label, a1), 0, r)
+            elif op == "goto":
+                self.jumps.append((self._emit(JMP), r))
+            elif op in ("ifFalse", "ifTrue"):
+                self._branch(label, i, op, a1, r)
+            elif op == "param":
+                if a1 is None:
+                    f.params.append(self._slot(f, r))
+                else:
+                    self._emit(PARAM, self._read(label, a1))
+            elif op == "call":
+                self._call(label, proc, a1, a2, r)
+            elif op == "callvirt":
+                self._emit_to(label, CALLVT, literal(a1), a2 or 0, r)
+            elif op == "return":
+                if returns_this:
+                    self._emit(RET, f.this_slot)
+                elif a1 is not None:
+                    self._emit(RET, self._read(label, a1))
+                else:
+                    self._emit(RETN)
+            elif op == "endfunc":
+                if returns_this:
+                    self._emit(RET, f.this_slot)
+                else:
+                    self._emit(RETN)
+            elif op == "new":
+                self._new(label, a1, a2, r)
+            elif op == "getprop":
+                self._getprop(label, proc, a1, a2, r)
+            elif op == "setprop":
+                self._emit(SETPROP, self._read(label, a1), self._read(label, a2), self._name_index(r))
+            elif op == "newarr":
+                self._emit_to(label, NEWARR, self._read(label, a2), 0, r)
+            elif op == "[]":
+                self._emit_to(label, INDEX, self._read(label, a1), self._read(label, a2), r)
+            elif op == "[]=":
+                self._emit(STORE, self._read(label, a1), self._read(label, a2), self._read(label, r))
+            elif op == "len":
+                self._emit_to(label, LEN, self._read(label, a1), 0, r)
+            elif op == "print":
+                self._emit(PRINT, self._read(label, a1))
+            elif op == "endclass":
+                f.fields = sorted((name, self._slot(f, name)) for name in proc.written
+                                  if self._where(label, name)[0] == "local")
+                self._emit(ENDINIT)
+            # class, inherit, trybegin y tryend no generan nada: los catch van en la tabla
+
+        if label == MAIN:
+            self.handler = None
+            self._emit(HALT)
+
+    def _copy(self, label, a1, r):
+        # `=` directo entre un registro y una global (o una local de afuera), sin auxiliar
+        if not isinstance(r, Temp) and _is_name(r):
+            where = self._where(label, r)
+            if where[0] != "local":
+                a = self._read(label, a1)
+                if where[0] == "global":
+                    self._emit(SETG, a, 0, where[1])
+                else:
+                    self._emit(SETO, a, where[1], where[2])
+                return
+        if _is_name(a1) and not isinstance(a1, Temp) and a1 != "this":
+            where = self._where(label, a1)
+            if where[0] == "global":
+                self._emit_to(label, GETG, where[1], 0, r)
+                return
+        self._emit_to(label, MOVE, self._read(label, a1), 0, r)
+
+    def _branch(self, label, i, op, a1, target):
+        last = self.last_compare
+        if last is not None and i in self.dead and last[2] == a1:
+            pc, code, _ = last
+            if op == "ifTrue":
+                code = _NEGATED.get(code)
+            if code is not None:
+                ins = self.program.code[pc]
+                ins[0] = _JUMP_IF_NOT[code]
+                self.jumps.append((pc, target))
+                self.last_compare = None
+                return
+        self.jumps.append((self._emit(JF if op == "ifFalse" else JT, self._read(label, a1)), target))
+
+    def _call(self, label, proc, target, n, r):
+        n = n or 0
+        f = self.fn[label]
+        if isinstance(target, Temp):
+            self._emit_to(label, CALLV, target.id, n, r)
+            return
+        function = self.layout.function(target, label)
+        if f.this_slot is not None and target in self.method_names:
+            fallback = self.fn[function] if function is not None else None
+            self.program.callsites.append((target, fallback))
+            self._emit_to(label, CALLTHIS, len(self.program.callsites) - 1, n, r)
+        elif function is not None:
+            self._emit_to(label, CALL, self.fn[function].index, n, r)
+        else:
+            self._emit_to(label, CALLV, self._read(label, target), n, r)
+
+    def _new(self, label, cls, n, r):
+        n = n or 0
+        obj, after = self._dest(label, r)
+        self._emit(NEWOBJ, self._name_index(cls), 0, obj)
+        for c in self.layout.init_chain(cls):
+            self._emit(CALLM, self.fn[class_proc(c)].index, 0, obj)
+        ctor = self.layout.method(cls, "constructor")
+        if ctor is not None:
+            self._emit(CALLM, self.fn[ctor].index, n, obj)
+        elif n:
+            self._emit(POPARGS, n)
+        if after is not None:
+            self._emit(*after)
+
+    def _getprop(self, label, proc, obj, prop, r):
+        f = self.fn[label]
+        if obj == "super" and f.this_slot is not None:
+            base = proc.cls.base if proc.cls is not None else None
+            method = self.layout.method(base, prop)
+            if method is not None:
+                self._emit_to(label, MKMETHOD, f.this_slot, self.fn[method].index, r)
+                return
+            obj = "this"
+        self._emit_to(label, GETPROP, self._read(label, obj), self._name_index(prop), r)
+
+
+def _is_name(x):
+    return isinstance(x, str) and literal(x) is None and x != "null"
@@ -0,0 +1,320 @@
+import time
+
+from src.optimizer.Tac import INT_MIN, INT_MAX
+from src.vm.Bytecode import (
+    MOVE, ADD, SUB, MUL, JMP, JFLT, JFLE, JFGT, JFGE, JFEQ, JFNE, JF, JT, INDEX, STORE,
+    LT, LE, GT, GE, EQ, NE, GETG, SETG, PARAM, CALL, RET, GETPROP, SETPROP, CALLV, CALLM,
+    CALLVT, LEN, DIV, MOD, NOT, RETN, PRINT, NEWARR, NEWOBJ, CALLTHIS, GETO, SETO, MKMETHOD,
+    POPARGS, ENDINIT, HALT,
+)
+from src.vm.VirtualMachine import VMError, StepLimitExceeded, Instance, Method, BINARY_OPS, text
+
+
+class BytecodeMachine:
+    """
+    Corre un Program de Bytecode.lower con la misma semántica que la VirtualMachine
+    (mismos valores, mismos mensajes de error, mismos catch), pero sobre registros:
+    un solo ciclo con el pc, los registros del frame actual y la pila de argumentos
+    en variables locales, y un if por opcode en orden de frecuencia. Un frame
+    suspendido es una tupla (registros, función, pc de retorno, registro destino,
+    altura de la pila de argumentos).
+
+    `steps` cuenta instrucciones (no cuádruplos); `max_steps` se revisa en los saltos
+    y las llamadas, que es por donde pasa cualquier ejecución larga.
+    """
+
+    def __init__(self, program, max_steps=None, max_depth=10_000, stdout=None):
+        self.program = program
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+        self.stdout = stdout
+
+        self.output = []
+        self.error = None
+        self.steps = 0
+        self.elapsed = 0.0
+
+    def run(self):
+        start = time.perf_counter()
+        program = self.program
+        code = program.code
+        functions = program.functions
+        classes = program.classes
+        names = program.names
+        callsites = program.callsites
+        handlers = program.handlers
+        output = self.output
+        stdout = self.stdout
+        limit = self.max_steps if self.max_steps is not None else float("inf")
+        over = f"se superó el límite de {self.max_steps} pasos"
+        max_depth = self.max_depth
+        add, sub, mul, mod, eq = (BINARY_OPS[op] for op in ("+", "-", "*", "%", "=="))
+
+        func = program.main
+        regs = func.proto[:]
+        globals_ = regs
+        frames = []
+        stack = []
+        pc = func.entry
+        steps = 0
+
+        while True:
+            try:
+                while True:
+                    op, a, b, c = code[pc]
+                    pc += 1
+                    steps += 1
+                    if op == MOVE:
+                        regs[c] = regs[a]
+                    elif op == ADD:
+                        x = regs[a]
+                        y = regs[b]
+                        if x.__class__ is int and y.__class__ is int:
+                            r = x + y
+                            regs[c] = r if INT_MIN <= r <= INT_MAX else add(x, y)
+                        else:
+                            regs[c] = add(x, y)
+                    elif op == SUB:
+                        x = regs[a]
+                        y = regs[b]
+                        if x.__class__ is int and y.__class__ is int:
+                            r = x - y
+                            regs[c] = r if INT_MIN <= r <= INT_MAX else sub(x, y)
+                        else:
+                            regs[c] = sub(x, y)
+                    elif op == MUL:
+                        x = regs[a]
+                        y = regs[b]
+                        if x.__class__ is int and y.__class__ is int:
+                            r = x * y
+                            regs[c] = r if INT_MIN <= r <= INT_MAX else mul(x, y)
+                        else:
+                            regs[c] = mul(x, y)
+                    elif op == JMP:
+                        pc = c
+                        if steps > limit:
+                            raise StepLimitExceeded(over)
+                    elif op == JFLT:
+                        if not regs[a] < regs[b]:
+                            pc = c
+                            if steps > limit:
+                                raise StepLimitExceeded(over)
+                    elif op == JFLE:
+                        if not regs[a] <= regs[b]:
+                            pc = c
+                            if steps > limit:
+                                raise StepLimitExceeded(over)
+                    elif op == JFGT:
+                        if not regs[a] > regs[b]:
+                            pc = c
+                            if steps > limit:
+                                raise StepLimitExceeded(over)
+                    elif op == JFGE:
+                        if not regs[a] >= regs[b]:
+                            pc = c
+                            if steps > limit:
+                                raise StepLimitExceeded(over)
+                    elif op == JFEQ:
+                        if not eq(regs[a], regs[b]):
+                            pc = c
+                            if steps > limit:
+                                raise StepLimitExceeded(over)
+                    elif op == JFNE:
+                        if eq(regs[a], regs[b]):
+                            pc = c
+                            if steps > limit:
+                                raise StepLimitExceeded(over)
+                    elif op == JF:
+                        x = regs[a]
+                        if x is None or x == 0:
+                            pc = c
+                            if steps > limit:
+                                raise StepLimitExceeded(over)
+                    elif op == JT:
+                        x = regs[a]
+                        if not (x is None or x == 0):
+                            pc = c
+                            if steps > limit:
+                                raise StepLimitExceeded(over)
+                    elif op == INDEX:
+                        x = regs[a]
+                        i = regs[b]
+                        if x.__class__ is not list or i.__class__ is not int or not 0 <= i < len(x):
+                            raise _index_error(x, i)
+                        regs[c] = x[i]
+                    elif op == STORE:
+                        x = regs[a]
+                        i = regs[b]
+                        if x.__class__ is not list or i.__class__ is not int or not 0 <= i < len(x):
+                            raise _index_error(x, i)
+                        x[i] = regs[c]
+                    elif op == LT:
+                        regs[c] = 1 if regs[a] < regs[b] else 0
+                    elif op == LE:
+                        regs[c] = 1 if regs[a] <= regs[b] else 0
+                    elif op == GT:
+                        regs[c] = 1 if regs[a] > regs[b] else 0
+                    elif op == GE:
+                        regs[c] = 1 if regs[a] >= regs[b] else 0
+                    elif op == EQ:
+                        regs[c] = eq(regs[a], regs[b])
+                    elif op == NE:
+                        regs[c] = 1 - eq(regs[a], regs[b])
+                    elif op == GETG:
+                        regs[c] = globals_[a]
+                    elif op == SETG:
+                        globals_[c] = regs[a]
+                    elif op == PARAM:
+                        stack.append(regs[a])
+                    elif op == CALL or op == CALLVT or op == CALLM or op == CALLV or op == CALLTHIS:
+                        this = None
+                        if op == CALL:
+                            f = functions[a]
+                        elif op == CALLVT:
+                            # el receptor es el primer argumento: se saca de la pila
+                            this = stack[-b] if b else None
+                            if this.__class__ is not Instance:
+                                raise VMError(f"no se puede llamar un método de {text(this)}")
+                            f = classes[this.cls].vtable[a]
+                            del stack[-b]
+                            b -= 1
+                        elif op == CALLM:
+                            f = functions[a]
+                            this = regs[c]
+                        elif op == CALLV:
+                            m = regs[a]
+                            if m.__class__ is not Method:
+                                raise VMError(f"{text(m)} no se puede llamar")
+                            f = m.label
+                            this = m.this
+                        else:
+                            name, f = callsites[a]
+                            obj = regs[func.this_slot]
+                            method = classes[obj.cls].methods.get(name) if obj.__class__ is Instance else None
+                            if method is not None:
+                                f, this = method, obj
+                            elif f is None:
+                                raise VMError(f"'{name}' no está definida")
+                        if len(frames) >= max_depth:
+                            raise VMError("desbordamiento de pila")
+                        new = f.proto[:]
+                        if b:
+                            args = stack[-b:]
+                            del stack[-b:]
+                            for slot, v in zip(f.params, args):
+                                new[slot] = v
+                        if f.this_slot is not None:
+                            new[f.this_slot] = this
+                        frames.append((regs, func, pc, c, len(stack)))
+                        regs = new
+                        func = f
+                        pc = f.entry
+                        if steps > limit:
+                            raise StepLimitExceeded(over)
+                    elif op == RET:
+                        x = regs[a]
+                        regs, func, pc, c, _ = frames.pop()
+                        regs[c] = x
+                    elif op == GETPROP:
+                        obj = regs[a]
+                        if obj.__class__ is not Instance:
+                            raise VMError(f"no se puede leer '{names[b]}' de {text(obj)}")
+                        name = names[b]
+                        fields = obj.fields
+                        if name in fields:
+                            regs[c] = fields[name]
+                        else:
+                            method = classes[obj.cls].methods.get(name)
+                            regs[c] = Method(obj, method) if method is not None else None
+                    elif op == SETPROP:
+                        obj = regs[a]
+                        if obj.__class__ is not Instance:
+                            raise VMError(f"no se puede asignar '{names[c]}' en {text(obj)}")
+                        obj.fields[names[c]] = regs[b]
+                    elif op == LEN:
+                        x = regs[a]
+                        if x.__class__ is not list and x.__class__ is not str:
+                            raise VMError(f"{text(x)} no tiene longitud")
+                        regs[c] = len(x)
+                    elif op == DIV:
+                        y = regs[b]
+                        if y == 0:
+                            raise VMError("división entre cero")
+                        regs[c] = regs[a] / y
+                    elif op == MOD:
+                        regs[c] = mod(regs[a], regs[b])
+                    elif op == NOT:
+                        x = regs[a]
+                        regs[c] = 1 if x is None or x == 0 else 0
+                    elif op == RETN:
+                        regs, func, pc, c, _ = frames.pop()
+                        regs[c] = None
+                    elif op == PRINT:
+                        line = text(regs[a])
+                        output.append(line)
+                        if stdout is not None:
+                            stdout(line)
+                    elif op == NEWARR:
+                        n = regs[a]
+                        if n.__class__ is not int or n < 0:
+                            raise VMError(f"tamaño de arreglo inválido: {text(n)}")
+                        regs[c] = [None] * n
+                    elif op == NEWOBJ:
+                        regs[c] = Instance(names[a])
+                    elif op == GETO:
+                        regs[c] = _active(frames, a)[b]
+                    elif op == SETO:
+                        _active(frames, b)[c] = regs[a]
+                    elif op == MKMETHOD:
+                        regs[c] = Method(regs[a], functions[b])
+                    elif op == POPARGS:
+                        del stack[-a:]
+                    elif op == ENDINIT:
+                        obj = regs[func.this_slot]
+                        for name, slot in func.fields:
+                            obj.fields[name] = regs[slot]
+                        regs, func, pc, c, _ = frames.pop()
+                        regs[c] = obj
+                    elif op == HALT:
+                        break
+                break
+            except StepLimitExceeded as e:
+                self.error = str(e)
+                break
+            except (VMError, TypeError, RecursionError) as e:
+                at = pc - 1
+                if isinstance(e, TypeError):
+                    _, a, b, _ = code[at]
+                    message = f"operandos inválidos: {text(regs[a])} y {text(regs[b])}"
+                elif isinstance(e, RecursionError):
+                    message = "recursión demasiado profunda"
+                else:
+                    message = str(e)
+                # Busca el catch: en este frame y después en cada llamada pendiente
+                while at not in handlers and frames:
+                    regs, func, ret, _, height = frames.pop()
+                    del stack[height:]
+                    at = ret - 1
+                if at not in handlers:
+                    self.error = message
+                    break
+                pc, slot = handlers[at]
+                regs[slot] = message
+
+        self.steps = steps
+        self.elapsed = time.perf_counter() - start
+        return self
+
+
+def _index_error(arr, i):
+    if not isinstance(arr, list):
+        return VMError(f"{text(arr)} no es un arreglo")
+    return VMError(f"índice fuera de rango: {text(i)}")
+
+
+def _active(frames, index):
+    # Registros de la llamada más reciente de la función `index` (una que encierra a la actual)
+    for regs, func, *_ in reversed(frames):
+        if func.index == index:
+            return regs
+    raise VMError("la función que encierra a esta no está activa")
@@ -0,0 +1,247 @@
+from src.utils.Temp import Temp
+from src.utils.Scope import extend_vtable
+
+MAIN = "<main>"  # el código top-level es un procedimiento más
+
+# Ops cuyo result es un nombre que se asigna
+WRITES = {"+", "-", "*", "/", "%", "<", "<=", ">", ">=", "==", "!=",
+          "=", "not", "[]", "getprop", "call", "callvirt", "new", "newarr", "len"}
+
+
+# Así se llama el procedimiento de un inicializador de clase (lo que hay entre class y endclass)
+def class_proc(name):
+    return f"class {name}"
+
+
+class ClassInfo:
+    __slots__ = ("name", "base", "start", "methods", "has_init")
+
+    def __init__(self, name, base, start):
+        self.name = name
+        self.base = base
+        self.start = start      # índice del cuádruplo `class`
+        self.methods = {}       # nombre -> etiqueta func_C_m
+        self.has_init = False   # hay inicializadores de campos entre class y endclass
+
+
+class ProcInfo:
+    __slots__ = ("label", "name", "parent", "cls", "temps", "params", "written", "indices")
+
+    def __init__(self, label, name, parent, cls=None):
+        self.label = label
+        self.name = name
+        self.parent = parent    # procedimiento que lo encierra (para los nombres de afuera)
+        self.cls = cls          # ClassInfo si es un método
+        self.temps = 0          # tamaño del arreglo de temporales
+        self.params = []        # en el orden de las cabeceras `param`
+        self.written = set()    # nombres (no temporales) que asigna
+        self.indices = []       # sus cuádruplos, sin los de los procedimientos anidados
+
+
+class ProgramLayout:
+    """
+    Lo que necesita cualquier forma de ejecutar el TAC, en una pasada: a qué
+    procedimiento pertenece cada cuádruplo (top-level, funciones anidadas
+    incluidas, y los inicializadores de campos de cada clase), las clases con sus
+    métodos, las etiquetas y qué catch atiende cada cuádruplo (un catch no cruza
+    funciones). Lo usan la VirtualMachine y el lowering a bytecode.
+    """
+
+    def __init__(self, quads):
+        self.rows = [tuple(row) for row in quads.rows()]
+        self.labels = {}      # etiqueta -> índice
+        self.skip = {}        # índice de un `label func_*` o `class` -> dónde sigue el flujo normal
+        self.procs = {MAIN: ProcInfo(MAIN, MAIN, None)}
+        self.functions = {}   # nombre -> [etiquetas] (puede haber anidadas con el mismo nombre)
+        self.classes = {}
+        self.handlers = []    # etiqueta del catch que atiende cada cuádruplo
+        self._vtables = {}
+
+        procs = [(MAIN, None)]  # (procedimiento, índice donde empieza)
+        classes = []
+        tries = [[]]            # un stack de try por procedimiento
+
+        for i, (_, op, a1, a2, r) in enumerate(self.rows):
+            proc = self.procs[procs[-1][0]]
+
+            if op == "label" and r.startswith("func_"):
+                cls = classes[-1] if classes and procs[-1][0] == class_proc(classes[-1].name) else None
+                if cls is not None and r.startswith(f"func_{cls.name}_"):
+                    name = r[len(f"func_{cls.name}_"):]
+                    cls.methods[name] = r
+                    parent = procs[-2][0]
+                else:
+                    cls, name, parent = None, r[len("func_"):], proc.label
+                    self.functions.setdefault(name, []).append(r)
+                proc = self.procs[r] = ProcInfo(r, name, parent, cls)
+                proc.indices.append(i)
+                procs.append((r, i))
+                tries.append([])
+                self.handlers.append(None)
+                self.labels.setdefault(r, i)
+                continue
+            if op == "endfunc" and len(procs) > 1:
+                proc.indices.append(i)
+                self.skip[procs.pop()[1]] = i + 1
+                tries.pop()
+                self.handlers.append(None)
+                continue
+            if op == "class":
+                cls = self.classes[r] = ClassInfo(r, a1, i)
+                proc = self.procs[class_proc(r)] = ProcInfo(class_proc(r), r, proc.label)
+                proc.indices.append(i)
+                classes.append(cls)
+                procs.append((class_proc(r), i))
+                tries.append([])
+                self.handlers.append(None)
+                continue
+            if op == "endclass" and classes:
+                proc.indices.append(i)
+                classes.pop()
+                self.skip[procs.pop()[1]] = i + 1
+                tries.pop()
+                self.handlers.append(None)
+                continue
+
+            proc.indices.append(i)
+            self.handlers.append(tries[-1][-1] if tries[-1] else None)
+            if op == "label":
+                self.labels.setdefault(r, i)
+            elif op == "trybegin":
+                tries[-1].append(r)
+            elif op == "tryend" and tries[-1]:
+                tries[-1].pop()
+            elif op == "param" and a1 is None:
+                proc.params.append(r)
+            if op not in ("inherit", "label") and classes and proc.label == class_proc(classes[-1].name):
+                classes[-1].has_init = True
+            for x in (a1, a2, r):
+                if isinstance(x, Temp):
+                    proc.temps = max(proc.temps, x.id + 1)
+            if r is not None and op in WRITES and not isinstance(r, Temp):
+                proc.written.add(r)
+
+    def guess_locals(self):
+        """
+        Sin tabla de símbolos: local es lo que una función recibe o asigna y no asigna
+        ningún procedimiento que la encierra; en el top-level y en las clases, todo.
+        """
+        out = {}
+        for label, proc in self.procs.items():
+            outer = set()
+            parent = proc.parent
+            while parent is not None:
+                outer |= self.procs[parent].written
+                parent = self.procs[parent].parent
+            if label == MAIN or label.startswith("class "):
+                out[label] = set(proc.written)
+            else:
+                out[label] = set(proc.params) | (proc.written - outer)
+        return out
+
+    def method(self, cls, name):
+        """Etiqueta del método `name` de la clase `cls` o de la más cercana de sus bases; None si no hay."""
+        while cls is not None:
+            info = self.classes.get(cls)
+            if info is None:
+                return None
+            label = info.methods.get(name)
+            if label is not None:
+                return label
+            cls = info.base
+        return None
+
+    def vtable(self, cls):
+        """
+        Etiquetas de los métodos de `cls` por slot, con la misma regla que
+        ClassSymbol.vtable (los métodos en el orden de sus `label func_C_m`): el
+        slot que el CodeGenerator puso en un `callvirt` indexa esta lista.
+        """
+        return [label for _, label in self._vtable(cls)]
+
+    def _vtable(self, cls):
+        table = self._vtables.get(cls)
+        if table is None:
+            info = self.classes.get(cls)
+            if info is None:
+                return []
+            self._vtables[cls] = []  # una herencia circular no se sigue
+            table = self._vtables[cls] = extend_vtable(self._vtable(info.base), info.methods)
+        return table
+
+    def function(self, name, proc):
+        """La función `name` más cercana léxicamente al procedimiento `proc`."""
+        labels = self.functions.get(name)
+        if not labels:
+            return None
+        while proc is not None:
+            for label in labels:
+                if self.procs[label].parent == proc:
+                    return label
+            proc = self.procs[proc].parent
+        return labels[0]
+
+    def init_chain(self, cls):
+        """Clases de la cadena de `cls` con inicializadores de campos, de la base a la derivada."""
+        chain = []
+        while cls is not None and cls in self.classes:
+            if self.classes[cls].has_init:
+                chain.append(cls)
+            cls = self.classes[cls].base
+        return chain[::-1]
+
+
+def local_names(symbols):
+    """
+    Nombres declarados en cada procedimiento según la tabla de símbolos: {MAIN: globales,
+    "func_f": parámetros y locales de f, "class C": campos de C}. Con esto se sabe si
+    `x = ...` dentro de una función asigna una local o una variable de afuera.
+    """
+    out = {}
+    scopes = {symbols.globalScope, *symbols.scopes.values()}
+    for scope in scopes:
+        names = {n for n, sym in scope.symbols.items() if getattr(sym, "kind", None) in ("var", "const")}
+        out.setdefault(procedure_of(scope), set()).update(names)
+    return out
+
+
+def local_types(symbols):
+    """
+    Como local_names pero con el tipo declarado: {procedimiento: {nombre: tipo}}. Si
+    dos bloques del mismo procedimiento declaran el nombre con tipos distintos, None.
+    """
+    out = {}
+    scopes = {symbols.globalScope, *symbols.scopes.values()}
+    for scope in scopes:
+        types = out.setdefault(procedure_of(scope), {})
+        for name, sym in scope.symbols.items():
+            if getattr(sym, "kind", None) not in ("var", "const"):
+                continue
+            types[name] = sym.ty if types.get(name, sym.ty) == sym.ty else None
+    return out
+
+
+def return_types(symbols):
+    """Tipo que devuelve cada función o método: {"func_f": tipo}."""
+    out = {}
+    for scope in symbols.scopes.values():
+        if scope.name.startswith("func ") and scope.parent is not None:
+            sym = scope.parent.symbols.get(scope.name[len("func "):])
+            if getattr(sym, "kind", None) == "func":
+                out[procedure_of(scope)] = sym.ty
+    return out
+
+
+def procedure_of(scope):
+    """Procedimiento al que pertenece un scope: "func_f", "func_C_m", "class C" o MAIN."""
+    while scope is not None:
+        if scope.name.startswith("func "):
+            fname = scope.name[len("func "):]
+            parent = scope.parent
+            if parent is not None and parent.name.startswith("class "):
+                return f"func_{parent.name[len('class '):]}_{fname}"
+            return f"func_{fname}"
+        if scope.name.startswith("class "):
+            return class_proc(scope.name[len("class "):])
+        scope = scope.parent
+    return MAIN
@@ -0,0 +1,1188 @@
+import re
+
+from src.optimizer.Tac import BINARY, literal, uses, defined
+from src.optimizer.ControlFlowGraph import build_procedure_cfg
+from src.optimizer.Liveness import Liveness
+from src.utils.Temp import Temp
+from src.utils.Types import Type, ArrayType
+from src.vm.Layout import MAIN, ProgramLayout, class_proc
+from src.vm.VirtualMachine import VMError, StepLimitExceeded
+from src.vm.PythonMachine import RUNTIME, replay
+
+FILENAME = "<compiscript>"
+
+# Qué se sabe de un valor al traducir: número (o null, en una variable declarada
+# numérica sin asignar), string que no es null, arreglo (o null) o cualquier cosa
+_BOTTOM, NUM, STR, ARR, ANY = range(5)
+
+_COMPARE = {"<", "<=", ">", ">="}
+# Ops que no generan nada: los saltos, returns y endfunc los arma la estructura
+_SKIP = {"label", "trybegin", "tryend", "class", "endclass", "inherit", "goto",
+         "ifFalse", "ifTrue", "return", "endfunc"}
+# Cuántos ciclos/try anidados se arman como Python estructurado (el compilador
+# de CPython no acepta más de 20) y hasta qué indentación
+_MAX_NESTING = 18
+_MAX_INDENT = 80
+
+
+class PythonProgram:
+    """
+    El programa traducido: el código fuente generado, la función `entry(output,
+    stdout, limit, stats)` que lo corre y, para cada línea del fuente, los
+    cuádruplos que le corresponden (con eso `message` arma el mismo mensaje de
+    error que la VirtualMachine).
+    """
+
+    def __init__(self, source, lines, rows, names):
+        self.source = source
+        self.lines = lines   # número de línea -> índices de cuádruplos
+        self.rows = rows
+        self.names = names   # nombre de la función generada -> (etiqueta, tiene this)
+        namespace = dict(RUNTIME)
+        namespace["_message"] = self.message
+        exec(compile(source, FILENAME, "exec"), namespace)
+        self.entry = namespace["_program"]
+
+    def listing(self):
+        return self.source.splitlines()
+
+    def message(self, e):
+        """Mensaje de la VirtualMachine para una excepción que salió del código generado."""
+        if isinstance(e, StepLimitExceeded):
+            raise e
+        if isinstance(e, VMError):
+            return str(e)
+        if isinstance(e, RecursionError):
+            return "desbordamiento de pila"
+        if isinstance(e, ZeroDivisionError):
+            return "división entre cero"
+        if isinstance(e, NameError):
+            m = re.search(r"'v_(\w+)'", str(e))
+            if m:
+                return f"'{m.group(1)}' no está definida"
+        tb, last = e.__traceback__, None
+        while tb is not None:
+            if tb.tb_frame.f_code.co_filename == FILENAME:
+                last = tb
+            tb = tb.tb_next
+        if last is not None:
+            frame = last.tb_frame
+            label, has_this = self.names.get(frame.f_code.co_name, (MAIN, False))
+            env = frame.f_locals
+            try:
+                replay(self.rows, self.lines.get(last.tb_lineno, ()), lambda x: _operand(env, x, has_this))
+            except VMError as inner:
+                return str(inner)
+        return str(e)
+
+
+def _operand(env, x, has_this):
+    if isinstance(x, Temp):
+        return env.get(f"t{x.id}")
+    if x == "null":
+        return None
+    v = literal(x)
+    if v is not None:
+        return v[1:-1] if isinstance(v, str) else v
+    if x == "this":
+        return env.get("this") if has_this else None
+    return env.get(f"v_{x}")
+
+
+def compile_python(quads, local_names=None, local_types=None):
+    """
+    Traduce el TAC a una sola función de Python, `_program`, cuyo cuerpo es el
+    top-level y que adentro define una función por procedimiento (las anidadas
+    dentro de la que las encierra, así una local de afuera es una variable de la
+    clausura con `nonlocal`). El flujo de cada procedimiento se reconstruye a
+    partir de su CFG, a la "Beyond Relooper" (Ramsey): cada bloque que no es de
+    unión se escribe dentro del if que lo alcanza, un ciclo natural es un
+    `while True` y los bloques de unión (varios predecesores, salidas de ciclo y
+    los catch de más de un bloque) van después de un bloque del que se sale con
+    `break`; el catch de un solo bloque va en su `except`. Un CFG irreducible o
+    demasiado anidado queda como un despachador de bloques.
+
+    Con los tipos declarados (`local_types`, ver Layout.local_types) y lo que se
+    infiere de los temporales, +, -, * y las comparaciones entre números, los
+    índices de arreglos y los campos se escriben con los operadores de Python; lo
+    demás pasa por las mismas funciones que usa la VirtualMachine. Los errores de
+    Python (TypeError, AttributeError...) se traducen al mensaje de la máquina
+    volviendo a ejecutar con su semántica los cuádruplos de la línea que falló.
+    """
+    return _Translator(quads, local_names, local_types).program
+
+
+class _Translator:
+    def __init__(self, quads, local_names, local_types):
+        layout = self.layout = ProgramLayout(quads)
+        self.quads = quads
+        self.rows = layout.rows
+        self.locals = local_names if local_names is not None else layout.guess_locals()
+        self.types = local_types or {}
+
+        # Nombres de Python de cada procedimiento y los de cada clase
+        self.pyname = {}
+        self.info = {}  # nombre de Python -> (etiqueta, tiene this)
+        for k, (label, proc) in enumerate(layout.procs.items()):
+            if label == MAIN:
+                name = "_program"
+            elif label.startswith("class "):
+                name = f"init{k}_{proc.name}"
+            else:
+                name = f"f{k}_{label[len('func_'):]}"
+            self.pyname[label] = name
+            self.info[name] = (label, self._has_this(label))
+        self.method_labels = {}  # nombre -> etiquetas de todos los métodos que se llaman así
+        for cls in layout.classes.values():
+            for m, label in cls.methods.items():
+                self.method_labels.setdefault(m, []).append(label)
+        self.vtables = {cls: layout.vtable(cls) for cls in layout.classes}
+        self.fields = set()
+        for label, proc in layout.procs.items():
+            if label.startswith("class "):
+                self.fields |= proc.written
+        for _, op, a1, a2, r in self.rows:
+            if op == "setprop":
+                self.fields.add(r)
+
+        self.children = {label: [] for label in layout.procs}
+        for label in layout.procs:
+            if label != MAIN:
+                self.children[self.parent(label)].append(label)
+        self.captured = {label: set() for label in layout.procs}  # locales que usan los anidados
+        self.globals_written = set()
+
+        procs = {label: _Procedure(self, label) for label in layout.procs}
+        for p in procs.values():
+            p.resolve()
+        for p in procs.values():
+            p.translate()
+
+        self.lines = []
+        self.map = {}
+        self._emit_proc(procs, MAIN, 0)
+        source = "\n".join(self.lines) + "\n"
+        self.program = PythonProgram(source, self.map, self.rows, self.info)
+
+    # Alcances
+    def _has_this(self, label):
+        return self.layout.procs[label].cls is not None or label.startswith("class ")
+
+    def parent(self, label):
+        # Los métodos y los inicializadores se definen en _program aunque la clase esté anidada
+        if self._has_this(label):
+            return MAIN
+        return self.layout.procs[label].parent
+
+    def own_locals(self, label):
+        proc = self.layout.procs[label]
+        names = set(self.locals.get(label, ())) | set(proc.params) | {"exception"}
+        if label == MAIN:
+            names |= proc.written
+        return names
+
+    def home(self, label, name):
+        """Procedimiento donde vive el nombre visto desde `label` (MAIN para las globales)."""
+        if label == MAIN or name in self.own_locals(label):
+            return label
+        parent = self.parent(label)
+        while parent is not None and parent != MAIN:
+            if name in self.locals.get(parent, ()) or name in self.layout.procs[parent].params:
+                return parent
+            parent = self.parent(parent)
+        return MAIN
+
+    def kind_of_name(self, label, name):
+        if name == "exception":
+            return ANY
+        ty = self.types.get(self.home(label, name), {}).get(name)
+        if ty in (Type.INT, Type.FLOAT, Type.BOOL):
+            return NUM
+        if isinstance(ty, ArrayType):
+            return ARR
+        return ANY
+
+    def visible(self, label, target):
+        """¿Se ve la función generada de `target` desde el código de `label`?"""
+        parent = self.parent(target)
+        while label is not None:
+            if label == parent:
+                return True
+            label = self.parent(label) if label != MAIN else None
+        return False
+
+    # Salida
+    def _emit_proc(self, procs, label, indent):
+        p = procs[label]
+        pad = "    " * indent
+        if label == MAIN:
+            head = [f"def _program(_output, _stdout, _limit, _stats):",
+                    "    _steps = 0",
+                    "    _emit = _output.append if _stdout is None else _printer(_output, _stdout)"]
+        else:
+            head = [f"def {p.pyname}({p.signature()}):"]
+            declared = sorted(p.nonlocal_names)
+            if declared:
+                head.append("    nonlocal " + ", ".join(declared))
+        for line in head:
+            self._line(pad + line, ())
+        for child in self.children[label]:
+            self._emit_proc(procs, child, indent + 1)
+        for text in p.prologue():
+            self._line(pad + "    " + text, ())
+        if label == MAIN:
+            self._tables(pad + "    ")
+            self._line(pad + "    try:", ())
+            body_pad = pad + "        "
+        else:
+            body_pad = pad + "    "
+        for depth, text, quads in p.body:
+            self._line(body_pad + "    " * depth + text, quads)
+        if label == MAIN:
+            self._line(pad + "    finally:", ())
+            self._line(pad + "        _stats.append(_steps)", ())
+
+    def _line(self, text, quads):
+        self.lines.append(text)
+        if quads:
+            self.map[len(self.lines)] = tuple(quads)
+
+    def _tables(self, pad):
+        layout = self.layout
+        methods, labels, code = [], [], []
+        for cls in layout.classes:
+            names = self._method_names(cls)
+            resolved = {m: layout.method(cls, m) for m in sorted(names)}
+            methods.append(f"{cls!r}: {{" + ", ".join(f"{m!r}: {self.pyname[l]}" for m, l in resolved.items()) + "}")
+            labels.append(f"{cls!r}: {{" + ", ".join(f"{m!r}: {l!r}" for m, l in resolved.items()) + "}")
+        for cls in layout.classes.values():
+            for label in cls.methods.values():
+                code.append(f"{label!r}: {self.pyname[label]}")
+        vtables = [f"{cls!r}: (" + "".join(f"{self.pyname[l]}, " for l in table) + ")"
+                   for cls, table in self.vtables.items()]
+        self._line(pad + "_methods = {" + ", ".join(methods) + "}", ())
+        self._line(pad + "_vtables = {" + ", ".join(vtables) + "}", ())
+        self._line(pad + "_labels = {" + ", ".join(labels) + "}", ())
+        self._line(pad + "_invoke = _invoker({" + ", ".join(code) + "})", ())
+
+    def _method_names(self, cls):
+        names = set()
+        while cls is not None and cls in self.layout.classes:
+            names |= set(self.layout.classes[cls].methods)
+            cls = self.layout.classes[cls].base
+        return names
+
+
+class _Stop(Exception):
+    """La estructura no entra en Python (muy anidada): el procedimiento va como despachador."""
+
+
+class _Wrap(Exception):
+    def __init__(self, block):
+        self.block = block
+
+
+# Nodos de la estructura de un procedimiento
+class _Code:
+    __slots__ = ("block",)
+
+    def __init__(self, block):
+        self.block = block
+
+
+class _If:
+    __slots__ = ("cond", "quads", "then", "other")
+
+    def __init__(self, cond, quads, then, other):
+        self.cond = cond
+        self.quads = quads
+        self.then = then
+        self.other = other
+
+
+class _Br:
+    __slots__ = ("target",)
+
+    def __init__(self, target):
+        self.target = target
+
+
+class _Return:
+    __slots__ = ("text", "quads")
+
+    def __init__(self, text, quads):
+        self.text = text
+        self.quads = quads
+
+
+class _Block:
+    __slots__ = ("label", "body")
+
+    def __init__(self, label, body):
+        self.label = label
+        self.body = body
+
+
+class _Loop:
+    __slots__ = ("label", "body")
+
+    def __init__(self, label, body):
+        self.label = label
+        self.body = body
+
+
+class _Frame:
+    # Un ciclo de Python abierto mientras se escribe: el de un _Loop o el de un _Block envuelto
+    __slots__ = ("kind", "label", "after", "python", "exits")
+
+    def __init__(self, kind, label, after, python):
+        self.kind = kind      # "loop" o "block"
+        self.label = label
+        self.after = after    # bloques a los que se llega saliendo con break
+        self.python = python  # ¿es un while de Python?
+        self.exits = []       # saltos de varios niveles que pasan por acá (etiquetas)
+
+
+class _Procedure:
+    def __init__(self, tr, label):
+        self.tr = tr
+        self.label = label
+        self.proc = tr.layout.procs[label]
+        self.pyname = tr.pyname[label]
+        self.has_this = tr._has_this(label)
+        self.rows = tr.rows
+        self.cfg = build_procedure_cfg(tr.quads, label, self.proc.indices)
+        self.nonlocal_names = set()
+        self.local_names = set()
+
+    # Nombres
+    def resolve(self):
+        """Dónde vive cada nombre que usa el procedimiento; los que se asignan afuera van con nonlocal."""
+        tr, label = self.tr, self.label
+        for i in self.proc.indices:
+            row = self.rows[i]
+            op = row[1]
+            written = defined(row)
+            names = [x for x in uses(row) if not (op == "call" and x == row[2] and self._callable(x))]
+            if written is not None:
+                names.append(written)
+            for x in names:
+                if isinstance(x, Temp) or x in ("this", "super", "null"):
+                    continue
+                home = tr.home(label, x)
+                if home == label:
+                    self.local_names.add(x)
+                    continue
+                tr.captured[home].add(x)
+                if x == written:
+                    self.nonlocal_names.add(f"v_{x}")
+                    if home == MAIN:
+                        tr.globals_written.add(x)
+
+    def _callable(self, name):
+        return name in self.tr.method_labels or self.tr.layout.function(name, self.label) is not None
+
+    def signature(self):
+        params = [f"v_{p}=None" for p in self.proc.params]
+        if self.has_this:
+            params.insert(0, "this")
+        return ", ".join(params)
+
+    def prologue(self):
+        tr = self.tr
+        if self.label == MAIN:
+            names = set(tr.locals.get(MAIN, ())) | tr.globals_written
+        else:
+            names = (self.live_entry | tr.captured[self.label]) - set(self.proc.params)
+        targets = [f"v_{n}" for n in sorted(names)] + [f"t{t.id}" for t in sorted(self.temps_entry, key=lambda t: t.id)]
+        values = ["None"] * len(targets)
+        if self.uses_go:
+            targets.append("_go")
+            values.append("0")
+        out = []
+        if targets:
+            out.append(", ".join(targets) + " = " + ", ".join(values))
+        if self.label != MAIN:
+            out.append("_steps += 1")
+            out.append("if _steps > _limit: _over(_limit)")
+        return out
+
+    # Traducción
+    def translate(self):
+        cfg = self.cfg
+        self.blocks = cfg.blocks
+        if not cfg.blocks:
+            self.live_entry, self.temps_entry, self.uses_go = set(), set(), False
+            self.body = [(0, "return", ())]
+            if self.label != MAIN:
+                self.nonlocal_names.add("_steps")
+            return
+        self.order = {b: k for k, b in enumerate(cfg.rpo)}
+        self.reachable = set(cfg.rpo)
+        self._exits()
+        self._liveness()
+        self._kinds()
+        self._depths()
+        self.code = {b: self._block_code(b) for b in cfg.rpo}
+        if self.label != MAIN:
+            self.nonlocal_names.add("_steps")
+        self.uses_go = False
+        try:
+            self.body = self._structured()
+        except _Stop:
+            self.uses_go = False
+            self.body = self._dispatch()
+
+    def _exits(self):
+        # Salida normal de cada bloque: ("goto", b), ("if", cond, quads, sí, no), ("return", texto, quads) o ("end",)
+        self.exit = {}
+        last = len(self.blocks) - 1
+        for b in self.cfg.rpo:
+            block = self.blocks[b]
+            i = block.end - 1
+            _, op, a1, a2, r = self.rows[i]
+            nxt = b + 1 if b < last else None
+            if op == "goto":
+                self.exit[b] = ("goto", self.cfg.label_index[r])
+            elif op in ("ifFalse", "ifTrue"):
+                target = self.cfg.label_index[r]
+                yes, no = (nxt, target) if op == "ifFalse" else (target, nxt)
+                self.exit[b] = ("if", a1, i, yes, no)
+            elif op == "return":
+                self.exit[b] = ("return", a1, i)
+            elif op == "endfunc":
+                self.exit[b] = ("return", None, i)
+            elif nxt is not None and op != "endclass":
+                self.exit[b] = ("goto", nxt)
+            else:
+                self.exit[b] = ("end",)
+
+    def _liveness(self):
+        live = Liveness(self.cfg, self.rows)
+        self.live_after = {}
+        for b in self.cfg.rpo:
+            for i, after in live.backwards(self.blocks[b]):
+                self.live_after[i] = set(after)
+        self.temps_entry = set(live.live_in[self.cfg.entry])
+        names = Liveness(self.cfg, self.rows, track=lambda x: x in self.local_names)
+        self.live_entry = set(names.live_in[self.cfg.entry])
+
+    def _kinds(self):
+        # Análisis hacia adelante: qué se sabe de cada temporal al entrar a cada bloque
+        blocks = self.blocks
+        state_in = {self.cfg.entry: {}}
+        handlers_in = {}
+        work = [self.cfg.entry]
+        self.kinds_in = state_in
+        while work:
+            b = work.pop()
+            state = dict(state_in[b])
+            block = blocks[b]
+            if block.handler is not None:
+                handlers_in.setdefault(block.handler, []).append(dict(state))
+            for i in range(block.start, block.end):
+                self._transfer(state, self.rows[i])
+            if block.handler is not None:
+                handlers_in[block.handler].append(dict(state))
+            targets = list(block.succs)
+            for s in targets:
+                incoming = state
+                if s == block.handler and block.handler not in self._normal_succs(b):
+                    incoming = _join_all(handlers_in[s])
+                old = state_in.get(s)
+                new = incoming if old is None else _join(old, incoming)
+                if new != old:
+                    state_in[s] = new
+                    work.append(s)
+
+    def _normal_succs(self, b):
+        e = self.exit.get(b)
+        if e is None:
+            return ()
+        if e[0] == "goto":
+            return (e[1],)
+        if e[0] == "if":
+            return (e[3], e[4])
+        return ()
+
+    def _transfer(self, state, row):
+        _, op, a1, a2, r = row
+        if not isinstance(r, Temp) or op not in _WRITES_RESULT:
+            return
+        state[r] = self._result_kind(state, op, a1, a2)
+
+    def _result_kind(self, state, op, a1, a2):
+        if op in ("<", "<=", ">", ">=", "==", "!=", "not", "len", "-", "/", "%"):
+            return NUM
+        if op == "+":
+            a, b = self._kind(state, a1), self._kind(state, a2)
+            if a == NUM and b == NUM:
+                return NUM
+            if a == STR or b == STR:
+                return STR
+            return ANY
+        if op == "*":
+            return NUM if self._kind(state, a1) == NUM and self._kind(state, a2) == NUM else ANY
+        if op == "=":
+            return self._kind(state, a1)
+        if op == "newarr":
+            return ARR
+        return ANY
+
+    def _kind(self, state, x):
+        if isinstance(x, Temp):
+            k = state.get(x, ANY)
+            return ANY if k == _BOTTOM else k
+        if x is None or x == "null" or x == "this":
+            return ANY
+        v = literal(x)
+        if v is not None:
+            return STR if isinstance(v, str) else NUM
+        return self.tr.kind_of_name(self.label, x)
+
+    def _depths(self):
+        # Argumentos apilados (param) al entrar a cada bloque
+        depth = {self.cfg.entry: 0}
+        tries = {}
+        work = [self.cfg.entry]
+        while work:
+            b = work.pop()
+            d = depth[b]
+            block = self.blocks[b]
+            for i in range(block.start, block.end):
+                _, op, a1, a2, r = self.rows[i]
+                if op == "param" and a1 is not None:
+                    d += 1
+                elif op in _CALLS:
+                    d = max(0, d - _count(a2))
+                elif op == "trybegin":
+                    tries[self.cfg.label_index.get(r)] = d
+            for s in self._normal_succs(b):
+                if s is not None and s not in depth:
+                    depth[s] = d
+                    work.append(s)
+            for h, hd in tries.items():
+                if h is not None and h not in depth:
+                    depth[h] = hd
+                    work.append(h)
+        self.depth = depth
+
+    # Código de un bloque
+    def _block_code(self, b):
+        block = self.blocks[b]
+        kinds = dict(self.kinds_in.get(b, {}))
+        self.state = kinds
+        self.out = []
+        self.stack = [[f"_s{k}", None, True, ()] for k in range(self.depth.get(b, 0))]
+        self.fused_calls = {}
+        end = block.end - 1
+        fused = None
+        cond = None
+        _, last_op, last_a1, _, _ = self.rows[end]
+        # Una comparación que solo usa el ifFalse/ifTrue siguiente va en el if (fuera de un try:
+        # ahí el error de la comparación tiene que quedar dentro)
+        if last_op in ("ifFalse", "ifTrue") and isinstance(last_a1, Temp) and end > block.start \
+                and block.handler is None:
+            _, op, a1, a2, r = self.rows[end - 1]
+            if (op in _COMPARE or op in ("==", "!=")) and r == last_a1 and last_a1 not in self.live_after[end]:
+                fused = end - 1
+        for i in range(block.start, block.end):
+            row = self.rows[i]
+            op = row[1]
+            if i == fused:
+                cond = (self._compare(op, row[2], row[3]), (i, end))
+                continue
+            if op in _SKIP or (op == "param" and row[2] is None):
+                continue
+            self._clobber(i, row)
+            self._quad(i, row, block)
+            self._transfer(kinds, row)
+        e = self.exit[b]
+        if e[0] != "return":
+            self._flush()
+        if e[0] == "if" and cond is None:
+            cond = (self._truth(e[1]), (e[2],))
+        lines = self.out
+        self.out = None
+        return lines, cond
+
+    def _line(self, text, i, depth=0):
+        self.out.append((depth, text, (i,) if isinstance(i, int) else tuple(i)))
+
+    def _val(self, x):
+        if isinstance(x, Temp):
+            return f"t{x.id}"
+        if x is None or x == "null":
+            return "None"
+        v = literal(x)
+        if v is not None:
+            return repr(v[1:-1]) if isinstance(v, str) else repr(v)
+        if x == "this":
+            return "this" if self.has_this else "None"
+        return f"v_{x}"
+
+    def _dst(self, x):
+        return f"t{x.id}" if isinstance(x, Temp) else f"v_{x}"
+
+    def _k(self, x):
+        return self._kind(self.state, x)
+
+    def _truth(self, x):
+        v = literal(x) if not isinstance(x, Temp) else None
+        if v is not None and not isinstance(v, str):
+            return "True" if v != 0 else "False"
+        if x == "null":
+            return "False"
+        if self._k(x) == NUM:
+            return self._val(x)
+        s = self._val(x)
+        return f"{s} is not None and {s} != 0"
+
+    def _compare(self, op, a1, a2):
+        a, b = self._val(a1), self._val(a2)
+        if op in _COMPARE:
+            return f"{a} {op} {b}"
+        if a1 == "null" or a2 == "null":
+            other = b if a1 == "null" else a
+            return f"{other} is None" if op == "==" else f"{other} is not None"
+        if self._primitive(a1, a2):
+            return f"{a} {op} {b}"
+        return f"_same({a}, {b})" if op == "==" else f"not _same({a}, {b})"
+
+    def _primitive(self, a1, a2):
+        ka, kb = self._k(a1), self._k(a2)
+        if ka in (NUM, STR) and kb in (NUM, STR):
+            return True
+        return any(not isinstance(x, Temp) and x != "null" and literal(x) is not None for x in (a1, a2))
+
+    # Pila de argumentos: un param se deja pendiente y se escribe en la llamada,
+    # salvo que antes se pise lo que apiló (entonces va a una variable _s)
+    def _clobber(self, i, row):
+        _, op, a1, a2, r = row
+        written = r if op in _WRITES_RESULT else None
+        calls = op in _CALLS
+        # Los argumentos que consume la llamada ya se leyeron cuando escribe su resultado
+        alive = len(self.stack) - min(_count(a2), len(self.stack)) if calls else len(self.stack)
+        for k, entry in enumerate(self.stack[:alive]):
+            text, x, done, quads = entry
+            if done or x is None:
+                continue
+            if x == written or (calls and _is_name(x) and not isinstance(x, Temp) and x != "this"):
+                self._line(f"_s{k} = {text}", quads)
+                entry[0], entry[2] = f"_s{k}", True
+
+    def _flush(self):
+        for k, entry in enumerate(self.stack):
+            text, x, done, quads = entry
+            if not done:
+                self._line(f"_s{k} = {text}", quads)
+                entry[0], entry[2] = f"_s{k}", True
+
+    def _args(self, n):
+        n = min(n, len(self.stack))
+        taken = self.stack[len(self.stack) - n:] if n else []
+        del self.stack[len(self.stack) - n:]
+        return [e[0] for e in taken], [q for e in taken for q in e[3] if not e[2]]
+
+    def _quad(self, i, row, block):
+        _, op, a1, a2, r = row
+        if op in BINARY:
+            self._binary(i, op, a1, a2, r)
+        elif op == "=":
+            self._line(f"{self._dst(r)} = {self._val(a1)}", i)
+        elif op == "not":
+            x = self._val(a1)
+            if self._k(a1) == NUM:
+                self._line(f"{self._dst(r)} = 0 if {x} else 1", i)
+            else:
+                self._line(f"{self._dst(r)} = 1 if {x} is None or {x} == 0 else 0", i)
+        elif op == "param":
+            self.stack.append([self._val(a1), a1, False, (i,)])
+        elif op == "print":
+            self._line(f"_emit(_text({self._val(a1)}))", i)
+        elif op == "[]":
+            a, x = self._val(a1), self._val(a2)
+            check = self._in_range(a1, a2)
+            self._line(f"{self._dst(r)} = {a}[{x}] if {check} else _bad_index({a}, {x})", i)
+        elif op == "[]=":
+            a, x = self._val(a1), self._val(a2)
+            self._line(f"if {self._in_range(a1, a2)}: {a}[{x}] = {self._val(r)}", i)
+            self._line(f"else: _bad_index({a}, {x})", i)
+        elif op == "len":
+            self._line(f"{self._dst(r)} = len({self._val(a1)})", i)
+        elif op == "newarr":
+            n = literal(a2) if not isinstance(a2, Temp) else None
+            if isinstance(n, int) and n >= 0:
+                self._line(f"{self._dst(r)} = [None] * {n}", i)
+            else:
+                self._line(f"{self._dst(r)} = _newarr({self._val(a2)})", i)
+        elif op == "getprop":
+            self._getprop(i, a1, a2, r, block)
+        elif op == "setprop":
+            self._line(f"{self._val(a1)}.fields[{r!r}] = {self._val(a2)}", i)
+        elif op == "call":
+            self._call(i, a1, _count(a2), r)
+        elif op == "callvirt":
+            self._callvirt(i, literal(a1), _count(a2), r)
+        elif op == "new":
+            self._new(i, a1, _count(a2), r)
+
+    def _in_range(self, a1, a2):
+        a, x = self._val(a1), self._val(a2)
+        v = literal(a2) if not isinstance(a2, Temp) else None
+        bound = f"{v} < len({a})" if isinstance(v, int) and v >= 0 else f"-1 < {x} < len({a})"
+        return bound if self._k(a1) == ARR else f"{a}.__class__ is _list and {bound}"
+
+    def _binary(self, i, op, a1, a2, r):
+        d, a, b = self._dst(r), self._val(a1), self._val(a2)
+        ka, kb = self._k(a1), self._k(a2)
+        if op in ("+", "-", "*"):
+            if ka == NUM and kb == NUM:
+                self._line(f"{d} = {a} {op} {b}", i)
+                self._line(f"if not -2147483648 <= {d} <= 2147483647: {d} = _wrap({d})", i)
+            elif op == "+" and ka == STR and kb == STR:
+                self._line(f"{d} = {a} + {b}", i)
+            elif op == "+":
+                self._line(f"{d} = _add({a}, {b})", i)
+            else:
+                self._line(f"{d} = _wrap({a} {op} {b})", i)
+        elif op == "/":
+            self._line(f"{d} = {a} / {b}", i)
+        elif op == "%":
+            self._line(f"{d} = _mod({a}, {b})", i)
+        else:
+            self._line(f"{d} = 1 if {self._compare(op, a1, a2)} else 0", i)
+
+    # Objetos y llamadas
+    def _getprop(self, i, obj, prop, r, block):
+        tr = self.tr
+        call = self._method_call(i, r, block)
+        if obj == "super" and self.has_this:
+            base = self.proc.cls.base if self.proc.cls is not None else None
+            label = tr.layout.method(base, prop)
+            if label is not None:
+                if call is not None and self._arity_ok([label], call[1]):
+                    self.fused_calls[call[0]] = (tr.pyname[label], "this")
+                else:
+                    self._line(f"{self._dst(r)} = _Method(this, {label!r})", i)
+                return
+            obj = "this"
+        o = self._val(obj)
+        if call is not None and prop not in tr.fields and self._arity_ok(tr.method_labels.get(prop, ()), call[1]):
+            receiver = o
+            if not self._stable(obj, i, call[0]):
+                receiver = f"_r{i}"
+                self._line(f"{receiver} = {o}", i)
+            self._line(f"{self._dst(r)} = _methods[{receiver}.cls].get({prop!r})", i)
+            self.fused_calls[call[0]] = (self._dst(r), receiver)
+        elif prop not in tr.method_labels:
+            self._line(f"{self._dst(r)} = {o}.fields.get({prop!r})", i)
+        else:
+            self._line(f"{self._dst(r)} = _getprop({o}, {prop!r}, _labels)", i)
+
+    def _method_call(self, i, t, block):
+        # (índice, argumentos) del call que consume el temporal de un getprop, si es el único uso
+        if not isinstance(t, Temp):
+            return None
+        for j in range(i + 1, block.end):
+            _, op, a1, a2, r = self.rows[j]
+            if op == "call" and a1 == t:
+                if r != t and t in self.live_after[j]:
+                    return None
+                return j, _count(a2)
+            if t in (a1, a2) or (op == "[]=" and r == t) or (op in _WRITES_RESULT and r == t):
+                return None
+        return None
+
+    def _stable(self, x, i, j):
+        # ¿El operando vale lo mismo en el call (j) que en el getprop (i)?
+        if x == "this" or literal(x) is not None:
+            return True
+        if x == self.rows[i][4]:
+            return False  # el getprop pisa su propio objeto
+        for k in range(i + 1, j):
+            _, op, a1, a2, r = self.rows[k]
+            if op in _WRITES_RESULT and r == x:
+                return False
+            if op in _CALLS and not isinstance(x, Temp):
+                return False
+        return True
+
+    def _arity_ok(self, labels, n):
+        return all(len(self.tr.layout.procs[l].params) >= n for l in labels)
+
+    def _call(self, i, target, n, r):
+        tr = self.tr
+        args, quads = self._args(n)
+        d = self._dst(r) if r is not None else None
+        at = (*quads, i)
+        if i in self.fused_calls:
+            fn, this = self.fused_calls.pop(i)
+            self._assign(d, f"{fn}({', '.join([this] + args)})", at)
+            return
+        if isinstance(target, Temp) or not _is_name(target):
+            self._assign(d, f"_invoke({', '.join([self._val(target)] + args)})", at)
+            return
+        function = tr.layout.function(target, self.label)
+        fallback = None
+        if function is not None and tr.visible(self.label, function):
+            params = len(tr.layout.procs[function].params)
+            fallback = f"{tr.pyname[function]}({', '.join(args[:params])})"
+        elif function is None or not tr.visible(self.label, function):
+            fallback = f"_invoke({', '.join([self._val(target)] + args)})"
+        if self.has_this and target in tr.method_labels:
+            labels = tr.method_labels[target]
+            m = f"_m{i}"
+            self._line(f"{m} = _methods[this.cls].get({target!r})", at)
+            direct = f"{m}({', '.join(['this'] + args)})" if self._arity_ok(labels, n) else \
+                f"_apply({', '.join([m, 'this'] + args)})"
+            self._assign(d, f"{direct} if {m} is not None else {fallback}", at)
+        else:
+            self._assign(d, fallback, at)
+
+    def _callvirt(self, i, slot, n, r):
+        args, quads = self._args(n)
+        d = self._dst(r) if r is not None else None
+        at = (*quads, i)
+        this = args[0] if args else "None"
+        labels = {table[slot] for table in self.tr.vtables.values() if slot < len(table)}
+        fn = f"_vtables[{this}.cls][{slot}]"
+        call = f"{fn}({', '.join([this] + args[1:])})" if self._arity_ok(labels, n - 1) else \
+            f"_apply({', '.join([fn, this] + args[1:])})"
+        self._assign(d, f"{call} if {this}.__class__ is _Instance else _no_receiver({this})", at)
+
+    def _assign(self, d, expr, quads):
+        self._line(f"{d} = {expr}" if d is not None else expr, quads)
+
+    def _new(self, i, cls, n, r):
+        tr, layout = self.tr, self.tr.layout
+        args, quads = self._args(n)
+        at = (*quads, i)
+        if cls not in layout.classes:
+            self._line(f"_no_class({cls!r})", at)
+            return
+        obj = f"_o{i}"
+        if isinstance(r, Temp) and not any(re.search(rf"\b{self._dst(r)}\b", a) for a in args):
+            obj = self._dst(r)  # el temporal no es uno de los argumentos: se arma ahí mismo
+        self._line(f"{obj} = _Instance({cls!r})", at)
+        for c in layout.init_chain(cls):
+            self._line(f"{tr.pyname[class_proc(c)]}({obj})", at)
+        ctor = layout.method(cls, "constructor")
+        if ctor is not None:
+            params = len(layout.procs[ctor].params)
+            self._line(f"{tr.pyname[ctor]}({', '.join([obj] + args[:params])})", at)
+        if obj != self._dst(r):
+            self._line(f"{self._dst(r)} = {obj}", at)
+
+    # Estructura
+    def _structured(self):
+        cfg = self.cfg
+        order = self.order
+        for b in cfg.rpo:
+            for s in self.blocks[b].succs:
+                if order[s] <= order[b] and not cfg.dominates(s, b):
+                    raise _Stop()  # irreducible
+        self.loop_at = {loop.header: loop for loop in cfg.loops}
+        # Aristas reales: las del flujo normal y las de cada bloque de un try a su catch
+        # (la del trybegin al catch no cuenta: ahí todavía no pasó nada)
+        preds = {b: [] for b in cfg.rpo}
+        tried = {}
+        for b in cfg.rpo:
+            for s in self._normal_succs(b):
+                if s is not None:
+                    preds[s].append(b)
+            h = self.blocks[b].handler
+            if h is not None:
+                preds[h].append(b)
+                tried.setdefault(h, []).append(b)
+        # Un catch al que solo se llega desde un bloque va entero en el except de ese bloque
+        self.inline_handler = {}
+        for h, blocks in tried.items():
+            if len(blocks) == 1 and len(preds[h]) == 1:
+                self.inline_handler[blocks[0]] = h
+        self.merge = set()
+        for b in cfg.rpo:
+            forward = [p for p in preds[b] if not cfg.dominates(b, p)]
+            if len(forward) >= 2:
+                self.merge.add(b)
+            h = self.blocks[b].handler
+            if h is not None and b not in self.inline_handler:
+                self.merge.add(h)
+            for s in self._normal_succs(b):
+                if s is not None:
+                    loop = cfg.loop_of(b)
+                    while loop is not None:
+                        if s not in loop.blocks:
+                            self.merge.add(s)
+                            break
+                        loop = loop.parent
+        self.dom_children = {b: [] for b in cfg.rpo}
+        for b in cfg.rpo[1:]:
+            idom = self.blocks[b].idom
+            if idom is not None:
+                self.dom_children[idom].append(b)
+        tree = self._tree(cfg.entry)
+        self.wrapped = set()
+        while True:
+            try:
+                self.lines = []
+                self.uses_go = False
+                self._render(tree, [], frozenset(), 0, 0)
+                return self.lines
+            except _Wrap as w:
+                self.wrapped.add(w.block)
+
+    def _tree(self, x):
+        merges = sorted((y for y in self.dom_children[x] if y in self.merge), key=self.order.get)
+        loop = self.loop_at.get(x)
+        if loop is None:
+            return self._within(x, merges)
+        inside = [y for y in merges if y in loop.blocks]
+        outside = [y for y in merges if y not in loop.blocks]
+        stmts = [_Loop(x, self._within(x, inside))]
+        for y in outside:
+            stmts = [_Block(y, stmts)] + self._tree(y)
+        return stmts
+
+    def _within(self, x, ys):
+        if not ys:
+            return [_Code(x)] + self._branch(x)
+        y = ys[-1]
+        return [_Block(y, self._within(x, ys[:-1]))] + self._tree(y)
+
+    def _branch(self, x):
+        e = self.exit[x]
+        if e[0] == "goto":
+            return self._goto(x, e[1])
+        if e[0] == "if":
+            cond, quads = self.code[x][1]
+            yes, no = e[3], e[4]
+            if yes == no or cond in ("True", "False"):
+                return self._goto(x, yes if yes == no or cond == "True" else no)
+            return [_If(cond, quads, self._goto(x, yes), self._goto(x, no))]
+        if e[0] == "return":
+            return [self._return(e[1], e[2])]
+        if not self.label.startswith("class "):
+            return [_Return("return", ())]
+        return [_Return(self._end_init(), ())]
+
+    def _goto(self, x, y):
+        if y is None:
+            return [_Return("return", ())]
+        if self.order[y] <= self.order[x] or y in self.merge:
+            return [_Br(y)]
+        return self._tree(y)
+
+    def _return(self, value, i):
+        if value is None:
+            return _Return("return", (i,))
+        return _Return(f"return {self._val(value)}", (i,))
+
+    def _end_init(self):
+        # Fin de un inicializador de campos: lo que asignó pasa a ser campo del objeto
+        names = sorted(n for n in self.proc.written if n in self.local_names)
+        if not names:
+            return "return"
+        return "this.fields.update({" + ", ".join(f"{n!r}: v_{n}" for n in names) + "}); return"
+
+    # Escritura
+    def _emit(self, depth, text, quads=()):
+        if depth > _MAX_INDENT:
+            raise _Stop()
+        self.lines.append((depth, text, tuple(quads)))
+
+    def _render(self, stmts, ctx, cont, depth, nesting):
+        # `cont`: bloques a los que equivale seguir de largo al terminar `stmts`
+        for k, s in enumerate(stmts):
+            self._stmt(s, ctx, self._first(stmts, k + 1, cont), depth, nesting)
+
+    def _first(self, stmts, k, cont):
+        """Bloques a los que equivale estar justo antes de stmts[k]."""
+        if k >= len(stmts):
+            return cont
+        s = stmts[k]
+        cls = s.__class__
+        if cls is _Code:
+            if self.code[s.block][0]:
+                return frozenset((s.block,))
+            return frozenset((s.block,)) | self._first(stmts, k + 1, cont)  # bloque vacío
+        if cls is _Loop:
+            return frozenset((s.label,))
+        if cls is _Block:
+            return self._first(s.body, 0, self._first(stmts, k + 1, cont) | {s.label})
+        if cls is _Br:
+            return frozenset((s.target,))
+        return frozenset()
+
+    def _stmt(self, s, ctx, cont, depth, nesting):
+        cls = s.__class__
+        if cls is _Code:
+            self._code(s.block, ctx, cont, depth, nesting)
+        elif cls is _If:
+            then = self._capture(s.then, ctx, cont, depth + 1, nesting)
+            other = self._capture(s.other, ctx, cont, depth + 1, nesting)
+            if not other:
+                self._emit(depth, f"if {s.cond}:", s.quads)
+                self.lines += then or [(depth + 1, "pass", ())]
+            elif not then:
+                self._emit(depth, f"if not ({s.cond}):", s.quads)
+                self.lines += other
+            else:
+                self._emit(depth, f"if {s.cond}:", s.quads)
+                self.lines += then
+                self._emit(depth, "else:", s.quads)
+                self.lines += other
+        elif cls is _Br:
+            self._jump(s.target, ctx, cont, depth)
+        elif cls is _Return:
+            self._emit(depth, s.text, s.quads)
+        elif cls is _Loop:
+            if nesting + 1 > _MAX_NESTING:
+                raise _Stop()
+            frame = _Frame("loop", s.label, cont, True)
+            self._emit(depth, "while True:")
+            self._emit(depth + 1, "_steps += 1")
+            self._emit(depth + 1, "if _steps > _limit: _over(_limit)")
+            self._render(s.body, ctx + [frame], frozenset((s.label,)), depth + 1, nesting + 1)
+            self._after(frame, ctx, cont, depth)
+        elif cls is _Block:
+            if s.label in self.wrapped:
+                if nesting + 1 > _MAX_NESTING:
+                    raise _Stop()
+                frame = _Frame("block", s.label, cont | {s.label}, True)
+                self._emit(depth, "while True:")
+                self._render(s.body, ctx + [frame], frame.after, depth + 1, nesting + 1)
+                self._emit(depth + 1, "break")
+                self._after(frame, ctx, frame.after, depth)
+            else:
+                frame = _Frame("block", s.label, cont | {s.label}, False)
+                self._render(s.body, ctx + [frame], frame.after, depth, nesting)
+
+    def _capture(self, stmts, ctx, cont, depth, nesting):
+        outer = self.lines
+        self.lines = []
+        try:
+            self._render(stmts, ctx, cont, depth, nesting)
+            return self.lines
+        finally:
+            self.lines = outer
+
+    def _code(self, b, ctx, cont, depth, nesting):
+        lines, _ = self.code[b]
+        handler = self.blocks[b].handler
+        if handler is None or not lines:
+            for d, text, quads in lines:
+                self._emit(depth + d, text, quads)
+            return
+        if nesting + 1 > _MAX_NESTING:
+            raise _Stop()
+        self._emit(depth, "try:")
+        for d, text, quads in lines:
+            self._emit(depth + 1 + d, text, quads)
+        self._emit(depth, "except Exception as _e:")
+        self._emit(depth + 1, "v_exception = _message(_e)")
+        if b in self.inline_handler:
+            self._render(self._tree(handler), ctx, cont, depth + 1, nesting + 1)
+        else:
+            self._jump(handler, ctx, cont, depth + 1)
+
+    def _jump(self, target, ctx, cont, depth):
+        """
+        Salto a `target` (un bloque que encierra al código actual o la cabecera de
+        un ciclo) desde donde, sin hacer nada, se seguiría en `cont`.
+        """
+        if target in cont:
+            return
+        frame = next((f for f in reversed(ctx) if f.python), None)
+        if frame is None:
+            if target in self.wrapped or not any(f.label == target for f in ctx):
+                raise _Stop()
+            raise _Wrap(target)
+        if frame.kind == "loop" and frame.label == target:
+            self._emit(depth, "continue")
+        elif target in frame.after:
+            self._emit(depth, "break")
+        else:
+            # Sale de más de un ciclo de Python: se marca en _go y se sigue después de cada uno
+            if target not in frame.exits:
+                frame.exits.append(target)
+            self.uses_go = True
+            self._emit(depth, f"_go = {target + 1}")
+            self._emit(depth, "break")
+
+    def _after(self, frame, ctx, cont, depth):
+        for target in frame.exits:
+            self._emit(depth, f"if _go == {target + 1}:")
+            mark = len(self.lines)
+            self._emit(depth + 1, "_go = 0")
+            self._jump(target, ctx, cont, depth + 1)
+            if len(self.lines) == mark + 3 and self.lines[-1][1] == "break" and self.lines[-2][1].startswith("_go = "):
+                del self.lines[mark:mark + 2]  # sigue saliendo con el mismo _go
+
+    # Despachador
+    def _dispatch(self):
+        self.lines = []
+        self._emit(0, f"_b = {self.cfg.entry}")
+        self._emit(0, "while True:")
+        self._emit(1, "_steps += 1")
+        self._emit(1, "if _steps > _limit: _over(_limit)")
+        for k, b in enumerate(self.cfg.rpo):
+            self._emit(1, f"{'if' if k == 0 else 'elif'} _b == {b}:")
+            lines, cond = self.code[b]
+            handler = self.blocks[b].handler
+            if handler is not None and lines:
+                self._emit(2, "try:")
+                for d, text, quads in lines:
+                    self._emit(3 + d, text, quads)
+                self._emit(2, "except Exception as _e:")
+                self._emit(3, "v_exception = _message(_e)")
+                self._emit(3, f"_b = {handler}")
+                self._emit(3, "continue")
+            else:
+                for d, text, quads in lines:
+                    self._emit(2 + d, text, quads)
+            e = self.exit[b]
+            if e[0] == "goto":
+                self._emit(2, f"_b = {e[1]}")
+            elif e[0] == "if":
+                cond, quads = cond
+                yes, no = (-1 if x is None else x for x in e[3:5])
+                self._emit(2, f"_b = {yes} if {cond} else {no}", quads)
+            elif e[0] == "return":
+                r = self._return(e[1], e[2])
+                self._emit(2, r.text, r.quads)
+            else:
+                self._emit(2, self._branch(b)[0].text)
+        self._emit(1, "else:")
+        self._emit(2, "return")
+        return self.lines
+
+
+# Ops cuyo result es lo que asignan
+_WRITES_RESULT = BINARY | {"=", "not", "[]", "getprop", "call", "callvirt", "new", "newarr", "len"}
+# Ops que consumen argumentos apilados
+_CALLS = {"call", "callvirt", "new"}
+
+
+def _count(n):
+    v = literal(n) if n is not None else 0
+    return v if isinstance(v, int) else 0
+
+
+def _is_name(x):
+    return isinstance(x, str) and literal(x) is None and x != "null"
+
+
+def _join(a, b):
+    out = {}
+    for t in a.keys() | b.keys():
+        x, y = a.get(t, _BOTTOM), b.get(t, _BOTTOM)
+        out[t] = x if x == y else (y if x == _BOTTOM else (x if y == _BOTTOM else ANY))
+    return out
+
+
+def _join_all(states):
+    out = {}
+    for s in states:
+        out = _join(out, s) if out else dict(s)
+    return out
@@ -0,0 +1,171 @@
+import sys
+import time
+
+from src.utils.Temp import Temp
+from src.vm.VirtualMachine import (
+    VMError, StepLimitExceeded, Instance, Method, BINARY_OPS, text, _add, _wrap, _mod, _same,
+)
+
+
+class PythonMachine:
+    """
+    Corre un PythonProgram (PythonBackend.compile_python): llama a la función que
+    generó para todo el programa con la salida, el límite de pasos y una lista donde
+    deja los pasos contados. Mismos valores, mensajes de error y catch que la
+    VirtualMachine; `steps` son las vueltas de ciclo (cada vez que se entra a la
+    cabecera de un ciclo) más las llamadas, que es lo único que se cuenta en el
+    código generado, y `max_depth` se vuelve el límite de recursión de Python
+    mientras corre.
+    """
+
+    def __init__(self, program, max_steps=None, max_depth=10_000, stdout=None):
+        self.program = program
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+        self.stdout = stdout
+
+        self.output = []
+        self.error = None
+        self.steps = 0
+        self.elapsed = 0.0
+
+    def run(self):
+        start = time.perf_counter()
+        limit = self.max_steps if self.max_steps is not None else sys.maxsize
+        stats = []
+        previous = sys.getrecursionlimit()
+        sys.setrecursionlimit(_depth() + self.max_depth + 50)
+        try:
+            self.program.entry(self.output, self.stdout, limit, stats)
+        except StepLimitExceeded as e:
+            self.error = str(e)
+        except Exception as e:
+            self.error = self.program.message(e)
+        finally:
+            sys.setrecursionlimit(previous)
+        self.steps = stats[0] if stats else 0
+        self.elapsed = time.perf_counter() - start
+        return self
+
+
+def _depth():
+    frame, n = sys._getframe(), 0
+    while frame is not None:
+        frame, n = frame.f_back, n + 1
+    return n
+
+
+# Lo que usa el código generado (ver PythonBackend): los casos lentos o que terminan en error
+def _bad_index(arr, i):
+    if not isinstance(arr, list):
+        raise VMError(f"{text(arr)} no es un arreglo")
+    raise VMError(f"índice fuera de rango: {text(i)}")
+
+
+def _newarr(n):
+    if n.__class__ is not int or n < 0:
+        raise VMError(f"tamaño de arreglo inválido: {text(n)}")
+    return [None] * n
+
+
+def _not_callable(v):
+    raise VMError(f"{text(v)} no se puede llamar")
+
+
+def _no_receiver(v):
+    raise VMError(f"no se puede llamar un método de {text(v)}")
+
+
+def _no_class(name):
+    raise VMError(f"la clase {name} no existe")
+
+
+def _over(limit):
+    raise StepLimitExceeded(f"se superó el límite de {limit} pasos")
+
+
+def _getprop(obj, name, labels):
+    if obj.__class__ is not Instance:
+        raise VMError(f"no se puede leer '{name}' de {text(obj)}")
+    fields = obj.fields
+    if name in fields:
+        return fields[name]
+    label = labels[obj.cls].get(name)
+    return Method(obj, label) if label is not None else None
+
+
+def _apply(fn, *args):
+    # Llamada con más argumentos de los que recibe la función: los de más se ignoran
+    return fn(*args[:fn.__code__.co_argcount])
+
+
+def _invoker(code):
+    """`_invoke(m, *args)` del programa: llama un método ligado (Method) con la función de su etiqueta."""
+    def _invoke(m, *args):
+        if m.__class__ is not Method:
+            _not_callable(m)
+        return _apply(code[m.label], m.this, *args)
+    return _invoke
+
+
+def _printer(output, stdout):
+    def _emit(line):
+        output.append(line)
+        stdout(line)
+    return _emit
+
+
+RUNTIME = {
+    "_Instance": Instance, "_Method": Method, "_list": list,
+    "_text": text, "_add": _add, "_wrap": _wrap, "_mod": _mod, "_same": _same,
+    "_bad_index": _bad_index, "_newarr": _newarr, "_no_class": _no_class, "_over": _over,
+    "_no_receiver": _no_receiver,
+    "_getprop": _getprop, "_apply": _apply, "_invoker": _invoker, "_printer": _printer,
+}
+
+
+def replay(rows, indices, value):
+    """
+    Repite con la semántica de la VirtualMachine los cuádruplos de una línea generada
+    que falló con un error de Python (TypeError, AttributeError...): el primero que
+    falla levanta el VMError con el mensaje que daría ella. `value(x)` lee un operando
+    en el frame que falló; no escribe nada.
+    """
+    env = {}
+
+    def read(x):
+        return env[x] if x in env else value(x)
+
+    for i in indices:
+        _, op, a1, a2, r = rows[i]
+        if op in BINARY_OPS:
+            a, b = read(a1), read(a2)
+            try:
+                env[r] = BINARY_OPS[op](a, b)
+            except TypeError:
+                raise VMError(f"operandos inválidos: {text(a)} y {text(b)}") from None
+        elif op in ("[]", "[]="):
+            arr, idx = read(a1), read(a2)
+            if not isinstance(arr, list) or idx.__class__ is not int or not 0 <= idx < len(arr):
+                _bad_index(arr, idx)
+            if op == "[]":
+                env[r] = arr[idx]
+        elif op == "len":
+            arr = read(a1)
+            if not isinstance(arr, (list, str)):
+                raise VMError(f"{text(arr)} no tiene longitud")
+            env[r] = len(arr)
+        elif op == "getprop" and a1 != "super":
+            obj = read(a1)
+            if not isinstance(obj, Instance):
+                raise VMError(f"no se puede leer '{a2}' de {text(obj)}")
+        elif op == "setprop":
+            obj = read(a1)
+            if not isinstance(obj, Instance):
+                raise VMError(f"no se puede asignar '{r}' en {text(obj)}")
+        elif op == "call" and isinstance(a1, Temp):
+            target = read(a1)
+            if not isinstance(target, Method) and not callable(target):
+                _not_callable(target)
+        elif op == "newarr":
+            _newarr(read(a2))
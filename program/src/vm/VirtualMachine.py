@@ -0,0 +1,521 @@
+import math
+import time
+
+from src.optimizer.Tac import INT_MIN, INT_MAX, literal
+from src.utils.Temp import Temp
+from src.vm.Layout import MAIN, ProgramLayout, class_proc
+
+
+class VMError(Exception):
+    """Error en ejecución (división entre cero, índice fuera de rango, null...): lo atrapa un try/catch del programa."""
+
+
+class StepLimitExceeded(VMError):
+    """El programa superó `max_steps`; a diferencia de los demás errores, ningún catch lo atrapa."""
+
+
+class Instance:
+    __slots__ = ("cls", "fields")
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.fields = {}
+
+    def __repr__(self):
+        return f"<{self.cls}>"
+
+
+class Method:
+    """Método ya ligado a su objeto: lo que deja `getprop obj m` para el `call` siguiente."""
+
+    __slots__ = ("this", "label")
+
+    def __init__(self, this, label):
+        self.this = this
+        self.label = label
+
+
+class _Const:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class _Slot:
+    # Temporal ya decodificado: índice en el arreglo de temporales del registro
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+
+class _Super:
+    __slots__ = ("this", "cls")
+
+    def __init__(self, this, cls):
+        self.this = this
+        self.cls = cls
+
+
+class _New:
+    # Un `new C` en curso: inicializadores de las clases (base primero) y después el constructor
+    __slots__ = ("obj", "chain", "args", "dest", "ret_pc", "call_pc")
+
+    def __init__(self, obj, chain, args, dest, ret_pc, call_pc):
+        self.obj = obj
+        self.chain = chain
+        self.args = args
+        self.dest = dest
+        self.ret_pc = ret_pc
+        self.call_pc = call_pc
+
+
+class Frame:
+    """Registro de activación: temporales, nombres locales, parámetros que llegan y los que se van apilando."""
+
+    __slots__ = ("proc", "temps", "names", "this", "args", "arg_index", "outgoing",
+                 "dest", "ret_pc", "call_pc", "new")
+
+    def __init__(self, proc, size, this=None, args=(), dest=None, ret_pc=None, call_pc=None, new=None):
+        self.proc = proc
+        self.temps = [None] * size
+        self.names = {}
+        self.this = this
+        self.args = args
+        self.arg_index = 0
+        self.outgoing = []
+        self.dest = dest
+        self.ret_pc = ret_pc
+        self.call_pc = call_pc
+        self.new = new
+
+
+def text(v):
+    """Cómo se ve un valor al imprimirlo o concatenarlo."""
+    if v.__class__ is str:
+        return v
+    if v is None:
+        return "null"
+    if isinstance(v, list):
+        return "[" + ", ".join(text(x) for x in v) + "]"
+    if isinstance(v, Method):
+        return f"<método {v.label}>"
+    return str(v)
+
+
+def truthy(v):
+    return not (v is None or v == 0)
+
+
+def _wrap(v):
+    # Enteros de 32 bits con complemento a dos, como en el backend
+    if v.__class__ is int and not INT_MIN <= v <= INT_MAX:
+        return (v - INT_MIN) % 2 ** 32 + INT_MIN
+    return v
+
+
+def _add(a, b):
+    if a.__class__ is str or b.__class__ is str:
+        return text(a) + text(b)
+    return _wrap(a + b)
+
+
+def _div(a, b):
+    if b == 0:
+        raise VMError("división entre cero")
+    return a / b
+
+
+def _mod(a, b):
+    if b == 0:
+        raise VMError("módulo entre cero")
+    r = math.fmod(a, b)
+    return int(r) if a.__class__ is int and b.__class__ is int else r
+
+
+def _same(a, b):
+    # Arreglos y objetos se comparan por referencia
+    if isinstance(a, (list, Instance)) or isinstance(b, (list, Instance)):
+        return a is b
+    return a == b
+
+
+BINARY_OPS = {
+    "+": _add,
+    "-": lambda a, b: _wrap(a - b),
+    "*": lambda a, b: _wrap(a * b),
+    "/": _div,
+    "%": _mod,
+    "<": lambda a, b: int(a < b),
+    "<=": lambda a, b: int(a <= b),
+    ">": lambda a, b: int(a > b),
+    ">=": lambda a, b: int(a >= b),
+    "==": lambda a, b: int(_same(a, b)),
+    "!=": lambda a, b: int(not _same(a, b)),
+}
+
+
+class VirtualMachine:
+    """
+    Intérprete del TAC del CodeGenerator (o del optimizado). Antes de correr, una sola
+    pasada resuelve las etiquetas a índices, decodifica los operandos (literales,
+    temporales y nombres), arma la tabla de clases y métodos y calcula qué catch
+    atiende cada cuádruplo; en la ejecución solo se indexa.
+
+    - funciones: `param`/`call`/`return`/`endfunc` con un registro por llamada; una
+      función anidada lee y escribe las locales de la llamada activa de la que la
+      encierra, y lo que no es local de nadie es global;
+    - objetos: `new` corre los inicializadores de campos de cada clase (la base
+      primero) y después `constructor`; `getprop` da el campo o el método ligado y
+      `callvirt k` llama al método del slot k de la vtable del receptor;
+    - arreglos: `newarr`, `[]`, `[]=` y `len`, con índices fuera de rango como error;
+    - errores: un VMError salta al catch que lo encierra (en esta función o en
+      alguna de las que la llamaron) con el mensaje en `exception`; si nadie lo
+      atrapa la ejecución termina con `error`.
+
+    `local_names` ({procedimiento: nombres declarados}, ver Layout.local_names) dice qué
+    asignaciones son a locales; sin él se supone local lo que una función asigna y
+    no asigna ningún procedimiento que la encierra.
+    """
+
+    def __init__(self, quads, local_names=None, max_steps=None, max_depth=10_000, stdout=None):
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+        self.stdout = stdout  # función que recibe cada línea impresa, además de `output`
+
+        self.output = []
+        self.error = None
+        self.steps = 0
+        self.elapsed = 0.0
+
+        self._load(quads)
+        self._locals = local_names if local_names is not None else self.layout.guess_locals()
+
+        self._ops = {op: self._binary(fn) for op, fn in BINARY_OPS.items()}
+        self._ops.update({
+            "=": self._op_copy, "not": self._op_not, "label": self._op_label,
+            "goto": self._op_goto, "ifFalse": self._op_if_false, "ifTrue": self._op_if_true,
+            "print": self._op_print, "param": self._op_param, "call": self._op_call, "callvirt": self._op_callvirt,
+            "return": self._op_return, "endfunc": self._op_return, "new": self._op_new,
+            "getprop": self._op_getprop, "setprop": self._op_setprop,
+            "newarr": self._op_newarr, "[]": self._op_index, "[]=": self._op_store, "len": self._op_len,
+            "class": self._op_class, "endclass": self._op_endclass,
+            "inherit": self._op_nothing, "trybegin": self._op_nothing, "tryend": self._op_nothing,
+        })
+
+    # Carga
+    def _load(self, quads):
+        layout = self.layout = ProgramLayout(quads)
+        self._code = [(op, _decode(a1), _decode(a2), _decode(r)) for _, op, a1, a2, r in layout.rows]
+        self._procs = layout.procs
+        self._classes = layout.classes
+        self._vtables = {name: layout.vtable(name) for name in layout.classes}
+        self._labels = layout.labels
+        self._skip = layout.skip
+        self._handlers = layout.handlers
+
+    # Ejecución
+    def run(self):
+        """Corre el programa desde el primer cuádruplo; deja `output`, `error` y `steps`."""
+        start = time.perf_counter()
+        self.frames = []
+        self._active = {}  # procedimiento -> registros vivos (el último es el de la llamada más reciente)
+        main = self._push(MAIN)
+        self.globals = main.names
+        self.pc = 0
+
+        code, ops = self._code, self._ops
+        n = len(code)
+        limit = self.max_steps
+        try:
+            while self.pc < n:
+                op, a1, a2, r = code[self.pc]
+                self.pc += 1
+                self.steps += 1
+                if limit is not None and self.steps > limit:
+                    raise StepLimitExceeded(f"se superó el límite de {limit} pasos")
+                try:
+                    ops[op](a1, a2, r)
+                except StepLimitExceeded:
+                    raise
+                except VMError as e:
+                    self._throw(str(e), self.pc - 1)
+                except RecursionError:
+                    self._throw("recursión demasiado profunda", self.pc - 1)
+        except VMError as e:
+            self.error = str(e)
+        self.elapsed = time.perf_counter() - start
+        return self
+
+    def _throw(self, message, at):
+        # Busca el catch hacia afuera: primero en este registro y después en cada llamada pendiente
+        while True:
+            frame = self.frames[-1]
+            handler = self._handlers[at]
+            if handler is not None:
+                frame.names["exception"] = message
+                self.pc = self._labels[handler]
+                return
+            if len(self.frames) == 1:
+                raise VMError(message)
+            self._pop()
+            at = frame.call_pc
+
+    # Registros
+    def _push(self, proc, **kwargs):
+        if len(self.frames) >= self.max_depth:
+            raise VMError("desbordamiento de pila")
+        frame = Frame(proc, self._procs[proc].temps, **kwargs)
+        self.frames.append(frame)
+        self._active.setdefault(proc, []).append(frame)
+        return frame
+
+    def _pop(self):
+        frame = self.frames.pop()
+        self._active[frame.proc].pop()
+        return frame
+
+    def _enter(self, label, this, args, dest, call_pc, new=None):
+        self._push(label, this=this, args=args, dest=dest, ret_pc=self.pc, call_pc=call_pc, new=new)
+        self.pc = self._labels[label] + 1
+
+    # Operandos
+    def _value(self, x):
+        cls = x.__class__
+        if cls is _Slot:
+            return self.frames[-1].temps[x.index]
+        if cls is _Const:
+            return x.value
+        return self._read(x)
+
+    def _store(self, x, v):
+        if x.__class__ is _Slot:
+            self.frames[-1].temps[x.index] = v
+        else:
+            self._home(x)[x] = v
+
+    def _home(self, name):
+        # Diccionario donde vive el nombre: el registro actual, el activo de una función que lo encierra o globales
+        frame = self.frames[-1]
+        if name in frame.names or name in self._locals.get(frame.proc, ()):
+            return frame.names
+        parent = self._procs[frame.proc].parent
+        while parent is not None and parent != MAIN:
+            active = self._active.get(parent)
+            if active and (name in active[-1].names or name in self._locals.get(parent, ())):
+                return active[-1].names
+            parent = self._procs[parent].parent
+        return self.globals
+
+    def _read(self, name):
+        frame = self.frames[-1]
+        if name == "this":
+            return frame.this
+        if name == "super":
+            cls = self._procs[frame.proc].cls
+            return _Super(frame.this, cls.base if cls is not None else None)
+        home = self._home(name)
+        if name in home:
+            return home[name]
+        proc = frame.proc
+        while proc is not None:
+            if name in self._locals.get(proc, ()):
+                return None  # declarada pero todavía sin valor
+            proc = self._procs[proc].parent
+        raise VMError(f"'{name}' no está definida")
+
+    # Clases
+    def _method(self, cls, name):
+        return self.layout.method(cls, name)
+
+    def _function(self, name):
+        return self.layout.function(name, self.frames[-1].proc)
+
+    def _continue_new(self, state):
+        if state.chain:
+            cls = state.chain.pop()
+            self._push(class_proc(cls), this=state.obj, call_pc=state.call_pc, new=state)
+            self.pc = self._classes[cls].start + 1
+            return
+        ctor = self._method(state.obj.cls, "constructor")
+        if ctor is not None:
+            self.pc = state.ret_pc
+            self._enter(ctor, state.obj, state.args, state.dest, state.call_pc, state)
+        else:
+            self._store(state.dest, state.obj)
+            self.pc = state.ret_pc
+
+    # Ops
+    def _binary(self, fn):
+        def op(a1, a2, r):
+            a, b = self._value(a1), self._value(a2)
+            try:
+                v = fn(a, b)
+            except TypeError:
+                raise VMError(f"operandos inválidos: {text(a)} y {text(b)}") from None
+            self._store(r, v)
+        return op
+
+    def _op_copy(self, a1, a2, r):
+        self._store(r, self._value(a1))
+
+    def _op_not(self, a1, a2, r):
+        self._store(r, int(not truthy(self._value(a1))))
+
+    def _op_label(self, a1, a2, r):
+        # Una función se define en medio del flujo: si se llega a ella sin llamarla, se salta
+        nxt = self._skip.get(self.pc - 1)
+        if nxt is not None:
+            self.pc = nxt
+
+    def _op_class(self, a1, a2, r):
+        self.pc = self._skip[self.pc - 1]
+
+    def _op_goto(self, a1, a2, r):
+        self.pc = self._labels[r]
+
+    def _op_if_false(self, a1, a2, r):
+        if not truthy(self._value(a1)):
+            self.pc = self._labels[r]
+
+    def _op_if_true(self, a1, a2, r):
+        if truthy(self._value(a1)):
+            self.pc = self._labels[r]
+
+    def _op_print(self, a1, a2, r):
+        line = text(self._value(a1))
+        self.output.append(line)
+        if self.stdout is not None:
+            self.stdout(line)
+
+    def _op_param(self, a1, a2, r):
+        frame = self.frames[-1]
+        if a1 is None:
+            # Cabecera de la función: recibe el siguiente argumento
+            i = frame.arg_index
+            frame.names[r] = frame.args[i] if i < len(frame.args) else None
+            frame.arg_index = i + 1
+        else:
+            frame.outgoing.append(self._value(a1))
+
+    def _args(self, n):
+        outgoing = self.frames[-1].outgoing
+        n = n.value if n.__class__ is _Const else 0
+        if not n:
+            return []
+        args = outgoing[-n:]
+        del outgoing[-n:]
+        return args
+
+    def _op_call(self, a1, a2, r):
+        args = self._args(a2)
+        call_pc = self.pc - 1
+        if a1.__class__ is str:
+            frame = self.frames[-1]
+            label = self._method(frame.this.cls, a1) if isinstance(frame.this, Instance) else None
+            if label is not None:
+                return self._enter(label, frame.this, args, r, call_pc)
+            label = self._function(a1)
+            if label is not None:
+                return self._enter(label, None, args, r, call_pc)
+        target = self._value(a1)
+        if not isinstance(target, Method):
+            raise VMError(f"{text(target)} no se puede llamar")
+        self._enter(target.label, target.this, args, r, call_pc)
+
+    def _op_callvirt(self, a1, a2, r):
+        # El receptor es el primer argumento; el método sale de su vtable sin buscarlo por nombre
+        args = self._args(a2)
+        this = args[0] if args else None
+        if not isinstance(this, Instance):
+            raise VMError(f"no se puede llamar un método de {text(this)}")
+        self._enter(self._vtables[this.cls][a1.value], this, args[1:], r, self.pc - 1)
+
+    def _op_return(self, a1, a2, r):
+        value = self._value(a1) if a1 is not None else None
+        frame = self._pop()
+        if frame.new is not None:
+            value = frame.new.obj  # el constructor devuelve el objeto
+        if frame.dest is not None:
+            self._store(frame.dest, value)
+        self.pc = frame.ret_pc
+
+    def _op_new(self, a1, a2, r):
+        if a1 not in self._classes:
+            raise VMError(f"la clase {a1} no existe")
+        chain = self.layout.init_chain(a1)[::-1]  # se sacan con pop(): la base primero
+        state = _New(Instance(a1), chain, self._args(a2), r, self.pc, self.pc - 1)
+        self._continue_new(state)
+
+    def _op_endclass(self, a1, a2, r):
+        # Fin de un inicializador de campos: lo asignado pasa a ser campo del objeto
+        frame = self._pop()
+        state = frame.new
+        state.obj.fields.update(frame.names)
+        self._continue_new(state)
+
+    def _op_nothing(self, a1, a2, r):
+        pass
+
+    def _op_getprop(self, a1, a2, r):
+        obj = self._value(a1)
+        if obj.__class__ is _Super:
+            label = self._method(obj.cls, a2)
+            self._store(r, Method(obj.this, label) if label else obj.this.fields.get(a2))
+            return
+        if not isinstance(obj, Instance):
+            raise VMError(f"no se puede leer '{a2}' de {text(obj)}")
+        if a2 in obj.fields:
+            self._store(r, obj.fields[a2])
+            return
+        label = self._method(obj.cls, a2)
+        self._store(r, Method(obj, label) if label else None)
+
+    def _op_setprop(self, a1, a2, r):
+        obj = self._value(a1)
+        if not isinstance(obj, Instance):
+            raise VMError(f"no se puede asignar '{r}' en {text(obj)}")
+        obj.fields[r] = self._value(a2)
+
+    def _op_newarr(self, a1, a2, r):
+        n = self._value(a2)
+        if n.__class__ is not int or n < 0:
+            raise VMError(f"tamaño de arreglo inválido: {text(n)}")
+        self._store(r, [None] * n)
+
+    def _array_index(self, arr, i):
+        if not isinstance(arr, list):
+            raise VMError(f"{text(arr)} no es un arreglo")
+        if i.__class__ is not int or not 0 <= i < len(arr):
+            raise VMError(f"índice fuera de rango: {text(i)}")
+        return i
+
+    def _op_index(self, a1, a2, r):
+        arr = self._value(a1)
+        self._store(r, arr[self._array_index(arr, self._value(a2))])
+
+    def _op_store(self, a1, a2, r):
+        arr = self._value(a1)
+        arr[self._array_index(arr, self._value(a2))] = self._value(r)
+
+    def _op_len(self, a1, a2, r):
+        arr = self._value(a1)
+        if not isinstance(arr, (list, str)):
+            raise VMError(f"{text(arr)} no tiene longitud")
+        self._store(r, len(arr))
+
+
+def _decode(x):
+    if x is None:
+        return None
+    if isinstance(x, Temp):
+        return _Slot(x.id)
+    if x == "null":
+        return _Const(None)
+    v = literal(x)
+    if v is None:
+        return x
+    if isinstance(v, str):
+        v = v[1:-1]
+    return _Const(v)
@@ -0,0 +1,54 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.batch.BatchCompiler import compile_batch, collect_sources
+
+FILES = os.path.join(os.path.dirname(__file__), "files")
+
+
+# ---------- tests ----------
+def test_collect_sources_expands_directories():
+    sources = collect_sources([os.path.join(FILES, "CodeGen")])
+    assert sources and all(s.endswith(".cps") for s in sources)
+    assert sources == sorted(sources)
+
+def test_batch_writes_tac_and_diagnostics(tmp_path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "ok.cps").write_text("let x: integer = 1 + 2;\nprint(x);\n")
+    (src_dir / "bad.cps").write_text('let y: integer = "hola";\n')
+    out = tmp_path / "out"
+
+    summary = compile_batch([str(src_dir)], out_dir=str(out), jobs=1)
+
+    assert summary.files == 2
+    assert summary.with_errors == 1 and summary.failed == 0
+    assert summary.lines == 3
+    assert (out / "ok.tac").read_text().count("\n") == 3
+    assert "[line 1:0]" in (out / "bad.diag").read_text()
+    assert "archivos/s" in summary.format()
+
+def test_batch_writes_syntax_errors_to_the_diagnostics(tmp_path):
+    src = tmp_path / "bad.cps"
+    src.write_text("let x: integer = ;\n")
+
+    summary = compile_batch([str(src)], out_dir=str(tmp_path / "out"), jobs=1)
+
+    assert summary.with_errors == 1
+    diag = (tmp_path / "out" / "bad.diag").read_text().splitlines()
+    assert diag[0] == "# parse: LL, syntax errors: 1"
+    assert diag[1].startswith("[line 1:17] mismatched input ';'")
+
+def test_batch_parallel_matches_serial(tmp_path):
+    serial = compile_batch([FILES], out_dir=str(tmp_path / "a"), jobs=1)
+    parallel = compile_batch([FILES], out_dir=str(tmp_path / "b"), jobs=2)
+
+    assert parallel.jobs == 2
+    assert [r.path for r in serial.results] == [r.path for r in parallel.results]
+    assert serial.quads == parallel.quads
+    for r in serial.results:
+        rel = os.path.relpath(r.path, FILES)
+        tac = os.path.splitext(rel)[0] + ".tac"
+        assert (tmp_path / "a" / tac).read_text() == (tmp_path / "b" / tac).read_text()
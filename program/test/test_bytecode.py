@@ -0,0 +1,122 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+from src.vm.Layout import local_names
+from src.vm.Bytecode import lower, JFLT, JF, CALL, GETG
+import Driver
+
+PROGRAM = os.path.join(os.path.dirname(__file__), "..", "program.cps")
+
+# ---------- helpers ----------
+def compiled(src: str, level: int = 0):
+    session = CompilerSession(src, error_listeners=[], opt_level=level).run()
+    assert session.errors.errors == []
+    return session
+
+def both(src: str, level: int = 0, **kwargs):
+    """Corre el programa con los dos motores y devuelve (vm, bytecode)."""
+    session = compiled(src, level)
+    return session.execute(**kwargs), session.execute(engine="bytecode", **kwargs)
+
+def opcodes(program):
+    return [ins[0] for ins in program.code]
+
+# ---------- tests ----------
+def test_program_gives_the_same_output_as_the_vm():
+    with open(PROGRAM, encoding="utf-8") as fh:
+        src = fh.read()
+    for level in (0, 3):
+        vm, bc = both(src, level)
+        assert bc.error is None
+        assert bc.output == vm.output
+
+
+def test_functions_classes_and_nested_locals():
+    vm, bc = both("""
+    let base: integer = 10;
+    class A {
+        let x: integer = 5;
+        function constructor(v: integer) { this.x = this.x + v; }
+        function get(): integer { return this.x; }
+        function add(k: integer): integer { return this.get() + k + base; }
+    }
+    class B : A {
+        let y: integer = 2;
+        function get(): integer { return this.x * this.y; }
+    }
+    function outer(n: integer): integer {
+        let acc: integer = 0;
+        function step(k: integer): integer { if (k == 0) { return acc; } acc = acc + k; return step(k - 1); }
+        return step(n);
+    }
+    let b: B = new B(3);
+    print(new A(1).add(1));
+    print(b.add(1));
+    print(outer(10));
+    """, level=2)
+    assert bc.output == vm.output == ["17", "27", "55"]
+
+
+def test_compare_and_branch_become_one_instruction():
+    session = compiled("""
+    let s: integer = 0;
+    for (let i: integer = 0; i < 10; i = i + 1) { s = s + i; }
+    print(s);
+    """)
+    program = lower(session.quadruples, local_names(session.symbols))
+    ops = opcodes(program)
+    assert JFLT in ops and JF not in ops
+    assert "JFLT" in "\n".join(program.listing())
+
+
+def test_calls_and_globals_are_resolved_when_lowering():
+    session = compiled("""
+    let n: integer = 2;
+    function f(x: integer): integer { return x * n; }
+    print(f(4));
+    """)
+    program = lower(session.quadruples, local_names(session.symbols))
+    f = next(fn for fn in program.functions if fn.label == "func_f")
+    body = program.code[f.entry:]
+    assert CALL in opcodes(program)
+    assert body[0][0] == GETG  # n se lee del top-level sin buscarla por nombre
+    assert len(f.params) == 1 and f.proto[f.params[0]] is None
+
+
+def test_errors_unwind_to_the_enclosing_catch():
+    vm, bc = both("""
+    function pick(xs: integer[], i: integer): integer { return xs[i]; }
+    function safe(i: integer): integer {
+        let xs: integer[] = [1, 2];
+        try { return pick(xs, i); } catch (e) { print("safe: " + e); }
+        return -1;
+    }
+    function rec(n: integer): integer { return rec(n + 1); }
+    print(safe(5));
+    try { print(rec(0)); } catch (e) { print(e); }
+    let z: integer = 0;
+    print(1 / z);
+    """)
+    assert bc.output == vm.output == ["safe: índice fuera de rango: 5", "-1", "desbordamiento de pila"]
+    assert bc.error == vm.error == "división entre cero"
+
+
+def test_step_limit_counts_instructions():
+    _, bc = both("let i: integer = 0; while (true) { i = i + 1; }", max_steps=1000)
+    assert bc.error == "se superó el límite de 1000 pasos"
+    assert bc.steps > 1000
+
+
+def test_session_and_driver_select_the_engine(tmp_path, capsys):
+    session = compiled("print(1 + 2);")
+    session.execute(engine="bytecode")
+    phase = session.timings_json()["phases"][-1]
+    assert phase["engine"] == "bytecode" and phase["instructions"] == 3 and session.vm.output == ["3"]
+
+    path = tmp_path / "p.cps"
+    path.write_text('print("hola"); let xs: integer[] = [1]; print(xs[2]);', encoding="utf-8")
+    assert Driver.main(["Driver.py", str(path), "--run", "--engine", "bytecode"]) == 1
+    assert capsys.readouterr().out.splitlines() == ["hola", "Error en ejecución: índice fuera de rango: 2"]
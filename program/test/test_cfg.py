@@ -0,0 +1,125 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+from src.codeGenerator.QuadStore import QuadStore
+from src.optimizer.ControlFlowGraph import build_cfgs
+
+# ---------- helpers ----------
+def cfgs_of(src: str):
+    session = CompilerSession(src, error_listeners=[]).run()
+    assert session.errors.errors == []
+    return {cfg.name: cfg for cfg in session.cfgs}
+
+def store(*rows):
+    return QuadStore({"id": i, "op": op, "arg1": a1, "arg2": a2, "result": r}
+                     for i, (op, a1, a2, r) in enumerate(rows))
+
+def edges(cfg):
+    return {b.id: sorted(b.succs) for b in cfg.blocks}
+
+# ---------- tests ----------
+def test_functions_get_their_own_cfg():
+    cfgs = cfgs_of("""
+    function f(n: integer): integer { return n + 1; }
+    let x: integer = f(2);
+    print(x);
+    """)
+    assert list(cfgs) == ["<main>", "func_f"]
+    main = cfgs["<main>"]
+    # El top-level no incluye el cuerpo de f
+    main_ops = [q["op"] for b in main.blocks for q in main.block_quads(b)]
+    assert "return" not in main_ops and "endfunc" not in main_ops
+    assert main.block_of(0) is None
+    assert cfgs["func_f"].blocks[0].labels == ["func_f"]
+
+
+def test_if_else_diamond_and_dominators():
+    cfg = cfgs_of("""
+    let x: integer = 3;
+    if (x > 2) { print(x); } else { print(0); }
+    print(1);
+    """)["<main>"]
+    assert edges(cfg) == {0: [1, 2], 1: [3], 2: [3], 3: []}
+    assert cfg.blocks[3].idom == 0
+    assert cfg.dominates(0, 3) and not cfg.dominates(1, 3)
+    assert cfg.loops == []
+
+
+def test_nested_loops_depth_and_latches():
+    cfg = cfgs_of("""
+    function f(n: integer): integer {
+      let s: integer = 0;
+      for (let i: integer = 0; i < n; i = i + 1) {
+        while (s < 10) { s = s + i; }
+      }
+      return s;
+    }
+    """)["func_f"]
+    assert len(cfg.loops) == 2
+    outer, inner = cfg.loops
+    assert cfg.target("Lfor_test_1").id == outer.header
+    assert cfg.target("Lwhile_test_5").id == inner.header
+    assert inner.blocks < outer.blocks and inner.parent is outer
+    assert cfg.blocks[inner.header].loop_depth == 2
+    assert cfg.target("Lfor_end_4").loop_depth == 0
+    for loop in cfg.loops:
+        assert all(cfg.dominates(loop.header, b) for b in loop.blocks)
+
+
+def test_preheader_goes_before_the_label_the_latch_jumps_to():
+    cfg = cfgs_of("""
+    let i: integer = 0;
+    if (i > 1) { print(i); }
+    while (i < 3) { i = i + 1; }
+    """)["<main>"]
+    loop = cfg.loops[0]
+    header = cfg.blocks[loop.header]
+    # La etiqueta del if y la del while quedan en el mismo bloque; el if salta a la primera
+    assert header.labels == ["Lif_else_1", "Lwhile_test_2"]
+    assert cfg.preheader(loop) == header.start + 1
+
+    # Un ciclo que empieza el procedimiento no tiene por dónde entrar
+    cfg = cfgs_of("do { print(1); } while (true);")["<main>"]
+    assert cfg.loops[0].header == cfg.entry
+    assert cfg.preheader(cfg.loops[0]) is None
+
+
+def test_try_blocks_reach_the_handler():
+    cfg = cfgs_of("""
+    let x: integer = 1;
+    try { x = x + 1; } catch (e) { print(e); }
+    """)["<main>"]
+    handler = next(b for b in cfg.blocks if b.labels and b.labels[0].startswith("Lcatch"))
+    protected = [b for b in cfg.blocks if b.handler == handler.id]
+    assert protected
+    assert all(handler.id in b.succs for b in protected)
+    assert handler.idom == 0
+
+
+def test_unreachable_duplicate_and_unresolved_labels():
+    cfg = build_cfgs(store(
+        ("goto", None, None, "A"),
+        ("print", 1, None, None),       # inalcanzable
+        ("label", None, None, "A"),
+        ("label", None, None, "A"),     # duplicada
+        ("ifFalse", "t1", None, "B"),   # sin destino
+        ("return", None, None, None),
+    ))[0]
+    assert edges(cfg) == {0: [2], 1: [2], 2: [3], 3: []}
+    assert not cfg.reachable(1) and cfg.dominators(1) == []
+    assert cfg.duplicate_labels == ["A"]
+    assert cfg.unresolved == [(2, "B")]
+    assert cfg.exits() == [cfg.blocks[3]]
+
+
+def test_session_reports_cfg_phase_and_json():
+    session = CompilerSession("let i: integer = 0; while (i < 3) { i = i + 1; }", error_listeners=[]).run()
+    phase = session.timings_json()["phases"][-1]
+    assert phase["phase"] == "cfg" and phase["loops"] == 1
+    js = session.cfgs[0].to_json()
+    header = js["loops"][0]["header"]
+    assert js["blocks"][header]["labels"][0].startswith("Lwhile_test")
+    assert js["blocks"][header]["first"] == session.quadruples.index_of(js["blocks"][header]["first"])
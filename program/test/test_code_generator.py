@@ -1,12 +1,11 @@
 import os, sys
-from antlr4 import InputStream, CommonTokenStream, ParseTreeWalker # type: ignore
+from antlr4 import InputStream, ParseTreeWalker # type: ignore
 
 # Asegura que Python vea los módulos en /program
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from CompiscriptLexer import CompiscriptLexer
-from CompiscriptParser import CompiscriptParser
 from src.utils.Errors import Error
+from src.parser.TwoStageParser import parse_program
 from src.symbolTable.SymbolTableBuilder import SymbolTableBuilder
 from src.typeChecker.TypeChecker import TypeChecker
 from src.utils.Temp import TempManager
@@ -14,12 +13,8 @@ from src.codeGenerator.CodeGenerator import CodeGenerator
 
 # ---------- helpers ----------
 def parse_src(src: str):
-    inp = InputStream(src)
-    lex = CompiscriptLexer(inp)
-    ts  = CommonTokenStream(lex)
-    parser = CompiscriptParser(ts)
-    tree = parser.program()
-    return parser, tree
+    parsed = parse_program(InputStream(src))
+    return parsed.parser, parsed.tree
 
 def build_symbols(tree):
     errors = Error()
@@ -578,3 +573,93 @@ def test_switch_incompatible_case_type_failure():
 
     assert errors.errors, "Se esperaba error por case incompatible con switch(bool)"
 
+
+
+# ----- QuadStore
+def test_quad_store_behaves_like_the_list_of_dicts():
+    import json
+    from src.codeGenerator.QuadStore import QuadStore
+    src = """
+    let x: integer = 1;
+    let y: float = 1.0;
+    let ok: boolean = true;
+    if (x < 2) { x = x + 1; }
+    """
+    parser, tree = parse_src(src)
+    cg = gen_code(tree)
+    quads = cg.quadruples
+    as_dicts = quads.to_json()
+
+    assert isinstance(quads, QuadStore)
+    assert quads == as_dicts and len(quads) == len(as_dicts)
+    assert [dict(q) for q in quads] == as_dicts
+    assert repr(quads[-1]) == repr(as_dicts[-1])
+    assert quads[1:3] == as_dicts[1:3]
+    assert quads.by_id(2) == as_dicts[2]
+    # 1, 1.0 y True no se mezclan al internar
+    assert [type(q["arg1"]) for q in quads if q["op"] == "="][:3] == [type(d["arg1"]) for d in as_dicts if d["op"] == "="][:3]
+    assert json.loads(quads.to_json_text()) == json.loads(json.dumps(as_dicts))
+
+def test_quad_store_slice_extend_and_shift():
+    from src.codeGenerator.QuadStore import QuadStore
+    store = QuadStore([
+        {"id": 0, "op": "label", "arg1": None, "arg2": None, "result": "L1"},
+        {"id": 1, "op": "+", "arg1": "a", "arg2": 1, "result": "t1"},
+        {"id": 2, "op": "goto", "arg1": None, "arg2": None, "result": "L1"},
+    ])
+    tail = store.slice(1)
+    assert [q["id"] for q in tail] == [1, 2]
+
+    moved = store.shifted(10, lambda label: label + "x", {"label", "goto"})
+    assert [q["id"] for q in moved] == [10, 11, 12]
+    assert [q["result"] for q in moved] == ["L1x", "t1", "L1x"]
+    assert store[0]["result"] == "L1"
+
+    other = QuadStore()
+    other.extend(moved)
+    other.extend(tail)
+    assert len(other) == 5 and other[-1] == tail[-1]
+
+def test_logical_operators_short_circuit_with_unique_labels():
+    src = """
+    function f(): boolean { print("f"); return true; }
+    let a: integer = 1;
+    if (a > 0 && a < 9 && f()) { print(a); }
+    if (a > 0 || f()) { print(a); }
+    while (!(a >= 3)) { a = a + 1; }
+    """
+    parser, tree = parse_src(src)
+    quads = [(q["op"], q["arg1"], q["arg2"], q["result"]) for q in gen_code(tree).quadruples]
+
+    # Nada se materializa en un temporal 1/0: cada operando salta directo
+    assert not any(op == "=" and a in (0, 1, "0", "1") and str(r).startswith("t") for op, a, _, r in quads)
+    # `f()` se llama después de los saltos de los operandos anteriores
+    first_call = next(i for i, q in enumerate(quads) if q[0] == "call")
+    assert [q[0] for q in quads[first_call - 4:first_call]] == [">", "ifFalse", "<", "ifFalse"]
+    # En el `||` un operando verdadero salta al cuerpo sin evaluar f()
+    second_call = [i for i, q in enumerate(quads) if q[0] == "call"][1]
+    assert quads[second_call - 1][0] == "ifTrue"
+    # `!` invierte el salto del while
+    assert any(op == "ifTrue" and str(r).startswith("Lwhile_end_") for op, _, _, r in quads)
+
+    labels = [r for op, _, _, r in quads if op == "label"]
+    assert len(labels) == len(set(labels))
+    targets = {r for op, _, _, r in quads if op in ("goto", "ifFalse", "ifTrue")}
+    assert None not in targets and targets <= set(labels)
+
+def test_logical_value_and_ternary_use_jumps():
+    src = """
+    let a: integer = 1;
+    let b: integer = 2;
+    let ok: boolean = a > b || b > 0 || a == 1;
+    let m: integer = a > b ? a : b;
+    """
+    parser, tree = parse_src(src)
+    quads = [(q["op"], q["arg1"], q["arg2"], q["result"]) for q in gen_code(tree).quadruples]
+    ops = [q[0] for q in quads]
+
+    # Los tres operandos del || se evalúan (antes solo se usaban el primero y el segundo)
+    assert ops.count("==") == 1
+    assert ("=", 1, None, "t1") in quads and ("=", 0, None, "t1") in quads
+    assert ("=", "a", None, "t1") in quads and ("=", "b", None, "t1") in quads
+    assert quads[-1] == ("=", "t1", None, "m")
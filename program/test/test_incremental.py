@@ -0,0 +1,129 @@
+import os, sys
+from antlr4 import InputStream # type: ignore
+from antlr4.tree.Tree import TerminalNode # type: ignore
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parser.TwoStageParser import parse_program
+from src.incremental.IncrementalParser import IncrementalDocument
+from src.pipeline.CompilerSession import CompilerSession
+from src.server.DocumentStore import DocumentStore
+
+SOURCE = """let a: integer = 1;
+function twice(x: integer): integer {
+    return x * 2;
+}
+let b: integer = twice(a);
+if (b > 1) {
+    print("grande");
+}
+let c: integer = b + 3;
+"""
+
+
+def token_sig(tokens):
+    return [(t.type, t.text, t.start, t.stop, t.line, t.column, t.tokenIndex) for t in tokens]
+
+def tree_sig(node):
+    if isinstance(node, TerminalNode):
+        return (node.symbol.type, node.symbol.tokenIndex)
+    return (type(node).__name__, node.start.tokenIndex, node.stop.tokenIndex if node.stop else None,
+            tuple(tree_sig(c) for c in node.children or []))
+
+def assert_matches_full_parse(doc):
+    ref = parse_program(InputStream(doc.text), [])
+    ref.tokens.fill()
+    assert token_sig(doc.tokens) == token_sig(ref.tokens.tokens)
+    assert tree_sig(doc.tree) == tree_sig(ref.tree)
+
+
+# ---------- tests ----------
+def test_edit_inside_statement_is_incremental():
+    doc = IncrementalDocument(SOURCE, [])
+    pos = SOURCE.index("b + 3")
+    stats = doc.apply_edit(pos + 4, pos + 5, "30")
+
+    assert stats.mode == "incremental"
+    assert stats.reparsed <= 3
+    assert doc.mode == "INCR"
+    assert_matches_full_parse(doc)
+
+def test_following_tokens_shift_lines_and_columns():
+    doc = IncrementalDocument(SOURCE, [])
+    doc.update(SOURCE.replace("let a: integer = 1;", "let a: integer =\n    1 + 1;"))
+
+    assert doc.last_edit.mode == "incremental"
+    last = [t for t in doc.tokens if t.text == "c"][0]
+    assert (last.line, last.column) == (10, 4)
+    assert_matches_full_parse(doc)
+
+def test_typing_a_statement_keystroke_by_keystroke():
+    doc = IncrementalDocument(SOURCE, [])
+    pos = SOURCE.index("let b")
+    snippet = "while (a < 10) { a = a + 1; }\n"
+    for i in range(1, len(snippet) + 1):
+        stats = doc.update(SOURCE[:pos] + snippet[:i] + SOURCE[pos:])
+        assert stats.mode == "incremental"
+    # Con el código otra vez válido, el árbol empalmado coincide con un parse completo
+    assert_matches_full_parse(doc)
+
+def test_syntax_errors_stay_inside_the_region():
+    doc = IncrementalDocument(SOURCE, [])
+    broken = SOURCE.replace("return x * 2;", "return x * ;")
+    doc.update(broken)
+    assert doc.last_edit.mode == "incremental"
+
+    doc.update(SOURCE)
+    assert_matches_full_parse(doc)
+
+def test_statement_split_by_error_recovery_is_reparsed_whole():
+    doc = IncrementalDocument(SOURCE, [])
+    # Sin el `)` la recuperación parte la sentencia en varias top-level
+    broken = SOURCE.replace("twice(a);", "twice(a;")
+    doc.update(broken)
+    assert len(doc.tree.children) > len(parse_program(InputStream(SOURCE), []).tree.children)
+
+    doc.update(SOURCE)
+    assert doc.last_edit.mode == "incremental"
+    assert_matches_full_parse(doc)
+    session = CompilerSession(SOURCE, error_listeners=[], parsed=doc.parse_result()).run()
+    assert session.errors.errors == []
+    assert session.quadruples == CompilerSession(SOURCE, error_listeners=[]).run().quadruples
+
+def test_unclosed_block_comment_falls_back_to_full_parse():
+    doc = IncrementalDocument(SOURCE, [])
+    pos = SOURCE.index("let b")
+    stats = doc.apply_edit(pos, pos, "/* ")
+
+    assert stats.mode == "full"
+    assert stats.reason
+    assert_matches_full_parse(doc)
+
+def test_session_reuses_incremental_parse():
+    doc = IncrementalDocument(SOURCE, [])
+    code = SOURCE.replace("b + 3", "b + 4")
+    doc.update(code)
+
+    incremental = CompilerSession(code, error_listeners=[], parsed=doc.parse_result()).run()
+    full = CompilerSession(code, error_listeners=[]).run()
+
+    assert incremental.parsed.mode == "INCR"
+    assert incremental.quadruples == full.quadruples
+    assert incremental.errors.errors == full.errors.errors
+
+def test_document_store_is_bounded():
+    store = DocumentStore(max_docs=2)
+    seen = []
+    handler = lambda parsed, edit, analyzer: seen.append(edit.mode)
+
+    store.run("a", SOURCE, handler, [])
+    store.run("a", SOURCE.replace("b + 3", "b + 5"), handler, [])
+    store.run("b", SOURCE, handler, [])
+    store.run("c", SOURCE, handler, [])
+
+    assert seen == ["full", "incremental", "full", "full"]
+    stats = store.stats()
+    assert stats["documents"] == 2 and stats["evictions"] == 1
+    assert stats["incremental"] == 1
+    assert not store.close("a")
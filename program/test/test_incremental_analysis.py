@@ -0,0 +1,132 @@
+import os, sys, re, json
+import pytest
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.incremental.IncrementalParser import IncrementalDocument
+from src.incremental.IncrementalAnalysis import IncrementalAnalyzer
+from src.pipeline.CompilerSession import CompilerSession
+from src.server.Analysis import _build_symtab_json, document_payload, analysis_payload
+from src.server.DocumentStore import DocumentStore
+
+SOURCE = """let base: integer = 10;
+function scale(x: integer): integer {
+    let s: integer = 0;
+    for (let i: integer = 0; i < x; i = i + 1) {
+        s = s + base;
+    }
+    return s;
+}
+class Animal {
+    let name: string;
+    function speak(): string { return this.name; }
+}
+class Dog : Animal {
+    function bark(): string { return "guau"; }
+}
+let d: Dog = new Dog();
+let total: integer = scale(3);
+if (total > 5) {
+    print("grande " + d.speak());
+}
+let other: integer = 1 + 2;
+"""
+
+
+def canon(node):
+    return (node["name"], json.dumps(node["symbols"], sort_keys=True),
+            tuple(sorted(canon(c) for c in node["children"])))
+
+def result(session):
+    st = session.symbols
+    errors = [re.sub(r" at 0x[0-9a-f]+", "", e) for e in session.errors.errors]
+    return errors, session.quadruples, canon(_build_symtab_json(st.globalScope, list(st.scopes.values())))
+
+class Editor:
+    def __init__(self, text):
+        self.doc = IncrementalDocument(text, [])
+        self.analyzer = IncrementalAnalyzer()
+        self.analyze()
+
+    def analyze(self):
+        self.session = CompilerSession(self.doc.text, error_listeners=[], parsed=self.doc.parse_result(),
+                                       analyzer=self.analyzer).run()
+        full = CompilerSession(self.doc.text, error_listeners=[]).run()
+        assert result(self.session) == result(full)
+        return self.session
+
+    def replace(self, old, new):
+        assert old in self.doc.text
+        self.doc.update(self.doc.text.replace(old, new, 1))
+        return self.analyze()
+
+
+# ---------- tests ----------
+def test_first_run_analyzes_everything():
+    ed = Editor(SOURCE)
+    assert ed.analyzer.reused == 0
+    assert ed.session.errors.errors == []
+
+def test_edit_rechecks_only_the_reparsed_statements():
+    ed = Editor(SOURCE)
+    ed.replace("1 + 2", "1 + 5")
+    # `other` y su vecino re-parseado (el if); nadie los lee
+    assert ed.analyzer.rebuilt <= 3
+    assert ed.analyzer.reused >= 7
+    assert ed.analyzer.code_reused >= 7
+
+def test_declaration_edit_rechecks_its_readers():
+    ed = Editor(SOURCE)
+    ed.replace("s = s + base;", "s = s + base * 2;")
+    assert 0 < ed.analyzer.rebuilt < len(ed.session.tree.children)
+
+def test_type_change_reaches_transitive_readers():
+    ed = Editor(SOURCE)
+    session = ed.replace("let base: integer = 10;", 'let base: string = "x";')
+    assert session.errors.errors
+    session = ed.replace('let base: string = "x";', "let base: integer = 10;")
+    assert session.errors.errors == []
+
+def test_reused_errors_and_code_follow_shifted_lines():
+    ed = Editor(SOURCE + "let bad: integer = \"no\";\n")
+    before = list(ed.session.errors.errors)
+    session = ed.replace("let base: integer = 10;", "let base: integer = 10;\n\n\n")
+    assert ed.analyzer.reused > 0
+    assert session.errors.errors != before
+    assert "[line 25:" in session.errors.errors[0]
+
+def test_removed_superclass_reanalyzes_subclass():
+    ed = Editor(SOURCE)
+    session = ed.replace("class Animal {", "class Animal2 {")
+    assert any("Animal" in e for e in session.errors.errors)
+    ed.replace("class Animal2 {", "class Animal {")
+
+def test_document_store_keeps_analysis_between_requests():
+    store = DocumentStore()
+    document_payload(store, "doc", SOURCE)
+    payload = json.loads(document_payload(store, "doc", SOURCE.replace("1 + 2", "1 + 3")))
+
+    symbols = [p for p in payload["timings"]["phases"] if p["phase"] == "symbols"][0]
+    assert payload["edit"]["mode"] == "incremental"
+    assert symbols["reused"] > symbols["rechecked"]
+
+def test_document_store_drops_a_document_whose_analysis_failed(monkeypatch):
+    store = DocumentStore()
+    document_payload(store, "doc", SOURCE)
+
+    # Falla después de actualizar la tabla de símbolos: el analizador queda a medias
+    def crash(self, errors, parser):
+        raise RuntimeError("boom")
+    with monkeypatch.context() as m:
+        m.setattr(IncrementalAnalyzer, "type_check", crash)
+        with pytest.raises(RuntimeError):
+            document_payload(store, "doc", SOURCE.replace("1 + 2", "1 + 3"))
+    assert store.stats()["failures"] == 1 and len(store) == 0
+
+    code = SOURCE.replace("1 + 2", "1 + 4")
+    payload = json.loads(document_payload(store, "doc", code))
+    full = json.loads(analysis_payload(code))
+    assert payload["edit"]["mode"] == "full"
+    assert (payload["errors"], payload["tac"]) == (full["errors"], full["tac"])
+    assert canon(payload["symtab"]) == canon(full["symtab"])
@@ -0,0 +1,84 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+from src.memory.MemoryLayout import plan_memory
+from src.utils.Types import Type, ArrayType, size_of
+import Driver
+
+# ---------- helpers ----------
+def planned(src: str):
+    session = CompilerSession(src, error_listeners=[]).run()
+    assert session.errors.errors == []
+    return session, session.memory_layout()
+
+def offsets(slots):
+    return {name: (s.offset, s.size) for name, s in slots.items()}
+
+# ---------- tests ----------
+def test_sizes_and_scope_addresses_follow_the_declared_types():
+    assert [size_of(t) for t in (Type.INT, Type.FLOAT, Type.BOOL, Type.STRING, ArrayType(Type.FLOAT, 1))] == [4, 8, 1, 4, 4]
+    session, _ = planned("""
+    let ok: boolean = true;
+    let x: float = 1.5;
+    function f(): integer { return 1; }
+    let n: integer = 2;
+    """)
+    g = session.symbols.globalScope
+    # x se alinea a 8; las funciones no ocupan lugar
+    assert [(s.address, s.size) for s in (g.symbols["ok"], g.symbols["x"], g.symbols["f"], g.symbols["n"])] == \
+        [(0, 1), (8, 8), (16, 0), (16, 4)]
+    assert g.offset == 20
+
+
+def test_frames_pack_locals_by_alignment_and_reserve_temps():
+    _, layout = planned("""
+    function f(flag: boolean, n: integer): integer {
+        let done: boolean = false;
+        let ratio = 0.5;
+        let k: integer = n * 2;
+        if (flag) { let k: integer = 1; let s: string = "x"; print(s + k); }
+        return k;
+    }
+    print(f(true, 2));
+    """)
+    frame = layout.frame("func_f")
+    assert offsets(frame.params) == {"flag": (4, 4), "n": (0, 4)}  # el primero más arriba; un bool se promueve a palabra
+    # ratio se infiere float; las dos k comparten lugar
+    assert offsets(frame.locals) == {"ratio": (0, 8), "k": (8, 4), "s": (12, 4), "done": (16, 1)}
+    assert frame.temps > 0 and frame.temp_base == 20
+    assert frame.size % 8 == 0 and frame.size >= frame.temp_offset(frame.temps) + 8
+    assert frame.func.name == "f"
+
+
+def test_objects_put_inherited_fields_first_at_the_same_offsets():
+    _, layout = planned("""
+    class A { let x: integer = 1; let on: boolean = true; function get(k: integer): integer { return this.x + k; } }
+    class B : A { let name: string = "b"; let w: float = 2.0; let x: integer = 3; }
+    class C : B { let c: boolean = false; }
+    let c: C = new C();
+    print(c.get(1));
+    """)
+    a, b, c = layout.object("A"), layout.object("B"), layout.object("C")
+    assert offsets(a.fields) == {"x": (4, 4), "on": (8, 1)} and a.size == 12
+    assert offsets(b.fields) == {"x": (4, 4), "on": (8, 1), "w": (16, 8), "name": (24, 4)}
+    assert b.size == 32 and c.base is b
+    assert offsets(c.fields) == {**offsets(b.fields), "c": (32, 1)} and c.size == 40
+    assert offsets(layout.frame("func_A_get").params) == {"this": (4, 4), "k": (0, 4)}
+
+
+def test_globals_are_a_data_area_and_session_outputs_include_the_layout(tmp_path, capsys):
+    session, layout = planned("let flag: boolean = true; let n: integer = 3; print(n);")
+    main = layout.frame("<main>")
+    assert offsets(main.locals) == {"n": (0, 4), "flag": (4, 1)} and main.locals_size == 5
+    data = layout.to_json()
+    assert data["frames"][0]["name"] == "<main>" and data["frames"][0]["locals"][1]["type"] == "bool"
+    assert plan_memory(session.symbols).frame("<main>").temps == 0
+
+    path = tmp_path / "p.cps"
+    path.write_text("class P { let x: integer = 1; } let p: P = new P(); print(p.x);", encoding="utf-8")
+    assert Driver.main(["Driver.py", str(path), "--layout"]) == 0
+    out = capsys.readouterr().out
+    assert "class P: 8 bytes" in out and "  +4 x (4 bytes, int)" in out
@@ -0,0 +1,193 @@
+import os, sys
+import pytest
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+from src.mips.MipsSimulator import assemble, MipsSimulator, AssemblyError
+from src.mips.RegisterAllocator import Interval, linear_scan
+from src.mips.MipsGenerator import compile_mips, MipsError
+import Driver
+
+# ---------- helpers ----------
+def compiled(src: str, level: int = 0):
+    session = CompilerSession(src, error_listeners=[], opt_level=level).run()
+    assert session.errors.errors == []
+    return session
+
+def both(src: str, level: int = 0, **kwargs):
+    """Corre el programa en la VM y en MIPS; devuelve (vm, simulador)."""
+    session = compiled(src, level)
+    return session.execute(**kwargs), session.execute(engine="mips", **kwargs)
+
+def simulate(asm: str, **kwargs):
+    return MipsSimulator(assemble(asm), **kwargs).run()
+
+def interval(name, start, end, weight=1, crosses_call=False):
+    iv = Interval(name, start)
+    iv.end, iv.weight, iv.crosses_call = end, weight, crosses_call
+    return {name: iv}
+
+# ---------- tests ----------
+def test_simulator_runs_assembly_and_counts_memory_accesses():
+    sim = simulate("""
+        .data
+    xs: .word 3, 4, 5
+    msg: .asciiz "suma: "
+        .text
+    main:
+        la $t0, xs
+        li $t1, 0
+        li $t2, 3
+    loop:
+        lw $t3, 0($t0)
+        addu $t1, $t1, $t3
+        addiu $t0, $t0, 4
+        addiu $t2, $t2, -1
+        bnez $t2, loop
+        sw $t1, xs
+        la $a0, msg
+        li $v0, 4
+        syscall
+        lw $a0, xs
+        li $v0, 1
+        syscall
+        li $a0, 10
+        li $v0, 11
+        syscall
+        li $v0, 10
+        syscall
+    """)
+    assert sim.output == ["suma: 12"] and sim.error is None
+    assert (sim.loads, sim.stores) == (4, 1)
+    with pytest.raises(AssemblyError):
+        assemble("main: frob $t0, $t1")
+    assert simulate("main: j main", max_steps=100).error == "se superó el límite de 100 pasos"
+
+
+def test_linear_scan_keeps_call_crossing_values_in_saved_registers():
+    ivs = {}
+    ivs.update(interval("a", 0, 10, crosses_call=True))
+    ivs.update(interval("b", 1, 3))
+    allocated = {iv.name: iv.register for iv in linear_scan(ivs)}
+    assert allocated == {"a": "$s0", "b": "$t0"}
+
+    # Con un solo registro se queda en él el más usado; el otro va a memoria
+    ivs = {}
+    ivs.update(interval("cold", 0, 10, weight=2))
+    ivs.update(interval("hot", 1, 5, weight=100))
+    allocated = {iv.name: iv.register for iv in linear_scan(ivs, caller_saved=("$t0",), callee_saved=())}
+    assert allocated == {"cold": None, "hot": "$t0"}
+
+
+def test_programs_give_the_same_output_as_the_vm():
+    src = """
+    let shared: integer = 5;
+    let words: string[] = ["uno", "dos", "tres"];
+    function fib(n: integer): integer { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); }
+    function bump(k: integer): integer { shared = shared + k; return shared; }
+    function outer(n: integer): integer {
+        function twice(m: integer): integer { return m * 2; }
+        return twice(n) + 1;
+    }
+    function join(xs: string[]): string {
+        let out: string = "";
+        foreach (w in xs) { if (w != "dos") { out = out + w + ","; } }
+        return out;
+    }
+    let total: integer = 0;
+    for (let i: integer = 0; i < 10; i = i + 1) { if (i % 3 == 0 || i == 7) { total = total + i * i; } }
+    print(fib(15));
+    print(bump(2) + bump(3) + shared);
+    print(outer(20));
+    print(join(words) + total + true);
+    print(words[1] == "dos");
+    print(-2147483647 - 1);
+    """
+    for level in (0, 3):
+        vm, mips = both(src, level)
+        assert mips.error is None
+        assert mips.output == vm.output == ["610", "27", "41", "uno,tres,1751", "1", "-2147483648"]
+
+
+def test_values_that_do_not_fit_in_registers_are_spilled_to_the_frame():
+    width = 24
+    src = f"""
+    function mix(k: integer): integer {{
+        {" ".join(f"let a{i}: integer = {i};" for i in range(width))}
+        for (let i: integer = 0; i < k; i = i + 1) {{
+            {" ".join(f"a{i} = a{i} + a{(i + 1) % width} % 7;" for i in range(width))}
+        }}
+        return {" + ".join(f"a{i}" for i in range(width))};
+    }}
+    print(mix(30));
+    """
+    session = compiled(src)
+    allocation = compile_mips(session.quadruples, session.symbols).allocations["func_mix"]
+    assert allocation.spilled and len(allocation.registers) >= 16
+
+    vm, mips = both(src)
+    assert mips.output == vm.output
+    plain = MipsSimulator(assemble(compile_mips(session.quadruples, session.symbols, allocate=False).source)).run()
+    assert plain.output == vm.output
+    assert mips.loads + mips.stores < plain.loads + plain.stores
+
+
+def test_frames_and_globals_follow_the_memory_layout():
+    src = """
+    let flag: boolean = false;
+    let count: integer = 0;
+    function toggle(): integer { flag = !flag; count = count + 1; if (flag) { return 1; } return 0; }
+    print(toggle()); print(toggle()); print(flag); print(count);
+    """
+    vm, mips = both(src)
+    assert mips.output == vm.output == ["1", "0", "0", "2"]
+    session = compiled(src)
+    source = compile_mips(session.quadruples, session.symbols).source
+    # count en $gp+0 y el bool en el byte siguiente, como los pone plan_memory
+    assert "_globals: .space 8" in source
+    assert "sb $t8, 4($gp)" in source and "lbu $t8, 4($gp)" in source and "sw $t8, 0($gp)" in source
+
+
+def test_runtime_errors_match_the_vm():
+    cases = [
+        ("let xs: integer[] = [1, 2]; print(xs[0]); print(xs[2]);", "índice fuera de rango: 2"),
+        ("let z: integer = 0; print(7 % z);", "módulo entre cero"),
+        ("function rec(n: integer): integer { return rec(n + 1); } print(rec(0));", "desbordamiento de pila"),
+    ]
+    for src, error in cases:
+        vm, mips = both(src)
+        assert mips.output == vm.output
+        assert mips.error == vm.error == error
+
+
+def test_unsupported_features_raise_mips_error():
+    for src in ("class P { let x: integer; } let p: P = new P(); print(p.x);",
+                'try { print(1); } catch (e) { print(e); }',
+                "print(1 / 2);",
+                "let f: float = 1.5; print(f);",
+                "function outer(): integer { let a: integer = 1; function inner(): integer { return a; } return inner(); } print(outer());"):
+        session = compiled(src)
+        with pytest.raises(MipsError):
+            compile_mips(session.quadruples, session.symbols)
+
+
+def test_session_and_driver_select_the_mips_engine(tmp_path, capsys):
+    session = compiled("print(1 + 2);")
+    session.execute(engine="mips")
+    phase = session.timings_json()["phases"][-1]
+    assert phase["engine"] == "mips" and phase["instructions"] > 0 and session.vm.output == ["3"]
+
+    path = tmp_path / "p.cps"
+    path.write_text('print("hola"); let xs: integer[] = [1]; print(xs[2]);', encoding="utf-8")
+    assert Driver.main(["Driver.py", str(path), "--run", "--engine", "mips"]) == 1
+    assert capsys.readouterr().out.splitlines() == ["hola", "Error en ejecución: índice fuera de rango: 2"]
+
+    assert Driver.main(["Driver.py", str(path), "--mips"]) == 0
+    listing = capsys.readouterr().out
+    assert "main:" in listing and "jal _print_str" in listing
+
+    path.write_text("print(1 / 2);", encoding="utf-8")
+    assert Driver.main(["Driver.py", str(path), "--run", "--engine", "mips"]) == 1
+    assert capsys.readouterr().out.startswith("Error MIPS: ")
@@ -0,0 +1,276 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+from src.optimizer.Tac import evaluate
+import Driver
+
+# ---------- helpers ----------
+def optimize(src: str, level: int = 1):
+    session = CompilerSession(src, error_listeners=[], opt_level=level).run()
+    assert session.errors.errors == []
+    return session
+
+def tac(session):
+    return [(q["op"], q["arg1"], q["arg2"], q["result"]) for q in session.quadruples]
+
+# ---------- tests ----------
+def test_arithmetic_is_folded_into_one_assignment():
+    session = optimize("let x: integer = 4 + 2 * 2 + 4 * 2;")
+    assert tac(session) == [("=", 16, None, "x")]
+    assert session.optimizer.removed == 4
+
+
+def test_level_zero_keeps_generated_code():
+    session = CompilerSession("let x: integer = 4 + 2 * 2;", error_listeners=[]).run()
+    assert session.optimizer is None
+    assert [q["op"] for q in session.quadruples] == ["*", "+", "="]
+    phase = session.timings_json()["phases"][4]
+    assert phase["phase"] == "optimize" and phase["level"] == 0 and "removed" not in phase
+
+
+def test_constants_propagate_across_blocks_and_fold_branches():
+    session = optimize("""
+    let x: integer = 3;
+    let y: integer = 0;
+    if (x > 2 && x < 9) { y = x * 2; } else { y = 1; }
+    print(y);
+    """)
+    code = tac(session)
+    assert ("print", 6, None, None) in code
+    assert not any(op in ("ifFalse", "ifTrue", "&&", ">") for op, *_ in code)
+
+
+def test_loop_variables_are_not_folded():
+    session = optimize("""
+    let i: integer = 0;
+    while (i < 3) { i = i + 1; }
+    print(i);
+    """)
+    code = tac(session)
+    assert ("<", "i", 3, "t1") in code
+    assert ("+", "i", 1, "t1") in code
+    assert ("print", "i", None, None) in code
+
+
+def test_const_declarations_reach_functions_but_globals_do_not_survive_calls():
+    session = optimize("""
+    const N: integer = 2 * 3;
+    let g: integer = 5;
+    function f(a: integer): integer { return a + N; }
+    print(f(1));
+    print(g);
+    print(N);
+    """)
+    code = tac(session)
+    assert ("+", "a", 6, "t1") in code
+    # f podría haber cambiado g: después de la llamada ya no se conoce
+    assert ("print", "g", None, None) in code
+    assert ("print", 6, None, None) in code
+
+
+def test_division_by_zero_and_overflow_are_left_for_runtime():
+    assert evaluate("/", 7, 0) is None
+    assert evaluate("%", 7, 0) is None
+    assert evaluate("*", 2 ** 20, 2 ** 20) is None
+    assert evaluate("/", 7, 2) == 3.5
+    assert evaluate("%", -7, 2) == -1
+    assert evaluate("+", '"a"', 1) == '"a1"'
+    assert evaluate("<", '"a"', 1) is None
+    assert evaluate("not", 0) == 1
+
+
+def test_catch_does_not_see_values_assigned_inside_try():
+    session = optimize("""
+    let x: integer = 1;
+    try { x = 2; print(x); } catch (e) { print(x); }
+    """)
+    prints = [a for op, a, _, _ in tac(session) if op == "print"]
+    assert prints == [2, "x"]
+
+
+def test_driver_reports_removed_quads(tmp_path, capsys):
+    src = tmp_path / "prog.cps"
+    src.write_text("let x: integer = 4 + 2 * 2 + 4 * 2;\nprint(x);\n")
+    assert Driver.main(["Driver.py", str(src), "-O1"]) == 0
+    out = capsys.readouterr().out
+    assert "'op': 'print', 'arg1': 16" in out
+    assert "Optimización -O1: 4 cuádruplos eliminados (constfold: 4, deadcode: 0)" in out
+
+
+def test_code_after_return_and_unused_labels_are_removed():
+    src = """
+    function f(a: integer): integer {
+      return a;
+      print(a);
+    }
+    let x: integer = 1;
+    if (x > 0) { print(x); }
+    """
+    # El type checker avisa del código muerto, pero CodeGenerator lo emite igual
+    plain = CompilerSession(src, error_listeners=[]).run()
+    assert ("print", "a", None, None) in tac(plain)
+    session = CompilerSession(src, error_listeners=[], opt_level=1).run()
+    assert tac(session) == [
+        ("label", None, None, "func_f"),
+        ("param", None, None, "a"),
+        ("return", "a", None, None),
+        ("endfunc", None, None, "f"),
+        ("=", 1, None, "x"),
+        ("print", 1, None, None),
+    ]
+
+
+def test_dead_locals_are_removed_but_globals_and_side_effects_stay():
+    code = tac(optimize("""
+    let g: integer = 0;
+    function f(a: integer, b: integer): integer {
+      let unused: integer = a * b;
+      let q: float = a / b;
+      g = a + 1;
+      return a;
+    }
+    print(f(1, 2));
+    """))
+    assert not any(r in ("unused", "q") for *_, r in code)
+    assert ("/", "a", "b", "t1") in code  # b puede ser 0: la división se queda
+    assert ("=", "t1", None, "g") in code
+
+
+def test_nested_function_writes_to_the_enclosing_local_stay():
+    code = tac(optimize("""
+    function outer(n: integer): integer {
+      let acc: integer = 0;
+      function step(k: integer): integer { if (k == 0) { return acc; } acc = acc + k; return step(k - 1); }
+      return step(n);
+    }
+    print(outer(10));
+    """))
+    assert ("+", "acc", "k", "t1") in code
+    assert ("=", "t1", None, "acc") in code
+
+
+def test_loops_and_try_structure_survive():
+    code = tac(optimize("""
+    let i: integer = 0;
+    while (i < 3) { i = i + 1; }
+    try { print(i); } catch (e) { print(0); }
+    """))
+    ops = [op for op, *_ in code]
+    assert ops.count("trybegin") == 1 and ops.count("tryend") == 1
+    labels = {r for op, a, b, r in code if op == "label"}
+    targets = {r for op, a, b, r in code if op in ("goto", "ifFalse", "ifTrue", "trybegin")}
+    assert labels == targets
+
+
+def test_repeated_array_reads_and_properties_are_computed_once():
+    session = optimize("""
+    class P {
+      let x: integer;
+      function sq(): integer { return this.x * this.x; }
+    }
+    function twice(a: integer[], i: integer): integer { return a[i] + a[i]; }
+    print(twice([1, 2], 1));
+    """, level=2)
+    code = tac(session)
+    ops = [op for op, *_ in code]
+    assert ops.count("getprop") == 1 and ("*", "t1", "t1", "t1") in code
+    assert ops.count("[]") == 1 and ("+", "t1", "t1", "t1") in code
+    assert [r.name for r in session.optimizer.reports] == ["constfold", "cse", "copyprop", "deadcode"]
+    assert [r.name for r in optimize("print(1);").optimizer.reports] == ["constfold", "deadcode"]
+
+
+def test_expression_available_on_every_path_is_reused():
+    code = tac(optimize("""
+    function f(a: integer, b: integer): integer {
+      let r: integer = 0;
+      if (a > b) { r = a * b + 1; } else { r = a * b - 1; }
+      return r + a * b;
+    }
+    print(f(3, 4));
+    """, level=2))
+    assert [op for op, *_ in code].count("*") == 2  # una por rama; la del return se reutiliza
+
+
+def test_stores_and_calls_invalidate_reused_values():
+    code = tac(optimize("""
+    let a: integer[] = [1, 2, 3];
+    let g: integer = 2;
+    function h(): integer { g = g + 1; a[0] = 7; return 0; }
+    function f(i: integer): integer {
+      let x: integer = a[i] * g;
+      a[i] = 5;
+      let y: integer = a[i] * g;
+      let z: integer = h();
+      return x + y + a[i] * g + z;
+    }
+    print(f(0));
+    """, level=2))
+    ops = [op for op, *_ in code]
+    assert ops.count("[]") == 3
+    assert ops.count("*") == 3
+
+
+def test_copies_are_propagated_and_removed():
+    code = tac(optimize("""
+    function f(a: integer): integer {
+      let b: integer = a;
+      let c: integer = b;
+      return c * 2;
+    }
+    print(f(3));
+    """, level=2))
+    body = code[code.index(("param", None, None, "a")) + 1:code.index(("endfunc", None, None, "f"))]
+    assert body == [("*", "a", 2, "t1"), ("return", "t1", None, None)]
+
+
+def test_foreach_length_is_hoisted_and_iterator_incremented_in_place():
+    session = optimize("""
+    function total(a: integer[]): integer {
+      let s: integer = 0;
+      foreach (v in a) { s = s + v; }
+      return s;
+    }
+    print(total([1, 2, 3]));
+    """, level=3)
+    code = tac(session)
+    header = code.index(("label", None, None, "Lforeach_test_1"))
+    assert code[header - 1] == ("len", "a", None, "t2")
+    assert [op for op, *_ in code].count("len") == 1
+    assert ("+", "t1", 1, "t1") in code[header:]
+    assert [r.name for r in session.optimizer.reports] == [
+        "constfold", "licm", "cse", "strength", "copyprop", "deadcode"]
+
+
+def test_invariant_property_reads_leave_the_loop_but_divisions_stay():
+    code = tac(optimize("""
+    class P {
+      let x: integer;
+      function scaled(n: integer, d: integer): integer {
+        let s: integer = 0;
+        let i: integer = 0;
+        while (i < n) { s = s + this.x * 2 + 100 / d; i = i + 1; }
+        return s;
+      }
+    }
+    """, level=3))
+    header = code.index(("label", None, None, "Lwhile_test_1"))
+    assert code[header - 2:header] == [("getprop", "this", "x", "t1"), ("*", "t1", 2, "t1")]
+    # con n = 0 la división no corre: no se puede sacar del ciclo
+    assert ("/", 100, "d", "t3") in code[header:]
+
+
+def test_index_multiplication_becomes_an_addition():
+    code = tac(optimize("""
+    function f(a: integer[], n: integer) {
+      for (let i: integer = 0; i < n; i = i + 1) { print(a[i * 4]); }
+    }
+    """, level=3))
+    header = code.index(("label", None, None, "Lfor_test_1"))
+    assert code[header - 1] == ("*", "i", 4, "t1")
+    loop = code[header:]
+    assert not any(op == "*" for op, *_ in loop)
+    assert ("[]", "a", "t1", "t2") in loop
+    assert loop.index(("+", "i", 1, "i")) + 1 == loop.index(("+", "t1", 4, "t1"))
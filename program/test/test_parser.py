@@ -0,0 +1,82 @@
+import os, sys
+from antlr4 import InputStream # type: ignore
+from antlr4.error.ErrorListener import ErrorListener # type: ignore
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parser.TwoStageParser import parse_program
+
+
+class CollectingListener(ErrorListener):
+    def __init__(self):
+        self.messages = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.messages.append(f"[line {line}:{column}] {msg}")
+
+
+# ---------- tests ----------
+def test_valid_program_uses_sll():
+    src = """
+    function add(a: integer, b: integer): integer {
+        return a + b;
+    }
+    let r: integer = add(1, 2) * 3;
+    """
+    listener = CollectingListener()
+    parsed = parse_program(InputStream(src), [listener])
+
+    assert parsed.mode == "SLL"
+    assert parsed.ll_time == 0.0
+    assert parsed.parser.getNumberOfSyntaxErrors() == 0
+    assert not listener.messages
+    assert parsed.tree.getText().startswith("functionadd")
+
+def test_syntax_error_falls_back_to_ll_with_diagnostics():
+    src = "let x: integer = ;"
+    listener = CollectingListener()
+    parsed = parse_program(InputStream(src), [listener])
+
+    assert parsed.mode == "LL"
+    assert parsed.parser.getNumberOfSyntaxErrors() == 1
+    assert len(listener.messages) == 1
+    assert listener.messages[0].startswith("[line 1:17]")
+
+def test_fallback_restores_default_strategy():
+    src = "let x = 1 +;"
+    parsed = parse_program(InputStream(src), [])
+
+    # tras el fallback el parser debe quedar en LL con la estrategia por defecto
+    assert type(parsed.parser._errHandler).__name__ == "DefaultErrorStrategy"
+    assert parsed.to_json()["mode"] == "LL"
+    assert parsed.elapsed >= parsed.ll_time > 0
+
+def test_dfa_cache_warm_save_and_load(tmp_path):
+    from src.parser import DfaCache
+
+    n = DfaCache.warm()
+    assert n > 0
+    counts = DfaCache.dfa_state_counts()
+    assert counts["parser"] > 0 and counts["lexer"] > 0
+
+    path = str(tmp_path / "dfa.pickle")
+    DfaCache.save(path)
+    assert DfaCache.load(path)
+
+    # con los DFAs cargados, reparsear el corpus no debe crear estados nuevos
+    DfaCache.warm()
+    assert DfaCache.dfa_state_counts() == counts
+
+    # y el parser sigue funcionando sobre programas fuera del corpus
+    parsed = parse_program(InputStream('function f(x: integer): integer { return x; }\nf("5");'), [])
+    assert parsed.mode == "SLL"
+    assert parsed.parser.getNumberOfSyntaxErrors() == 0
+
+def test_dfa_cache_rejects_foreign_file(tmp_path):
+    from src.parser import DfaCache
+
+    bogus = tmp_path / "dfa.pickle"
+    bogus.write_bytes(b"not a pickle")
+    assert not DfaCache.load(str(bogus))
+    assert not DfaCache.load(str(tmp_path / "missing.pickle"))
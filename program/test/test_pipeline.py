@@ -0,0 +1,86 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+
+
+# ---------- tests ----------
+def test_session_runs_all_phases():
+    src = """
+    function add(a: integer, b: integer): integer {
+        return a + b;
+    }
+    let r: integer = add(2, 3);
+    """
+    session = CompilerSession(src).run()
+
+    assert not session.errors.errors
+    assert [st.name for st in session.stats] == list(CompilerSession.PHASES)
+    assert any(q["op"] == "call" and q["arg1"] == "add" for q in session.quadruples)
+    assert "add" in session.symbols.globalScope.symbols
+
+def test_session_counters():
+    session = CompilerSession("let x: integer = 1 + 2;").run()
+
+    # let x : integer = 1 + 2 ; <EOF>
+    assert session.token_count == 10
+    assert session.node_count > session.token_count
+    assert session.quad_count == len(session.quadruples) == 2
+
+    timings = session.timings_json()
+    assert timings["quads"] == 2
+    assert timings["phases"][0]["mode"] == "SLL"
+    assert all(p["peakKb"] is None for p in timings["phases"])
+
+def test_session_tracks_memory_per_phase():
+    session = CompilerSession("let x: integer = 4 * 2;", track_memory=True).run()
+
+    assert all(st.peak_memory is not None and st.peak_memory >= 0 for st in session.stats)
+    assert session.stats[0].peak_memory > 0
+    assert "peak KB" in session.format_stats()
+
+def test_session_collects_semantic_errors():
+    session = CompilerSession('let x: integer = "hola";').run()
+
+    assert session.errors.errors
+    assert session.stats[2].counters["errors"] == len(session.errors.errors)
+
+def test_importing_the_session_does_not_load_the_backends():
+    import subprocess
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    code = ("import sys; import src.pipeline.CompilerSession; "
+            "print(sorted(m for m in sys.modules if m.startswith(('src.mips', 'src.vm.PythonBackend', 'src.vm.Bytecode'))))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+def _unwritable_checkout(monkeypatch, tmp_path):
+    import tempfile
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    monkeypatch.setattr(sys, "pycache_prefix", None)
+    monkeypatch.setattr(os, "access", lambda path, mode: False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+
+def test_bytecode_cache_fallback_is_private_to_the_user(monkeypatch, tmp_path):
+    import stat
+    from src.utils.Startup import ensure_bytecode_cache
+    _unwritable_checkout(monkeypatch, tmp_path)
+
+    prefix = ensure_bytecode_cache(str(tmp_path / "program"))
+
+    assert prefix == str(tmp_path / f"compiscript-pycache-{os.getuid()}")
+    assert sys.pycache_prefix == prefix
+    st = os.stat(prefix)
+    assert st.st_uid == os.getuid() and stat.S_IMODE(st.st_mode) == 0o700
+
+def test_bytecode_cache_refuses_a_shared_directory(monkeypatch, tmp_path):
+    from src.utils.Startup import ensure_bytecode_cache
+    _unwritable_checkout(monkeypatch, tmp_path)
+    shared = tmp_path / f"compiscript-pycache-{os.getuid()}"
+    shared.mkdir()
+    shared.chmod(0o777)
+
+    assert ensure_bytecode_cache(str(tmp_path / "program")) is None
+    assert sys.pycache_prefix is None
@@ -0,0 +1,119 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+from src.vm.Layout import local_names, local_types
+from src.vm.PythonBackend import compile_python
+import Driver
+
+PROGRAM = os.path.join(os.path.dirname(__file__), "..", "program.cps")
+
+# ---------- helpers ----------
+def compiled(src: str, level: int = 0):
+    session = CompilerSession(src, error_listeners=[], opt_level=level).run()
+    assert session.errors.errors == []
+    return session
+
+def both(src: str, level: int = 0, **kwargs):
+    """Corre el programa en la VM y traducido a Python; devuelve (vm, python)."""
+    session = compiled(src, level)
+    return session.execute(**kwargs), session.execute(engine="python", **kwargs)
+
+def translated(src: str, level: int = 0):
+    session = compiled(src, level)
+    return compile_python(session.quadruples, local_names(session.symbols), local_types(session.symbols))
+
+# ---------- tests ----------
+def test_program_gives_the_same_output_as_the_vm():
+    with open(PROGRAM, encoding="utf-8") as fh:
+        src = fh.read()
+    for level in (0, 3):
+        vm, py = both(src, level)
+        assert py.error is None
+        assert py.output == vm.output
+
+
+def test_functions_classes_and_nested_locals():
+    vm, py = both("""
+    let base: integer = 10;
+    class A {
+        let x: integer = 5;
+        function constructor(v: integer) { this.x = this.x + v; }
+        function get(): integer { return this.x; }
+        function add(k: integer): integer { return this.get() + k + base; }
+    }
+    class B : A {
+        let y: integer = 2;
+        function get(): integer { return this.x * this.y; }
+    }
+    function outer(n: integer): integer {
+        let acc: integer = 0;
+        function step(k: integer): integer { if (k == 0) { return acc; } acc = acc + k; return step(k - 1); }
+        return step(n);
+    }
+    let b: B = new B(3);
+    print(new A(1).add(1));
+    print(b.add(1));
+    print(outer(10));
+    """, level=2)
+    assert py.output == vm.output == ["17", "27", "55"]
+
+
+def test_loops_and_branches_become_python_control_flow():
+    program = translated("""
+    function f(n: integer): integer {
+        let s: integer = 0;
+        for (let i: integer = 0; i < n; i = i + 1) {
+            if (i % 2 == 0) { s = s + i; } else { s = s - 1; }
+        }
+        return s;
+    }
+    print(f(10));
+    """)
+    source = "\n".join(program.listing())
+    assert "def f1_f(v_n=None):" in source
+    assert "while True:" in source and "if v_i < v_n:" in source
+    assert "_b = " not in source and "_go" not in source  # ni despacho por bloques ni banderas
+
+
+def test_errors_unwind_to_the_enclosing_catch():
+    vm, py = both("""
+    function pick(xs: integer[], i: integer): integer { return xs[i]; }
+    function safe(i: integer): integer {
+        let xs: integer[] = [1, 2];
+        try { return pick(xs, i); } catch (e) { print("safe: " + e); }
+        return -1;
+    }
+    function rec(n: integer): integer { return rec(n + 1); }
+    class P { let x: integer; }
+    function make(k: integer): P { if (k > 0) { return new P(); } }
+    print(safe(5));
+    try { print(rec(0)); } catch (e) { print(e); }
+    try { print(make(0).x + 1); } catch (e) { print(e); }
+    let z: integer = 0;
+    print(1 / z);
+    """)
+    assert py.output == vm.output == [
+        "safe: índice fuera de rango: 5", "-1", "desbordamiento de pila", "no se puede leer 'x' de null"]
+    assert py.error == vm.error == "división entre cero"
+
+
+def test_step_limit_counts_loop_iterations_and_calls():
+    _, py = both("let i: integer = 0; while (true) { i = i + 1; }", max_steps=1000)
+    assert py.error == "se superó el límite de 1000 pasos"
+    _, py = both("function f(n: integer): integer { return f(n + 1); } print(f(0));", max_steps=50)
+    assert py.error == "se superó el límite de 50 pasos"
+
+
+def test_session_and_driver_select_the_engine(tmp_path, capsys):
+    session = compiled("print(1 + 2);")
+    session.execute(engine="python")
+    phase = session.timings_json()["phases"][-1]
+    assert phase["engine"] == "python" and phase["pythonLines"] > 0 and session.vm.output == ["3"]
+
+    path = tmp_path / "p.cps"
+    path.write_text('print("hola"); let xs: integer[] = [1]; print(xs[2]);', encoding="utf-8")
+    assert Driver.main(["Driver.py", str(path), "--run", "--engine", "python"]) == 1
+    assert capsys.readouterr().out.splitlines() == ["hola", "Error en ejecución: índice fuera de rango: 2"]
@@ -0,0 +1,86 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.server.ResultCache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# ---------- tests ----------
+def test_hit_and_miss_counters():
+    cache = ResultCache(max_entries=4)
+    key = ResultCache.key_for("let x = 1;")
+
+    assert cache.get(key) is None
+    cache.put(key, b'{"tac": []}')
+    assert cache.get(key) == b'{"tac": []}'
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hitRate"] == 0.5
+
+def test_same_source_same_key():
+    assert ResultCache.key_for("let x = 1;") == ResultCache.key_for("let x = 1;")
+    assert ResultCache.key_for("let x = 1;") != ResultCache.key_for("let x = 2;")
+
+def test_lru_eviction_by_entries():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")          # "a" pasa a ser el más reciente
+    cache.put("c", b"3")    # expulsa a "b"
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+    assert cache.stats()["evictions"] == 1
+
+def test_eviction_by_bytes():
+    cache = ResultCache(max_entries=10, max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"123")
+
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+    # una respuesta más grande que el tope no se guarda ni vacía el cache
+    assert not cache.put("big", b"x" * 11)
+    assert len(cache) == 2
+
+def test_ttl_expiration():
+    clock = FakeClock()
+    cache = ResultCache(max_entries=4, ttl=5, clock=clock)
+    cache.put("a", b"1")
+
+    clock.now = 4.9
+    assert cache.get("a") == b"1"
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_document_requests_bypass_the_cache():
+    import json
+    from src.server import main
+
+    code = "let a: integer = 1;\nprint(a);\n"
+    main.result_cache.clear()
+    plain = main.analyze(main.AnalyzeReq(code=code))
+    first = main.analyze(main.AnalyzeReq(code=code, docId="cache-test"))
+    second = main.analyze(main.AnalyzeReq(code=code + "print(a);\n", docId="cache-test"))
+    again = main.analyze(main.AnalyzeReq(code=code))
+
+    assert [r.headers["X-Cache"] for r in (plain, first, second, again)] == ["miss", "bypass", "bypass", "hit"]
+    # Cada petición con docId actualiza el documento y trae su `edit`; las otras no
+    assert "edit" in json.loads(first.body) and "edit" not in json.loads(again.body)
+    assert json.loads(second.body)["edit"]["mode"] == "incremental"
+    main.documents.close("cache-test")
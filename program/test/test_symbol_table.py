@@ -2,21 +2,18 @@
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from antlr4 import InputStream, CommonTokenStream, ParseTreeWalker
+from antlr4 import InputStream, ParseTreeWalker
 
 # Ajusta estos imports a tu layout real
-from CompiscriptLexer import CompiscriptLexer
-from CompiscriptParser import CompiscriptParser
 from src.utils.Errors import Error
+from src.parser.TwoStageParser import parse_program
 from src.symbolTable.SymbolTableBuilder import SymbolTableBuilder
 from src.utils.Types import Type, ArrayType
+from src.utils.Scope import VarSymbol, FuncSymbol
 
 def parse_and_build(src: str):
-    input_stream = InputStream(src)
-    lexer = CompiscriptLexer(input_stream)
-    stream = CommonTokenStream(lexer)
-    parser = CompiscriptParser(stream)
-    tree = parser.program()
+    parsed = parse_program(InputStream(src))
+    parser, tree = parsed.parser, parsed.tree
 
     errors = Error()
     stb = SymbolTableBuilder(errors)
@@ -171,4 +168,30 @@ def test_array_type_annotation_1d_and_2d():
     assert isinstance(m, ArrayType)
     assert m.base == Type.FLOAT and m.dimensions == 2
 
-    assert len(errors.errors) == 0
\ No newline at end of file
+    assert len(errors.errors) == 0
+
+def test_class_member_table_follows_changes_to_the_hierarchy():
+    src = """
+        let shared: integer = 1;
+        class A { let x: integer = 1; function f(): integer { return 1; } }
+        class B : A { let y: integer = 2; }
+        class C : B { let z: integer = 3; }
+    """
+    stb, errors, parser, tree = parse_and_build(src)
+    g = stb.globalScope.symbols
+    a, b, c = g["A"], g["B"], g["C"]
+    assert c.resolve_member("x") is a.scope.symbols["x"]
+    assert c.resolve_member("this").ty is c
+    # Lo que no es miembro se sigue buscando en el scope que rodea a las clases
+    assert c.resolve_member("shared") is g["shared"] and c.resolve_member("nada") is None
+    assert c.slot("f") == 0
+
+    # Cambiar una base descarta las tablas ya armadas de sus subclases
+    x = VarSymbol("x", Type.INT)
+    b.scope.define(x)
+    b.methods["g"] = FuncSymbol("g", Type.INT, [])
+    b.invalidate_members()
+    assert c.resolve_member("x") is x and c.slot("g") == 1
+    c.superclass = a
+    assert c.resolve_member("y") is None and c.resolve_member("x") is a.scope.symbols["x"]
+    assert [name for name, _ in c.vtable()] == ["f"]
@@ -0,0 +1,67 @@
+import os, sys, pickle
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+from src.utils.Temp import Temp, TempManager
+from src.optimizer.Tac import is_temp
+
+# ---------- helpers ----------
+def compile_src(src: str):
+    session = CompilerSession(src, error_listeners=[]).run()
+    assert session.errors.errors == []
+    return session
+
+def tac(session):
+    return [(q["op"], q["arg1"], q["arg2"], q["result"]) for q in session.quadruples]
+
+# ---------- tests ----------
+def test_temps_are_not_confused_with_user_variables():
+    tm = TempManager()
+    t = tm.new_temp()
+    assert t == "t1" and t.id == 1 and is_temp(t)
+    assert not is_temp("total") and not is_temp("t1")
+    assert pickle.loads(pickle.dumps(t)) == t and type(pickle.loads(pickle.dumps(t))) is Temp
+
+    code = tac(compile_src("""
+    let total: integer = 1;
+    let t1: integer = total * 2 + total * 3;
+    print(t1);
+    """))
+    # La variable `t1` y el temporal t1 se escriben igual pero no son lo mismo
+    assign = next(q for q in code if q[0] == "=" and q[3] == "t1")
+    assert is_temp(assign[1]) and not is_temp(assign[3])
+    assert not any(is_temp(v) for q in code for v in q if v == "total")
+
+
+def test_temps_are_reused_when_live_ranges_do_not_overlap():
+    session = compile_src("""
+    function f(a: integer, b: integer): integer {
+      return (a + b) * (a - b) + (a * b) * (b - a);
+    }
+    let x: integer = 1 + 2 * 3;
+    let y: integer = (x + 1) * (x + 2);
+    print(f(x, y));
+    """)
+    # (a + b) * (a - b) necesita dos vivos a la vez; el tercero es el otro producto
+    assert session.frame_temps == {"<main>": 2, "func_f": 3}
+    assert session.timings_json()["phases"][3]["temps"] == 3
+    temps = {v for q in session.quadruples for v in (q["arg1"], q["arg2"], q["result"]) if is_temp(v)}
+    assert temps == {"t1", "t2", "t3"}
+
+
+def test_temp_live_across_loop_keeps_its_slot():
+    code = tac(compile_src("""
+    let xs: integer[] = [1, 2, 3];
+    let s: integer = 0;
+    foreach (x in xs) { s = s + x * 2; }
+    print(s);
+    """))
+    # El índice del foreach vive en todo el ciclo: nada más se escribe en su temporal
+    index = next(r for op, a, b, r in code if op == "=" and a == 0 and is_temp(r))
+    start = code.index(("=", 0, None, index))
+    end = next(i for i, q in enumerate(code) if q[0] == "goto")
+    writes = [q for q in code[start + 1:end] if q[3] == index and q[0] not in ("[]=", "print")]
+    assert writes == [("=", writes[0][1], None, index)]
+    assert writes[0][1] != index and is_temp(writes[0][1])
@@ -1,13 +1,11 @@
 import os, sys
-from antlr4 import InputStream, CommonTokenStream, ParseTreeWalker # type: ignore
+from antlr4 import InputStream, ParseTreeWalker # type: ignore
 
 # Asegura que Python vea los módulos en /program
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from CompiscriptLexer import CompiscriptLexer
-from CompiscriptParser import CompiscriptParser
-
 from src.utils.Errors import Error
+from src.parser.TwoStageParser import parse_program
 from src.symbolTable.SymbolTableBuilder import SymbolTableBuilder
 from src.typeChecker.TypeChecker import TypeChecker
 from src.utils.Types import Type, ArrayType
@@ -15,12 +13,8 @@ from src.utils.Types import Type, ArrayType
 
 # ---------- helpers ----------
 def parse_src(src: str):
-    inp = InputStream(src)
-    lex = CompiscriptLexer(inp)
-    ts  = CommonTokenStream(lex)
-    parser = CompiscriptParser(ts)
-    tree = parser.program()
-    return parser, tree
+    parsed = parse_program(InputStream(src))
+    return parsed.parser, parsed.tree
 
 def build_symbols(tree):
     errors = Error()
@@ -857,4 +851,36 @@ def test_dead_code_after_return_is_reported():
     stb, errors = build_symbols(tree)
     tc, errors  = type_check(stb, errors, parser, tree)
 
-    assert errors_contain(errors, "Se detectó código inalcanzable (código muerto)")
\ No newline at end of file
+    assert errors_contain(errors, "Se detectó código inalcanzable (código muerto)")
+
+def test_array_types_are_interned():
+    import pickle
+    a = ArrayType(Type.INT, 2)
+    assert a is ArrayType(Type.INT, 2)
+    assert a.element() is ArrayType(Type.INT, 1)
+    assert ArrayType(Type.INT, 1).element() is Type.INT
+    assert ArrayType(Type.NULL, 1, True) is not ArrayType(Type.NULL, 1)
+    assert pickle.loads(pickle.dumps(a)) is a
+    assert len({a, ArrayType(Type.INT, 2), ArrayType(Type.FLOAT, 2)}) == 2
+
+def test_assignability_uses_interned_types():
+    from src.utils.Types import can_assign
+    assert can_assign(ArrayType(Type.FLOAT, 1), ArrayType(Type.INT, 1))
+    assert not can_assign(ArrayType(Type.INT, 1), ArrayType(Type.FLOAT, 1))
+    assert not can_assign(ArrayType(Type.INT, 2), ArrayType(Type.INT, 1))
+    assert can_assign(ArrayType(Type.STRING, 1), ArrayType(Type.NULL, 1, True))
+
+def test_array_of_class_ternary_and_index_types():
+    src = """
+    class Animal { let name: string; }
+    class Dog : Animal { }
+    let zoo: Animal[][] = [[new Animal()]];
+    let first: Animal[] = true ? zoo[0] : zoo[0];
+    let pet: Animal = new Dog();
+    pet = first[0];
+    """
+    parser, tree = parse_src(src)
+    stb, errors = build_symbols(tree)
+    tc, errors  = type_check(stb, errors, parser, tree)
+
+    assert errors.errors == []
@@ -0,0 +1,166 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+from src.vm.VirtualMachine import VirtualMachine
+import Driver
+
+PROGRAM = os.path.join(os.path.dirname(__file__), "..", "program.cps")
+
+# ---------- helpers ----------
+def execute(src: str, level: int = 0, **kwargs):
+    session = CompilerSession(src, error_listeners=[], opt_level=level).run()
+    assert session.errors.errors == []
+    return session.execute(**kwargs)
+
+def output(src: str, level: int = 0):
+    vm = execute(src, level)
+    assert vm.error is None
+    return vm.output
+
+# ---------- tests ----------
+def test_program_runs_the_whole_language():
+    with open(PROGRAM, encoding="utf-8") as fh:
+        vm = execute(fh.read())
+
+    assert vm.error is None
+    assert vm.output[:3] == ["5 + 1 = 6", "Greater than 5", "Result is now 10"]
+    # continue salta el 3, break corta después del 5; el switch sin break cae a los demás casos
+    assert [l for l in vm.output if l.startswith("Number")] == ["Number: 1", "Number: 2", "Number: 4", "Number: 5"]
+    i = vm.output.index("It's seven")
+    assert vm.output[i:i + 3] == ["It's seven", "It's six", "Something else"]
+    assert "Caught an error: índice fuera de rango: 10" in vm.output
+    assert vm.output[-4:] == ["Rex barks.", "First number: 1", "Multiples of 2: 2, 4", "Program finished."]
+
+
+def test_same_output_at_every_level():
+    src = """
+    let data: integer[] = [4, 8, 15, 16, 23, 42];
+    function sum(xs: integer[]): integer {
+        let total: integer = 0;
+        foreach (x in xs) { total = total + x; }
+        return total;
+    }
+    function fib(n: integer): integer {
+        if (n < 2) { return n; }
+        return fib(n - 1) + fib(n - 2);
+    }
+    let k: integer = 0;
+    for (let i: integer = 0; i < 6; i = i + 1) {
+        if (i % 2 == 0) { continue; }
+        k = k + data[i] * 3 + i * 4;
+    }
+    print(sum(data) + ", " + fib(10) + ", " + k + ", " + (7 / 2));
+    """
+    outputs = [output(src, level) for level in (0, 1, 2, 3)]
+    assert outputs[0] == ["108, 55, 234, 3.5"]
+    assert all(o == outputs[0] for o in outputs)
+
+
+def test_nested_functions_share_the_enclosing_locals():
+    assert output("""
+    let count: integer = 100;
+    function outer(a: integer): integer {
+        let acc: integer = 0;
+        let count: integer = 1;
+        function add(b: integer): integer { acc = acc + b; count = count + 1; return acc; }
+        add(a); add(a);
+        return acc * 10 + count;
+    }
+    print(outer(4));
+    print(count);
+    """) == ["83", "100"]
+
+
+def test_fields_constructor_and_inheritance():
+    assert output("""
+    let base: integer = 10;
+    class A {
+        let x: integer = 5;
+        let tag: string;
+        function constructor(v: integer) { this.x = this.x + v; }
+        function get(): integer { return this.x; }
+        function add(k: integer): integer { return this.get() + k + base; }
+    }
+    class B : A {
+        let y: integer = 2;
+        function get(): integer { return this.x * this.y; }
+    }
+    let a: A = new A(1);
+    let b: B = new B(3);
+    print(a.add(1));
+    print(b.add(1));
+    print(b.tag);
+    """) == ["17", "27", "null"]
+
+
+def test_error_unwinds_calls_to_the_enclosing_catch():
+    vm = execute("""
+    function pick(xs: integer[], i: integer): integer { return xs[i]; }
+    function safe(i: integer): integer {
+        let xs: integer[] = [1, 2];
+        try { return pick(xs, i); } catch (e) { print("safe: " + e); }
+        return -1;
+    }
+    print(safe(1));
+    print(safe(5));
+    let z: integer = 0;
+    print(1 / z);
+    print("no llega");
+    """)
+    assert vm.output == ["2", "safe: índice fuera de rango: 5", "-1"]
+    assert vm.error == "división entre cero"
+
+
+def test_integers_wrap_at_32_bits():
+    assert output("let x: integer = 2147483647; print(x + 1); print(-7 % 3);") == ["-2147483648", "-1"]
+
+
+def test_step_limit_stops_infinite_loops():
+    vm = execute("let i: integer = 0; while (true) { i = i + 1; }", max_steps=1000)
+    assert vm.error == "se superó el límite de 1000 pasos"
+    assert vm.steps == 1001
+
+
+def test_continue_in_for_and_foreach_still_advances():
+    # continue tiene que pasar por el incremento; si saltara directo a la
+    # condición, el foreach no avanzaría nunca y el for repetiría el mismo i
+    vm = execute("""
+    let xs: integer[] = [1, 2, 3, 4];
+    foreach (x in xs) {
+        if (x % 2 == 0) { continue; }
+        print("foreach " + x);
+    }
+    for (let i: integer = 0; i < 4; i = i + 1) {
+        if (i < 2) { continue; }
+        print("for " + i);
+    }
+    """, max_steps=10000)
+    assert vm.error is None
+    assert vm.output == ["foreach 1", "foreach 3", "for 2", "for 3"]
+
+
+def test_without_symbols_locals_are_guessed():
+    session = CompilerSession("""
+    let n: integer = 1;
+    function f(x: integer): integer { let y: integer = x * 2; n = n + y; return y; }
+    print(f(3) + n);
+    """, error_listeners=[]).run()
+    assert VirtualMachine(session.quadruples).run().output == ["13"]
+
+
+def test_session_records_run_phase():
+    session = CompilerSession("print(1 + 2);", error_listeners=[]).run()
+    assert execute("print(1 + 2);", level=1).steps == 1  # -O1 ya pliega la suma
+    session.execute()
+    phase = session.timings_json()["phases"][-1]
+    assert phase["phase"] == "run" and phase["steps"] == session.vm.steps == 2 and phase["lines"] == 1
+
+
+def test_driver_run_prints_program_output(tmp_path, capsys):
+    path = tmp_path / "p.cps"
+    path.write_text('print("hola"); let xs: integer[] = [1]; print(xs[2]);', encoding="utf-8")
+    assert Driver.main(["Driver.py", str(path), "--run", "-O2"]) == 1
+    assert capsys.readouterr().out.splitlines() == ["hola", "Error en ejecución: índice fuera de rango: 2"]
@@ -0,0 +1,105 @@
+import os, sys
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.CompilerSession import CompilerSession
+from src.incremental.IncrementalParser import IncrementalDocument
+from src.incremental.IncrementalAnalysis import IncrementalAnalyzer
+from src.vm.Layout import ProgramLayout
+
+SHAPES = """
+class Shape {
+    let side: integer = 2;
+    function area(): integer { return 0; }
+    function twice(): integer { return this.area() * 2; }
+}
+class Square : Shape { function area(): integer { return this.side * this.side; } function name(): string { return "sq"; } }
+class Cube : Square { function area(): integer { return this.side * 6; } }
+function make(k: integer): Shape { if (k == 0) { return new Shape(); } if (k == 1) { return new Square(); } return new Cube(); }
+"""
+
+# ---------- helpers ----------
+def compiled(src: str, level: int = 0):
+    session = CompilerSession(src, error_listeners=[], opt_level=level).run()
+    assert session.errors.errors == []
+    return session
+
+def ops(session, op):
+    return [row for row in session.quadruples.rows() if row[1] == op]
+
+# ---------- tests ----------
+def test_overrides_keep_the_slot_of_the_base_and_new_methods_go_last():
+    session = compiled(SHAPES)
+    g = session.symbols.globalScope
+    shape, square, cube = g.symbols["Shape"], g.symbols["Square"], g.symbols["Cube"]
+    assert [name for name, _ in shape.vtable()] == ["area", "twice"]
+    assert [name for name, _ in cube.vtable()] == ["area", "twice", "name"]
+    assert cube.vtable()[0][1] is cube.methods["area"] and cube.vtable()[1][1] is shape.methods["twice"]
+    assert (square.slot("name"), cube.slot("area"), shape.slot("name")) == (2, 0, None)
+
+    # La misma tabla sale del TAC solo, con etiquetas
+    layout = ProgramLayout(session.quadruples)
+    assert layout.vtable("Cube") == ["func_Cube_area", "func_Shape_twice", "func_Square_name"]
+
+
+def test_typed_method_calls_become_callvirt_with_the_receiver_first():
+    session = compiled(SHAPES + """
+    let s: Shape = make(2);
+    let sq: Square = new Square();
+    print(s.twice() + sq.area());
+    print(sq.name());
+    """)
+    assert [(row[2], row[3]) for row in ops(session, "callvirt")] == [(0, 1), (1, 1), (0, 1), (2, 1)]
+    rows = list(session.quadruples.rows())
+    first = rows.index(ops(session, "callvirt")[1])
+    assert rows[first - 1][1:3] == ("param", "s")
+    # Sin los tipos del TypeChecker los métodos se buscan por nombre
+    assert not any(row[1] == "getprop" and row[3] in ("area", "twice", "name") for row in rows)
+
+
+def test_every_engine_dispatches_through_the_vtable():
+    src = SHAPES + """
+    let total: integer = 0;
+    for (let k: integer = 0; k < 3; k = k + 1) {
+        let s: Shape = make(k);
+        print(s.twice());
+        total = total + s.area();
+    }
+    let picked: Shape = new Square();
+    function swap(): integer { picked = new Cube(); return 0; }
+    print(picked.area() + swap());
+    print(picked.twice() + total);
+    function none(): Shape { if (total < 0) { return new Shape(); } }
+    let empty: Shape = none();
+    try { print(empty.area()); } catch (e) { print(e); }
+    """
+    expected = ["0", "8", "24", "4", "40", "no se puede llamar un método de null"]
+    for level in (0, 3):
+        session = compiled(src, level)
+        assert ops(session, "callvirt")
+        for engine in ("tac", "bytecode", "python"):
+            session.execute(engine=engine)
+            assert (session.vm.output, session.vm.error) == (expected, None), engine
+
+
+def test_incremental_analysis_regenerates_calls_when_slots_change():
+    src = """
+    class A { function f(): integer { return 1; } }
+    class B : A { function g(): integer { return 2; } }
+    let b: B = new B();
+    print(b.g());
+    """
+    doc = IncrementalDocument(src, [])
+    analyzer = IncrementalAnalyzer()
+    CompilerSession(doc.text, error_listeners=[], parsed=doc.parse_result(), analyzer=analyzer).run()
+
+    for old, new in (("return 1; }", "return 1; } function h(): integer { return 3; }"),
+                     ("class B : A", "class B : C"), ("class B : C", "class B : A")):
+        doc.update(doc.text.replace(old, new, 1))
+        session = CompilerSession(doc.text, error_listeners=[], parsed=doc.parse_result(), analyzer=analyzer).run()
+        full = CompilerSession(doc.text, error_listeners=[]).run()
+        assert session.quadruples == full.quadruples
+    # g quedó en el slot 2, después de f y h
+    assert [row[2] for row in ops(session, "callvirt")] == [2]
+    assert session.execute().output == ["2"]
@@ -0,0 +1,132 @@
+import os, sys, threading, time
+import pytest
+
+# Asegura que Python vea los módulos en /program
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.server.WorkerPool import WorkerPool, PoolSaturated, AnalysisTimeout, WorkerError
+
+
+# ---------- tests ----------
+def test_submit_runs_handler_in_worker():
+    pool = WorkerPool(1, abs, timeout=10).start()
+    try:
+        assert pool.submit(-3) == 3
+        assert pool.stats()["completed"] == 1
+    finally:
+        pool.shutdown()
+
+def test_handler_error_is_reported():
+    pool = WorkerPool(1, abs, timeout=10).start()
+    try:
+        with pytest.raises(WorkerError, match="TypeError"):
+            pool.submit("no es un número")
+        # el worker sigue sano después de un error del handler
+        assert pool.submit(-1) == 1
+    finally:
+        pool.shutdown()
+
+def test_handler_error_becomes_a_json_500(monkeypatch):
+    import json
+    from src.server import main
+
+    pool = WorkerPool(1, abs, timeout=10).start()
+    monkeypatch.setattr(main, "pool", pool)
+    main.result_cache.clear()
+    try:
+        # abs() no acepta el código: el worker levanta TypeError
+        for response in (main.analyze(main.AnalyzeReq(code="print(1);")),
+                         main.run(main.RunReq(code="print(1);"))):
+            assert response.status_code == 500
+            assert "TypeError" in json.loads(response.body)["detail"]
+    finally:
+        pool.shutdown()
+
+def test_timeout_kills_and_replaces_worker():
+    pool = WorkerPool(1, time.sleep, timeout=0.5).start()
+    try:
+        with pytest.raises(AnalysisTimeout):
+            pool.submit(30)
+        assert pool.stats()["restarts"] == 1
+
+        # el reemplazo arranca en segundo plano; la siguiente petición lo espera
+        pool.timeout = 10
+        assert pool.submit(0) is None
+    finally:
+        pool.shutdown()
+
+def test_saturation_rejects_with_backpressure():
+    pool = WorkerPool(1, time.sleep, timeout=10, max_queue=0).start()
+    try:
+        busy = threading.Thread(target=pool.submit, args=(0.5,))
+        busy.start()
+        time.sleep(0.1)
+        with pytest.raises(PoolSaturated):
+            pool.submit(0)
+        busy.join()
+        assert pool.stats()["rejected"] == 1
+        assert pool.submit(0) is None
+    finally:
+        pool.shutdown()
+
+def test_affinity_waits_for_its_worker_within_the_timeout():
+    pool = WorkerPool(2, time.sleep, timeout=0.5).start()
+    try:
+        busy = threading.Thread(target=pool.submit, args=(0.3,), kwargs={"affinity": "doc"})
+        busy.start()
+        time.sleep(0.1)
+        # hay otro worker libre, pero "doc" espera al suyo (y lo consigue a tiempo)
+        assert pool.submit(0, affinity="doc") is None
+        busy.join()
+
+        # si el suyo sigue ocupado al vencer el plazo, es un timeout como cualquier otro
+        pool.timeout = 2
+        busy = threading.Thread(target=pool.submit, args=(1.5,), kwargs={"affinity": "doc"})
+        busy.start()
+        time.sleep(0.1)
+        pool.timeout = 0.3
+        with pytest.raises(AnalysisTimeout):
+            pool.submit(0, affinity="doc")
+        busy.join()
+    finally:
+        pool.shutdown()
+
+def test_documents_stick_to_a_worker(monkeypatch):
+    import json
+    from src.server import main
+    from src.server.Analysis import handle_job
+
+    pool = WorkerPool(2, handle_job, timeout=30).start()
+    monkeypatch.setattr(main, "pool", pool)
+    try:
+        def analyze(code):
+            return json.loads(main.analyze(main.AnalyzeReq(code=code, docId="tab-1")).body)
+
+        assert analyze("let a: integer = 1;\nprint(a);")["edit"]["mode"] == "full"
+        # otro documento pasa entretanto (sin afinidad, la rotación de los
+        # workers libres mandaría la siguiente edición al que no tiene tab-1)
+        main.analyze(main.AnalyzeReq(code="print(2);", docId="tab-2"))
+        main.analyze(main.AnalyzeReq(code="print(3);", docId="tab-2"))
+        assert analyze("let a: integer = 2;\nprint(a);")["edit"]["mode"] == "incremental"
+
+        stats = main.document_stats()
+        assert stats["documents"] == 2 and stats["incremental"] == 2
+        assert main.close_document("tab-1") == {"closed": True}
+        assert main.document_stats()["documents"] == 1
+    finally:
+        pool.shutdown()
+
+def test_document_requests_get_backpressure(monkeypatch):
+    from src.server import main
+
+    pool = WorkerPool(1, time.sleep, timeout=10, max_queue=0).start()
+    monkeypatch.setattr(main, "pool", pool)
+    try:
+        busy = threading.Thread(target=pool.submit, args=(0.5,))
+        busy.start()
+        time.sleep(0.1)
+        response = main.analyze(main.AnalyzeReq(code="print(1);", docId="tab-1"))
+        assert response.status_code == 503
+        busy.join()
+    finally:
+        pool.shutdown()